@@ -1,17 +1,52 @@
 import pandas as pd
-import matplotlib.pyplot as plt
 from sklearn.cluster import KMeans
 import os
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 import json
 from datetime import datetime
+from agents.reporting.charts import ChartRenderer, ChartSpec
 
-def analyze_competition(raw_data: pd.DataFrame) -> Dict[str, Any]:
+def build_chart_specs(raw_data: pd.DataFrame, price_comparison: pd.DataFrame) -> Dict[str, ChartSpec]:
+    """
+    Describes the analysis charts as data.
+    
+    Args:
+        raw_data: DataFrame containing product data
+        price_comparison: Category x competitor price aggregates
+        
+    Returns:
+        Mapping of chart name to ChartSpec
+    """
+    means = price_comparison['mean'].fillna(0)
+    return {
+        "price_comparison": ChartSpec(
+            kind="bar",
+            title="Average Price Comparison by Category",
+            labels=[str(c) for c in means.index],
+            series={str(c): means[c].round(2).tolist() for c in means.columns},
+            size=[12, 6]
+        ),
+        "price_distribution": ChartSpec(
+            kind="hist",
+            title="Price Distribution by Competitor",
+            series={str(c): raw_data.loc[raw_data['competitor'] == c, 'price'].round(2).tolist()
+                    for c in raw_data['competitor'].unique()},
+            xlabel="Price",
+            ylabel="Count"
+        )
+    }
+
+def analyze_competition(raw_data: pd.DataFrame,
+                        render_charts: bool = True,
+                        renderer: Optional[ChartRenderer] = None) -> Dict[str, Any]:
     """
     Performs competitive analysis on scraped product data.
     
     Args:
         raw_data: DataFrame containing product data
+        render_charts: Draw the charts now; pass False when a reporting
+            pipeline renders the "charts" specs of many analyses together
+        renderer: Chart renderer to use (default: cache in analysis/charts)
         
     Returns:
         Dictionary containing various analysis results
@@ -43,28 +78,9 @@ def analyze_competition(raw_data: pd.DataFrame) -> Dict[str, Any]:
     kmeans = KMeans(n_clusters=3, n_init='auto')
     raw_data['price_cluster'] = kmeans.fit_predict(price_data)
     
-    # Save visualizations
-    os.makedirs('analysis', exist_ok=True)
-    
-    # Price comparison plot
-    plt.figure(figsize=(12, 6))
-    price_comparison['mean'].plot(kind='bar', title='Average Price Comparison by Category')
-    plt.tight_layout()
-    plt.savefig('analysis/price_comparison.png')
-    plt.close()
-    
-    # Price distribution plot
-    plt.figure(figsize=(10, 6))
-    for competitor in raw_data['competitor'].unique():
-        competitor_data = raw_data[raw_data['competitor'] == competitor]
-        plt.hist(competitor_data['price'], alpha=0.5, label=competitor, bins=30)
-    plt.title('Price Distribution by Competitor')
-    plt.xlabel('Price')
-    plt.ylabel('Count')
-    plt.legend()
-    plt.tight_layout()
-    plt.savefig('analysis/price_distribution.png')
-    plt.close()
+    # Charts are described here and drawn by the reporting renderer, which
+    # caches unchanged images and renders many charts in parallel
+    charts = build_chart_specs(raw_data, price_comparison)
     
     # Prepare analysis results
     analysis.update({
@@ -77,12 +93,19 @@ def analyze_competition(raw_data: pd.DataFrame) -> Dict[str, Any]:
             "centers": kmeans.cluster_centers_.tolist(),
             "distribution": raw_data.groupby(['competitor', 'price_cluster']).size().to_dict()
         },
-        "plots": {
-            "price_comparison": "analysis/price_comparison.png",
-            "price_distribution": "analysis/price_distribution.png"
-        }
+        "charts": {name: spec.to_dict() for name, spec in charts.items()}
     })
     
+    if render_charts:
+        own_renderer = renderer is None
+        renderer = renderer or ChartRenderer(cache_dir="analysis/charts")
+        analysis["plots"] = renderer.render_all(charts)
+        if own_renderer:
+            # Only the latest charts are kept; unchanged ones are still reused next run
+            renderer.prune(list(analysis["plots"].values()))
+        # The dashboard reads analysis/price_comparison.png and price_distribution.png
+        renderer.publish(analysis["plots"], "analysis")
+    
     # Save analysis to JSON
     os.makedirs('analysis', exist_ok=True)
     with open('analysis/latest_analysis.json', 'w') as f:
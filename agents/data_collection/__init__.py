@@ -3,7 +3,20 @@ ZK MarketWatch - Data Collection Module
 Handles automated collection of competitor pricing data.
 """
 
-from .collector import collect_data, save_data
-from .scheduler import SmartScheduler
+import importlib
+
+# Exports are resolved on first use, so importing a helper submodule such as
+# browser or price_patterns does not pull in the collectors, APScheduler or
+# Playwright
+_EXPORTS = {
+    'collect_data': '.collector',
+    'save_data': '.collector',
+    'SmartScheduler': '.scheduler',
+}
 
 __all__ = ['collect_data', 'save_data', 'SmartScheduler']
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,304 @@
+"""
+Browser helpers shared by the Playwright and Selenium collectors.
+Replaces fixed sleeps with event-driven waits on the product grid and
+keeps browser fetches lightweight by blocking non-essential requests.
+"""
+
+import re
+import time
+import logging
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Callable, Dict, FrozenSet, List, Optional, Sequence
+from urllib.parse import urlparse
+
+from .rate_limiter import RateLimiter, get_rate_limiter
+
+if TYPE_CHECKING:
+    # Playwright is imported lazily so Selenium-only callers do not need it
+    from playwright.sync_api import Browser, BrowserContext, Page, Route
+
+# Chromium network errors raised when the proxy, not the site, failed
+PROXY_ERROR_RE = re.compile(r"ERR_PROXY_|ERR_TUNNEL_CONNECTION_FAILED|ERR_SOCKS_CONNECTION_FAILED")
+
+SCROLL_TO_BOTTOM_JS = "window.scrollTo(0, document.body.scrollHeight);"
+
+# Resource types that never carry product data
+DEFAULT_BLOCKED_RESOURCE_TYPES = frozenset({"image", "media", "font", "manifest"})
+
+# Analytics, ad and session-replay hosts common on Bangladeshi retail sites
+DEFAULT_BLOCKED_DOMAINS = frozenset({
+    "google-analytics.com",
+    "googletagmanager.com",
+    "googleadservices.com",
+    "doubleclick.net",
+    "facebook.net",
+    "connect.facebook.net",
+    "hotjar.com",
+    "clarity.ms",
+    "criteo.com",
+    "analytics.tiktok.com",
+})
+
+@dataclass
+class SiteProfile:
+    """Per-site browser settings for lightweight page fetches."""
+    name: str
+    blocked_resource_types: FrozenSet[str] = DEFAULT_BLOCKED_RESOURCE_TYPES
+    blocked_domains: FrozenSet[str] = DEFAULT_BLOCKED_DOMAINS
+    javascript_enabled: bool = True
+    # Extraction strategy -> number of times it produced products for this site
+    strategy_hits: Dict[str, int] = field(default_factory=dict)
+
+    def record_strategy(self, strategy: str) -> None:
+        """Record that an extraction strategy produced products for this site."""
+        self.strategy_hits[strategy] = self.strategy_hits.get(strategy, 0) + 1
+
+    def preferred_strategies(self, strategies: Sequence[str]) -> List[str]:
+        """
+        Order extraction strategies so the ones that worked before run first.
+
+        Args:
+            strategies: Strategy names in default order
+
+        Returns:
+            Strategies sorted by past successes, default order breaking ties
+        """
+        return sorted(strategies, key=lambda s: -self.strategy_hits.get(s, 0))
+
+    def should_block(self, resource_type: str, url: str) -> bool:
+        """
+        Decide whether a request can be aborted without losing product data.
+
+        Args:
+            resource_type: Playwright request resource type (e.g., 'image', 'xhr')
+            url: Request URL
+
+        Returns:
+            True if the request should be aborted
+        """
+        if resource_type in self.blocked_resource_types:
+            return True
+
+        host = (urlparse(url).hostname or "").lower()
+        return any(host == domain or host.endswith(f".{domain}") for domain in self.blocked_domains)
+
+SITE_PROFILES: Dict[str, SiteProfile] = {
+    "default": SiteProfile(name="default"),
+    "shwapno": SiteProfile(name="shwapno"),
+    "agora": SiteProfile(name="agora"),
+    "chaldal": SiteProfile(name="chaldal"),
+    "daraz": SiteProfile(
+        name="daraz",
+        # Daraz ships its own Alibaba tracking beacons
+        blocked_domains=DEFAULT_BLOCKED_DOMAINS | {"mmstat.com", "arms-retcode.aliyuncs.com"}
+    ),
+}
+
+def get_site_profile(site_name: str) -> SiteProfile:
+    """Get the browser profile for a site, falling back to the default profile."""
+    return SITE_PROFILES.get(site_name.lower(), SITE_PROFILES["default"])
+
+def apply_resource_blocking(target, profile: SiteProfile) -> None:
+    """
+    Abort non-essential requests on a Playwright context or page.
+
+    Args:
+        target: BrowserContext or Page to intercept requests on
+        profile: Site profile describing what to block
+    """
+    def handle_route(route: "Route") -> None:
+        request = route.request
+        if profile.should_block(request.resource_type, request.url):
+            route.abort()
+        else:
+            route.continue_()
+
+    target.route("**/*", handle_route)
+
+def new_light_context(browser: "Browser", profile: SiteProfile, **context_kwargs) -> "BrowserContext":
+    """
+    Create a browser context with the site profile's lightweight settings.
+
+    Args:
+        browser: Launched Playwright browser
+        profile: Site profile to apply
+        **context_kwargs: Passed through to browser.new_context
+
+    Returns:
+        Context with JavaScript setting and request blocking applied
+    """
+    context = browser.new_context(java_script_enabled=profile.javascript_enabled, **context_kwargs)
+    apply_resource_blocking(context, profile)
+    return context
+
+def load_until_stable(count_items: Callable[[], int],
+                      scroll: Callable[[], None],
+                      settle_time: float = 1.0,
+                      poll_interval: float = 0.25,
+                      max_scrolls: int = 20,
+                      timeout: float = 30.0,
+                      sleep: Callable[[float], None] = time.sleep,
+                      clock: Callable[[], float] = time.monotonic) -> int:
+    """
+    Scroll a listing page until the number of loaded items stops growing.
+
+    After each scroll the item count is polled until it grows or
+    `settle_time` passes without change, so a page that is already complete
+    costs a single settle window instead of a fixed sleep per scroll.
+
+    Args:
+        count_items: Returns the number of product elements currently loaded
+        scroll: Triggers the next lazy-load batch (usually scroll to bottom)
+        settle_time: Seconds without new items before the page is considered stable
+        poll_interval: Seconds between item count checks
+        max_scrolls: Upper bound on scroll attempts
+        timeout: Overall upper bound in seconds
+        sleep: Sleep function (browser-aware waits can be injected here)
+        clock: Monotonic clock function
+
+    Returns:
+        Final number of loaded items
+    """
+    deadline = clock() + timeout
+    count = count_items()
+
+    for _ in range(max_scrolls):
+        if clock() >= deadline:
+            logging.warning(f"Page did not stabilise within {timeout}s ({count} items loaded)")
+            break
+
+        scroll()
+        new_count = _wait_for_growth(count_items, count, settle_time,
+                                     poll_interval, deadline, sleep, clock)
+        if new_count <= count:
+            break
+        count = new_count
+
+    return count
+
+def _wait_for_growth(count_items: Callable[[], int],
+                     baseline: int,
+                     settle_time: float,
+                     poll_interval: float,
+                     deadline: float,
+                     sleep: Callable[[float], None],
+                     clock: Callable[[], float]) -> int:
+    """Poll the item count until it exceeds baseline or the settle window ends."""
+    settle_deadline = min(clock() + settle_time, deadline)
+    count = count_items()
+
+    while count <= baseline and clock() < settle_deadline:
+        sleep(poll_interval)
+        count = count_items()
+
+    return count
+
+def polite_goto(page: "Page", url: str, limiter: Optional[RateLimiter] = None, **goto_kwargs):
+    """
+    Navigate to a URL through the shared per-host rate limiter.
+
+    Waits for the host's next request slot, then feeds the response status,
+    latency and Retry-After header back so the host's rate adapts. Failures
+    at the proxy leave the host's rate alone.
+
+    Args:
+        page: Playwright page
+        url: URL to open
+        limiter: Rate limiter to use (defaults to the process-wide one)
+        **goto_kwargs: Passed through to page.goto
+
+    Returns:
+        Playwright response, or None
+
+    Raises:
+        RobotsDisallowed: If robots.txt disallows the URL
+    """
+    limiter = limiter or get_rate_limiter()
+    limiter.acquire(url)
+
+    start = time.monotonic()
+    try:
+        response = page.goto(url, **goto_kwargs)
+    except Exception as e:
+        limiter.record_response(url, None, time.monotonic() - start,
+                                proxy_error=PROXY_ERROR_RE.search(str(e)) is not None)
+        raise
+
+    limiter.record_response(
+        url,
+        response.status if response else None,
+        time.monotonic() - start,
+        response.headers.get("retry-after") if response else None
+    )
+    return response
+
+def wait_for_products(page: "Page",
+                      item_selector: str,
+                      timeout: int = 15000,
+                      network_idle_timeout: int = 5000,
+                      **stable_kwargs) -> int:
+    """
+    Wait for a Playwright page's product grid to finish loading.
+
+    Waits for the first product element, gives the network a bounded chance
+    to go idle, then scrolls only while new products keep appearing.
+
+    Args:
+        page: Playwright page already navigated to the listing
+        item_selector: CSS selector matching one product element
+        timeout: Milliseconds to wait for the first product element
+        network_idle_timeout: Milliseconds to wait for network idle
+        **stable_kwargs: Passed through to load_until_stable
+
+    Returns:
+        Number of product elements loaded
+    """
+    from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+
+    page.wait_for_selector(item_selector, state="attached", timeout=timeout)
+
+    try:
+        page.wait_for_load_state("networkidle", timeout=network_idle_timeout)
+    except PlaywrightTimeoutError:
+        # Long-polling trackers keep some pages busy forever; the grid is already attached
+        logging.debug(f"Network did not go idle within {network_idle_timeout}ms, continuing")
+
+    return load_until_stable(
+        count_items=lambda: page.locator(item_selector).count(),
+        scroll=lambda: page.evaluate(SCROLL_TO_BOTTOM_JS),
+        sleep=lambda seconds: page.wait_for_timeout(seconds * 1000),
+        **stable_kwargs
+    )
+
+def wait_for_elements(driver, item_selector: str, timeout: float = 15, **stable_kwargs) -> int:
+    """
+    Selenium counterpart of wait_for_products.
+
+    Args:
+        driver: Selenium WebDriver already navigated to the listing
+        item_selector: CSS selector matching one product element
+        timeout: Seconds to wait for the document and first product element
+        **stable_kwargs: Passed through to load_until_stable
+
+    Returns:
+        Number of product elements loaded, 0 if none appeared in time
+    """
+    from selenium.common.exceptions import TimeoutException
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    def count_items() -> int:
+        return len(driver.find_elements("css selector", item_selector))
+
+    try:
+        WebDriverWait(driver, timeout).until(
+            lambda d: d.execute_script("return document.readyState") == "complete" and count_items() > 0
+        )
+    except TimeoutException:
+        logging.warning(f"No elements matching '{item_selector}' after {timeout}s")
+        return 0
+
+    return load_until_stable(
+        count_items=count_items,
+        scroll=lambda: driver.execute_script(SCROLL_TO_BOTTOM_JS),
+        **stable_kwargs
+    )
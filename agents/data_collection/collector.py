@@ -11,23 +11,35 @@ from datetime import datetime
 from typing import List, Dict, Any, Optional
 from .competitors import COMPETITOR_MAP
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='[%(asctime)s] %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("agents/data_collection/logs/collection.log"),
-        logging.StreamHandler()
-    ]
-)
+LOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs")
 
-def collect_data(competitor: str, category: str) -> List[Dict[str, Any]]:
+def configure_logging(log_dir: str = LOG_DIR):
+    """
+    Send log output to the console and to collection.log.
+
+    Only called by the command line entry point, so importing this module
+    does not create directories or change the host's logging setup.
+    """
+    os.makedirs(log_dir, exist_ok=True)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='[%(asctime)s] %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(os.path.join(log_dir, "collection.log")),
+            logging.StreamHandler()
+        ]
+    )
+
+def collect_data(competitor: str, category: str, raise_errors: bool = False) -> List[Dict[str, Any]]:
     """
     Dispatch to competitor-specific collector and handle errors.
     
     Args:
         competitor: Name of the competitor (e.g., 'shwapno', 'agora')
         category: Product category to scrape
+        raise_errors: Re-raise collection errors instead of returning an
+            empty list, so queue workers can tell a failed scrape from an
+            empty category
         
     Returns:
         List of product dictionaries with standardized fields
@@ -49,6 +61,8 @@ def collect_data(competitor: str, category: str) -> List[Dict[str, Any]]:
         
     except Exception as e:
         logging.error(f"Collection failed: {competitor}/{category} - {str(e)}")
+        if raise_errors:
+            raise
         return []
 
 def save_data(data: List[Dict[str, Any]], 
@@ -108,6 +122,7 @@ if __name__ == "__main__":
     parser.add_argument("--category", required=True, help="Product category to scrape")
     parser.add_argument("--output", default="data/raw", help="Output directory for data files")
     args = parser.parse_args()
+    configure_logging()
     
     logging.info(f"Starting collection: {args.competitor}/{args.category}")
     start_time = time.time()
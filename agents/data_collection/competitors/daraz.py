@@ -3,14 +3,19 @@ Daraz-specific scraping implementation.
 """
 
 from playwright.sync_api import sync_playwright
-from bs4 import BeautifulSoup
 from urllib.parse import urljoin
 import re
 import logging
-import json
 from typing import List, Dict, Any
 
+from ..browser import get_site_profile, new_light_context, polite_goto, wait_for_products
+from ..parsing import class_marker, make_soup, tag_marker
+from ..structured_data import extract_listing_products
+
 BASE_URL = "https://www.daraz.com.bd"
+# Product cards and the end of the grid, shared by the parser and the card count
+GRID_START = class_marker("product-card")
+GRID_END = tag_marker("footer")
 
 def scrape_category(category: str) -> List[Dict[str, Any]]:
     """
@@ -21,10 +26,16 @@ def scrape_category(category: str) -> List[Dict[str, Any]]:
         
     Returns:
         List of product dictionaries with standardized fields
+
+    Raises:
+        Exception: Browser and navigation errors, logged and re-raised so
+            collect_data decides whether a failed scrape is fatal
     """
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=True)
-        context = browser.new_context(
+        context = new_light_context(
+            browser,
+            get_site_profile("daraz"),
             user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
             viewport={"width": 1920, "height": 1080}
         )
@@ -34,80 +45,25 @@ def scrape_category(category: str) -> List[Dict[str, Any]]:
             url = urljoin(BASE_URL, f"products/{category}")
             logging.info(f"Scraping Daraz URL: {url}")
             
-            page.goto(url, timeout=60000)
-            page.wait_for_selector(".product-card", state="attached", timeout=15000)
-            
-            # Handle lazy loading by scrolling
-            page.evaluate("""async () => {
-                await new Promise(resolve => {
-                    let totalHeight = 0;
-                    const distance = 100;
-                    const timer = setInterval(() => {
-                        const scrollHeight = document.body.scrollHeight;
-                        window.scrollBy(0, distance);
-                        totalHeight += distance;
-                        if(totalHeight >= scrollHeight){
-                            clearInterval(timer);
-                            resolve();
-                        }
-                    }, 100);
-                });
-            }""")
-            
-            # Wait for dynamic content to load
-            page.wait_for_timeout(2000)
+            polite_goto(page, url, timeout=60000)
+            # Wait for the grid and scroll only while new products keep loading
+            wait_for_products(page, ".product-card")
             
-            # Extract product data from script tags (Daraz uses SSR with hydration)
-            scripts = page.eval_on_selector_all("script[type='application/ld+json']", """
-                elements => elements.map(el => el.textContent)
-            """)
-            
-            products = []
-            for script in scripts:
-                try:
-                    data = json.loads(script)
-                    if isinstance(data, dict) and data.get("@type") == "Product":
-                        products.extend(parse_product_json(data, category))
-                except json.JSONDecodeError:
-                    continue
-            
-            # Fallback to HTML parsing if JSON extraction fails
-            if not products:
-                content = page.content()
-                products = parse_products(content, category)
-            
-            return products
+            content = page.content()
+            return extract_products(content, category)
             
         except Exception as e:
             logging.error(f"Error scraping Daraz category {category}: {str(e)}")
-            return []
+            raise
             
         finally:
             context.close()
             browser.close()
 
-def parse_product_json(data: Dict[str, Any], category: str) -> List[Dict[str, Any]]:
-    """Parse product data from JSON-LD script tags."""
-    try:
-        price = float(data.get("offers", {}).get("price", 0))
-        availability = data.get("offers", {}).get("availability", "")
-        in_stock = "InStock" in availability
-        
-        return [{
-            "name": data.get("name", ""),
-            "price": price,
-            "currency": "BDT",
-            "in_stock": in_stock,
-            "url": data.get("url", ""),
-            "category": category,
-            "competitor": "daraz",
-            "promotion": None,  # Extract from offers if available
-            "unit": extract_unit(data.get("name", "")),
-            "brand": data.get("brand", {}).get("name") or extract_brand(data.get("name", ""))
-        }]
-    except Exception as e:
-        logging.error(f"Error parsing Daraz product JSON: {str(e)}")
-        return []
+def extract_products(html: str, category: str) -> List[Dict[str, Any]]:
+    """Extract products from structured data or the product grid (see extract_listing_products)."""
+    return extract_listing_products(html, category, "daraz", BASE_URL, parse_products, extract_unit, extract_brand,
+                                    card_marker=GRID_START, grid_end=GRID_END)
 
 def parse_products(html: str, category: str) -> List[Dict[str, Any]]:
     """
@@ -120,7 +76,8 @@ def parse_products(html: str, category: str) -> List[Dict[str, Any]]:
     Returns:
         List of standardized product dictionaries
     """
-    soup = BeautifulSoup(html, "html.parser")
+    # Only the product grid is parsed; header, footer and trailing scripts are skipped
+    soup = make_soup(html, start_marker=GRID_START, end_marker=GRID_END)
     products = []
     
     for item in soup.select(".product-card"):
@@ -3,13 +3,19 @@ Shwapno-specific scraping implementation.
 """
 
 from playwright.sync_api import sync_playwright
-from bs4 import BeautifulSoup
 from urllib.parse import urljoin
 import re
 import logging
 from typing import List, Dict, Any
 
+from ..browser import get_site_profile, new_light_context, polite_goto, wait_for_products
+from ..parsing import class_marker, make_soup, tag_marker
+from ..structured_data import extract_listing_products
+
 BASE_URL = "https://www.shwapno.com"
+# Product cards and the end of the grid, shared by the parser and the card count
+GRID_START = class_marker("product-item")
+GRID_END = tag_marker("footer")
 
 def scrape_category(category: str) -> List[Dict[str, Any]]:
     """
@@ -20,10 +26,16 @@ def scrape_category(category: str) -> List[Dict[str, Any]]:
         
     Returns:
         List of product dictionaries with standardized fields
+
+    Raises:
+        Exception: Browser and navigation errors, logged and re-raised so
+            collect_data decides whether a failed scrape is fatal
     """
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=True)
-        context = browser.new_context(
+        context = new_light_context(
+            browser,
+            get_site_profile("shwapno"),
             user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
             viewport={"width": 1920, "height": 1080}
         )
@@ -33,37 +45,26 @@ def scrape_category(category: str) -> List[Dict[str, Any]]:
             url = urljoin(BASE_URL, f"category/{category}")
             logging.info(f"Scraping Shwapno URL: {url}")
             
-            page.goto(url, timeout=60000)
-            page.wait_for_selector(".product-item", state="attached", timeout=15000)
-            
-            # Scroll to load all products
-            page.evaluate("""async () => {
-                await new Promise(resolve => {
-                    let totalHeight = 0;
-                    const distance = 100;
-                    const timer = setInterval(() => {
-                        const scrollHeight = document.body.scrollHeight;
-                        window.scrollBy(0, distance);
-                        totalHeight += distance;
-                        if(totalHeight >= scrollHeight){
-                            clearInterval(timer);
-                            resolve();
-                        }
-                    }, 100);
-                });
-            }""")
+            polite_goto(page, url, timeout=60000)
+            # Wait for the grid and scroll only while new products keep loading
+            wait_for_products(page, ".product-item")
             
             content = page.content()
-            return parse_products(content, category)
+            return extract_products(content, category)
             
         except Exception as e:
             logging.error(f"Error scraping Shwapno category {category}: {str(e)}")
-            return []
+            raise
             
         finally:
             context.close()
             browser.close()
 
+def extract_products(html: str, category: str) -> List[Dict[str, Any]]:
+    """Extract products from structured data or the product grid (see extract_listing_products)."""
+    return extract_listing_products(html, category, "shwapno", BASE_URL, parse_products, extract_unit, extract_brand,
+                                    card_marker=GRID_START, grid_end=GRID_END)
+
 def parse_products(html: str, category: str) -> List[Dict[str, Any]]:
     """
     Parse product data from Shwapno HTML.
@@ -75,7 +76,8 @@ def parse_products(html: str, category: str) -> List[Dict[str, Any]]:
     Returns:
         List of standardized product dictionaries
     """
-    soup = BeautifulSoup(html, "html.parser")
+    # Only the product grid is parsed; header, footer and trailing scripts are skipped
+    soup = make_soup(html, start_marker=GRID_START, end_marker=GRID_END)
     products = []
     
     for item in soup.select(".product-item"):
@@ -0,0 +1,244 @@
+"""
+Change-rate estimation and fetch-budget allocation for adaptive scheduling.
+Each job's prices are modelled as changing at a Poisson rate learned from
+past collections; poll frequencies are then chosen to maximize expected
+freshness across all jobs within a global fetch budget.
+"""
+
+import os
+import json
+import math
+import time
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, List, Optional
+
+# Prior weight: the initial guess counts as one day of observation
+PRIOR_SECONDS = 86400.0
+
+def price_signature(products: List[Dict[str, Any]]) -> str:
+    """Order-independent hash of the prices and availability in a collection."""
+    rows = sorted(
+        f"{p.get('name', '')}|{p.get('price', '')}|{p.get('in_stock', '')}"
+        for p in products
+    )
+    return hashlib.sha1("\n".join(rows).encode("utf-8")).hexdigest()
+
+@dataclass
+class ChangeHistory:
+    """Observed changes for one job."""
+    changes: float
+    observed_seconds: float
+    last_signature: Optional[str] = None
+    last_checked: Optional[float] = None
+    checks: int = 0
+
+    @property
+    def change_rate(self) -> float:
+        """Estimated changes per second."""
+        return self.changes / self.observed_seconds
+
+def expected_freshness(change_rate: float, poll_rate: float) -> float:
+    """Fraction of time a copy polled `poll_rate` times/s is up to date."""
+    if poll_rate <= 0:
+        return 0.0
+    r = change_rate / poll_rate
+    return 1.0 if r == 0 else (1 - math.exp(-r)) / r
+
+def _marginal_gain(change_rate: float, poll_rate: float) -> float:
+    """d(freshness)/d(poll_rate); decreasing in poll_rate."""
+    r = change_rate / poll_rate
+    return (1 - math.exp(-r) * (1 + r)) / change_rate
+
+def _rate_for_gain(change_rate: float, gain: float, max_rate: float) -> float:
+    """Poll rate at which the marginal freshness gain equals `gain`."""
+    if _marginal_gain(change_rate, max_rate) >= gain:
+        return max_rate
+    low, high = 0.0, max_rate
+    for _ in range(60):
+        mid = (low + high) / 2
+        if mid == 0 or _marginal_gain(change_rate, mid) > gain:
+            low = mid
+        else:
+            high = mid
+    return low
+
+def allocate_poll_rates(change_rates: Dict[str, float],
+                        budget: float,
+                        min_rate: float,
+                        max_rate: float,
+                        polls_per_change: float = 4.0) -> Dict[str, float]:
+    """
+    Split a fetch budget between jobs to maximize total expected freshness.
+
+    Each job is capped at `polls_per_change` polls per expected change
+    (about 88% freshness at the default of 4); polling faster buys little.
+    If the capped rates fit the budget they are used as they are and the
+    rest of the budget is left unspent. Otherwise each job gets the rate at
+    which its marginal freshness gain equals a common threshold, found by
+    bisection so the rates sum to `budget`. Jobs that change far faster
+    than they could be polled get little extra, since extra polls would
+    not keep them fresh anyway.
+
+    Args:
+        change_rates: Changes per second per job
+        budget: Total fetches per second
+        min_rate: Lowest poll rate any job gets
+        max_rate: Highest poll rate any job gets
+        polls_per_change: Poll rate cap as a multiple of the change rate
+
+    Returns:
+        Poll rate per job (fetches per second)
+    """
+    if not change_rates:
+        return {}
+    if budget <= min_rate * len(change_rates):
+        return {job: min_rate for job in change_rates}
+
+    caps = {job: min(max_rate, max(min_rate, polls_per_change * rate)) for job, rate in change_rates.items()}
+    if sum(caps.values()) <= budget:
+        return caps
+
+    def rates_for(gain: float) -> Dict[str, float]:
+        return {
+            job: min(caps[job], max(min_rate, _rate_for_gain(rate, gain, caps[job])))
+            for job, rate in change_rates.items()
+        }
+
+    low, high = 0.0, max(1 / rate for rate in change_rates.values())
+    for _ in range(60):
+        mid = (low + high) / 2
+        if sum(rates_for(mid).values()) > budget:
+            low = mid
+        else:
+            high = mid
+    return rates_for(high)
+
+class FreshnessTracker:
+    """
+    Learns per-job change rates from collection results and turns a global
+    hourly fetch budget into per-job poll intervals. History is persisted
+    as JSON so rates survive restarts; processes sharing the file (a
+    producer and its queue workers) merge rather than overwrite each
+    other's entries, and refresh() picks up what the others observed.
+    """
+
+    def __init__(self, state_path: Optional[str] = None, clock=time.time):
+        """
+        Args:
+            state_path: JSON file for change history (None keeps it in memory)
+            clock: Wall-clock function
+        """
+        self.state_path = state_path
+        self.clock = clock
+        self.history: Dict[str, ChangeHistory] = {}
+        self._lock = threading.Lock()
+        self.history = self._load()
+
+    def _load(self) -> Dict[str, ChangeHistory]:
+        if not self.state_path or not os.path.exists(self.state_path):
+            return {}
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                return {job: ChangeHistory(**h) for job, h in json.load(f).items()}
+        except (OSError, ValueError, TypeError) as e:
+            logging.warning(f"Could not load freshness state: {str(e)}")
+            return {}
+
+    def _merge_saved(self) -> None:
+        """Take entries from the state file that were observed more recently than ours."""
+        for job, saved in self._load().items():
+            current = self.history.get(job)
+            if current is None or (saved.last_checked or 0) > (current.last_checked or 0):
+                self.history[job] = saved
+
+    def refresh(self) -> None:
+        """Pick up observations other processes saved to the state file."""
+        with self._lock:
+            self._merge_saved()
+
+    def register(self, job_id: str, initial_interval: float) -> None:
+        """Start tracking a job, guessing one change per `initial_interval` seconds."""
+        with self._lock:
+            if job_id not in self.history:
+                self.history[job_id] = ChangeHistory(
+                    changes=PRIOR_SECONDS / initial_interval,
+                    observed_seconds=PRIOR_SECONDS
+                )
+
+    def observe(self, job_id: str, products: List[Dict[str, Any]]) -> bool:
+        """
+        Record a collection result.
+
+        Returns:
+            True if prices changed since the previous collection
+        """
+        signature = price_signature(products)
+        now = self.clock()
+        with self._lock:
+            if self.state_path:
+                self._merge_saved()
+            history = self.history.setdefault(
+                job_id, ChangeHistory(changes=1.0, observed_seconds=PRIOR_SECONDS)
+            )
+            changed = history.last_signature is not None and signature != history.last_signature
+            if history.last_checked is not None:
+                # At least one change happened in the interval if the signature moved
+                history.observed_seconds += max(now - history.last_checked, 1.0)
+                history.changes += 1 if changed else 0
+            history.last_signature = signature
+            history.last_checked = now
+            history.checks += 1
+            self._save()
+        return changed
+
+    def _save(self) -> None:
+        if not self.state_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+            temp_path = f"{self.state_path}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({job: asdict(h) for job, h in self.history.items()}, f, indent=2)
+            os.replace(temp_path, self.state_path)
+        except OSError as e:
+            logging.warning(f"Could not save freshness state: {str(e)}")
+
+    def change_rate(self, job_id: str) -> Optional[float]:
+        history = self.history.get(job_id)
+        return history.change_rate if history else None
+
+    def intervals(self,
+                  job_ids: List[str],
+                  fetches_per_hour: float,
+                  min_interval: float,
+                  max_interval: float,
+                  polls_per_change: float = 4.0) -> Dict[str, float]:
+        """
+        Poll interval in seconds for each job within the hourly fetch budget.
+
+        Args:
+            job_ids: Jobs to schedule (must be registered or observed)
+            fetches_per_hour: Global fetch budget
+            min_interval: Shortest interval any job may get
+            max_interval: Longest interval any job may get
+            polls_per_change: Most polls per expected change for any job
+        """
+        with self._lock:
+            rates = {job: self.history[job].change_rate for job in job_ids if job in self.history}
+        poll_rates = allocate_poll_rates(rates, fetches_per_hour / 3600,
+                                         min_rate=1 / max_interval, max_rate=1 / min_interval,
+                                         polls_per_change=polls_per_change)
+        return {job: 1 / rate for job, rate in poll_rates.items()}
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            job: {
+                "changes_per_day": round(h.change_rate * 86400, 2),
+                "checks": h.checks,
+                "last_checked": h.last_checked
+            }
+            for job, h in self.history.items()
+        }
@@ -0,0 +1,380 @@
+"""
+Leased work queue for spreading collection jobs across worker nodes.
+A producer submits jobs with idempotency keys; workers claim them under a
+visibility timeout, extend the lease while working, and ack or fail them.
+Failed or abandoned jobs are retried with exponential backoff and moved to
+a dead-letter list after too many attempts. Redis backs the queue in
+production; MemoryBackend is an in-process stand-in with the same semantics.
+"""
+
+import os
+import json
+import time
+import uuid
+import random
+import socket
+import logging
+import threading
+from dataclasses import dataclass, field, asdict
+from typing import Any, Callable, Dict, List, Optional
+
+@dataclass
+class Job:
+    """A unit of work and its delivery state."""
+    payload: Dict[str, Any]
+    key: str
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    attempts: int = 0
+    available_at: float = 0.0
+    lease_until: float = 0.0
+    lease_token: Optional[str] = None
+    last_error: Optional[str] = None
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self))
+
+    @classmethod
+    def from_json(cls, data: str) -> "Job":
+        return cls(**json.loads(data))
+
+class MemoryBackend:
+    """In-process queue storage for tests and single-node runs."""
+
+    def __init__(self):
+        self._jobs: Dict[str, Job] = {}
+        self._keys: Dict[str, str] = {}
+        self._leased: Dict[str, Job] = {}
+        self._dead: List[Job] = []
+        self._lock = threading.Lock()
+
+    def add(self, job: Job) -> bool:
+        with self._lock:
+            if job.key in self._keys:
+                return False
+            self._keys[job.key] = job.id
+            self._jobs[job.id] = job
+            return True
+
+    def claim(self, now: float, visibility_timeout: float) -> Optional[Job]:
+        with self._lock:
+            # Leases that ran out go back to the ready set
+            for job_id, job in list(self._leased.items()):
+                if job.lease_until <= now:
+                    del self._leased[job_id]
+                    job.lease_token = None
+                    self._jobs[job_id] = job
+
+            ready = [job for job in self._jobs.values() if job.available_at <= now]
+            if not ready:
+                return None
+            job = min(ready, key=lambda j: j.available_at)
+            del self._jobs[job.id]
+            job.attempts += 1
+            job.lease_token = uuid.uuid4().hex
+            job.lease_until = now + visibility_timeout
+            self._leased[job.id] = job
+            return Job(**asdict(job))
+
+    def _owned(self, job: Job) -> Optional[Job]:
+        leased = self._leased.get(job.id)
+        return leased if leased and leased.lease_token == job.lease_token else None
+
+    def extend(self, job: Job, lease_until: float) -> bool:
+        with self._lock:
+            leased = self._owned(job)
+            if not leased:
+                return False
+            leased.lease_until = job.lease_until = lease_until
+            return True
+
+    def ack(self, job: Job) -> bool:
+        with self._lock:
+            if not self._owned(job):
+                return False
+            del self._leased[job.id]
+            self._keys.pop(job.key, None)
+            return True
+
+    def retry(self, job: Job, available_at: float) -> bool:
+        with self._lock:
+            if not self._owned(job):
+                return False
+            del self._leased[job.id]
+            job.available_at = available_at
+            job.lease_token = None
+            self._jobs[job.id] = job
+            return True
+
+    def bury(self, job: Job) -> bool:
+        with self._lock:
+            if not self._owned(job):
+                return False
+            del self._leased[job.id]
+            self._keys.pop(job.key, None)
+            self._dead.append(job)
+            return True
+
+    def dead_letters(self) -> List[Job]:
+        return list(self._dead)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"queued": len(self._jobs), "leased": len(self._leased), "dead": len(self._dead)}
+
+# Reserve the job key and enqueue in one step, so a crash cannot leave a
+# key that blocks its job without the job itself
+_ADD_SCRIPT = """
+if redis.call('HSETNX', KEYS[5], ARGV[1], ARGV[2]) == 0 then return 0 end
+redis.call('HSET', KEYS[3], ARGV[2], ARGV[3])
+redis.call('ZADD', KEYS[1], ARGV[4], ARGV[2])
+return 1
+"""
+
+# Move expired leases back to ready, then lease the oldest ready job
+_CLAIM_SCRIPT = """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[1])
+for _, id in ipairs(expired) do
+    redis.call('ZREM', KEYS[2], id)
+    redis.call('HDEL', KEYS[4], id)
+    local job = cjson.decode(redis.call('HGET', KEYS[3], id))
+    redis.call('ZADD', KEYS[1], job['available_at'], id)
+end
+local ready = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, 1)
+if #ready == 0 then return nil end
+local id = ready[1]
+redis.call('ZREM', KEYS[1], id)
+local job = cjson.decode(redis.call('HGET', KEYS[3], id))
+job['attempts'] = job['attempts'] + 1
+job['lease_token'] = ARGV[3]
+job['lease_until'] = tonumber(ARGV[1]) + tonumber(ARGV[2])
+local encoded = cjson.encode(job)
+redis.call('HSET', KEYS[3], id, encoded)
+redis.call('HSET', KEYS[4], id, ARGV[3])
+redis.call('ZADD', KEYS[2], job['lease_until'], id)
+return encoded
+"""
+
+# Run only if the caller still holds the lease; ARGV[2] selects the outcome
+_FINISH_SCRIPT = """
+if redis.call('HGET', KEYS[4], ARGV[1]) ~= ARGV[3] then return 0 end
+if ARGV[2] == 'extend' then
+    redis.call('ZADD', KEYS[2], ARGV[5], ARGV[1])
+    redis.call('HSET', KEYS[3], ARGV[1], ARGV[4])
+    return 1
+end
+redis.call('ZREM', KEYS[2], ARGV[1])
+redis.call('HDEL', KEYS[4], ARGV[1])
+if ARGV[2] == 'retry' then
+    redis.call('HSET', KEYS[3], ARGV[1], ARGV[4])
+    redis.call('ZADD', KEYS[1], ARGV[5], ARGV[1])
+else
+    redis.call('HDEL', KEYS[3], ARGV[1])
+    redis.call('HDEL', KEYS[5], ARGV[6])
+    if ARGV[2] == 'bury' then redis.call('RPUSH', KEYS[6], ARGV[4]) end
+end
+return 1
+"""
+
+class RedisBackend:
+    """
+    Redis queue storage shared by all nodes.
+
+    Ready jobs sit in a sorted set scored by availability time and leased
+    jobs in one scored by lease expiry; adds, claims and lease-checked
+    updates run as Lua scripts so they are atomic across workers.
+    """
+
+    def __init__(self, name: str, url: Optional[str] = None, client=None):
+        if client is None:
+            try:
+                import redis
+            except ImportError:
+                raise ImportError("RedisBackend requires the 'redis' package: pip install redis")
+            client = redis.Redis.from_url(url or os.getenv("REDIS_URL", "redis://localhost:6379"))
+        self.client = client
+        self.keys = [f"{name}:{suffix}" for suffix in ("ready", "leased", "jobs", "tokens", "keys", "dead")]
+        self._add = client.register_script(_ADD_SCRIPT)
+        self._claim = client.register_script(_CLAIM_SCRIPT)
+        self._finish = client.register_script(_FINISH_SCRIPT)
+
+    def add(self, job: Job) -> bool:
+        args = [job.key, job.id, job.to_json(), job.available_at]
+        return bool(self._add(keys=self.keys, args=args))
+
+    def claim(self, now: float, visibility_timeout: float) -> Optional[Job]:
+        data = self._claim(keys=self.keys, args=[now, visibility_timeout, uuid.uuid4().hex])
+        return Job.from_json(data) if data else None
+
+    def _update(self, job: Job, outcome: str, score: float = 0.0) -> bool:
+        args = [job.id, outcome, job.lease_token, job.to_json(), score, job.key]
+        return bool(self._finish(keys=self.keys, args=args))
+
+    def extend(self, job: Job, lease_until: float) -> bool:
+        job.lease_until = lease_until
+        return self._update(job, "extend", lease_until)
+
+    def ack(self, job: Job) -> bool:
+        return self._update(job, "ack")
+
+    def retry(self, job: Job, available_at: float) -> bool:
+        job.available_at = available_at
+        return self._update(job, "retry", available_at)
+
+    def bury(self, job: Job) -> bool:
+        return self._update(job, "bury")
+
+    def dead_letters(self) -> List[Job]:
+        return [Job.from_json(data) for data in self.client.lrange(self.keys[5], 0, -1)]
+
+    def stats(self) -> Dict[str, int]:
+        ready, leased, _, _, _, dead = self.keys
+        return {"queued": self.client.zcard(ready), "leased": self.client.zcard(leased),
+                "dead": self.client.llen(dead)}
+
+class JobQueue:
+    """
+    Producer/consumer API over a queue backend.
+
+    Jobs with the same key are not queued twice while one is pending or
+    running, so a scheduler firing faster than workers drain the queue does
+    not pile up duplicate collections.
+    """
+
+    def __init__(self,
+                 backend,
+                 visibility_timeout: float = 300.0,
+                 max_attempts: int = 5,
+                 backoff_base: float = 30.0,
+                 backoff_max: float = 3600.0,
+                 clock: Callable[[], float] = time.time):
+        """
+        Args:
+            backend: MemoryBackend or RedisBackend
+            visibility_timeout: Seconds a claimed job stays invisible to other workers
+            max_attempts: Deliveries before a job is dead-lettered
+            backoff_base: Retry delay after the first failure (doubles per attempt)
+            backoff_max: Upper bound on the retry delay
+            clock: Wall-clock function (shared across nodes)
+        """
+        self.backend = backend
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.clock = clock
+
+    def submit(self, payload: Dict[str, Any], key: Optional[str] = None, delay: float = 0.0) -> Optional[str]:
+        """
+        Queue a job.
+
+        Returns:
+            Job ID, or None if a job with the same key is already pending
+        """
+        job = Job(payload=payload, key=key or uuid.uuid4().hex, available_at=self.clock() + delay)
+        if not self.backend.add(job):
+            logging.debug(f"Job {job.key} already queued, skipping")
+            return None
+        return job.id
+
+    def claim(self) -> Optional[Job]:
+        """Lease the next available job, dead-lettering ones that keep coming back."""
+        while True:
+            job = self.backend.claim(self.clock(), self.visibility_timeout)
+            if job is None or job.attempts <= self.max_attempts:
+                return job
+            job.last_error = job.last_error or "lease expired too many times"
+            self.backend.bury(job)
+            logging.error(f"Job {job.key} dead-lettered after {job.attempts - 1} attempts")
+
+    def extend(self, job: Job) -> bool:
+        """Renew a job's lease; False means it was lost to another worker."""
+        return self.backend.extend(job, self.clock() + self.visibility_timeout)
+
+    def complete(self, job: Job) -> bool:
+        return self.backend.ack(job)
+
+    def fail(self, job: Job, error: str) -> bool:
+        """Schedule a retry with exponential backoff, or dead-letter the job."""
+        job.last_error = error
+        if job.attempts >= self.max_attempts:
+            logging.error(f"Job {job.key} failed {job.attempts} times, dead-lettered: {error}")
+            return self.backend.bury(job)
+
+        delay = min(self.backoff_base * 2 ** (job.attempts - 1), self.backoff_max)
+        delay *= random.uniform(0.8, 1.2)
+        logging.warning(f"Job {job.key} failed (attempt {job.attempts}), retrying in {delay:.0f}s: {error}")
+        return self.backend.retry(job, self.clock() + delay)
+
+    def stats(self) -> Dict[str, int]:
+        return self.backend.stats()
+
+class Worker:
+    """Claims jobs from a queue and runs them through a handler."""
+
+    def __init__(self,
+                 queue: JobQueue,
+                 handler: Callable[[Dict[str, Any]], Any],
+                 worker_id: Optional[str] = None,
+                 poll_interval: float = 1.0):
+        self.queue = queue
+        self.handler = handler
+        self.worker_id = worker_id or f"{socket.gethostname()}-{uuid.uuid4().hex[:6]}"
+        self.poll_interval = poll_interval
+        self.processed = 0
+        self.failed = 0
+
+    def run_once(self) -> bool:
+        """
+        Process one job if available.
+
+        Returns:
+            True if a job was claimed
+        """
+        job = self.queue.claim()
+        if job is None:
+            return False
+
+        # Keep the lease alive while long collections run
+        stop_heartbeat = threading.Event()
+
+        def heartbeat():
+            while not stop_heartbeat.wait(self.queue.visibility_timeout / 3):
+                if not self.queue.extend(job):
+                    logging.warning(f"{self.worker_id} lost the lease on job {job.key}")
+                    return
+
+        beat = threading.Thread(target=heartbeat, daemon=True)
+        beat.start()
+        try:
+            self.handler(job.payload)
+        except Exception as e:
+            stop_heartbeat.set()
+            beat.join()
+            self.failed += 1
+            self.queue.fail(job, str(e))
+        else:
+            stop_heartbeat.set()
+            beat.join()
+            self.processed += 1
+            self.queue.complete(job)
+        return True
+
+    def run(self, stop_event: Optional[threading.Event] = None) -> None:
+        """Process jobs until `stop_event` is set."""
+        stop_event = stop_event or threading.Event()
+        logging.info(f"Worker {self.worker_id} started")
+        while not stop_event.is_set():
+            if not self.run_once():
+                stop_event.wait(self.poll_interval)
+        logging.info(f"Worker {self.worker_id} stopped after {self.processed} jobs")
+
+def get_job_queue(name: str = "collection", **kwargs) -> JobQueue:
+    """
+    Build a queue from the environment.
+
+    JOB_QUEUE_BACKEND selects 'redis' (using REDIS_URL) or the default
+    in-process 'memory' backend.
+    """
+    if os.getenv("JOB_QUEUE_BACKEND", "memory").lower() == "redis":
+        return JobQueue(RedisBackend(name), **kwargs)
+    return JobQueue(MemoryBackend(), **kwargs)
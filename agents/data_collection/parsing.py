@@ -0,0 +1,159 @@
+"""
+HTML parsing helpers with a pluggable parser backend.
+Prefers the C-backed lxml parser and can cut a page down to the product
+grid before any tree is built, so large category pages parse quickly.
+"""
+
+import os
+import re
+import importlib.util
+from typing import Optional, Pattern, Sequence, Union
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+def _installed(module: str) -> bool:
+    """Check whether an optional parser module is importable."""
+    return importlib.util.find_spec(module) is not None
+
+# BeautifulSoup tree builders, fastest first
+BACKENDS = ("lxml", "html.parser")
+
+def get_parser_backend() -> str:
+    """
+    Pick the BeautifulSoup tree builder to use.
+
+    HTML_PARSER_BACKEND overrides the choice; otherwise lxml is used when
+    installed and the pure-Python html.parser otherwise.
+
+    Returns:
+        Tree builder name accepted by BeautifulSoup
+    """
+    backend = os.getenv("HTML_PARSER_BACKEND")
+    if backend:
+        return backend
+
+    for candidate in BACKENDS:
+        if candidate == "html.parser" or _installed(candidate):
+            return candidate
+    return "html.parser"
+
+PARSER_BACKEND = get_parser_backend()
+
+_selectolax_available = _installed("selectolax")
+
+Marker = Union[str, Pattern[str]]
+
+def class_marker(class_name: str) -> Pattern[str]:
+    """
+    Marker matching an element whose class attribute holds `class_name` as a
+    whole class, so CSS rules, scripts and longer class names such as
+    'product-item-name' do not match.
+    """
+    return re.compile(r'\sclass\s*=\s*(["\'])(?:[^"\']*\s)?' + re.escape(class_name) + r'(?=[\s"\'])')
+
+def tag_marker(tag: str) -> Pattern[str]:
+    """Marker matching an opening `tag` element (e.g. <footer>, but not <footer-menu>)."""
+    return re.compile(r'<' + re.escape(tag) + r'(?=[\s>/])', re.IGNORECASE)
+
+def _find(html: str, marker: Marker, start: int = 0) -> int:
+    if isinstance(marker, str):
+        return html.find(marker, start)
+    match = marker.search(html, start)
+    return match.start() if match else -1
+
+def slice_region(html: str, start_marker: Marker, end_marker: Optional[Marker] = None) -> str:
+    """
+    Cut a document down to the region holding the product grid.
+
+    The slice starts at the tag containing the first `start_marker` and stops
+    at the first `end_marker` after it, so headers, footers and trailing
+    scripts are never tokenised. Unclosed tags in the slice are tolerated by
+    both parser backends.
+
+    Args:
+        html: Raw HTML content
+        start_marker: Text or pattern marking the first product; prefer
+            class_marker('product-item') over a bare substring
+        end_marker: Text or pattern marking the end of the grid (e.g., tag_marker('footer'))
+
+    Returns:
+        The sliced HTML, or the full document if start_marker is not found
+    """
+    start = _find(html, start_marker)
+    if start == -1:
+        return html
+
+    tag_start = html.rfind("<", 0, start + 1)
+    if tag_start != -1:
+        start = tag_start
+
+    if end_marker:
+        end = _find(html, end_marker, start + 1)
+        if end != -1:
+            return html[start:end]
+
+    return html[start:]
+
+def count_markers(html: str, marker: Marker, end_marker: Optional[Marker] = None) -> int:
+    """
+    Count `marker` matches in the region slice_region would cut, without
+    building a tree; a cheap estimate of how many product cards a page has.
+    """
+    region = slice_region(html, marker, end_marker)
+    if isinstance(marker, str):
+        return region.count(marker)
+    return sum(1 for _ in marker.finditer(region))
+
+def make_soup(html: str,
+              start_marker: Optional[Marker] = None,
+              end_marker: Optional[Marker] = None,
+              parse_only: Optional[SoupStrainer] = None,
+              backend: Optional[str] = None) -> BeautifulSoup:
+    """
+    Parse HTML with the fastest available backend.
+
+    Args:
+        html: Raw HTML content
+        start_marker: Optional marker to slice the document from (see slice_region)
+        end_marker: Optional marker to stop the slice at
+        parse_only: Optional SoupStrainer limiting which tags are built
+        backend: Tree builder override, defaults to PARSER_BACKEND
+
+    Returns:
+        Parsed BeautifulSoup tree
+    """
+    if start_marker:
+        html = slice_region(html, start_marker, end_marker)
+
+    return BeautifulSoup(html, backend or PARSER_BACKEND, parse_only=parse_only)
+
+def select_text(html: str, selectors: Sequence[str]) -> Optional[str]:
+    """
+    Get the text of the first element matching any of the selectors.
+
+    Uses selectolax when it is installed, since it avoids building a
+    BeautifulSoup tree entirely; otherwise falls back to make_soup.
+
+    Args:
+        html: Raw HTML content
+        selectors: CSS selectors to try in order
+
+    Returns:
+        Stripped text of the first match, or None
+    """
+    if _selectolax_available:
+        from selectolax.parser import HTMLParser
+
+        tree = HTMLParser(html)
+        for selector in selectors:
+            node = tree.css_first(selector)
+            if node is not None:
+                return node.text(strip=True)
+        return None
+
+    soup = make_soup(html)
+    for selector in selectors:
+        element = soup.select_one(selector)
+        if element is not None:
+            return element.get_text(strip=True)
+    return None
@@ -0,0 +1,130 @@
+"""
+Precompiled price matching for raw HTML and page text.
+All price formats are combined into one alternation so a page is scanned
+once instead of once per pattern.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import List, Optional
+
+BANGLA_DIGITS = str.maketrans("০১২৩৪৫৬৭৮৯", "0123456789")
+
+# \d also matches Bangla digits (০-৯); they are translated before conversion
+NUMBER = r"\d[\d,]*(?:\.\d+)?"
+
+# Named alternatives in priority order: earlier groups win over later ones
+# when both occur on a page. The first six follow the old pattern-by-pattern
+# loop; formats it did not know come last so existing results do not change.
+PRICE_GROUPS = ("taka", "tk", "json", "amount", "attr", "css", "bdt", "dollar", "suffix")
+
+PRICE_RE = re.compile(
+    r"৳\s*(?P<taka>" + NUMBER + r")"
+    r"|\bTk\.?\s*(?P<tk>" + NUMBER + r")"
+    r"|\bBDT\s*(?P<bdt>" + NUMBER + r")"
+    r"|(?:\$|\bUSD\s*)\s*(?P<dollar>" + NUMBER + r")"
+    # The currency is only looked at, so "50 ৳ 100" still yields the ৳ 100
+    r"|(?P<suffix>" + NUMBER + r")\s*(?=৳|টাকা|\bTk\b|\bBDT\b)"
+    r'|"price"\s*:\s*"?(?P<json>' + NUMBER + r")"
+    r"|(?:price-amount|product-price)[^>]*>\s*(?P<amount>" + NUMBER + r")"
+    r'|data-price="(?P<attr>' + NUMBER + r')"'
+    r'|class="price"[^>]*>\s*(?P<css>' + NUMBER + r")",
+    re.IGNORECASE
+)
+
+NON_NUMERIC_RE = re.compile(r"[^\d.,]")
+
+@dataclass
+class PriceMatch:
+    """A price found in text."""
+    value: float
+    currency: str
+    kind: str
+    start: int
+
+def clean_price(price_str: str) -> float:
+    """
+    Convert a price string to float, handling separators and Bangla digits.
+
+    Args:
+        price_str: Raw price text (e.g., '৳ ১,২৫০', '4,99', '1,000.50')
+
+    Returns:
+        Price rounded to 2 decimals, 0.0 if it cannot be parsed
+    """
+    if not price_str:
+        return 0.0
+
+    # Strip currency junk, including the dot of abbreviations like "Tk."
+    price_str = NON_NUMERIC_RE.sub("", str(price_str).translate(BANGLA_DIGITS)).strip(".,")
+
+    if "," in price_str and "." in price_str:
+        # Whichever separator comes last is the decimal point
+        if price_str.rfind(",") < price_str.rfind("."):
+            price_str = price_str.replace(",", "")
+        else:
+            price_str = price_str.replace(".", "").replace(",", ".")
+    elif "," in price_str:
+        # One or two trailing digits after a single comma means decimal comma (4,99);
+        # otherwise commas group thousands (1,000 or 1,00,000)
+        head, _, tail = price_str.rpartition(",")
+        if price_str.count(",") == 1 and len(tail) in (1, 2):
+            price_str = f"{head}.{tail}"
+        else:
+            price_str = price_str.replace(",", "")
+
+    try:
+        return round(float(price_str), 2)
+    except ValueError:
+        return 0.0
+
+def find_prices(text: str) -> List[PriceMatch]:
+    """
+    Find every price in text in a single scan.
+
+    Args:
+        text: Raw HTML or extracted page text
+
+    Returns:
+        Prices in document order; zero and unparseable values are skipped
+    """
+    prices = []
+    for match in PRICE_RE.finditer(text):
+        kind = match.lastgroup
+        value = clean_price(match.group(kind))
+        if value > 0:
+            currency = "USD" if kind == "dollar" else "BDT"
+            prices.append(PriceMatch(value=value, currency=currency, kind=kind, start=match.start()))
+    return prices
+
+def find_price(text: str) -> Optional[float]:
+    """
+    Find the single most reliable price in text.
+
+    Returns the first occurrence of the highest-priority format (explicit
+    ৳ beats Tk, which beats JSON/markup hints, which beat BDT, $ and
+    trailing-currency prices), scanning the text once and stopping early
+    once a ৳ price is seen.
+
+    Args:
+        text: Raw HTML or extracted page text
+
+    Returns:
+        Price value, or None if no price was found
+    """
+    best_rank = len(PRICE_GROUPS)
+    best_value = None
+
+    for match in PRICE_RE.finditer(text):
+        kind = match.lastgroup
+        rank = PRICE_GROUPS.index(kind)
+        if rank >= best_rank:
+            continue
+
+        value = clean_price(match.group(kind))
+        if value > 0:
+            best_rank, best_value = rank, value
+            if rank == 0:
+                break
+
+    return best_value
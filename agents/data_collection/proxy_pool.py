@@ -0,0 +1,203 @@
+"""
+Health-scored proxy pool shared by the HTTP and browser scrapers.
+Proxies are picked by weighted choice on success rate and latency, kept
+sticky per domain while they work, and evicted for a cooldown after
+repeated failures.
+"""
+
+import os
+import time
+import random
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+@dataclass
+class ProxyStats:
+    """Health record for one proxy."""
+    url: str
+    successes: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    ewma_latency: Optional[float] = None
+    evicted_until: float = 0.0
+
+    @property
+    def success_rate(self) -> float:
+        # Smoothed so a fresh proxy starts at 0.5 rather than 0 or 1
+        return (self.successes + 1) / (self.successes + self.failures + 2)
+
+class ProxyPool:
+    """
+    Pool of proxies with per-proxy health scoring.
+
+    Selection weight is success rate divided by smoothed latency, so fast
+    reliable proxies carry most traffic while slower ones still get probed.
+    A proxy that fails `max_failures` times in a row is evicted for
+    `cooldown` seconds (doubling on each re-eviction). A domain keeps using
+    the same proxy for `sticky_ttl` seconds, so cookies and sessions stay
+    on one exit IP.
+    """
+
+    def __init__(self,
+                 proxies: Iterable[str],
+                 max_failures: int = 3,
+                 cooldown: float = 300.0,
+                 max_cooldown: float = 3600.0,
+                 sticky_ttl: float = 600.0,
+                 default_latency: float = 2.0,
+                 rng: Optional[random.Random] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            proxies: Proxy URLs (e.g., 'http://host:port')
+            max_failures: Consecutive failures before a proxy is evicted
+            cooldown: Seconds an evicted proxy sits out the first time
+            max_cooldown: Upper bound on the eviction period
+            sticky_ttl: Seconds a domain keeps its assigned proxy
+            default_latency: Latency assumed for proxies without measurements
+            rng: Random generator (seedable for tests)
+            clock: Monotonic clock function
+        """
+        self.max_failures = max_failures
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.sticky_ttl = sticky_ttl
+        self.default_latency = default_latency
+        self.rng = rng or random.Random()
+        self.clock = clock
+        self._proxies: Dict[str, ProxyStats] = {}
+        self._evictions: Dict[str, int] = {}
+        self._sticky: Dict[str, Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+        for proxy in proxies:
+            self.add(proxy)
+
+    @classmethod
+    def from_env(cls, default: Iterable[str] = (), **kwargs) -> "ProxyPool":
+        """Build a pool from the comma-separated PROXY_LIST variable, else `default`."""
+        proxies = [p.strip() for p in os.getenv("PROXY_LIST", "").split(",") if p.strip()]
+        return cls(proxies or default, **kwargs)
+
+    def add(self, proxy: str) -> None:
+        proxy = proxy.strip()
+        if proxy:
+            with self._lock:
+                self._proxies.setdefault(proxy, ProxyStats(url=proxy))
+
+    def __len__(self) -> int:
+        return len(self._proxies)
+
+    def healthy(self) -> List[str]:
+        """Proxies not currently evicted."""
+        now = self.clock()
+        return [p.url for p in self._proxies.values() if p.evicted_until <= now]
+
+    def weight(self, proxy: str) -> float:
+        stats = self._proxies[proxy]
+        latency = stats.ewma_latency if stats.ewma_latency is not None else self.default_latency
+        return stats.success_rate / max(latency, 0.05)
+
+    def acquire(self, domain: Optional[str] = None) -> Optional[str]:
+        """
+        Pick a proxy, reusing the domain's sticky proxy while it is healthy.
+
+        Returns:
+            Proxy URL, or None if every proxy is evicted (callers go direct)
+        """
+        with self._lock:
+            now = self.clock()
+            if domain and domain in self._sticky:
+                proxy, expires = self._sticky[domain]
+                stats = self._proxies.get(proxy)
+                if stats and expires > now and stats.evicted_until <= now:
+                    return proxy
+                del self._sticky[domain]
+
+            candidates = self.healthy()
+            if not candidates:
+                return None
+
+            proxy = self.rng.choices(candidates, weights=[self.weight(p) for p in candidates])[0]
+            if domain:
+                self._sticky[domain] = (proxy, now + self.sticky_ttl)
+            return proxy
+
+    def record_success(self, proxy: str, latency: Optional[float] = None) -> None:
+        with self._lock:
+            stats = self._proxies.get(proxy)
+            if not stats:
+                return
+            stats.successes += 1
+            stats.consecutive_failures = 0
+            self._evictions.pop(proxy, None)
+            if latency is not None:
+                stats.ewma_latency = latency if stats.ewma_latency is None \
+                    else 0.7 * stats.ewma_latency + 0.3 * latency
+
+    def record_failure(self, proxy: str, domain: Optional[str] = None) -> None:
+        """
+        Count a proxy failure, evicting the proxy after too many in a row.
+
+        Args:
+            proxy: Proxy URL that failed
+            domain: Domain being fetched; its sticky assignment is dropped so
+                the next attempt picks a different proxy
+        """
+        with self._lock:
+            if domain and self._sticky.get(domain, (None,))[0] == proxy:
+                del self._sticky[domain]
+            stats = self._proxies.get(proxy)
+            if not stats:
+                return
+            stats.failures += 1
+            stats.consecutive_failures += 1
+            if stats.consecutive_failures < self.max_failures:
+                return
+
+            evictions = self._evictions.get(proxy, 0)
+            self._evictions[proxy] = evictions + 1
+            period = min(self.cooldown * (2 ** evictions), self.max_cooldown)
+            stats.evicted_until = self.clock() + period
+            # Give it a single chance to prove itself when it comes back
+            stats.consecutive_failures = self.max_failures - 1
+            for sticky_domain in [d for d, (p, _) in self._sticky.items() if p == proxy]:
+                del self._sticky[sticky_domain]
+            logging.warning(f"Evicted proxy {proxy} for {period:.0f}s")
+
+    def check_all(self, probe: Callable[[str], float]) -> Dict[str, bool]:
+        """
+        Actively health-check every proxy.
+
+        Args:
+            probe: Function that fetches through the given proxy and returns
+                its latency, raising on failure
+
+        Returns:
+            Mapping of proxy URL to whether the probe succeeded
+        """
+        results = {}
+        for proxy in list(self._proxies):
+            try:
+                latency = probe(proxy)
+                self.record_success(proxy, latency)
+                results[proxy] = True
+            except Exception as e:
+                logging.debug(f"Proxy {proxy} failed health check: {str(e)}")
+                self.record_failure(proxy)
+                results[proxy] = False
+        return results
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        now = self.clock()
+        return {
+            p.url: {
+                "success_rate": round(p.success_rate, 3),
+                "ewma_latency": round(p.ewma_latency, 3) if p.ewma_latency is not None else None,
+                "successes": p.successes,
+                "failures": p.failures,
+                "evicted": p.evicted_until > now
+            }
+            for p in self._proxies.values()
+        }
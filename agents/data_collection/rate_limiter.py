@@ -0,0 +1,309 @@
+"""
+Per-host adaptive rate limiting shared by all fetchers in the process.
+Each host gets its own token bucket whose rate grows additively while the
+host answers quickly and shrinks multiplicatively on 429/503 responses or
+rising latency, bounded by the host's robots.txt crawl-delay. URLs that
+robots.txt disallows are refused.
+"""
+
+import os
+import time
+import asyncio
+import logging
+import threading
+import urllib.request
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+THROTTLE_STATUSES = frozenset({429, 503})
+
+class RobotsDisallowed(Exception):
+    """Raised when robots.txt disallows fetching a URL."""
+
+@dataclass
+class HostState:
+    """Token bucket and feedback state for one host."""
+    rate: float
+    tokens: float
+    updated: float
+    blocked_until: float = 0.0
+    crawl_delay: Optional[float] = None
+    ewma_latency: Optional[float] = None
+    requests: int = 0
+    throttled: int = 0
+    robots: Optional[RobotFileParser] = None
+    # Set once the first caller claims the robots.txt fetch; robots_ready
+    # once it has finished, so concurrent first callers wait for its result
+    robots_checked: bool = False
+    robots_ready: threading.Event = field(default_factory=threading.Event)
+
+class RateLimiter:
+    """
+    Per-host token-bucket limiter with AIMD rate adaptation.
+
+    Callers reserve a slot with acquire() (or acquire_async()) before each
+    request and report the outcome with record_response(). Reservations are
+    computed under a lock and the caller sleeps outside it, so many hosts
+    proceed in parallel while each host is paced independently.
+    """
+
+    def __init__(self,
+                 default_rate: float = 1.0,
+                 burst: float = 2.0,
+                 min_rate: float = 0.05,
+                 max_rate: float = 10.0,
+                 increase: float = 0.1,
+                 decrease: float = 0.5,
+                 latency_target: float = 2.0,
+                 default_backoff: float = 30.0,
+                 respect_robots: bool = True,
+                 user_agent: str = "*",
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            default_rate: Initial requests per second for a new host
+            burst: Bucket capacity (requests that may go out back to back)
+            min_rate: Lower bound on a host's rate
+            max_rate: Upper bound on a host's rate
+            increase: Requests/second added after each healthy response
+            decrease: Factor applied to the rate on throttling
+            latency_target: Seconds of smoothed latency above which the rate backs off
+            default_backoff: Pause in seconds after a 429/503 without Retry-After
+            respect_robots: Read robots.txt crawl-delay for each new host
+            user_agent: User agent matched against robots.txt rules
+            clock: Monotonic clock function
+        """
+        self.default_rate = default_rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_target = latency_target
+        self.default_backoff = default_backoff
+        self.respect_robots = respect_robots
+        self.user_agent = user_agent
+        self.clock = clock
+        self._hosts: Dict[str, HostState] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def host_of(url: str) -> str:
+        """Normalize a URL (or bare host) to the key used for rate limiting."""
+        parsed = urlparse(url if "//" in url else f"//{url}")
+        return (parsed.hostname or url).lower()
+
+    def _state(self, host: str) -> HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            state = HostState(rate=self.default_rate, tokens=self.burst, updated=self.clock())
+            self._hosts[host] = state
+        return state
+
+    def _max_rate_for(self, state: HostState) -> float:
+        if state.crawl_delay:
+            return min(self.max_rate, 1.0 / state.crawl_delay)
+        return self.max_rate
+
+    def reserve(self, url: str) -> float:
+        """
+        Reserve the next request slot for a URL's host.
+
+        Returns:
+            Seconds the caller must wait before sending the request
+        """
+        host = self.host_of(url)
+        with self._lock:
+            state = self._state(host)
+            now = self.clock()
+
+            state.tokens = min(self.burst, state.tokens + max(0.0, now - state.updated) * state.rate)
+            state.updated = max(now, state.updated)
+            state.tokens -= 1
+            state.requests += 1
+
+            # A negative balance is a queue of reservations; each waits its turn,
+            # counted from the end of any throttling block
+            wait = 0.0 if state.tokens >= 0 else -state.tokens / state.rate
+            return state.updated - now + wait
+
+    def acquire(self, url: str) -> float:
+        """
+        Block until a request to the URL's host is allowed.
+
+        Returns:
+            Seconds waited
+
+        Raises:
+            RobotsDisallowed: If robots.txt disallows the URL
+        """
+        if self.respect_robots:
+            self._ensure_robots(url)
+            self._check_allowed(url)
+        wait = self.reserve(url)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, url: str) -> float:
+        """Asynchronous acquire(); robots.txt is fetched in a worker thread."""
+        if self.respect_robots:
+            if not self._state_checked(url):
+                await asyncio.get_running_loop().run_in_executor(None, self._ensure_robots, url)
+            self._check_allowed(url)
+        wait = self.reserve(url)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def record_response(self, url: str,
+                        status: Optional[int],
+                        latency: Optional[float] = None,
+                        retry_after: Optional[str] = None,
+                        proxy_error: bool = False) -> None:
+        """
+        Adapt the host's rate to a response.
+
+        Args:
+            url: Requested URL
+            status: HTTP status, or None for a connection error/timeout
+            latency: Seconds the request took
+            retry_after: Raw Retry-After header value, if any
+            proxy_error: The request failed at the proxy, so the outcome
+                says nothing about the host and its rate is left alone
+        """
+        if proxy_error:
+            return
+        host = self.host_of(url)
+        with self._lock:
+            state = self._state(host)
+            now = self.clock()
+
+            if latency is not None:
+                state.ewma_latency = latency if state.ewma_latency is None \
+                    else 0.8 * state.ewma_latency + 0.2 * latency
+
+            if status in THROTTLE_STATUSES:
+                state.throttled += 1
+                pause = _parse_retry_after(retry_after)
+                state.blocked_until = max(state.blocked_until,
+                                          now + (pause if pause is not None else self.default_backoff))
+                # Refill stops until the block ends, so callers queued meanwhile
+                # resume one probe at a time at the new rate instead of as a burst
+                state.tokens = min(1.0, state.tokens + max(0.0, now - state.updated) * state.rate)
+                state.updated = max(state.updated, state.blocked_until)
+                state.rate = max(self.min_rate, state.rate * self.decrease)
+                logging.warning(f"{host} throttled ({status}); rate now {state.rate:.2f}/s")
+            elif status is None or status >= 500:
+                state.rate = max(self.min_rate, state.rate * 0.8)
+            elif state.ewma_latency is not None and state.ewma_latency > self.latency_target:
+                # Server is slowing down: back off before it starts refusing
+                state.rate = max(self.min_rate, state.rate * 0.9)
+            else:
+                state.rate = min(self._max_rate_for(state), state.rate + self.increase)
+
+    def set_crawl_delay(self, url: str, delay: Optional[float]) -> None:
+        """Cap a host's rate at one request per `delay` seconds."""
+        with self._lock:
+            state = self._state(self.host_of(url))
+            state.crawl_delay = delay
+            if delay:
+                state.rate = min(state.rate, 1.0 / delay)
+
+    def can_fetch(self, url: str) -> bool:
+        """Check robots.txt rules for a URL (allowed if robots.txt is unavailable)."""
+        state = self._hosts.get(self.host_of(url))
+        if state is None or state.robots is None:
+            return True
+        return state.robots.can_fetch(self.user_agent, url)
+
+    def _check_allowed(self, url: str) -> None:
+        if not self.can_fetch(url):
+            raise RobotsDisallowed(f"robots.txt disallows {url}")
+
+    def _state_checked(self, url: str) -> bool:
+        state = self._hosts.get(self.host_of(url))
+        return state is not None and state.robots_ready.is_set()
+
+    def _ensure_robots(self, url: str, timeout: float = 5.0) -> None:
+        """Fetch robots.txt once per host and apply its crawl-delay and rules."""
+        host = self.host_of(url)
+        with self._lock:
+            state = self._state(host)
+            fetching = not state.robots_checked
+            state.robots_checked = True
+        if not fetching:
+            # Another caller is fetching it; reserve only once its crawl-delay applies
+            state.robots_ready.wait(timeout + 1.0)
+            return
+
+        try:
+            parsed = urlparse(url)
+            robots_url = f"{parsed.scheme or 'https'}://{parsed.netloc or host}/robots.txt"
+            try:
+                with urllib.request.urlopen(robots_url, timeout=timeout) as response:
+                    lines = response.read().decode("utf-8", errors="ignore").splitlines()
+            except Exception as e:
+                logging.debug(f"No robots.txt for {host}: {str(e)}")
+                return
+
+            parser = RobotFileParser(robots_url)
+            parser.parse(lines)
+            delay = parser.crawl_delay(self.user_agent)
+            with self._lock:
+                state.robots = parser
+            if delay:
+                logging.info(f"{host} robots.txt crawl-delay: {delay}s")
+                self.set_crawl_delay(url, float(delay))
+        finally:
+            state.robots_ready.set()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Current rate, latency and throttle counts per host."""
+        with self._lock:
+            return {
+                host: {
+                    "rate": round(state.rate, 3),
+                    "ewma_latency": round(state.ewma_latency, 3) if state.ewma_latency is not None else None,
+                    "crawl_delay": state.crawl_delay,
+                    "requests": state.requests,
+                    "throttled": state.throttled
+                }
+                for host, state in self._hosts.items()
+            }
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given in seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+def get_rate_limiter() -> RateLimiter:
+    """
+    Get the process-wide rate limiter.
+
+    SCRAPER_DEFAULT_RPS, SCRAPER_MAX_RPS and SCRAPER_RESPECT_ROBOTS configure
+    it on first use.
+    """
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter(
+                default_rate=float(os.getenv("SCRAPER_DEFAULT_RPS", "1.0")),
+                max_rate=float(os.getenv("SCRAPER_MAX_RPS", "10.0")),
+                respect_robots=os.getenv("SCRAPER_RESPECT_ROBOTS", "true").lower() == "true"
+            )
+        return _limiter
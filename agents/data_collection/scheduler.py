@@ -1,36 +1,123 @@
 """
 Smart scheduler for data collection jobs.
-Handles job scheduling, retries, and error tracking.
+Handles job scheduling, retries, and error tracking, plus an adaptive mode
+that polls categories according to how often their prices change and a
+producer mode that hands collections to queue workers on other nodes.
 """
 
 import json
+import time
 import logging
+import threading
+from dataclasses import dataclass, asdict
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, List, Optional
 from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.executors.pool import ThreadPoolExecutor
 from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.interval import IntervalTrigger
-from apscheduler.events import EVENT_JOB_ERROR, EVENT_JOB_EXECUTED
+from apscheduler.events import (
+    EVENT_JOB_ERROR, EVENT_JOB_EXECUTED, EVENT_JOB_MAX_INSTANCES, EVENT_JOB_MISSED, EVENT_JOB_SUBMITTED
+)
 
 from .collector import collect_data, save_data
+from .freshness import FreshnessTracker
+from .job_queue import JobQueue, Worker, get_job_queue
+
+REBALANCE_JOB_ID = "_freshness_rebalance"
+
+# Defaults for the optional "execution" config block
+EXECUTION_DEFAULTS = {
+    "max_workers": 4,
+    "max_instances": 1,
+    "coalesce": True,
+    "misfire_grace_seconds": 300,
+    "jitter_seconds": 30
+}
+
+@dataclass
+class JobMetrics:
+    """Run statistics for one scheduled job."""
+    runs: int = 0
+    failures: int = 0
+    skipped_overlap: int = 0
+    missed: int = 0
+    last_lag_seconds: float = 0.0
+    max_lag_seconds: float = 0.0
+    last_duration_seconds: float = 0.0
+    max_duration_seconds: float = 0.0
+
+# Defaults for the optional "adaptive" config block
+ADAPTIVE_DEFAULTS = {
+    "fetches_per_hour": 20,
+    "min_interval_minutes": 15,
+    "max_interval_minutes": 1440,
+    "polls_per_change": 4,
+    "rebalance_minutes": 30,
+    "state_path": "data/freshness.json"
+}
+
+# Defaults for the optional "queue" config block
+QUEUE_DEFAULTS = {
+    "enabled": False,
+    "name": "collection",
+    "visibility_timeout": 600,
+    "max_attempts": 5,
+    "retry_backoff_seconds": 60
+}
 
 class SmartScheduler:
-    def __init__(self, config_path: str, output_path: str = "data/raw"):
+    def __init__(self, config_path: str, output_path: str = "data/raw",
+                 clock: Callable[[], float] = time.monotonic):
         """
         Initialize scheduler with configuration.
         
         Args:
             config_path: Path to scheduler config JSON
             output_path: Directory to save collected data
+            clock: Monotonic clock used to time job runs
         """
         self.output_path = output_path
+        self.clock = clock
         self.config = self._load_config(config_path)
-        self.scheduler = BackgroundScheduler()
         self.error_counts: Dict[str, int] = {}
         
+        # Sized pool; a job still running when its next run is due is skipped,
+        # and runs missed while the process was busy collapse into one
+        self.execution_config = {**EXECUTION_DEFAULTS, **self.config.get("execution", {})}
+        self.scheduler = BackgroundScheduler(
+            executors={"default": ThreadPoolExecutor(self.execution_config["max_workers"])},
+            job_defaults={
+                "coalesce": self.execution_config["coalesce"],
+                "max_instances": self.execution_config["max_instances"],
+                "misfire_grace_time": self.execution_config["misfire_grace_seconds"]
+            }
+        )
+        self.metrics: Dict[str, JobMetrics] = {}
+        self._run_started: Dict[str, float] = {}
+        
+        # Adaptive jobs: learned change rates decide their intervals
+        self.adaptive_config = {**ADAPTIVE_DEFAULTS, **self.config.get("adaptive", {})}
+        self.freshness = FreshnessTracker(self.adaptive_config["state_path"])
+        self.adaptive_intervals: Dict[str, float] = {}
+        
+        # Producer mode: scheduled runs are queued for workers instead of run here
+        self.queue_config = {**QUEUE_DEFAULTS, **self.config.get("queue", {})}
+        self.job_queue: Optional[JobQueue] = None
+        if self.queue_config["enabled"]:
+            self.job_queue = get_job_queue(
+                self.queue_config["name"],
+                visibility_timeout=self.queue_config["visibility_timeout"],
+                max_attempts=self.queue_config["max_attempts"],
+                backoff_base=self.queue_config["retry_backoff_seconds"]
+            )
+        
         # Configure error handling
         self.scheduler.add_listener(self._handle_job_event, 
                                   EVENT_JOB_ERROR | EVENT_JOB_EXECUTED)
+        self.scheduler.add_listener(self._record_metrics,
+                                  EVENT_JOB_SUBMITTED | EVENT_JOB_EXECUTED | EVENT_JOB_ERROR
+                                  | EVENT_JOB_MISSED | EVENT_JOB_MAX_INSTANCES)
         
     def _load_config(self, path: str) -> Dict[str, Any]:
         """Load and validate scheduler configuration."""
@@ -79,6 +166,39 @@ class SmartScheduler:
             # Reset error count on successful execution
             self.error_counts.pop(job_id, None)
             
+    def _record_metrics(self, event):
+        """Track start lag, duration, overlaps and missed runs per job."""
+        metrics = self.metrics.setdefault(event.job_id, JobMetrics())
+        
+        if event.code == EVENT_JOB_SUBMITTED:
+            scheduled = event.scheduled_run_times[-1]
+            lag = max((datetime.now(scheduled.tzinfo) - scheduled).total_seconds(), 0.0)
+            metrics.last_lag_seconds = lag
+            metrics.max_lag_seconds = max(metrics.max_lag_seconds, lag)
+            self._run_started[event.job_id] = self.clock()
+            
+        elif event.code in (EVENT_JOB_EXECUTED, EVENT_JOB_ERROR):
+            metrics.runs += 1
+            if event.code == EVENT_JOB_ERROR:
+                metrics.failures += 1
+            started = self._run_started.pop(event.job_id, None)
+            if started is not None:
+                duration = self.clock() - started
+                metrics.last_duration_seconds = duration
+                metrics.max_duration_seconds = max(metrics.max_duration_seconds, duration)
+                
+        elif event.code == EVENT_JOB_MAX_INSTANCES:
+            metrics.skipped_overlap += 1
+            logging.warning(f"Job {event.job_id} still running, skipped this run")
+            
+        elif event.code == EVENT_JOB_MISSED:
+            metrics.missed += 1
+            logging.warning(f"Job {event.job_id} missed its run at {event.scheduled_run_time}")
+            
+    def get_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Per-job run statistics (lag, duration, overlaps, missed runs)."""
+        return {job_id: asdict(metrics) for job_id, metrics in self.metrics.items()}
+        
     def add_collection_job(self, 
                           competitor: str,
                           category: str,
@@ -89,7 +209,9 @@ class SmartScheduler:
         Args:
             competitor: Competitor name
             category: Product category
-            schedule: Schedule configuration with type and params
+            schedule: Schedule configuration with type ('cron', 'interval' or
+                'adaptive') and params; adaptive jobs take an optional
+                'initial_minutes' guess of how often prices change
             
         Returns:
             Job ID if successfully added, None otherwise
@@ -98,10 +220,17 @@ class SmartScheduler:
             job_id = f"{competitor}_{category}"
             
             # Create trigger based on schedule type
+            # Jitter spreads jobs sharing a schedule so they don't all hit at once
+            jitter = schedule.get("jitter_seconds", self.execution_config["jitter_seconds"]) or None
             if schedule["type"] == "cron":
-                trigger = CronTrigger(**schedule["params"])
+                trigger = CronTrigger(jitter=jitter, **schedule["params"])
             elif schedule["type"] == "interval":
-                trigger = IntervalTrigger(**schedule["params"])
+                trigger = IntervalTrigger(jitter=jitter, **schedule["params"])
+            elif schedule["type"] == "adaptive":
+                interval = schedule.get("params", {}).get("initial_minutes", 60) * 60
+                self.freshness.register(job_id, interval)
+                self.adaptive_intervals[job_id] = interval
+                trigger = IntervalTrigger(seconds=interval, jitter=jitter)
             else:
                 raise ValueError(f"Invalid schedule type: {schedule['type']}")
                 
@@ -116,6 +245,10 @@ class SmartScheduler:
             )
             
             logging.info(f"Added collection job: {job_id}")
+            
+            if schedule["type"] == "adaptive":
+                self._ensure_rebalance_job()
+                self.rebalance()
             return job_id
             
         except Exception as e:
@@ -123,11 +256,119 @@ class SmartScheduler:
             return None
             
     def _run_collection(self, competitor: str, category: str):
-        """Execute collection job with output handling."""
-        data = collect_data(competitor, category)
+        """Execute collection job with output handling, or queue it in producer mode."""
+        if self.job_queue:
+            # Keyed by job so a category is never queued twice while pending
+            job_key = f"{competitor}_{category}"
+            # Workers never schedule adaptive jobs themselves, so tell them to record freshness
+            payload = {"competitor": competitor, "category": category,
+                       "adaptive": job_key in self.adaptive_intervals}
+            if self.job_queue.submit(payload, key=job_key):
+                logging.info(f"Queued collection job: {job_key}")
+            return
+            
+        self._collect(competitor, category)
+        
+    def _collect(self, competitor: str, category: str, adaptive: bool = False,
+                 raise_errors: bool = False) -> List[Dict[str, Any]]:
+        data = collect_data(competitor, category, raise_errors=raise_errors)
         if data:
             save_data(data, self.output_path, competitor, category)
             
+            job_id = f"{competitor}_{category}"
+            if adaptive or job_id in self.adaptive_intervals:
+                changed = self.freshness.observe(job_id, data)
+                logging.info(f"{job_id}: prices {'changed' if changed else 'unchanged'} since last collection")
+        return data
+        
+    def process_job(self, payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Queue handler: run one collection on a worker node.
+        
+        An empty collection is a valid result (e.g. a category with nothing
+        listed) and completes the job. Collection errors propagate so the
+        queue fails the lease and retries or dead-letters the job.
+        """
+        data = self._collect(payload["competitor"], payload["category"], payload.get("adaptive", False),
+                             raise_errors=True)
+        if not data:
+            logging.warning(f"No products collected for {payload['competitor']}/{payload['category']}")
+        return data
+            
+    def run_workers(self, count: int = 1, stop_event: Optional[threading.Event] = None) -> List[threading.Thread]:
+        """
+        Start queue workers in background threads.
+        
+        Args:
+            count: Number of worker threads on this node
+            stop_event: Event that stops the workers when set
+            
+        Returns:
+            Started worker threads
+        """
+        if not self.job_queue:
+            raise ValueError("Queue mode is not enabled in the scheduler config")
+            
+        threads = []
+        for _ in range(count):
+            worker = Worker(self.job_queue, self.process_job)
+            thread = threading.Thread(target=worker.run, args=(stop_event,), name=worker.worker_id, daemon=True)
+            thread.start()
+            threads.append(thread)
+        logging.info(f"Started {count} collection workers")
+        return threads
+                
+    def _ensure_rebalance_job(self):
+        """Periodically re-split the fetch budget as change rates are learned."""
+        if not self.scheduler.get_job(REBALANCE_JOB_ID):
+            self.scheduler.add_job(
+                func=self.rebalance,
+                trigger=IntervalTrigger(minutes=self.adaptive_config["rebalance_minutes"]),
+                id=REBALANCE_JOB_ID,
+                name="Rebalance adaptive collection intervals"
+            )
+            
+    def rebalance(self) -> Dict[str, float]:
+        """
+        Recompute adaptive job intervals from learned change rates.
+        
+        Volatile categories get shorter intervals and stable ones longer,
+        with the total staying within the hourly fetch budget. No job is
+        polled more than `polls_per_change` times per expected change, so
+        spare budget is left unspent. A job is rescheduled when its interval
+        grows, or shrinks by more than 10%.
+        
+        Returns:
+            Interval in seconds per adaptive job
+        """
+        if self.job_queue:
+            # Workers record observations in the shared state file
+            self.freshness.refresh()
+        intervals = self.freshness.intervals(
+            list(self.adaptive_intervals),
+            fetches_per_hour=self.adaptive_config["fetches_per_hour"],
+            min_interval=self.adaptive_config["min_interval_minutes"] * 60,
+            max_interval=self.adaptive_config["max_interval_minutes"] * 60,
+            polls_per_change=self.adaptive_config["polls_per_change"]
+        )
+        
+        for job_id, interval in intervals.items():
+            current = self.adaptive_intervals[job_id]
+            # Longer intervals always apply so the total stays within budget
+            if (current - 0.1 * current <= interval <= current) or not self.scheduler.get_job(job_id):
+                continue
+                
+            # Keep the time already waited instead of restarting the interval
+            history = self.freshness.history[job_id]
+            last = history.last_checked or datetime.now().timestamp()
+            next_run = max(datetime.fromtimestamp(last + interval), datetime.now())
+            trigger = IntervalTrigger(seconds=interval, jitter=self.execution_config["jitter_seconds"] or None)
+            self.scheduler.modify_job(job_id, trigger=trigger, next_run_time=next_run)
+            self.adaptive_intervals[job_id] = interval
+            logging.info(f"Rescheduled {job_id} every {interval / 60:.0f} minutes")
+            
+        return intervals
+            
     def start(self):
         """Start the scheduler."""
         if not self.scheduler.running:
@@ -0,0 +1,297 @@
+"""
+Structured-data extraction for product listings.
+Reads JSON-LD, OpenGraph product tags and embedded hydration state before
+any DOM traversal, since these are faster to read and survive redesigns.
+"""
+
+import re
+import json
+import math
+import logging
+from collections import deque
+from typing import List, Dict, Any, Callable, Optional, Iterator, Tuple
+from urllib.parse import urljoin
+
+from .browser import SiteProfile, get_site_profile
+from .parsing import Marker, count_markers
+
+JSON_LD_RE = re.compile(
+    r'<script[^>]+type=["\']application/ld\+json["\'][^>]*>(.*?)</script>',
+    re.IGNORECASE | re.DOTALL
+)
+META_TAG_RE = re.compile(r'<meta\s[^>]*>', re.IGNORECASE)
+META_ATTR_RE = re.compile(r'([a-zA-Z:_-]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\')')
+NEXT_DATA_RE = re.compile(
+    r'<script[^>]+id=["\']__NEXT_DATA__["\'][^>]*>(.*?)</script>',
+    re.IGNORECASE | re.DOTALL
+)
+# window.pageData (Daraz), window.__INITIAL_STATE__ (Vue/React SSR) and similar
+STATE_ASSIGNMENT_RE = re.compile(
+    r'window\.(?:pageData|__INITIAL_STATE__|__PRELOADED_STATE__|__NUXT__|__APOLLO_STATE__)\s*=\s*'
+)
+
+NAME_KEYS = ("name", "title", "productName", "product_name")
+PRICE_KEYS = ("price", "salePrice", "sellingPrice", "finalPrice", "priceShow", "lowPrice")
+URL_KEYS = ("url", "productUrl", "itemUrl", "link", "slug")
+
+# Guards against walking huge state blobs
+MAX_STATE_NODES = 50000
+
+STRATEGIES = ("json_ld", "opengraph", "embedded_state")
+
+# On listing pages structured data must cover this share of the DOM grid
+MIN_LISTING_COVERAGE = 0.8
+
+def extract_structured_products(html: str,
+                                base_url: str,
+                                profile: Optional[SiteProfile] = None,
+                                min_items: int = 1) -> List[Dict[str, Any]]:
+    """
+    Extract products from structured data, trying the site's best strategy first.
+
+    Args:
+        html: Raw HTML content
+        base_url: Site base URL for resolving relative product links
+        profile: Site profile whose strategy history orders the attempts;
+            the winning strategy is recorded on it
+        min_items: Fewest products a strategy must yield to be used
+
+    Returns:
+        List of partial product dictionaries (name, price, currency, in_stock,
+        url, promotion, brand); empty if no structured data was usable
+    """
+    order = profile.preferred_strategies(STRATEGIES) if profile else STRATEGIES
+    for strategy in order:
+        try:
+            items = EXTRACTORS[strategy](html)
+        except Exception as e:
+            logging.warning(f"Structured extraction '{strategy}' failed: {str(e)}")
+            continue
+
+        products = [_normalize(item, base_url) for item in items]
+        products = [p for p in products if p is not None]
+        if not products:
+            continue
+        if len(products) < min_items:
+            logging.info(f"Ignoring {len(products)} {strategy} products: expected at least {min_items}")
+            continue
+
+        logging.info(f"Extracted {len(products)} products via {strategy}")
+        if profile:
+            profile.record_strategy(strategy)
+        return products
+
+    return []
+
+def extract_listing_products(html: str,
+                             category: str,
+                             competitor: str,
+                             base_url: str,
+                             parse_dom: Callable[[str, str], List[Dict[str, Any]]],
+                             extract_unit: Callable[[str], Optional[str]],
+                             extract_brand: Callable[[str], Optional[str]],
+                             card_marker: Marker,
+                             grid_end: Optional[Marker] = None) -> List[Dict[str, Any]]:
+    """
+    Extract a category listing's products, preferring structured data.
+
+    Structured results are only used when they cover the product grid (at
+    least MIN_LISTING_COVERAGE of its cards), so a lone OpenGraph tag or a
+    stray JSON-LD Product on a listing page cannot replace the grid or
+    become the site's preferred strategy. Cards are counted by scanning for
+    `card_marker`, so the grid is only parsed when structured data falls short.
+
+    Args:
+        html: Raw HTML content
+        category: Product category being scraped
+        competitor: Competitor name, also the site profile name
+        base_url: Site base URL for resolving relative product links
+        parse_dom: The competitor's HTML grid parser
+        extract_unit: The competitor's unit parser
+        extract_brand: The competitor's brand parser
+        card_marker: Marker for one product card (see parsing.class_marker)
+        grid_end: Marker for the end of the grid
+
+    Returns:
+        List of standardized product dictionaries
+    """
+    profile = get_site_profile(competitor)
+    grid_size = count_markers(html, card_marker, grid_end)
+    items = extract_structured_products(html, base_url, profile,
+                                        min_items=max(1, math.ceil(MIN_LISTING_COVERAGE * grid_size)))
+
+    if not items:
+        profile.record_strategy("dom")
+        return parse_dom(html, category)
+
+    return [{
+        **item,
+        "category": category,
+        "competitor": competitor,
+        "unit": extract_unit(item["name"]),
+        "brand": item["brand"] or extract_brand(item["name"])
+    } for item in items]
+
+def extract_json_ld(html: str) -> List[Dict[str, Any]]:
+    """Collect Product nodes from all JSON-LD script blocks."""
+    items = []
+    for block in JSON_LD_RE.findall(html):
+        try:
+            data = json.loads(block.strip())
+        except json.JSONDecodeError:
+            continue
+        items.extend(_iter_json_ld_products(data))
+    return items
+
+def extract_opengraph(html: str) -> List[Dict[str, Any]]:
+    """Read a single product from OpenGraph / product:* meta tags."""
+    meta = {}
+    for tag in META_TAG_RE.findall(html):
+        attrs = {k.lower(): a or b for k, a, b in META_ATTR_RE.findall(tag)}
+        key = attrs.get("property") or attrs.get("name")
+        if key and "content" in attrs:
+            meta.setdefault(key.lower(), attrs["content"])
+
+    price = meta.get("product:price:amount") or meta.get("og:price:amount")
+    name = meta.get("og:title")
+    if not price or not name:
+        return []
+
+    return [{
+        "name": name,
+        "price": price,
+        "currency": meta.get("product:price:currency") or meta.get("og:price:currency"),
+        "availability": meta.get("product:availability") or meta.get("og:availability"),
+        "url": meta.get("og:url"),
+        "brand": meta.get("product:brand")
+    }]
+
+def extract_embedded_state(html: str) -> List[Dict[str, Any]]:
+    """Find product-like objects in embedded hydration JSON."""
+    states = []
+
+    match = NEXT_DATA_RE.search(html)
+    if match:
+        try:
+            states.append(json.loads(match.group(1)))
+        except json.JSONDecodeError:
+            pass
+
+    decoder = json.JSONDecoder()
+    for match in STATE_ASSIGNMENT_RE.finditer(html):
+        try:
+            state, _ = decoder.raw_decode(html, match.end())
+            states.append(state)
+        except json.JSONDecodeError:
+            continue
+
+    items = []
+    for state in states:
+        items.extend(_iter_product_like(state))
+    return items
+
+EXTRACTORS = {
+    "json_ld": extract_json_ld,
+    "opengraph": extract_opengraph,
+    "embedded_state": extract_embedded_state
+}
+
+def _iter_json_ld_products(data: Any) -> Iterator[Dict[str, Any]]:
+    """Walk JSON-LD graphs, lists and ItemLists yielding Product nodes."""
+    if isinstance(data, list):
+        for node in data:
+            yield from _iter_json_ld_products(node)
+        return
+    if not isinstance(data, dict):
+        return
+
+    node_type = data.get("@type")
+    types = node_type if isinstance(node_type, list) else [node_type]
+
+    if "Product" in types:
+        offers = data.get("offers") or {}
+        if isinstance(offers, list):
+            offers = offers[0] if offers else {}
+        brand = data.get("brand")
+        yield {
+            "name": data.get("name"),
+            "price": offers.get("price", offers.get("lowPrice")),
+            "currency": offers.get("priceCurrency"),
+            "availability": offers.get("availability"),
+            "url": data.get("url") or offers.get("url"),
+            "brand": brand.get("name") if isinstance(brand, dict) else brand
+        }
+        return
+
+    if "@graph" in data:
+        yield from _iter_json_ld_products(data["@graph"])
+    if "ItemList" in types:
+        for element in data.get("itemListElement", []):
+            if isinstance(element, dict):
+                yield from _iter_json_ld_products(element.get("item", element))
+
+def _iter_product_like(state: Any) -> Iterator[Dict[str, Any]]:
+    """Breadth-first walk of a state blob yielding dicts with a name and a price."""
+    queue = deque([state])
+    visited = 0
+
+    while queue and visited < MAX_STATE_NODES:
+        node = queue.popleft()
+        visited += 1
+
+        if isinstance(node, list):
+            queue.extend(node)
+            continue
+        if not isinstance(node, dict):
+            continue
+
+        name = next((node[k] for k in NAME_KEYS if isinstance(node.get(k), str)), None)
+        price = next((node[k] for k in PRICE_KEYS if node.get(k) not in (None, "")), None)
+        if name and price is not None and not isinstance(price, (dict, list)):
+            in_stock = node.get("inStock", node.get("in_stock"))
+            brand = node.get("brandName") or node.get("brand")
+            yield {
+                "name": name,
+                "price": price,
+                "currency": node.get("currency"),
+                "availability": None if in_stock is None else ("InStock" if in_stock else "OutOfStock"),
+                "url": next((node[k] for k in URL_KEYS if isinstance(node.get(k), str)), None),
+                "brand": brand if isinstance(brand, str) else None
+            }
+            continue
+
+        queue.extend(v for v in node.values() if isinstance(v, (dict, list)))
+
+def _normalize(item: Dict[str, Any], base_url: str) -> Optional[Dict[str, Any]]:
+    """Convert a raw structured item into standardized product fields."""
+    name = (item.get("name") or "").strip()
+    price = _to_price(item.get("price"))
+    if not name or price is None:
+        return None
+
+    availability = str(item.get("availability") or "")
+    url = item.get("url")
+
+    return {
+        "name": name,
+        "price": price,
+        "currency": item.get("currency") or "BDT",
+        # Listings usually omit availability; treat missing as in stock
+        "in_stock": "OutOfStock" not in availability and "SoldOut" not in availability,
+        "url": urljoin(base_url, url) if url else base_url,
+        "promotion": None,
+        "brand": item.get("brand") or None
+    }
+
+def _to_price(value: Any) -> Optional[float]:
+    """Parse a structured price value (number or formatted string)."""
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value) if value > 0 else None
+
+    match = re.search(r"\d[\d,]*\.?\d*", str(value))
+    if not match:
+        return None
+    price = float(match.group(0).replace(",", ""))
+    return price if price > 0 else None
@@ -1,13 +1,29 @@
 import os
 import time
+from typing import Any, Dict, List, Tuple
 from .scraper import scrape_product_data
-from .tracker import detect_changes
+from .tracker import get_change_detector
 from .alert import send_alert
-from .utils import store_snapshot
+from .alert_engine import AlertEngine
+from .utils import store_snapshot, load_latest_snapshot
 
 # Default monitoring interval if not set by environment variable
 DEFAULT_MONITOR_INTERVAL = 600  # seconds (10 minutes)
 
+def _scrape(target_url: str) -> Tuple[List[Dict[str, Any]], bool]:
+    """
+    Scrape the target and tell whether the listing is complete.
+
+    scrape_product_data may return (items, complete); a bare list of items
+    gives no such guarantee (timeouts or pagination failures can cut it
+    short), so it is treated as partial.
+    """
+    result = scrape_product_data(target_url)
+    if isinstance(result, tuple):
+        items, complete = result
+        return items or [], bool(complete)
+    return result or [], False
+
 def run_agent(target_url: str, alert_method: str, monitor_interval: int):
     print(f"[Agent] Starting Apon rival monitor for URL: {target_url}")
     print(f"[Agent] Alert method: {alert_method}, Monitoring interval: {monitor_interval}s")
@@ -16,36 +32,48 @@ def run_agent(target_url: str, alert_method: str, monitor_interval: int):
         print("[Agent] Error: TARGET_URL is not set. Agent cannot start.")
         return
 
-    while True:
-        print(f"--- Agent Cycle Start ({time.strftime('%Y-%m-%d %H:%M:%S')}) ---")
-        print(f"[Agent] Scraping competitor data from {target_url}...")
-        current_data = scrape_product_data(target_url)
-
-        if not current_data:
-            print("[Agent] No data scraped. Skipping rest of the cycle.")
-        else:
-            print(f"[Agent] Scraped {len(current_data)} items. Storing snapshot...")
-            # Assuming site name can be derived or is fixed for the target_url context
-            # For simplicity, using "competitor" as the site name for snapshot storage
-            store_snapshot("competitor", current_data)
+    # Changes are diffed on the detector's thread and alerts go out as soon
+    # as each scrape is handed over, without waiting for the cycle to finish.
+    # The alert engine drops repeats and small moves and digests the rest.
+    engine = AlertEngine.from_env(send_alert, channels=alert_method.split(","))
+    engine.start()
+    detector = get_change_detector()
+    if not detector.knows("competitor"):
+        snapshot = load_latest_snapshot("competitor")
+        if snapshot:
+            detector.prime("competitor", snapshot)
+    detector.subscribe(engine.submit)
+    detector.start()
 
-            print("[Agent] Detecting changes...")
-            # The 'site' parameter for detect_changes matches the one used for store_snapshot
-            result = detect_changes(current_data, site="competitor")
-            changes = result.get("changes", []) # Ensure changes is always a list
+    try:
+        while True:
+            print(f"--- Agent Cycle Start ({time.strftime('%Y-%m-%d %H:%M:%S')}) ---")
+            print(f"[Agent] Scraping competitor data from {target_url}...")
+            current_data, complete = _scrape(target_url)
 
-            if result.get("changes_detected"):
-                print(f"[Agent] {len(changes)} change(s) detected. Processing...")
-                for change in changes:
-                    # Ensure the 'change' dictionary has all necessary info for alerts
-                    # The updated tracker.py should provide this.
-                    send_alert(change, method=alert_method)
+            if not current_data:
+                print("[Agent] No data scraped. Skipping rest of the cycle.")
+            elif not detector.knows("competitor"):
+                # Nothing to compare against yet: the first scrape is the baseline, not news
+                print(f"[Agent] Scraped {len(current_data)} items. Recording initial data...")
+                detector.prime("competitor", current_data)
+                store_snapshot("competitor", current_data)
             else:
-                print("[Agent] No changes detected.")
+                print(f"[Agent] Scraped {len(current_data)} items. Detecting changes...")
+                # Site name "competitor" is used for both change state and snapshot storage.
+                # Only a full listing may mark missing products as delisted.
+                detector.submit("competitor", current_data, complete=complete)
+
+                print("[Agent] Storing snapshot...")
+                store_snapshot("competitor", current_data)
         
-        print(f"[Agent] Cycle finished. Waiting for {monitor_interval} seconds...")
-        print("--- Agent Cycle End ---")
-        time.sleep(monitor_interval)
+            print(f"[Agent] Cycle finished. Waiting for {monitor_interval} seconds...")
+            print("--- Agent Cycle End ---")
+            time.sleep(monitor_interval)
+    finally:
+        # Drain pending batches into the engine, then send any open digests
+        detector.stop()
+        engine.stop()
 
 if __name__ == "__main__":
     print("[Agent Main] Initializing agent...")
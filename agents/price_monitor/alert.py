@@ -43,6 +43,9 @@ def send_console_alert(change_info: Dict[str, Any]) -> None:
         print(f"    Old Stock Status (In Stock?): {old_value}, New Stock Status (In Stock?): {new_value}")
     elif change_type == "delivery_time":
         print(f"    Old Delivery: {old_value}, New Delivery: {new_value}")
+    elif change_type == "digest":
+        for line in str(new_value).splitlines():
+            print(f"    - {line}")
     else: # Generic display for other change types
         print(f"    Old Value: {old_value}, New Value: {new_value}")
         
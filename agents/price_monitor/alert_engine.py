@@ -0,0 +1,302 @@
+"""
+Alert engine between change detection and delivery.
+Decides which change events are worth an alert: repeated values within a
+dedup window are dropped, price moves need to clear a threshold (and a wider
+band to reverse direction), and each channel is rate limited, with overflow
+and low-priority changes grouped into periodic digests.
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DIGEST = "digest"
+DEFAULT_DIGEST_TYPES = ("delivery_time", "new_product", "delisted")
+
+@dataclass
+class TokenBucket:
+    """Allows `rate` alerts per `per` seconds with bursts up to `rate`"""
+    rate: float
+    per: float
+    tokens: float = -1.0
+    updated: float = 0.0
+
+    def take(self, now: float) -> bool:
+        if self.tokens < 0:
+            self.tokens, self.updated = self.rate, now
+        self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate / self.per)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+@dataclass
+class EngineStats:
+    received: int = 0
+    sent: int = 0
+    deduplicated: int = 0
+    below_threshold: int = 0
+    digested: int = 0
+    digests_sent: int = 0
+
+@dataclass
+class Digest:
+    opened: float
+    changes: List[Dict[str, Any]] = field(default_factory=list)
+
+def _percent(old: float, new: float) -> float:
+    return (new - old) / old * 100 if old else 0.0
+
+class AlertEngine:
+    """
+    Filters, throttles and groups change alerts per channel.
+
+    Args:
+        sender: Called as sender(alert, channel), e.g. alert.send_alert
+        channels: Channel names passed to the sender
+        threshold_percent: Minimum price move from the last alerted price
+        hysteresis_percent: Extra move required when the price reverses
+            direction, so a price hovering around a level alerts once
+        dedup_window: Seconds during which the same value for the same
+            product and change type is not alerted again
+        rate_limits: {channel: (alerts, per_seconds)} immediate alert budget
+        digest_window: Seconds to collect digested changes before sending
+        digest_types: Change types that always go into the digest
+        state_path: JSON checkpoint of references, dedup keys and digests
+        checkpoint_interval: Minimum seconds between checkpoints
+    """
+
+    def __init__(self,
+                 sender: Callable[[Dict[str, Any], str], None],
+                 channels: Iterable[str] = ("console",),
+                 threshold_percent: float = 5.0,
+                 hysteresis_percent: float = 2.0,
+                 dedup_window: float = 6 * 3600,
+                 rate_limits: Optional[Dict[str, Tuple[float, float]]] = None,
+                 digest_window: float = 300,
+                 digest_types: Iterable[str] = DEFAULT_DIGEST_TYPES,
+                 state_path: Optional[str] = None,
+                 checkpoint_interval: float = 30,
+                 clock: Callable[[], float] = time.time):
+        self.sender = sender
+        self.channels = list(channels)
+        self.threshold_percent = threshold_percent
+        self.hysteresis_percent = hysteresis_percent
+        self.dedup_window = dedup_window
+        self.digest_window = digest_window
+        self.digest_types = set(digest_types)
+        self.state_path = state_path
+        self.checkpoint_interval = checkpoint_interval
+        self.clock = clock
+
+        rate_limits = rate_limits or {}
+        self.buckets = {c: TokenBucket(*rate_limits.get(c, (10, 60))) for c in self.channels}
+        # "site|product" -> [last alerted price, direction of that alert]
+        self.references: Dict[str, List[float]] = {}
+        # "site|product|type|value" -> time of the last alert
+        self.recent: Dict[str, float] = {}
+        self.digests: Dict[str, Digest] = {}
+        self.stats = EngineStats()
+        self._lock = threading.RLock()
+        self._last_checkpoint = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        if state_path and os.path.exists(state_path):
+            self._load()
+
+    def submit(self, change: Any) -> str:
+        """
+        Route a change event (ChangeEvent or alert dictionary).
+
+        Returns:
+            "sent", "digested", "duplicate" or "below_threshold"
+        """
+        alert = change.to_alert() if hasattr(change, "to_alert") else dict(change)
+        now = self.clock()
+
+        with self._lock:
+            self.stats.received += 1
+            if alert.get("change_type") == "price" and not self._passes_hysteresis(alert):
+                self.stats.below_threshold += 1
+                return "below_threshold"
+
+            dedup_key = "|".join(str(alert.get(k)) for k in ("site", "product", "change_type", "new_value"))
+            last = self.recent.get(dedup_key)
+            if last is not None and now - last < self.dedup_window:
+                self.stats.deduplicated += 1
+                return "duplicate"
+            self.recent[dedup_key] = now
+
+            outcome = "digested"
+            outgoing = []
+            for channel in self.channels:
+                if alert.get("change_type") not in self.digest_types and self.buckets[channel].take(now):
+                    outgoing.append((alert, channel))
+                    outcome = "sent"
+                else:
+                    self.digests.setdefault(channel, Digest(opened=now)).changes.append(alert)
+            if outcome == "sent":
+                self.stats.sent += 1
+            else:
+                self.stats.digested += 1
+            outgoing.extend(self._take_due(now))
+
+        # Delivery can be slow; it must not hold up other submitters or the flush thread
+        self._deliver(outgoing)
+        return outcome
+
+    def _passes_hysteresis(self, alert: Dict[str, Any]) -> bool:
+        try:
+            old, new = float(alert["old_value"]), float(alert["new_value"])
+        except (KeyError, TypeError, ValueError):
+            return True
+
+        key = f"{alert.get('site')}|{alert.get('product')}"
+        reference, direction = self.references.setdefault(key, [old, 0.0])
+        move = _percent(reference, new)
+        needed = self.threshold_percent
+        if direction and move * direction < 0:
+            needed += self.hysteresis_percent
+        if abs(move) < needed:
+            return False
+
+        self.references[key] = [new, 1.0 if move > 0 else -1.0]
+        alert["old_value"] = reference
+        alert["change_percent"] = round(move, 2)
+        return True
+
+    def _send(self, alert: Dict[str, Any], channel: str):
+        try:
+            self.sender(alert, channel)
+        except Exception as e:
+            logger.error(f"Alert delivery via {channel} failed for {alert.get('product')}: {e}")
+
+    def _deliver(self, outgoing: List[Tuple[Dict[str, Any], str]]):
+        """Send collected alerts; called without the lock held."""
+        for alert, channel in outgoing:
+            self._send(alert, channel)
+
+    def _take_due(self, now: float, force: bool = False) -> List[Tuple[Dict[str, Any], str]]:
+        """
+        Close digests whose window has ended (or all of them, if forced),
+        prune expired dedup keys and checkpoint state if due. Call with
+        the lock held.
+
+        Returns:
+            (digest alert, channel) pairs to deliver
+        """
+        due = []
+        for channel, digest in list(self.digests.items()):
+            if not force and now - digest.opened < self.digest_window:
+                continue
+            del self.digests[channel]
+            due.append((self._digest_alert(digest), channel))
+        self.stats.digests_sent += len(due)
+
+        if force or now - self._last_checkpoint >= self.checkpoint_interval:
+            self.recent = {k: t for k, t in self.recent.items() if now - t < self.dedup_window}
+            self._save()
+            self._last_checkpoint = now
+        return due
+
+    def flush(self, force: bool = False) -> int:
+        """
+        Send digests whose window has closed (or all of them, if forced),
+        prune expired dedup keys and checkpoint state if due.
+
+        Returns:
+            Number of digests sent
+        """
+        with self._lock:
+            due = self._take_due(self.clock(), force)
+        self._deliver(due)
+        return len(due)
+
+    def _digest_alert(self, digest: Digest) -> Dict[str, Any]:
+        changes = digest.changes
+        lines = []
+        for change in changes:
+            line = f"{change.get('product')} ({change.get('site')}): {change.get('change_type')}"
+            if change.get("old_value") is not None or change.get("new_value") is not None:
+                line += f" {change.get('old_value')} -> {change.get('new_value')}"
+            lines.append(line)
+        return {
+            "product": f"{len(changes)} changes",
+            "site": ", ".join(sorted({str(c.get("site")) for c in changes})),
+            "change_type": DIGEST,
+            "old_value": None,
+            "new_value": "\n".join(lines),
+            "url": None,
+            "timestamp": self.clock(),
+            "changes": changes
+        }
+
+    def start(self, interval: float = 5.0):
+        """Flush closed digests from a background thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.wait(interval):
+                self.flush()
+
+        self._thread = threading.Thread(target=run, name="alert-engine", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self.flush(force=True)
+
+    def _save(self):
+        if not self.state_path:
+            return
+        state = {
+            "references": self.references,
+            "recent": self.recent,
+            "digests": {c: {"opened": d.opened, "changes": d.changes} for c, d in self.digests.items()}
+        }
+        try:
+            os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+            temp_path = f"{self.state_path}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(state, f, ensure_ascii=False, default=str)
+            os.replace(temp_path, self.state_path)
+        except OSError as e:
+            logger.warning(f"Could not checkpoint alert state: {e}")
+
+    def _load(self):
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                state = json.load(f)
+            self.references = state.get("references", {})
+            self.recent = state.get("recent", {})
+            self.digests = {c: Digest(**d) for c, d in state.get("digests", {}).items() if c in self.buckets}
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning(f"Could not load alert state: {e}")
+
+    @classmethod
+    def from_env(cls, sender: Callable[[Dict[str, Any], str], None], channels: Iterable[str]) -> "AlertEngine":
+        """Build an engine using the same setting names as shared/config.Settings"""
+        rate = float(os.getenv("ALERT_RATE_LIMIT", "10"))
+        per = float(os.getenv("ALERT_RATE_PERIOD", "60"))
+        channels = list(channels)
+        return cls(
+            sender,
+            channels=channels,
+            threshold_percent=float(os.getenv("PRICE_CHANGE_THRESHOLD", "5.0")),
+            hysteresis_percent=float(os.getenv("ALERT_HYSTERESIS_PERCENT", "2.0")),
+            dedup_window=float(os.getenv("ALERT_DEDUP_WINDOW", str(6 * 3600))),
+            rate_limits={c: (rate, per) for c in channels},
+            digest_window=float(os.getenv("ALERT_DIGEST_WINDOW", "300")),
+            state_path=os.getenv("ALERT_STATE_PATH")
+        )
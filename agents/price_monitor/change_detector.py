@@ -0,0 +1,279 @@
+"""
+Streaming change detection between collection and alerting.
+Observation batches are diffed against the latest known state of each
+product held in memory, and typed change events are pushed to subscribers
+as soon as a batch is processed.
+"""
+
+import os
+import json
+import time
+import queue
+import logging
+import threading
+from dataclasses import dataclass, asdict, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PRICE = "price"
+STOCK = "stock"
+DELIVERY = "delivery_time"
+NEW_PRODUCT = "new_product"
+DELISTED = "delisted"
+CHANGE_TYPES = (PRICE, STOCK, DELIVERY, NEW_PRODUCT, DELISTED)
+
+@dataclass
+class ChangeEvent:
+    change_type: str
+    site: str
+    product: str
+    old_value: Any = None
+    new_value: Any = None
+    change_percent: Optional[float] = None
+    url: Optional[str] = None
+    timestamp: float = field(default_factory=time.time)
+
+    def to_alert(self) -> Dict[str, Any]:
+        """Dictionary in the shape alert.send_alert expects."""
+        return asdict(self)
+
+    def describe(self) -> str:
+        if self.change_type == PRICE:
+            return (f"Price changed from ৳{self.old_value:.2f} to ৳{self.new_value:.2f} "
+                    f"({self.change_percent:.2f}%)")
+        if self.change_type == STOCK:
+            return f"Stock status changed from '{self.old_value}' to '{self.new_value}'"
+        if self.change_type == DELIVERY:
+            return f"Delivery time changed from '{self.old_value}' to '{self.new_value}'"
+        if self.change_type == NEW_PRODUCT:
+            return f"New product listed at ৳{self.new_value}"
+        return "Product no longer listed"
+
+@dataclass
+class ProductState:
+    price: Optional[float] = None
+    stock: Any = None
+    delivery: Any = None
+    url: Optional[str] = None
+    last_seen: float = 0.0
+    misses: int = 0
+
+def _field(item: Dict[str, Any], *names: str) -> Any:
+    for name in names:
+        if item.get(name) is not None:
+            return item[name]
+    return None
+
+def _to_price(value: Any) -> Optional[float]:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    try:
+        return float("".join(c for c in str(value) if c.isdigit() or c == "."))
+    except ValueError:
+        return None
+
+Subscriber = Callable[[ChangeEvent], None]
+
+class ChangeDetector:
+    """
+    In-memory latest-state store that turns observation batches into events.
+
+    A batch is diffed with dictionary lookups only; state is checkpointed to
+    `state_path` once per batch at most, never per item. Products missing
+    from `delist_after` consecutive complete listings are reported delisted.
+    Call start() to process batches on a background thread via submit(), so
+    scrapers hand off their results and move on while subscribers are
+    notified as soon as each batch is diffed.
+    """
+
+    def __init__(self,
+                 price_threshold_percent: float = 0.0,
+                 delist_after: int = 2,
+                 state_path: Optional[str] = None,
+                 max_pending: int = 1000):
+        self.price_threshold_percent = price_threshold_percent
+        self.delist_after = delist_after
+        self.state_path = state_path
+        self.state: Dict[Tuple[str, str], ProductState] = {}
+        self._sites = set()
+        self._subscribers: List[Tuple[Subscriber, Optional[frozenset]]] = []
+        self._lock = threading.Lock()
+        self._pending: "queue.Queue" = queue.Queue(maxsize=max_pending)
+        self._thread: Optional[threading.Thread] = None
+        self.batches = 0
+        self.events = 0
+        if state_path and os.path.exists(state_path):
+            self._load()
+
+    def subscribe(self, callback: Subscriber, change_types: Optional[Iterable[str]] = None) -> Callable[[], None]:
+        """
+        Register a callback for change events.
+
+        Args:
+            callback: Called with each ChangeEvent
+            change_types: Only deliver these types (default: all)
+
+        Returns:
+            Function that removes the subscription
+        """
+        entry = (callback, frozenset(change_types) if change_types else None)
+        self._subscribers.append(entry)
+        return lambda: self._subscribers.remove(entry)
+
+    def prime(self, site: str, observations: Iterable[Dict[str, Any]]) -> None:
+        """Load known state (e.g., the last stored snapshot) without emitting events."""
+        with self._lock:
+            self._sites.add(site)
+            for item in observations:
+                name = _field(item, "product_name", "name")
+                if name:
+                    self.state[(site, name)] = self._observe(item, time.time())
+
+    def knows(self, site: str, product: Optional[str] = None) -> bool:
+        """Whether the site (or a product on it) has been primed or observed."""
+        if product is None:
+            return site in self._sites
+        return (site, product) in self.state
+
+    def _observe(self, item: Dict[str, Any], now: float) -> ProductState:
+        return ProductState(
+            price=_to_price(item.get("price")),
+            stock=_field(item, "stock_status", "in_stock"),
+            delivery=item.get("delivery_time"),
+            url=_field(item, "scraped_url", "url"),
+            last_seen=now
+        )
+
+    def process(self, site: str, observations: List[Dict[str, Any]], complete: bool = True) -> List[ChangeEvent]:
+        """
+        Diff a batch against the latest state and notify subscribers.
+
+        Args:
+            site: Site the observations came from
+            observations: Scraped product dictionaries
+            complete: Whether the batch is a full listing of the site, in
+                which case absent products count towards delisting
+
+        Returns:
+            Events emitted for the batch
+        """
+        now = time.time()
+        events: List[ChangeEvent] = []
+
+        with self._lock:
+            self._sites.add(site)
+            seen = set()
+            for item in observations:
+                name = _field(item, "product_name", "name")
+                if not name:
+                    continue
+                key = (site, name)
+                seen.add(key)
+                current = self._observe(item, now)
+                previous = self.state.get(key)
+                self.state[key] = current
+
+                if previous is None or previous.misses >= self.delist_after:
+                    events.append(ChangeEvent(NEW_PRODUCT, site, name, None, current.price, url=current.url))
+                    continue
+                events.extend(self._diff(site, name, previous, current))
+
+            if complete:
+                for key, state in self.state.items():
+                    if key[0] != site or key in seen:
+                        continue
+                    state.misses += 1
+                    if state.misses == self.delist_after:
+                        events.append(ChangeEvent(DELISTED, site, key[1], state.price, None, url=state.url))
+
+            self.batches += 1
+            self.events += len(events)
+            self._save()
+
+        self._dispatch(events)
+        return events
+
+    def _diff(self, site: str, name: str, previous: ProductState, current: ProductState) -> List[ChangeEvent]:
+        events = []
+        if previous.price is not None and current.price is not None and previous.price != current.price:
+            percent = (current.price - previous.price) / previous.price * 100 if previous.price else 0.0
+            if abs(percent) >= self.price_threshold_percent:
+                events.append(ChangeEvent(PRICE, site, name, previous.price, current.price,
+                                          change_percent=round(percent, 2), url=current.url))
+            else:
+                # Below threshold: keep comparing against the last reported price
+                current.price = previous.price
+        if previous.stock != current.stock:
+            events.append(ChangeEvent(STOCK, site, name, previous.stock, current.stock, url=current.url))
+        if previous.delivery != current.delivery:
+            events.append(ChangeEvent(DELIVERY, site, name, previous.delivery, current.delivery, url=current.url))
+        return events
+
+    def _dispatch(self, events: List[ChangeEvent]) -> None:
+        for event in events:
+            for callback, types in list(self._subscribers):
+                if types is not None and event.change_type not in types:
+                    continue
+                try:
+                    callback(event)
+                except Exception as e:
+                    logger.error(f"Change subscriber failed for {event.product}: {e}")
+
+    def start(self) -> None:
+        """Process submitted batches on a background thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="change-detector", daemon=True)
+        self._thread.start()
+
+    def submit(self, site: str, observations: List[Dict[str, Any]], complete: bool = True) -> None:
+        """Queue a batch for the background thread (starting it if needed)."""
+        self.start()
+        self._pending.put((site, observations, complete))
+
+    def _run(self) -> None:
+        while True:
+            batch = self._pending.get()
+            try:
+                if batch is None:
+                    return
+                self.process(*batch)
+            except Exception as e:
+                logger.error(f"Change detection failed for {batch[0]}: {e}")
+            finally:
+                self._pending.task_done()
+
+    def flush(self) -> None:
+        """Block until all submitted batches have been processed."""
+        self._pending.join()
+
+    def stop(self) -> None:
+        if self._thread and self._thread.is_alive():
+            self._pending.put(None)
+            self._thread.join()
+
+    def _save(self) -> None:
+        if not self.state_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+            temp_path = f"{self.state_path}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump([[site, name, asdict(state)] for (site, name), state in self.state.items()],
+                          f, ensure_ascii=False)
+            os.replace(temp_path, self.state_path)
+        except OSError as e:
+            logger.warning(f"Could not save change state: {e}")
+
+    def _load(self) -> None:
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                self.state = {(site, name): ProductState(**state) for site, name, state in json.load(f)}
+            self._sites = {site for site, _ in self.state}
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning(f"Could not load change state: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        return {"products": len(self.state), "batches": self.batches,
+                "events": self.events, "pending": self._pending.qsize()}
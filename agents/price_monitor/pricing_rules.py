@@ -0,0 +1,217 @@
+# agents/price_monitor/pricing_rules.py
+
+import json
+import numpy as np
+from dataclasses import dataclass, field, fields
+from typing import Any, Dict, List, Optional
+
+MATCH_FIELDS = ("category", "brand", "product")
+STRATEGIES = ("match", "beat")
+
+
+@dataclass
+class Rule:
+    """
+    One pricing rule. Rules are checked in order and the first whose `match`
+    fits a product prices it; an empty match applies to every product.
+    """
+    name: str
+    match: Dict[str, List[str]] = field(default_factory=dict)
+    strategy: str = "beat"
+    beat_by_percent: float = 0.0
+    beat_by_amount: float = 0.0
+    min_margin_pct: Optional[float] = 0.0  # None allows selling below cost
+    floor: Optional[float] = None
+    ceiling: Optional[float] = None
+    ending: Optional[int] = None  # e.g. 9 -> prices like ৳199, ৳249
+    step: int = 10
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Rule":
+        known = {f.name for f in fields(cls)}
+        unknown = set(data) - known
+        if unknown:
+            raise ValueError(f"Unknown rule settings {sorted(unknown)} in rule {data.get('name')!r}")
+        rule = cls(**data)
+        if rule.strategy not in STRATEGIES:
+            raise ValueError(f"Rule {rule.name!r}: strategy must be one of {STRATEGIES}")
+        bad_fields = set(rule.match) - set(MATCH_FIELDS)
+        if bad_fields:
+            raise ValueError(f"Rule {rule.name!r}: can only match on {MATCH_FIELDS}, got {sorted(bad_fields)}")
+        rule.match = {k: [str(v).lower() for v in (vs if isinstance(vs, list) else [vs])]
+                      for k, vs in rule.match.items()}
+        if rule.ending is not None and not 0 <= rule.ending < rule.step:
+            raise ValueError(f"Rule {rule.name!r}: ending must be between 0 and step")
+        return rule
+
+
+@dataclass
+class PriceFrame:
+    """Column arrays describing the products to price"""
+    product: np.ndarray
+    competitor_price: np.ndarray
+    cost: np.ndarray
+    category: np.ndarray
+    brand: np.ndarray
+    floor: np.ndarray
+    ceiling: np.ndarray
+
+    @classmethod
+    def from_records(cls, records: List[Dict[str, Any]]) -> "PriceFrame":
+        """Build a frame from dicts with product, competitor_price and optional cost, category, brand, floor, ceiling"""
+        def numbers(key):
+            return np.array([np.nan if r.get(key) is None else r[key] for r in records], dtype=float)
+
+        def labels(key):
+            return np.array([str(r.get(key) or "").lower() for r in records], dtype=object)
+
+        return cls(
+            product=np.array([str(r["product"]) for r in records], dtype=object),
+            competitor_price=numbers("competitor_price"),
+            cost=numbers("cost"),
+            category=labels("category"),
+            brand=labels("brand"),
+            floor=numbers("floor"),
+            ceiling=numbers("ceiling")
+        )
+
+    def __len__(self):
+        return len(self.product)
+
+
+@dataclass
+class Evaluation:
+    """Prices chosen for a frame, with what each step did kept as arrays"""
+    rules: List[Rule]
+    frame: PriceFrame
+    rule_index: np.ndarray
+    base: np.ndarray
+    lower: np.ndarray
+    upper: np.ndarray
+    raised: np.ndarray
+    capped: np.ndarray
+    rounded: np.ndarray
+    prices: np.ndarray
+
+    def explain(self, i: int) -> List[str]:
+        """Step-by-step explanation of the price chosen for row i"""
+        if self.rule_index[i] == len(self.rules):
+            return ["no rule matched; price left unchanged"]
+        rule = self.rules[self.rule_index[i]]
+        competitor = self.frame.competitor_price[i]
+        if rule.strategy == "match":
+            steps = [f"rule '{rule.name}': match competitor ৳{competitor:.2f}"]
+        else:
+            beat = " and ".join(part for part in (
+                f"{rule.beat_by_percent:g}%" if rule.beat_by_percent else "",
+                f"৳{rule.beat_by_amount:g}" if rule.beat_by_amount else "") if part) or "0%"
+            steps = [f"rule '{rule.name}': beat competitor ৳{competitor:.2f} by {beat} -> ৳{self.base[i]:.2f}"]
+        if self.capped[i]:
+            steps.append(f"capped at ceiling ৳{self.upper[i]:.2f}")
+        if self.raised[i]:
+            steps.append(f"raised to minimum ৳{self.lower[i]:.2f} (cost margin / floor)")
+        if self.rounded[i]:
+            steps.append(f"rounded to ৳{self.prices[i]:.2f} (ending {rule.ending})")
+        return steps
+
+    def explanations(self) -> List[List[str]]:
+        return [self.explain(i) for i in range(len(self.prices))]
+
+
+class RuleSet:
+    """
+    Declarative pricing rules compiled once into per-rule parameter arrays.
+
+    evaluate() matches every product against every rule with array
+    comparisons, picks the first matching rule per product and then applies
+    strategy, bounds and rounding as whole-column operations, so the cost is
+    a handful of numpy passes regardless of catalog size.
+    """
+
+    def __init__(self, rules: List[Rule]):
+        if not rules:
+            raise ValueError("A rule set needs at least one rule")
+        self.rules = rules
+        # One extra slot for "no rule matched", which yields NaN prices
+        def params(attr, default=np.nan, when=None):
+            values = [getattr(r, attr) if when is None or when(r) else default for r in rules]
+            return np.array([np.nan if v is None else v for v in values] + [np.nan], dtype=float)
+
+        is_beat = lambda r: r.strategy == "beat"
+        self._beat_pct = params("beat_by_percent", 0.0, is_beat)
+        self._beat_amount = params("beat_by_amount", 0.0, is_beat)
+        self._min_margin = params("min_margin_pct")
+        self._floor = params("floor")
+        self._ceiling = params("ceiling")
+        self._ending = params("ending")
+        self._step = params("step")
+
+    @classmethod
+    def from_dicts(cls, rules: List[Dict[str, Any]]) -> "RuleSet":
+        return cls([Rule.from_dict(r) for r in rules])
+
+    @classmethod
+    def load(cls, path: str) -> "RuleSet":
+        """Load rules from a JSON or YAML file holding a list under `rules`"""
+        with open(path, encoding="utf-8") as f:
+            if path.endswith((".yaml", ".yml")):
+                import yaml
+                data = yaml.safe_load(f)
+            else:
+                data = json.load(f)
+        return cls.from_dicts(data["rules"] if isinstance(data, dict) else data)
+
+    @classmethod
+    def from_margin(cls, margin_pct: float, min_margin_pct: Optional[float] = None) -> "RuleSet":
+        """Single rule equivalent to the original fixed-margin formula"""
+        return cls([Rule(name="default margin", beat_by_percent=margin_pct, min_margin_pct=min_margin_pct)])
+
+    def _match(self, frame: PriceFrame) -> np.ndarray:
+        index = np.full(len(frame), len(self.rules))
+        unmatched = np.ones(len(frame), dtype=bool)
+        columns = {"category": frame.category, "brand": frame.brand}
+        if any("product" in rule.match for rule in self.rules):
+            columns["product"] = np.array([p.lower() for p in frame.product], dtype=object)
+        for i, rule in enumerate(self.rules):
+            mask = unmatched.copy()
+            for key, values in rule.match.items():
+                mask &= np.isin(columns[key], values)
+            index[mask] = i
+            unmatched &= ~mask
+            if not unmatched.any():
+                break
+        return index
+
+    def evaluate(self, frame: PriceFrame) -> Evaluation:
+        idx = self._match(frame)
+        competitor = frame.competitor_price
+
+        base = competitor * (1 - self._beat_pct[idx] / 100.0) - self._beat_amount[idx]
+        min_margin = self._min_margin[idx]
+        cost_bound = np.where(np.isnan(min_margin), np.nan, frame.cost * (1 + min_margin / 100.0))
+        lower = np.fmax(np.fmax(cost_bound, self._floor[idx]), frame.floor)
+        upper = np.fmin(self._ceiling[idx], frame.ceiling)
+
+        # The ceiling is applied first so that cost and floor limits win a conflict
+        capped = base > upper
+        prices = np.where(capped, upper, base)
+        raised = prices < lower
+        prices = np.where(raised, lower, prices)
+
+        ending, step = self._ending[idx], self._step[idx]
+        has_ending = ~np.isnan(ending) & ~np.isnan(prices)
+        with np.errstate(invalid="ignore"):
+            down = np.floor((prices - ending) / step) * step + ending
+            # Round down to the ending; round up only when rounding down would
+            # break the lower bound and up stays under the ceiling. Otherwise,
+            # and for prices below the first ending, keep the price
+            positive = down > 0
+            keep_down = positive & ~(down < lower)
+            up = down + step
+            round_up = positive & (down < lower) & ~(up > upper)
+            rounded_prices = np.where(keep_down, down, np.where(round_up, up, np.round(prices, 2)))
+        rounded = has_ending & (keep_down | round_up) & (rounded_prices != prices)
+        prices = np.where(has_ending, rounded_prices, np.round(prices, 2))
+
+        return Evaluation(rules=self.rules, frame=frame, rule_index=idx, base=base, lower=lower, upper=upper,
+                          raised=raised, capped=capped, rounded=rounded, prices=prices)
@@ -1,8 +1,17 @@
 # agents/price_monitor/repricer.py
 
 import os
+import json
+import uuid
+import hashlib
 import requests
-from typing import List, Dict
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import List, Dict, Optional, Any
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from .pricing_rules import Evaluation, PriceFrame, RuleSet
 
 def reprice_product(product_name: str, competitor_price: float, margin_pct: float) -> float:
     """
@@ -13,6 +22,23 @@ def reprice_product(product_name: str, competitor_price: float, margin_pct: floa
     return round(new_price, 2)
 
 
+def compute_prices(competitor_prices: np.ndarray, margin_pct: float,
+                   costs: Optional[np.ndarray] = None, min_margin_pct: float = 0.0,
+                   floors: Optional[np.ndarray] = None, ceilings: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Vectorized version of reprice_product with guard rails.
+    NaN in costs, floors or ceilings means "no limit" for that product.
+    """
+    prices = competitor_prices * (1 - (margin_pct / 100.0))
+    if costs is not None:
+        prices = np.fmax(prices, costs * (1 + min_margin_pct / 100.0))
+    if floors is not None:
+        prices = np.fmax(prices, floors)
+    if ceilings is not None:
+        prices = np.fmin(prices, ceilings)
+    return np.round(prices, 2)
+
+
 def push_price_update(api_endpoint: str, api_key: str, product_name: str, new_price: float) -> Dict:
     """
     Calls the store API to update Apon’s product price.
@@ -32,52 +58,229 @@ def push_price_update(api_endpoint: str, api_key: str, product_name: str, new_pr
     return response.json()
 
 
-def run_repricer(changes: List[Dict], margin_pct: float, api_endpoint: str, api_key: str) -> List[Dict]:
+@dataclass
+class RepricingPlan:
+    """Computed prices for a set of products, diffed against the store"""
+    products: List[str]
+    competitor_prices: np.ndarray
+    current_prices: np.ndarray
+    new_prices: np.ndarray
+    changed: np.ndarray
+    invalid: Dict[str, str] = field(default_factory=dict)
+    evaluation: Optional[Evaluation] = None
+    # Part of every Idempotency-Key: pushing this plan again is a retry, while
+    # a new plan that returns to an earlier price is a new update
+    nonce: str = field(default_factory=lambda: uuid.uuid4().hex)
+
+    def updates(self) -> List[Dict[str, Any]]:
+        return [{"product_name": self.products[i], "new_price": float(self.new_prices[i])}
+                for i in np.flatnonzero(self.changed)]
+
+    def report(self) -> Dict[str, Any]:
+        """Dry-run style diff of what would be pushed"""
+        rows = []
+        for i in np.flatnonzero(self.changed):
+            current = None if np.isnan(self.current_prices[i]) else float(self.current_prices[i])
+            rows.append({
+                "product": self.products[i],
+                "competitor_price": float(self.competitor_prices[i]),
+                "current_price": current,
+                "new_price": float(self.new_prices[i]),
+                "delta": None if current is None else round(float(self.new_prices[i]) - current, 2)
+            })
+            if self.evaluation is not None:
+                rows[-1]["explanation"] = self.evaluation.explain(i)
+        return {
+            "total": len(self.products) + len(self.invalid),
+            "to_update": len(rows),
+            "unchanged": int(len(self.products) - len(rows)),
+            "invalid": dict(self.invalid),
+            "changes": rows
+        }
+
+
+class RepricingEngine:
     """
-    For each change in the 'changes' list, compute Apon's new price and push the update.
-    Returns a list of results, each containing success/failure and details.
+    Computes prices for many products at once and pushes only real changes.
+
+    Updates go out in batches over one pooled session, with a bounded number
+    of requests in flight. Each batch carries an Idempotency-Key derived
+    from its contents and its plan's nonce, so a retried batch is not
+    applied twice while a later plan setting the same price again is. Without a
+    batch endpoint, single updates are sent concurrently to api_endpoint.
     """
-    results = []
-    for change in changes:
-        # Only handle price‐type changes for repricing
-        if change.get("change_type") != "price":
-            continue
-
-        product = change.get("product")
-        old_val = change.get("old_value") # Keep for potential logging, though not used in repricing directly
-        new_val = change.get("new_value")
-
-        if product is None or new_val is None: # Basic validation
-            results.append({
-                "product": product or "Unknown",
-                "status": "error",
-                "error": "Missing product name or new value for repricing."
-            })
-            continue
-            
+
+    def __init__(self, api_endpoint: str, api_key: str,
+                 batch_endpoint: Optional[str] = None,
+                 batch_size: int = 100,
+                 max_concurrency: int = 4,
+                 min_change: float = 0.01,
+                 timeout: float = 10.0,
+                 session: Optional[requests.Session] = None):
+        self.api_endpoint = api_endpoint
+        self.api_key = api_key
+        self.batch_endpoint = batch_endpoint
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.min_change = min_change
+        self.timeout = timeout
+        self.session = session or self._make_session()
+        # Prices last pushed successfully, used when the caller has no store prices
+        self.known_prices: Dict[str, float] = {}
+
+    def _make_session(self) -> requests.Session:
+        session = requests.Session()
+        retry = Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504),
+                      allowed_methods=None, respect_retry_after_header=True)
+        adapter = HTTPAdapter(pool_connections=self.max_concurrency, pool_maxsize=self.max_concurrency,
+                              max_retries=retry)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers.update({"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"})
+        return session
+
+    def plan(self, changes: List[Dict], margin_pct: float,
+             catalog: Optional[Dict[str, Dict[str, float]]] = None,
+             min_margin_pct: float = 0.0, rules: Optional[RuleSet] = None) -> RepricingPlan:
+        """
+        Compute new prices for all price changes at once.
+
+        Args:
+            changes: Change alerts; only change_type "price" is used
+            margin_pct: Percent under the competitor price
+            catalog: Per product "price" (current store price), "cost",
+                "floor" and "ceiling", all optional
+            min_margin_pct: Minimum margin over cost
+            rules: Rule set used instead of the flat margin; catalog
+                "category" and "brand" are matched against it
+
+        Returns:
+            RepricingPlan with the diff against current store prices
+        """
+        catalog = catalog or {}
+        competitor: Dict[str, float] = {}
+        invalid: Dict[str, str] = {}
+        for change in changes:
+            if change.get("change_type") != "price":
+                continue
+            product, new_val = change.get("product"), change.get("new_value")
+            if product is None or new_val is None:
+                invalid[product or "Unknown"] = "Missing product name or new value for repricing."
+                continue
+            try:
+                # Later changes for the same product win
+                competitor[product] = float(new_val)
+                invalid.pop(product, None)
+            except (TypeError, ValueError):
+                competitor.pop(product, None)
+                invalid[product] = f"Invalid data for repricing: new_value='{new_val}', margin_pct='{margin_pct}'"
+
+        products = list(competitor)
+
+        def column(key: str) -> np.ndarray:
+            return np.array([catalog.get(p, {}).get(key, np.nan) for p in products], dtype=float)
+
+        competitor_prices = np.array([competitor[p] for p in products], dtype=float)
+        current = column("price")
+        known = np.array([self.known_prices.get(p, np.nan) for p in products], dtype=float)
+        current = np.where(np.isnan(current), known, current)
+
+        evaluation = None
+        if rules is not None:
+            frame = PriceFrame.from_records([{**catalog.get(p, {}), "product": p, "competitor_price": competitor[p]}
+                                             for p in products])
+            evaluation = rules.evaluate(frame)
+            new_prices = evaluation.prices
+        else:
+            new_prices = compute_prices(competitor_prices, float(margin_pct), column("cost"), min_margin_pct,
+                                        column("floor"), column("ceiling"))
+        # Products no rule priced (NaN) are left alone
+        changed = ~np.isnan(new_prices) & (np.isnan(current) | (np.abs(new_prices - current) >= self.min_change - 1e-9))
+        return RepricingPlan(products, competitor_prices, current, new_prices, changed, invalid, evaluation)
+
+    @staticmethod
+    def idempotency_key(updates: List[Dict[str, Any]], nonce: str = "") -> str:
+        body = json.dumps([nonce, sorted((u["product_name"], u["new_price"]) for u in updates)])
+        return hashlib.sha256(body.encode()).hexdigest()
+
+    def _post(self, url: str, payload: Dict[str, Any], key: str) -> Dict:
+        response = self.session.post(url, json=payload, headers={"Idempotency-Key": key}, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json() if response.content else {}
+
+    def _send_batch(self, updates: List[Dict[str, Any]], nonce: str) -> List[Dict]:
+        key = self.idempotency_key(updates, nonce)
         try:
-            # Compute Apon's new price
-            new_ap_price = reprice_product(product, float(new_val), float(margin_pct))
-
-            resp = push_price_update(api_endpoint, api_key, product, new_ap_price)
-            results.append({
-                "product": product,
-                "repriced_to": new_ap_price,
-                "status": "success",
-                "response": resp
-            })
-        except ValueError: # Handle case where new_val or margin_pct might not be convertible to float
-             results.append({
-                "product": product,
-                "status": "error",
-                "error": f"Invalid data for repricing: new_value='{new_val}', margin_pct='{margin_pct}'"
-            })
+            if self.batch_endpoint:
+                response = self._post(self.batch_endpoint, {"updates": updates, "idempotency_key": key}, key)
+            else:
+                response = self._post(self.api_endpoint, updates[0], key)
         except Exception as e:
-            results.append({
-                "product": product,
-                "repriced_to": new_ap_price if 'new_ap_price' in locals() else "N/A",
-                "status": "error",
-                "error": str(e)
-            })
+            return [{"product": u["product_name"], "repriced_to": u["new_price"], "status": "error",
+                     "error": str(e)} for u in updates]
+
+        for u in updates:
+            self.known_prices[u["product_name"]] = u["new_price"]
+        return [{"product": u["product_name"], "repriced_to": u["new_price"], "status": "success",
+                 "response": response} for u in updates]
+
+    def push(self, plan: RepricingPlan) -> List[Dict]:
+        """Push the changed prices of a plan; returns one result per product"""
+        updates = plan.updates()
+        size = self.batch_size if self.batch_endpoint else 1
+        batches = [updates[i:i + size] for i in range(0, len(updates), size)]
+
+        results = [{"product": p, "status": "error", "error": e} for p, e in plan.invalid.items()]
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            for batch_results in executor.map(lambda batch: self._send_batch(batch, plan.nonce), batches):
+                results.extend(batch_results)
+        for i in np.flatnonzero(~plan.changed):
+            results.append({"product": plan.products[i], "repriced_to": float(plan.new_prices[i]),
+                            "status": "unchanged"})
+        return results
+
+    def close(self):
+        self.session.close()
 
-    return results
+
+_engines: Dict[tuple, RepricingEngine] = {}
+_rule_sets: Dict[str, RuleSet] = {}
+
+
+def get_repricing_engine(api_endpoint: str, api_key: str, batch_endpoint: Optional[str] = None) -> RepricingEngine:
+    """Shared engine per store endpoint, so the session and known prices are reused"""
+    batch_endpoint = batch_endpoint or os.getenv("STORE_BATCH_ENDPOINT") or None
+    key = (api_endpoint, api_key, batch_endpoint)
+    if key not in _engines:
+        _engines[key] = RepricingEngine(api_endpoint, api_key,
+                                        batch_endpoint=batch_endpoint,
+                                        max_concurrency=int(os.getenv("REPRICER_CONCURRENCY", "4")))
+    return _engines[key]
+
+
+def load_rules(path: str) -> RuleSet:
+    """Rule sets are compiled once per file and reused across runs"""
+    if path not in _rule_sets:
+        _rule_sets[path] = RuleSet.load(path)
+    return _rule_sets[path]
+
+
+def run_repricer(changes: List[Dict], margin_pct: float, api_endpoint: str, api_key: str,
+                 dry_run: bool = False, catalog: Optional[Dict[str, Dict[str, float]]] = None,
+                 engine: Optional[RepricingEngine] = None, batch_endpoint: Optional[str] = None,
+                 rules: Optional[Any] = None) -> List[Dict]:
+    """
+    Compute Apon's new prices for all price changes and push those that differ from the store.
+    Returns a list of results, each containing success/failure and details. With dry_run,
+    nothing is pushed and the list holds a single diff report. `rules` (a RuleSet or a path to
+    a JSON/YAML rules file) replaces the flat margin.
+    """
+    engine = engine or get_repricing_engine(api_endpoint, api_key, batch_endpoint)
+    # Workflows pass unset optional inputs as empty strings
+    rules = rules or None
+    if isinstance(rules, str):
+        rules = load_rules(rules)
+    plan = engine.plan(changes, margin_pct, catalog=catalog, rules=rules)
+    if dry_run:
+        return [{"status": "dry_run", "report": plan.report()}]
+    return engine.push(plan)
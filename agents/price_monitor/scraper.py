@@ -1,49 +1,67 @@
 import os
 import random
 from playwright.sync_api import sync_playwright, Page, TimeoutError
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from .utils import get_logger, generate_user_agent
+from ..data_collection.browser import PROXY_ERROR_RE, get_site_profile, new_light_context, polite_goto
+from ..data_collection.proxy_pool import ProxyPool
+from ..data_collection.rate_limiter import RobotsDisallowed
 import time
 
 logger = get_logger(__name__)
 
 class MultiSiteScraper:
     def __init__(self):
-        self.proxies = os.getenv("PROXY_LIST", "").split(',')
+        self.use_proxies = os.getenv("USE_PROXIES") == "true"
+        self.proxy_pool = ProxyPool.from_env()
         self.user_agents = [
             generate_user_agent() for _ in range(20)
         ]
         self.playwright = None
 
-    def _get_page_content(self, page: Page, url: str) -> Optional[str]:
+    def _get_page_content(self, page: Page, url: str) -> Tuple[Optional[str], bool]:
+        """
+        Load a page's HTML.
+
+        Returns:
+            (content, proxy_error): content is None on failure; proxy_error
+            is True only when the failure happened at the proxy, so site
+            errors, timeouts and robots.txt refusals are not held against it
+        """
         try:
-            page.goto(url, wait_until="domcontentloaded", timeout=60000)
-            return page.content()
+            polite_goto(page, url, wait_until="domcontentloaded", timeout=60000)
+            return page.content(), False
         except TimeoutError:
             logger.error(f"Page load timeout for {url}")
-            return None
+            return None, False
+        except RobotsDisallowed:
+            logger.warning(f"robots.txt disallows {url}, skipping")
+            return None, False
         except Exception as e:
             logger.error(f"Error navigating to {url}: {e}", exc_info=True)
-            return None
+            return None, PROXY_ERROR_RE.search(str(e)) is not None
+
+    def _open_page(self, browser, site_name: str):
+        """Open a context (through the site's sticky proxy, if any) and a page."""
+        proxy_server = self.proxy_pool.acquire(site_name) if self.use_proxies else None
+        context_kwargs = {"proxy": {"server": proxy_server}} if proxy_server else {}
+        if proxy_server:
+            logger.debug(f"Using proxy: {proxy_server}")
+
+        context = new_light_context(
+            browser,
+            get_site_profile(site_name),
+            user_agent=random.choice(self.user_agents),
+            viewport={"width": 1280, "height": 1024},
+            **context_kwargs
+        )
+        return context, context.new_page(), proxy_server
 
     def scrape_site(self, site_name: str, site_url: str, products_to_scrape: List[Dict[str, str]]) -> List[Dict[str, Any]]:
         scraped_data = []
         with sync_playwright() as p:
-            browser_args = []
-            if self.proxies and os.getenv("USE_PROXIES") == "true":
-                proxy_server = random.choice(self.proxies).strip()
-                logger.debug(f"Using proxy: {proxy_server}")
-                browser_args.append(f'--proxy-server={proxy_server}')
-
-            browser = p.chromium.launch(
-                headless=True,
-                args=browser_args
-            )
-            context = browser.new_context(
-                user_agent=random.choice(self.user_agents),
-                viewport={"width": 1280, "height": 1024}
-            )
-            page = context.new_page()
+            browser = p.chromium.launch(headless=True)
+            context, page, proxy_server = self._open_page(browser, site_name)
 
             for product_info in products_to_scrape:
                 product_name_query = product_info["name"]
@@ -65,7 +83,17 @@ class MultiSiteScraper:
                         continue
 
                 logger.info(f"Navigating to {search_url} to scrape {product_name_query} from {site_name}")
-                content = self._get_page_content(page, search_url)
+                start = time.monotonic()
+                content, proxy_error = self._get_page_content(page, search_url)
+
+                if proxy_server:
+                    if content:
+                        self.proxy_pool.record_success(proxy_server, time.monotonic() - start)
+                    elif proxy_error:
+                        self.proxy_pool.record_failure(proxy_server, site_name)
+                        # Move the remaining products to a healthier proxy
+                        context.close()
+                        context, page, proxy_server = self._open_page(browser, site_name)
 
                 if content:
                     extracted_data = self._parse_content(site_name, content, product_name_query)
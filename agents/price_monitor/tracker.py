@@ -1,14 +1,17 @@
+import os
 import requests
 import json
 from typing import Dict, Any, List, Optional
-from .utils import get_logger
+from .change_detector import ChangeDetector, PRICE, STOCK, DELIVERY
+from .utils import get_logger, load_latest_snapshot
 import time
 
 logger = get_logger(__name__)
 
 class PriceChangeTracker:
-    def __init__(self, api_base_url: str):
+    def __init__(self, api_base_url: str, detector: Optional[ChangeDetector] = None):
         self.api_base_url = api_base_url
+        self.detector = detector or ChangeDetector()
 
     def _get_last_snapshot(self, site_name: str, product_name: str) -> Optional[Dict[str, Any]]:
         """Fetches the last snapshot for a specific product from the backend."""
@@ -27,47 +30,62 @@ class PriceChangeTracker:
             return None
 
     def detect_and_store_changes(self, site_name: str, current_data_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        detected_changes: List[Dict[str, Any]] = []
-
+        # Only products the detector has never seen need a backend lookup;
+        # later batches are diffed against the in-memory state
         for current_product_data in current_data_list:
             product_name = current_product_data.get("product_name")
             if not product_name:
                 logger.warning(f"Product name missing in current data for {site_name}. Skipping.")
                 continue
-
+            if self.detector.knows(site_name, product_name):
+                continue
             last_snapshot = self._get_last_snapshot(site_name, product_name)
-
-            if not last_snapshot:
+            if last_snapshot:
+                self.detector.prime(site_name, [{**last_snapshot, "product_name": product_name}])
+            else:
                 logger.info(f"No previous snapshot found for '{product_name}' on {site_name}. Initial data captured.")
-                continue
-
-            last_price = last_snapshot.get("price")
-            current_price = current_product_data.get("price")
-
-            last_stock = last_snapshot.get("stock_status")
-            current_stock = current_product_data.get("stock_status")
-
-            last_delivery = last_snapshot.get("delivery_time")
-            current_delivery = current_product_data.get("delivery_time")
-
-            change_description = []
 
-            if last_price is not None and current_price is not None and last_price != current_price:
-                price_change = ((current_price - last_price) / last_price) * 100 if last_price != 0 else 0
-                change_description.append(f"Price changed from ৳{last_price:.2f} to ৳{current_price:.2f} ({price_change:.2f}%)")
+        events = self.detector.process(site_name, current_data_list, complete=False)
 
-            if last_stock != current_stock:
-                change_description.append(f"Stock status changed from '{last_stock}' to '{current_stock}'")
+        descriptions: Dict[str, List[str]] = {}
+        for event in events:
+            if event.change_type in (PRICE, STOCK, DELIVERY):
+                descriptions.setdefault(event.product, []).append(event.describe())
 
-            if last_delivery != current_delivery:
-                change_description.append(f"Delivery time changed from '{last_delivery}' to '{current_delivery}'")
-
-            if change_description:
+        detected_changes: List[Dict[str, Any]] = []
+        for current_product_data in current_data_list:
+            product_name = current_product_data.get("product_name")
+            if product_name in descriptions:
                 detected_changes.append({
                     "product": product_name,
                     "site": site_name,
-                    "change_description": ", ".join(change_description),
+                    "change_description": ", ".join(descriptions.pop(product_name)),
                     "timestamp": current_product_data.get("timestamp", time.time()),
                     "link": current_product_data.get("scraped_url")
                 })
         return detected_changes
+
+_detector: Optional[ChangeDetector] = None
+
+def get_change_detector() -> ChangeDetector:
+    """Process-wide detector shared by the agent loop and detect_changes()."""
+    global _detector
+    if _detector is None:
+        _detector = ChangeDetector(state_path=os.getenv("CHANGE_STATE_PATH"))
+    return _detector
+
+def detect_changes(current_data: List[Dict[str, Any]], site: str) -> Dict[str, Any]:
+    """
+    Diff a scrape against the previous one for the site.
+
+    The first call for a site primes the detector from the latest stored
+    snapshot, so call it before storing the new snapshot.
+
+    Returns:
+        {"changes_detected": bool, "changes": [alert dictionaries]}
+    """
+    detector = get_change_detector()
+    if not detector.knows(site):
+        detector.prime(site, load_latest_snapshot(site))
+    events = detector.process(site, current_data)
+    return {"changes_detected": bool(events), "changes": [event.to_alert() for event in events]}
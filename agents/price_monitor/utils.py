@@ -1,9 +1,16 @@
 import os
 import json
+import logging
 from datetime import datetime
 
 SNAPSHOTS_DIR = "snapshots"
 
+def get_logger(name):
+    """Returns a module logger, configuring basic output on first use"""
+    if not logging.getLogger().handlers:
+        logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(name)s] %(levelname)s: %(message)s")
+    return logging.getLogger(name)
+
 def store_snapshot(site_name, data):
     """Stores scraped data as a JSON snapshot with timestamp"""
     # Ensure directory structure exists
@@ -22,6 +29,17 @@ def store_snapshot(site_name, data):
     print(f"[Utils] Saved snapshot: {filepath}")
     return timestamp
 
+def load_latest_snapshot(site_name):
+    """Loads the most recent snapshot for a site, or an empty list if there is none"""
+    site_dir = os.path.join(SNAPSHOTS_DIR, site_name)
+    if not os.path.isdir(site_dir):
+        return []
+    files = sorted(f for f in os.listdir(site_dir) if f.endswith(".json"))
+    if not files:
+        return []
+    with open(os.path.join(site_dir, files[-1]), encoding='utf-8') as f:
+        return json.load(f)
+
 # TODO: Add database integration options:
 # - Supabase: Use supabase-py
 # - Google Sheets: Use gspread
@@ -0,0 +1,168 @@
+import os
+import json
+import shutil
+import hashlib
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field, asdict
+from typing import Any, Callable, Dict, List, Optional
+
+# Bump when render_chart output changes, so cached images are re-rendered
+RENDERER_VERSION = 1
+
+@dataclass
+class ChartSpec:
+    """
+    Everything needed to draw one chart, as plain data.
+
+    Analysis code builds specs instead of drawing, so charts can be rendered
+    later in a worker pool and skipped entirely when an identical chart was
+    rendered before.
+    """
+    kind: str  # "bar", "hist" or "line"
+    title: str
+    series: Dict[str, List[Any]]
+    labels: List[Any] = field(default_factory=list)
+    xlabel: str = ""
+    ylabel: str = ""
+    size: List[float] = field(default_factory=lambda: [10, 6])
+    bins: int = 30
+
+    def key(self) -> str:
+        """Content hash of the spec, used as the cache file name"""
+        body = json.dumps([RENDERER_VERSION, asdict(self)], sort_keys=True, default=str)
+        return hashlib.sha256(body.encode()).hexdigest()[:32]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ChartSpec":
+        return cls(**data)
+
+def render_chart(spec: ChartSpec, path: str) -> str:
+    """
+    Draw a chart spec to a PNG file with matplotlib.
+    Runs in worker processes, so it only takes and returns picklable values.
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=tuple(spec.size))
+    try:
+        if spec.kind == "bar":
+            names = list(spec.series)
+            width = 0.8 / max(len(names), 1)
+            positions = range(len(spec.labels))
+            for i, name in enumerate(names):
+                ax.bar([p + i * width for p in positions], spec.series[name], width=width, label=name)
+            ax.set_xticks([p + width * (len(names) - 1) / 2 for p in positions])
+            ax.set_xticklabels(spec.labels, rotation=45, ha="right")
+        elif spec.kind == "hist":
+            for name, values in spec.series.items():
+                ax.hist(values, alpha=0.5, label=name, bins=spec.bins)
+        elif spec.kind == "line":
+            for name, values in spec.series.items():
+                ax.plot(spec.labels or range(len(values)), values, label=name)
+        else:
+            raise ValueError(f"Unknown chart kind: {spec.kind}")
+
+        ax.set_title(spec.title)
+        ax.set_xlabel(spec.xlabel)
+        ax.set_ylabel(spec.ylabel)
+        if len(spec.series) > 1 or spec.kind == "hist":
+            ax.legend()
+        fig.tight_layout()
+
+        temp_path = f"{path}.{os.getpid()}.tmp.png"
+        fig.savefig(temp_path)
+        os.replace(temp_path, path)
+    finally:
+        plt.close(fig)
+    return path
+
+class ChartRenderer:
+    """
+    Renders chart specs in a worker pool with an on-disk cache keyed by
+    spec hash. Unchanged charts (same data, same renderer version) are
+    reused from the cache, and identical charts requested by several
+    reports in one batch are drawn once.
+    """
+
+    def __init__(self,
+                 cache_dir: str = "reports/chart_cache",
+                 max_workers: Optional[int] = None,
+                 use_processes: bool = True,
+                 render_fn: Callable[[ChartSpec, str], str] = render_chart):
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers or min(8, os.cpu_count() or 1)
+        self.use_processes = use_processes
+        self.render_fn = render_fn
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def path_for(self, spec: ChartSpec) -> str:
+        return os.path.join(self.cache_dir, f"{spec.key()}.png")
+
+    def _executor(self) -> Executor:
+        if self.use_processes:
+            return ProcessPoolExecutor(max_workers=self.max_workers)
+        return ThreadPoolExecutor(max_workers=self.max_workers)
+
+    def render_all(self, specs: Dict[str, ChartSpec]) -> Dict[str, str]:
+        """
+        Render a batch of named charts.
+
+        Args:
+            specs: Mapping of chart name to spec
+
+        Returns:
+            Mapping of chart name to PNG path
+        """
+        paths = {name: self.path_for(spec) for name, spec in specs.items()}
+        pending: Dict[str, ChartSpec] = {}
+        for name, spec in specs.items():
+            path = paths[name]
+            if os.path.exists(path):
+                self.hits += 1
+            elif path not in pending:
+                pending[path] = spec
+            else:
+                self.hits += 1
+
+        if pending:
+            self.misses += len(pending)
+            if len(pending) == 1:
+                path, spec = next(iter(pending.items()))
+                self.render_fn(spec, path)
+            else:
+                with self._executor() as executor:
+                    futures = [executor.submit(self.render_fn, spec, path) for path, spec in pending.items()]
+                    for future in futures:
+                        future.result()
+        return paths
+
+    def publish(self, paths: Dict[str, str], directory: str) -> Dict[str, str]:
+        """
+        Copy rendered charts to stable `<directory>/<name>.png` paths for
+        readers that expect fixed file names (e.g. the dashboard).
+
+        Returns:
+            Mapping of chart name to published path
+        """
+        os.makedirs(directory, exist_ok=True)
+        published = {}
+        for name, path in paths.items():
+            target = os.path.join(directory, f"{name}.png")
+            shutil.copyfile(path, target)
+            published[name] = target
+        return published
+
+    def prune(self, keep: List[str]):
+        """Remove cached images not in `keep` (paths returned by render_all)"""
+        keep = {os.path.abspath(p) for p in keep}
+        for name in os.listdir(self.cache_dir):
+            path = os.path.abspath(os.path.join(self.cache_dir, name))
+            if name.endswith(".png") and path not in keep:
+                os.remove(path)
@@ -2,14 +2,23 @@ from datetime import datetime
 from fpdf import FPDF
 import os
 import json
-from typing import Dict, Any
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Any, Callable, List, Optional, Tuple
+from agents.reporting.charts import ChartRenderer, ChartSpec
 
 class CompetitiveReport(FPDF):
+    def __init__(self, title: str = 'ZK MarketWatch - Daily Intelligence Report'):
+        super().__init__()
+        self.report_title = title
+        self.generated = datetime.now().strftime("%Y-%m-%d %H:%M")
+
     def header(self):
         self.set_font('Arial', 'B', 16)
-        self.cell(0, 10, 'ZK MarketWatch - Daily Intelligence Report', 0, 1, 'C')
+        self.cell(0, 10, self.report_title, 0, 1, 'C')
         self.set_font('Arial', '', 10)
-        self.cell(0, 10, f'Generated: {datetime.now().strftime("%Y-%m-%d %H:%M")}', 0, 1, 'C')
+        self.cell(0, 10, f'Generated: {self.generated}', 0, 1, 'C')
         self.ln(10)
 
     def footer(self):
@@ -17,94 +26,195 @@ class CompetitiveReport(FPDF):
         self.set_font('Arial', 'I', 8)
         self.cell(0, 10, f'Page {self.page_no()}', 0, 0, 'C')
 
-def generate_daily_report(analysis: Dict[str, Any]) -> str:
+def _heading(pdf: FPDF, text: str, size: int = 14):
+    pdf.set_font('Arial', 'B', size)
+    pdf.cell(0, 10, text, 0, 1)
+    pdf.set_font('Arial', '', 10)
+
+def _lines(pdf: FPDF, lines: List[str]):
+    # One multi_cell per block instead of one cell per row
+    if lines:
+        pdf.multi_cell(0, 10, "\n".join(lines))
+    pdf.ln(5)
+
+def _summary(pdf: FPDF, analysis: Dict[str, Any], plots: Dict[str, str]):
+    _heading(pdf, 'Executive Summary')
+    _lines(pdf, [
+        f"Analysis of {analysis['total_products']} products across "
+        f"{len(analysis['competitors_analyzed'])} competitors "
+        f"({', '.join(analysis['competitors_analyzed'])})."
+    ])
+
+def _overall_prices(pdf: FPDF, analysis: Dict[str, Any], plots: Dict[str, str]):
+    _heading(pdf, 'Price Analysis')
+    _heading(pdf, 'Overall Average Prices', 12)
+    _lines(pdf, [f"{competitor}: ৳{price:.2f}"
+                 for competitor, price in analysis['price_analysis']['overall'].items()])
+
+def _category_rows(by_category: Dict[Any, Any]) -> List[Tuple[str, str, float]]:
+    rows = []
+    for key, value in by_category.items():
+        if isinstance(value, dict):
+            # {competitor: {category: price}} as produced by DataFrame.to_dict()
+            rows.extend((category, key, price) for category, price in value.items() if price == price)
+        else:
+            category, competitor = key
+            rows.append((category, competitor, value))
+    return rows
+
+def _category_prices(pdf: FPDF, analysis: Dict[str, Any], plots: Dict[str, str]):
+    _heading(pdf, 'Category-wise Price Analysis', 12)
+    _lines(pdf, [f"{category} - {competitor}: ৳{price:.2f}"
+                 for category, competitor, price in _category_rows(analysis['price_analysis']['by_category'])])
+
+def _stock(pdf: FPDF, analysis: Dict[str, Any], plots: Dict[str, str]):
+    _heading(pdf, 'Stock Availability')
+    stock = analysis['stock_analysis']
+    # {"mean": {competitor: share}} from DataFrame.to_dict(), or {competitor: {"mean": share}}
+    shares = stock['mean'] if 'mean' in stock else {c: s['mean'] for c, s in stock.items()}
+    _lines(pdf, [f"{competitor}: {share * 100:.1f}% products in stock" for competitor, share in shares.items()])
+
+def _chart_page(name: str, title: str) -> Callable:
+    def section(pdf: FPDF, analysis: Dict[str, Any], plots: Dict[str, str]):
+        path = plots.get(name)
+        if path and os.path.exists(path):
+            pdf.add_page()
+            _heading(pdf, title)
+            pdf.image(path, x=10, y=pdf.get_y(), w=190)
+    return section
+
+SECTIONS: Dict[str, Callable] = {
+    'summary': _summary,
+    'overall_prices': _overall_prices,
+    'category_prices': _category_prices,
+    'stock': _stock,
+    'price_comparison_chart': _chart_page('price_comparison', 'Price Comparison Visualization'),
+    'price_distribution_chart': _chart_page('price_distribution', 'Price Distribution Analysis'),
+}
+
+TEMPLATES: Dict[str, List[str]] = {
+    'daily': ['summary', 'overall_prices', 'category_prices', 'stock',
+              'price_comparison_chart', 'price_distribution_chart'],
+}
+
+@lru_cache(maxsize=None)
+def compile_template(name: str) -> Tuple[Callable, ...]:
+    """Resolves a template's section names to renderers once per process"""
+    try:
+        return tuple(SECTIONS[section] for section in TEMPLATES[name])
+    except KeyError as e:
+        raise ValueError(f"Unknown report template or section: {e}") from None
+
+def render_report(analysis: Dict[str, Any], plots: Dict[str, str], filename: str,
+                  title: Optional[str] = None, template: str = 'daily') -> str:
     """
-    Generates a PDF report from the competitive analysis results.
-    
+    Renders one PDF report from analysis results and rendered chart paths.
+
     Args:
         analysis: Dictionary containing analysis results
-        
+        plots: Mapping of chart name to image path
+        filename: Output PDF path
+        title: Report title (default: daily intelligence report)
+        template: Name of the section template in TEMPLATES
+
     Returns:
         Path to the generated PDF report
     """
-    pdf = CompetitiveReport()
+    pdf = CompetitiveReport(title) if title else CompetitiveReport()
     pdf.add_page()
-    
-    # Summary section
-    pdf.set_font('Arial', 'B', 14)
-    pdf.cell(0, 10, 'Executive Summary', 0, 1)
-    pdf.set_font('Arial', '', 10)
-    pdf.multi_cell(0, 10, (
-        f"Analysis of {analysis['total_products']} products across "
-        f"{len(analysis['competitors_analyzed'])} competitors "
-        f"({', '.join(analysis['competitors_analyzed'])})."
-    ))
-    pdf.ln(5)
-    
-    # Price Analysis
-    pdf.set_font('Arial', 'B', 14)
-    pdf.cell(0, 10, 'Price Analysis', 0, 1)
-    pdf.set_font('Arial', '', 10)
-    
-    # Overall price comparison
-    pdf.set_font('Arial', 'B', 12)
-    pdf.cell(0, 10, 'Overall Average Prices', 0, 1)
-    pdf.set_font('Arial', '', 10)
-    for competitor, price in analysis['price_analysis']['overall'].items():
-        pdf.cell(0, 10, f"{competitor}: ৳{price:.2f}", 0, 1)
-    pdf.ln(5)
-    
-    # Category-wise analysis
-    pdf.set_font('Arial', 'B', 12)
-    pdf.cell(0, 10, 'Category-wise Price Analysis', 0, 1)
-    pdf.set_font('Arial', '', 10)
-    for category_comp, price in analysis['price_analysis']['by_category'].items():
-        category, competitor = category_comp
-        pdf.cell(0, 10, f"{category} - {competitor}: ৳{price:.2f}", 0, 1)
-    pdf.ln(5)
-    
-    # Stock Analysis
-    pdf.set_font('Arial', 'B', 14)
-    pdf.cell(0, 10, 'Stock Availability', 0, 1)
-    pdf.set_font('Arial', '', 10)
-    for competitor, stats in analysis['stock_analysis'].items():
-        availability = stats['mean'] * 100
-        pdf.cell(0, 10, 
-                f"{competitor}: {availability:.1f}% products in stock", 
-                0, 1)
-    pdf.ln(5)
-    
-    # Add visualizations
-    if os.path.exists(analysis['plots']['price_comparison']):
-        pdf.add_page()
-        pdf.set_font('Arial', 'B', 14)
-        pdf.cell(0, 10, 'Price Comparison Visualization', 0, 1)
-        pdf.image(analysis['plots']['price_comparison'], 
-                 x=10, 
-                 y=pdf.get_y(), 
-                 w=190)
-    
-    if os.path.exists(analysis['plots']['price_distribution']):
-        pdf.add_page()
-        pdf.set_font('Arial', 'B', 14)
-        pdf.cell(0, 10, 'Price Distribution Analysis', 0, 1)
-        pdf.image(analysis['plots']['price_distribution'], 
-                 x=10, 
-                 y=pdf.get_y(), 
-                 w=190)
-    
-    # Save report
-    os.makedirs('reports', exist_ok=True)
-    filename = f"reports/daily_report_{datetime.now().strftime('%Y%m%d')}.pdf"
+    for section in compile_template(template):
+        section(pdf, analysis, plots)
+
+    os.makedirs(os.path.dirname(filename) or '.', exist_ok=True)
     pdf.output(filename)
     return filename
 
+def _plots_for(analysis: Dict[str, Any], renderer: ChartRenderer) -> Dict[str, str]:
+    if analysis.get('charts'):
+        specs = {name: ChartSpec.from_dict(spec) for name, spec in analysis['charts'].items()}
+        return renderer.render_all(specs)
+    return analysis.get('plots', {})
+
+def generate_daily_report(analysis: Dict[str, Any]) -> str:
+    """
+    Generates a PDF report from the competitive analysis results.
+
+    Args:
+        analysis: Dictionary containing analysis results
+
+    Returns:
+        Path to the generated PDF report
+    """
+    if analysis.get('plots'):
+        plots = analysis['plots']
+    else:
+        renderer = ChartRenderer()
+        plots = _plots_for(analysis, renderer)
+        renderer.prune(list(plots.values()))
+    filename = f"reports/daily_report_{datetime.now().strftime('%Y%m%d')}.pdf"
+    return render_report(analysis, plots, filename)
+
+@dataclass
+class ReportJob:
+    """One report to produce, e.g. for a region, store or category"""
+    name: str
+    analysis: Dict[str, Any]
+    filename: str
+    title: Optional[str] = None
+    template: str = 'daily'
+
+def _render_job(job: ReportJob, plots: Dict[str, str]) -> str:
+    return render_report(job.analysis, plots, job.filename, job.title, job.template)
+
+def generate_reports(jobs: List[ReportJob],
+                     max_workers: Optional[int] = None,
+                     renderer: Optional[ChartRenderer] = None) -> Dict[str, str]:
+    """
+    Generates many reports at once.
+
+    Charts of all jobs are rendered first in one pass through the chart
+    renderer, so charts shared between reports or unchanged since the last
+    run are drawn at most once. The PDFs are then built in parallel worker
+    processes.
+
+    Args:
+        jobs: Reports to generate
+        max_workers: Worker processes for PDF rendering
+        renderer: Chart renderer (default: cache in reports/chart_cache,
+            pruned to this batch's charts)
+
+    Returns:
+        Mapping of job name to PDF path
+    """
+    own_renderer = renderer is None
+    renderer = renderer or ChartRenderer()
+    all_specs: Dict[str, ChartSpec] = {}
+    for job in jobs:
+        for chart, spec in job.analysis.get('charts', {}).items():
+            all_specs[f"{job.name}/{chart}"] = ChartSpec.from_dict(spec)
+    rendered = renderer.render_all(all_specs)
+    if own_renderer:
+        # Keep the cache to this batch's charts so it does not grow without bound
+        renderer.prune(list(rendered.values()))
+
+    plots: Dict[str, Dict[str, str]] = {}
+    for job in jobs:
+        charts = job.analysis.get('charts', {})
+        plots[job.name] = ({chart: rendered[f"{job.name}/{chart}"] for chart in charts}
+                           if charts else job.analysis.get('plots', {}))
+
+    if len(jobs) <= 1:
+        return {job.name: _render_job(job, plots[job.name]) for job in jobs}
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {job.name: executor.submit(_render_job, job, plots[job.name]) for job in jobs}
+        return {name: future.result() for name, future in futures.items()}
+
 if __name__ == "__main__":
     try:
         # Load latest analysis
         with open('analysis/latest_analysis.json', 'r') as f:
             analysis = json.load(f)
-            
+
         # Generate report
         report_path = generate_daily_report(analysis)
         print(f"\nReport generated successfully: {report_path}")
@@ -1,22 +1,208 @@
+import os
+import html
+import json
+import math
+import shutil
+import hashlib
 import logging
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Iterable, Optional
 
 logger = logging.getLogger('ReportGenerator')
 
+RECOMMENDATIONS = [
+    "Monitor competitors with lowest prices for potential matching",
+    "Consider promotional strategies for high-priced items",
+    "Maintain stock levels for products with high demand",
+    "Review pricing strategy based on market averages",
+]
+
+# Bump when section layouts change so cached sections are re-rendered
+SECTION_VERSION = 2
+
+def _json_default(value):
+    return value.item() if hasattr(value, 'item') else str(value)
+
+def _json_safe(value):
+    """Replace NaN and infinities (e.g. the std of a single price) with None."""
+    if isinstance(value, dict):
+        return {k: _json_safe(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(v) for v in value]
+    if getattr(value, 'shape', None) == ():
+        value = value.item()  # numpy scalar
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+def _section_inputs(analysis: Dict) -> Dict:
+    """What a product section is rendered from; timestamps are left out so unchanged sections are reused."""
+    return {k: v for k, v in analysis.items() if k != 'analysis_timestamp'}
+
+def section_hash(analysis: Dict) -> str:
+    """Hash of the inputs a product section is rendered from."""
+    body = json.dumps([SECTION_VERSION, _section_inputs(analysis)], sort_keys=True, default=_json_default)
+    return hashlib.sha256(body.encode()).hexdigest()[:32]
+
+def _markdown_header(count: int, now: datetime) -> str:
+    return f"""# 📊 Apon Family Mart - Daily Market Intelligence Report\nGenerated on: {now.strftime('%Y-%m-%d %H:%M:%S')}\n\n## 📈 Executive Summary\n- **Products Analyzed**: {count}\n- **Report Date**: {now.strftime('%B %d, %Y')}\n- **Market Status**: Active Monitoring\n\n---\n\n"""
+
+def _markdown_section(analysis: Dict) -> str:
+    stats = analysis['price_statistics']
+    parts = [f"""## 🛍️ {analysis['product_name']}\n\n### Price Statistics\n- **Minimum Price**: {stats['min_price']:.2f} BDT\n- **Maximum Price**: {stats['max_price']:.2f} BDT\n- **Average Price**: {stats['avg_price']:.2f} BDT\n- **Price Range**: {stats['max_price'] - stats['min_price']:.2f} BDT\n\n### Competitor Analysis\n"""]
+    for competitor, data in analysis['competitor_analysis'].items():
+        parts.append(f"- **{competitor}**: {data['avg_price']:.2f} BDT (Availability: {data['availability_rate']:.1f}%)\n")
+    parts.append("\n### Key Insights\n")
+    parts.extend(f"- {insight}\n" for insight in analysis['insights'])
+    parts.append("\n---\n\n")
+    return "".join(parts)
+
+def _markdown_footer() -> str:
+    items = "".join(f"{i}. {text}\n" for i, text in enumerate(RECOMMENDATIONS, 1))
+    return f"""## 📋 Recommendations\n{items}\n---\n*Report generated by Apon Family Mart Intelligence System*\n"""
+
+def _html_header(count: int, now: datetime) -> str:
+    return (f"<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>Apon Family Mart - Daily Market Intelligence Report</title></head><body>\n"
+            f"<h1>📊 Apon Family Mart - Daily Market Intelligence Report</h1>\n<p>Generated on: {now.strftime('%Y-%m-%d %H:%M:%S')}</p>\n"
+            f"<h2>📈 Executive Summary</h2>\n<ul><li><b>Products Analyzed</b>: {count}</li><li><b>Report Date</b>: {now.strftime('%B %d, %Y')}</li>"
+            f"<li><b>Market Status</b>: Active Monitoring</li></ul>\n<hr>\n")
+
+def _html_section(analysis: Dict) -> str:
+    stats = analysis['price_statistics']
+    parts = [f"<section>\n<h2>🛍️ {html.escape(str(analysis['product_name']))}</h2>\n<h3>Price Statistics</h3>\n<ul>"
+             f"<li><b>Minimum Price</b>: {stats['min_price']:.2f} BDT</li><li><b>Maximum Price</b>: {stats['max_price']:.2f} BDT</li>"
+             f"<li><b>Average Price</b>: {stats['avg_price']:.2f} BDT</li><li><b>Price Range</b>: {stats['max_price'] - stats['min_price']:.2f} BDT</li></ul>\n"
+             "<h3>Competitor Analysis</h3>\n<ul>"]
+    for competitor, data in analysis['competitor_analysis'].items():
+        parts.append(f"<li><b>{html.escape(str(competitor))}</b>: {data['avg_price']:.2f} BDT (Availability: {data['availability_rate']:.1f}%)</li>")
+    parts.append("</ul>\n<h3>Key Insights</h3>\n<ul>")
+    parts.extend(f"<li>{html.escape(str(insight))}</li>" for insight in analysis['insights'])
+    parts.append("</ul>\n</section>\n<hr>\n")
+    return "".join(parts)
+
+def _html_footer() -> str:
+    items = "".join(f"<li>{html.escape(text)}</li>" for text in RECOMMENDATIONS)
+    return f"<h2>📋 Recommendations</h2>\n<ol>{items}</ol>\n<hr>\n<p><i>Report generated by Apon Family Mart Intelligence System</i></p>\n</body></html>\n"
+
+def _json_header(count: int, now: datetime) -> str:
+    return f'{{"generated_on": "{now.isoformat()}", "products_analyzed": {count}, "products": [\n'
+
+def _json_section(analysis: Dict) -> str:
+    return json.dumps(_json_safe(_section_inputs(analysis)), ensure_ascii=False, allow_nan=False,
+                      default=_json_default)
+
+def _json_footer() -> str:
+    return "\n], " + json.dumps({"recommendations": RECOMMENDATIONS}, ensure_ascii=False)[1:] + "\n"
+
+FORMATS = {
+    'md': (_markdown_header, _markdown_section, _markdown_footer, ""),
+    'html': (_html_header, _html_section, _html_footer, ""),
+    'json': (_json_header, _json_section, _json_footer, ",\n"),
+}
+
+class StreamingReportWriter:
+    """
+    Writes report sections to disk as analyses complete.
+
+    Each product section is appended to a per-format body file and flushed
+    right away, so memory stays flat and a partial report exists while the
+    pipeline runs. Rendered sections are cached by a hash of their inputs;
+    a product whose analysis is unchanged since the last run reuses its
+    cached section instead of being rendered again. close() writes the final
+    files as header + body + footer, streaming the body from disk.
+    """
+
+    def __init__(self, base_path: str, formats: Iterable[str] = ('md',), cache_dir: Optional[str] = None):
+        unknown = set(formats) - set(FORMATS)
+        if unknown:
+            raise ValueError(f"Unsupported report formats: {sorted(unknown)}")
+        self.base_path = base_path
+        self.formats = list(formats)
+        self.cache_dir = cache_dir or os.path.join(os.path.dirname(base_path) or '.', '.report_sections')
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.count = 0
+        self.reused = 0
+        self._used = set()
+        self._bodies = {fmt: open(f"{base_path}.{fmt}.part", 'w', encoding='utf-8') for fmt in self.formats}
+
+    def add(self, analysis: Dict):
+        """Render (or reuse) and append the section for one product analysis."""
+        if not analysis:
+            return
+        key = section_hash(analysis)
+        rendered = {}
+        reused = True
+        for fmt in self.formats:
+            cached = os.path.join(self.cache_dir, f"{key}.{fmt}")
+            self._used.add(cached)
+            if os.path.exists(cached):
+                with open(cached, encoding='utf-8') as f:
+                    rendered[fmt] = f.read()
+            else:
+                reused = False
+                rendered[fmt] = FORMATS[fmt][1](analysis)
+                with open(cached, 'w', encoding='utf-8') as f:
+                    f.write(rendered[fmt])
+        self.reused += reused
+        for fmt, text in rendered.items():
+            body = self._bodies[fmt]
+            if self.count:
+                body.write(FORMATS[fmt][3])
+            body.write(text)
+            body.flush()
+        self.count += 1
+
+    def close(self) -> Dict[str, str]:
+        """
+        Assemble the final report files and drop cached sections not used in this run.
+
+        Returns:
+            Mapping of format to report path
+        """
+        now = datetime.now()
+        paths = {}
+        for fmt in self.formats:
+            header, _, footer, _ = FORMATS[fmt]
+            part_path = f"{self.base_path}.{fmt}.part"
+            self._bodies[fmt].close()
+            final_path = f"{self.base_path}.{fmt}"
+            temp_path = f"{final_path}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as out, open(part_path, encoding='utf-8') as body:
+                out.write(header(self.count, now))
+                shutil.copyfileobj(body, out)
+                out.write(footer())
+            os.replace(temp_path, final_path)
+            os.remove(part_path)
+            paths[fmt] = final_path
+
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if path not in self._used:
+                os.remove(path)
+        logger.info(f"Generated report with {self.count} product analyses ({self.reused} sections reused)")
+        return paths
+
+    def discard(self):
+        """Close and remove the partial body files without writing a report."""
+        for fmt, body in self._bodies.items():
+            body.close()
+            part_path = f"{self.base_path}.{fmt}.part"
+            if os.path.exists(part_path):
+                os.remove(part_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
 def generate_markdown_report(analyses: List[Dict]) -> str:
     """Generate markdown report from analyses."""
-    report = f"""# 📊 Apon Family Mart - Daily Market Intelligence Report\nGenerated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n## 📈 Executive Summary\n- **Products Analyzed**: {len(analyses)}\n- **Report Date**: {datetime.now().strftime('%B %d, %Y')}\n- **Market Status**: Active Monitoring\n\n---\n\n"""
-    for analysis in analyses:
-        if not analysis:
-            continue
-        report += f"""## 🛍️ {analysis['product_name']}\n\n### Price Statistics\n- **Minimum Price**: {analysis['price_statistics']['min_price']:.2f} BDT\n- **Maximum Price**: {analysis['price_statistics']['max_price']:.2f} BDT\n- **Average Price**: {analysis['price_statistics']['avg_price']:.2f} BDT\n- **Price Range**: {analysis['price_statistics']['max_price'] - analysis['price_statistics']['min_price']:.2f} BDT\n\n### Competitor Analysis\n"""
-        for competitor, data in analysis['competitor_analysis'].items():
-            report += f"- **{competitor}**: {data['avg_price']:.2f} BDT (Availability: {data['availability_rate']:.1f}%)\n"
-        report += f"\n### Key Insights\n"
-        for insight in analysis['insights']:
-            report += f"- {insight}\n"
-        report += "\n---\n\n"
-    report += f"""## 📋 Recommendations\n1. Monitor competitors with lowest prices for potential matching\n2. Consider promotional strategies for high-priced items\n3. Maintain stock levels for products with high demand\n4. Review pricing strategy based on market averages\n\n---\n*Report generated by Apon Family Mart Intelligence System*\n"""
+    parts = [_markdown_header(len(analyses), datetime.now())]
+    parts.extend(_markdown_section(analysis) for analysis in analyses if analysis)
+    parts.append(_markdown_footer())
     logger.info(f"Generated report with {len(analyses)} product analyses")
-    return report
+    return "".join(parts)
@@ -9,10 +9,11 @@ from webdriver_manager.chrome import ChromeDriverManager
 from bs4 import BeautifulSoup
 import re
 from typing import Dict, Any, List
-import time
 import logging
 import os
 
+from agents.data_collection.browser import wait_for_elements
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -48,12 +49,9 @@ class ShawpnoScraper:
             logger.info(f"Scraping Shwapno URL: {url}")
             
             self.driver.get(url)
-            time.sleep(5)  # Extended wait for dynamic content
             
-            # Scroll multiple times to load lazy content
-            for _ in range(3):
-                self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(2)
+            # Wait for the product grid and scroll only while new items load
+            wait_for_elements(self.driver, ".product-item, .grid-product__content")
             
             products = []
             # Updated selectors for current Shwapno website
@@ -123,13 +121,9 @@ class MeenaBazarScraper:
             except Exception as e:
                 logger.error(f"Error accessing URL {url}: {e}")
                 return []
-                
-            time.sleep(5)  # Extended wait for dynamic content
             
-            # Scroll multiple times to load lazy content
-            for _ in range(3):
-                self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(2)
+            # Wait for the product grid and scroll only while new items load
+            wait_for_elements(self.driver, ".product-item-info, .product-item")
             
             products = []
             # Updated selectors for current Meena Bazar website
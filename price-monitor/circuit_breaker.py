@@ -0,0 +1,161 @@
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+StateListener = Callable[[str, str, str], None]
+
+@dataclass
+class CircuitBreaker:
+    """
+    Circuit breaker for one (host, fetch method) pair.
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    calls are refused. Once `recovery_timeout` has passed it goes half-open
+    and lets `half_open_probes` calls through: a success closes it, a
+    failure re-opens it with the timeout doubled (up to `max_recovery_timeout`).
+    Callers release() every allowed call once it ends, so a probe that ends
+    without an outcome (e.g. cancelled) frees its slot instead of wedging
+    the circuit half-open.
+    """
+    failure_threshold: int = 5
+    recovery_timeout: float = 30.0
+    max_recovery_timeout: float = 600.0
+    half_open_probes: int = 1
+    clock: Callable[[], float] = time.monotonic
+
+    def __post_init__(self):
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.current_timeout = self.recovery_timeout
+        self.probes_in_flight = 0
+        self.listener: Optional[Callable[[str], None]] = None
+
+    def _transition(self, state: str) -> None:
+        if state != self.state:
+            self.state = state
+            if self.listener:
+                self.listener(state)
+
+    def allow(self) -> bool:
+        """Whether a call may go through now; half-open calls count as probes."""
+        if self.state == OPEN:
+            if self.clock() - self.opened_at < self.current_timeout:
+                return False
+            self.probes_in_flight = 0
+            self._transition(HALF_OPEN)
+
+        if self.state == HALF_OPEN:
+            if self.probes_in_flight >= self.half_open_probes:
+                return False
+            self.probes_in_flight += 1
+        return True
+
+    def release(self) -> None:
+        """Give back the probe slot of a call that ended without recording an outcome."""
+        if self.state == HALF_OPEN and self.probes_in_flight > 0:
+            self.probes_in_flight -= 1
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.probes_in_flight = 0
+        self.current_timeout = self.recovery_timeout
+        self._transition(CLOSED)
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == HALF_OPEN:
+            # The probe failed: stay away longer before the next one
+            self.current_timeout = min(self.current_timeout * 2, self.max_recovery_timeout)
+            self._open()
+        elif self.state == CLOSED and self.failures >= self.failure_threshold:
+            self._open()
+
+    def _open(self) -> None:
+        self.opened_at = self.clock()
+        self.probes_in_flight = 0
+        self._transition(OPEN)
+
+    def reset(self) -> None:
+        self.failures = 0
+        self.probes_in_flight = 0
+        self.current_timeout = self.recovery_timeout
+        self._transition(CLOSED)
+
+    def retry_after(self) -> float:
+        """Seconds until an open circuit will allow a probe."""
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self.current_timeout - (self.clock() - self.opened_at))
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "retry_after_seconds": round(self.retry_after(), 1)
+        }
+
+class CircuitBreakerRegistry:
+    """
+    Circuit breakers keyed by (host, method), created on first use.
+
+    `listener(host, method, state)` is called on every state change, e.g.
+    to update metrics.
+    """
+
+    def __init__(self,
+                 failure_threshold: int = 5,
+                 recovery_timeout: float = 30.0,
+                 max_recovery_timeout: float = 600.0,
+                 half_open_probes: int = 1,
+                 listener: Optional[StateListener] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.max_recovery_timeout = max_recovery_timeout
+        self.half_open_probes = half_open_probes
+        self.listener = listener
+        self.clock = clock
+        self._breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+
+    def get(self, host: str, method: str) -> CircuitBreaker:
+        key = (host.lower(), method)
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                failure_threshold=self.failure_threshold,
+                recovery_timeout=self.recovery_timeout,
+                max_recovery_timeout=self.max_recovery_timeout,
+                half_open_probes=self.half_open_probes,
+                clock=self.clock
+            )
+            if self.listener:
+                breaker.listener = lambda state, h=key[0], m=method: self.listener(h, m, state)
+            self._breakers[key] = breaker
+        return breaker
+
+    def reset(self, host: Optional[str] = None) -> int:
+        """Close the circuits of one host (or all hosts). Returns how many were reset."""
+        reset = 0
+        for (breaker_host, _), breaker in self._breakers.items():
+            if host is None or breaker_host == host.lower():
+                breaker.reset()
+                reset += 1
+        return reset
+
+    def open_circuits(self) -> List[str]:
+        return [f"{host}/{method}" for (host, method), breaker in self._breakers.items()
+                if breaker.state != CLOSED]
+
+    def total_failures(self) -> int:
+        return sum(breaker.failures for breaker in self._breakers.values())
+
+    def stats(self) -> Dict[str, Dict[str, object]]:
+        stats: Dict[str, Dict[str, object]] = {}
+        for (host, method), breaker in self._breakers.items():
+            stats.setdefault(host, {})[method] = breaker.snapshot()
+        return stats
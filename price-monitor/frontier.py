@@ -0,0 +1,146 @@
+import asyncio
+import hashlib
+import math
+import re
+import xml.etree.ElementTree as ET
+from typing import Iterable, List, Optional, Tuple, Union
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+TRACKING_PARAM_RE = re.compile(r"^(?:utm_\w+|fbclid|gclid|ref|_ga)$", re.IGNORECASE)
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+def normalize_url(url: str) -> str:
+    """
+    Canonical form of a URL for deduplication.
+
+    Lowercases scheme and host, drops default ports, fragments, tracking
+    parameters and trailing slashes, and sorts the query string.
+    """
+    parsed = urlparse(url.strip())
+    scheme = parsed.scheme.lower()
+    host = (parsed.hostname or "").lower()
+    if parsed.port and parsed.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parsed.port}"
+
+    path = re.sub(r"/{2,}", "/", parsed.path) or "/"
+    if len(path) > 1:
+        path = path.rstrip("/")
+
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if not TRACKING_PARAM_RE.match(key)
+    ))
+    return urlunparse((scheme, host, path, "", query, ""))
+
+class BloomFilter:
+    """
+    Fixed-memory set membership with a bounded false-positive rate.
+
+    Used instead of a set for very large crawls; a false positive only
+    means a URL is skipped, never fetched twice.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str) -> Iterable[int]:
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item: str) -> None:
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def __len__(self) -> int:
+        return self.count
+
+class Frontier:
+    """
+    Deduplicating priority queue of URLs to crawl.
+
+    URLs are normalized and checked against a seen-set when pushed, so each
+    page is queued at most once. Lower priority values are fetched first
+    (defaulting to depth, i.e. breadth-first). URLs beyond `max_depth` or
+    after `max_pages` pushes are dropped.
+    """
+
+    def __init__(self,
+                 max_depth: int = 2,
+                 max_pages: int = 500,
+                 bloom_capacity: Optional[int] = None):
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.seen: Union[set, BloomFilter] = BloomFilter(bloom_capacity) if bloom_capacity else set()
+        self.queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self.queued = 0
+        self._seq = 0
+
+    def mark_seen(self, url: str) -> bool:
+        """Record a URL as seen. Returns False if it was already seen."""
+        url = normalize_url(url)
+        if url in self.seen:
+            return False
+        self.seen.add(url)
+        return True
+
+    def push(self, url: str, depth: int, priority: Optional[float] = None) -> bool:
+        """Queue a URL unless it was seen, is too deep, or the budget is spent."""
+        if depth > self.max_depth or self.queued >= self.max_pages:
+            return False
+        if not self.mark_seen(url):
+            return False
+        self._seq += 1
+        self.queued += 1
+        self.queue.put_nowait((depth if priority is None else priority, self._seq, normalize_url(url), depth))
+        return True
+
+    async def get(self) -> Tuple[str, int]:
+        _, _, url, depth = await self.queue.get()
+        return url, depth
+
+    def task_done(self) -> None:
+        self.queue.task_done()
+
+    async def join(self) -> None:
+        await self.queue.join()
+
+    def __len__(self) -> int:
+        return self.queue.qsize()
+
+SITEMAP_NS_RE = re.compile(r"^\{[^}]+\}")
+
+def parse_sitemap(xml_text: str) -> Tuple[List[str], List[str]]:
+    """
+    Parse a sitemap or sitemap index.
+
+    Returns:
+        (page URLs, child sitemap URLs)
+    """
+    try:
+        root = ET.fromstring(xml_text.strip().encode("utf-8"))
+    except ET.ParseError:
+        return [], []
+
+    pages, children = [], []
+    is_index = SITEMAP_NS_RE.sub("", root.tag) == "sitemapindex"
+    for loc in root.iter():
+        if SITEMAP_NS_RE.sub("", loc.tag) == "loc" and loc.text:
+            (children if is_index else pages).append(loc.text.strip())
+    return pages, children
+
+def sitemaps_from_robots(robots_text: str) -> List[str]:
+    """Sitemap URLs declared in a robots.txt file."""
+    return [
+        line.split(":", 1)[1].strip()
+        for line in robots_text.splitlines()
+        if line.lower().startswith("sitemap:")
+    ]
@@ -3,19 +3,23 @@ import time
 import asyncio
 from typing import Tuple, Optional
 from datetime import datetime
+from urllib.parse import urlparse
 
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.responses import JSONResponse
 from pydantic import BaseSettings, AnyHttpUrl
 import aiohttp
 from aiohttp.resolver import AsyncResolver
-from playwright.async_api import async_playwright, BrowserContext
+from playwright.async_api import async_playwright, BrowserContext, Route
 from bs4 import BeautifulSoup
 from loguru import logger
 from tenacity import (
     AsyncRetrying, stop_after_attempt, wait_exponential, retry_if_exception_type
 )
-from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import Counter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
+
+from circuit_breaker import CircuitBreakerRegistry, CLOSED, HALF_OPEN, OPEN
+from rate_limiter import HostRateLimiter
 
 # ----------------------------
 #   CONFIGURATION
@@ -32,7 +36,19 @@ class Settings(BaseSettings):
     retry_backoff_base: float = 0.5
     semaphore_limit: int = 20
     play_fallback: bool = True
+    play_javascript: bool = True
+    play_blocked_resource_types: Tuple[str, ...] = ("image", "media", "font", "manifest")
+    play_blocked_domains: Tuple[str, ...] = (
+        "google-analytics.com", "googletagmanager.com", "doubleclick.net",
+        "facebook.net", "hotjar.com", "clarity.ms"
+    )
     circuit_breaker_threshold: int = 5
+    circuit_recovery_seconds: float = 30.0
+    circuit_max_recovery_seconds: float = 600.0
+    circuit_half_open_probes: int = 1
+    host_default_rps: float = 2.0
+    host_max_rps: float = 20.0
+    respect_robots: bool = True
 
     class Config:
         env_file = ".env"
@@ -52,6 +68,11 @@ REQUEST_LATENCY = Histogram(
 CIRCUIT_BREAKER_STATE = Counter(
     "circuit_breaker_state", "Circuit breaker state changes", ["state"]
 )
+CIRCUIT_STATE = Gauge(
+    "circuit_breaker_current_state", "Circuit state per host and method (0=closed, 1=half-open, 2=open)",
+    ["host", "method"]
+)
+CIRCUIT_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
 
 # ----------------------------
 #   APP & MIDDLEWARE
@@ -75,8 +96,32 @@ async def log_requests(request: Request, call_next):
 session: Optional[aiohttp.ClientSession] = None
 play_context: Optional[BrowserContext] = None
 _semaphore = asyncio.Semaphore(settings.semaphore_limit)
-_circuit_open = False
-_circuit_failures = 0
+
+async def _fetch_robots(robots_url: str) -> Optional[str]:
+    async with session.get(robots_url) as resp:
+        return await resp.text() if resp.status == 200 else None
+
+def _on_circuit_change(host: str, method: str, state: str):
+    CIRCUIT_BREAKER_STATE.labels(state=state).inc()
+    CIRCUIT_STATE.labels(host=host, method=method).set(CIRCUIT_STATE_VALUES[state])
+    log = logger.warning if state == OPEN else logger.info
+    log(f"Circuit for {host} ({method}) is now {state}")
+
+# One breaker per host and fetch method, so a broken site only blocks itself
+breakers = CircuitBreakerRegistry(
+    failure_threshold=settings.circuit_breaker_threshold,
+    recovery_timeout=settings.circuit_recovery_seconds,
+    max_recovery_timeout=settings.circuit_max_recovery_seconds,
+    half_open_probes=settings.circuit_half_open_probes,
+    listener=_on_circuit_change
+)
+
+# Per-host pacing; the semaphore above only bounds total concurrency
+rate_limiter = HostRateLimiter(
+    default_rate=settings.host_default_rps,
+    max_rate=settings.host_max_rps,
+    robots_loader=_fetch_robots if settings.respect_robots else None
+)
 _startup_time = datetime.now()
 
 @app.on_event("startup")
@@ -107,7 +152,8 @@ async def startup():
         logger.info("Initializing Playwright...")
         pw = await async_playwright().start()
         browser = await pw.chromium.launch(headless=True)
-        play_context = await browser.new_context()
+        play_context = await browser.new_context(java_script_enabled=settings.play_javascript)
+        await play_context.route("**/*", _block_non_essential)
     
     logger.info("Application startup complete!")
 
@@ -123,6 +169,19 @@ async def shutdown():
 # ----------------------------
 #   HELPERS
 # ----------------------------
+def _is_blocked_request(resource_type: str, url: str) -> bool:
+    if resource_type in settings.play_blocked_resource_types:
+        return True
+    host = (urlparse(url).hostname or "").lower()
+    return any(host == d or host.endswith(f".{d}") for d in settings.play_blocked_domains)
+
+async def _block_non_essential(route: Route):
+    # Only the HTML matters for price extraction; skip images, fonts and trackers
+    if _is_blocked_request(route.request.resource_type, route.request.url):
+        await route.abort()
+    else:
+        await route.continue_()
+
 async def _extract_price(html: str) -> str:
     soup = BeautifulSoup(html, "lxml")
     tag = soup.find("p", class_="price_color")
@@ -131,22 +190,40 @@ async def _extract_price(html: str) -> str:
     return tag.get_text().strip()
 
 async def _fetch_with_aiohttp(url: str) -> Tuple[str, float]:
-    start = time.monotonic()
-    async with session.get(url) as resp:
-        resp.raise_for_status()
-        text = await resp.text()
+    # Wait for the host's slot before taking a global one, so crawl-delay and
+    # Retry-After pauses on one host do not stall requests to the others
+    await rate_limiter.acquire(url)
+    async with _semaphore:
+        start = time.monotonic()
+        status, retry_after = None, None
+        try:
+            async with session.get(url) as resp:
+                status, retry_after = resp.status, resp.headers.get("Retry-After")
+                resp.raise_for_status()
+                text = await resp.text()
+        finally:
+            rate_limiter.record_response(url, status, time.monotonic() - start, retry_after)
     price = await _extract_price(text)
     elapsed = time.monotonic() - start
     return price, elapsed
 
 async def _fetch_with_playwright(url: str) -> Tuple[str, float]:
-    start = time.monotonic()
-    page = await play_context.new_page()
-    try:
-        await page.goto(url, timeout=settings.http_timeout_total * 1000)
-        content = await page.content()
-    finally:
-        await page.close()
+    await rate_limiter.acquire(url)
+    async with _semaphore:
+        start = time.monotonic()
+        page = await play_context.new_page()
+        response = None
+        try:
+            response = await page.goto(url, timeout=settings.http_timeout_total * 1000)
+            content = await page.content()
+        finally:
+            await page.close()
+            rate_limiter.record_response(
+                url,
+                response.status if response else None,
+                time.monotonic() - start,
+                response.headers.get("retry-after") if response else None
+            )
     price = await _extract_price(content)
     elapsed = time.monotonic() - start
     return price, elapsed
@@ -162,55 +239,79 @@ retryer = AsyncRetrying(
 # ----------------------------
 #   ENDPOINTS
 # ----------------------------
+def _is_site_failure(err: Exception) -> bool:
+    """Client errors (other than 429) mean a bad URL, not a struggling site."""
+    if isinstance(err, aiohttp.ClientResponseError):
+        return err.status >= 500 or err.status == 429
+    return not isinstance(err, ValueError)
+
 @app.get("/price")
 async def get_price(url: AnyHttpUrl):
-    global _circuit_open, _circuit_failures
+    host = urlparse(str(url)).hostname or str(url)
+    http_breaker = breakers.get(host, "aiohttp")
+    play_breaker = breakers.get(host, "playwright")
 
-    if _circuit_open:
-        raise HTTPException(503, "Circuit is open; too many failures")
+    http_err = play_err = None
 
-    async with _semaphore:
-        # Try aiohttp with retries
+    # Try aiohttp with retries
+    if http_breaker.allow():
         try:
             async for attempt in retryer:
                 with attempt:
                     price, elapsed = await _fetch_with_aiohttp(str(url))
-            method = "aiohttp"
-            _circuit_failures = 0  # Reset on success
-        except Exception as http_err:
+            http_breaker.record_success()
+            return _price_response(url, price, "aiohttp", elapsed)
+        except Exception as e:
+            http_err = e
             REQUEST_COUNTER.labels(method="aiohttp", status="failure").inc()
-            logger.warning(f"aiohttp path failed: {http_err}")
-            
-            # Fallback to playwright
-            try:
-                price, elapsed = await _fetch_with_playwright(str(url))
-                method = "playwright"
-                _circuit_failures = 0  # Reset on success
-            except Exception as play_err:
-                REQUEST_COUNTER.labels(method="playwright", status="failure").inc()
-                logger.error(f"playwright path failed: {play_err}")
-                
-                # Update circuit breaker
-                _circuit_failures += 1
-                if _circuit_failures >= settings.circuit_breaker_threshold:
-                    _circuit_open = True
-                    CIRCUIT_BREAKER_STATE.labels(state="open").inc()
-                    logger.error("Circuit breaker opened due to repeated failures")
-                
-                raise HTTPException(
-                    500, f"Both fetch methods failed: aiohttp({http_err}), playwright({play_err})"
-                )
-        
-        # Record metrics
-        REQUEST_COUNTER.labels(method=method, status="success").inc()
-        REQUEST_LATENCY.labels(method=method).observe(elapsed)
-        
-        return {
-            "url": str(url),
-            "price": price,
-            "method": method,
-            "elapsed_seconds": round(elapsed, 3)
-        }
+            logger.warning(f"aiohttp path failed: {e}")
+            if _is_site_failure(e):
+                http_breaker.record_failure()
+            else:
+                http_breaker.record_success()
+        finally:
+            http_breaker.release()
+    else:
+        http_err = "circuit open"
+
+    # Fallback to playwright
+    if settings.play_fallback and play_breaker.allow():
+        try:
+            price, elapsed = await _fetch_with_playwright(str(url))
+            play_breaker.record_success()
+            return _price_response(url, price, "playwright", elapsed)
+        except Exception as e:
+            play_err = e
+            REQUEST_COUNTER.labels(method="playwright", status="failure").inc()
+            logger.error(f"playwright path failed: {e}")
+            if _is_site_failure(e):
+                play_breaker.record_failure()
+            else:
+                play_breaker.record_success()
+        finally:
+            play_breaker.release()
+    else:
+        play_err = "circuit open" if settings.play_fallback else "disabled"
+
+    if http_err == "circuit open" and play_err in ("circuit open", "disabled"):
+        retry_after = max(http_breaker.retry_after(), play_breaker.retry_after())
+        raise HTTPException(
+            503, f"Circuit is open for {host}; too many failures",
+            headers={"Retry-After": str(int(retry_after) + 1)}
+        )
+    raise HTTPException(
+        500, f"Both fetch methods failed: aiohttp({http_err}), playwright({play_err})"
+    )
+
+def _price_response(url: AnyHttpUrl, price: str, method: str, elapsed: float) -> dict:
+    REQUEST_COUNTER.labels(method=method, status="success").inc()
+    REQUEST_LATENCY.labels(method=method).observe(elapsed)
+    return {
+    "url": str(url),
+    "price": price,
+    "method": method,
+    "elapsed_seconds": round(elapsed, 3)
+    }
 
 @app.get("/metrics")
 async def metrics():
@@ -220,17 +321,24 @@ async def metrics():
 @app.get("/health")
 def health():
     uptime = datetime.now() - _startup_time
+    open_circuits = breakers.open_circuits()
     return {
         "status": "ok",
-        "circuit": "open" if _circuit_open else "closed",
-        "failures": _circuit_failures,
+        "circuit": "open" if open_circuits else "closed",
+        "open_circuits": open_circuits,
+        "failures": breakers.total_failures(),
         "uptime_seconds": uptime.total_seconds()
     }
 
+@app.get("/rate-limits")
+def rate_limits():
+    return rate_limiter.stats()
+
+@app.get("/circuits")
+def circuits():
+    return breakers.stats()
+
 @app.post("/circuit/reset")
-def reset_circuit():
-    global _circuit_open, _circuit_failures
-    _circuit_open = False
-    _circuit_failures = 0
-    CIRCUIT_BREAKER_STATE.labels(state="closed").inc()
-    return {"status": "Circuit breaker reset"} 
\ No newline at end of file
+def reset_circuit(host: Optional[str] = None):
+    reset = breakers.reset(host)
+    return {"status": "Circuit breaker reset", "host": host, "reset": reset} 
\ No newline at end of file
@@ -0,0 +1,177 @@
+import time
+import asyncio
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Dict, Optional
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+from loguru import logger
+
+THROTTLE_STATUSES = frozenset({429, 503})
+
+@dataclass
+class HostState:
+    rate: float
+    tokens: float
+    updated: float
+    blocked_until: float = 0.0
+    crawl_delay: Optional[float] = None
+    ewma_latency: Optional[float] = None
+    requests: int = 0
+    throttled: int = 0
+    robots: Optional[RobotFileParser] = None
+    # Shared by concurrent first callers so none reserves before the crawl-delay applies
+    robots_task: Optional["asyncio.Future[None]"] = None
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After in seconds, given as a number or an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class HostRateLimiter:
+    """
+    Per-host token buckets for the fetch paths.
+
+    A host's rate grows additively after healthy responses and is cut on
+    429/503 (honouring Retry-After) or when smoothed latency climbs above
+    `latency_target`. robots.txt crawl-delay caps the rate. The global
+    semaphore still bounds total concurrency; this paces each site.
+    """
+
+    def __init__(self,
+                 default_rate: float = 2.0,
+                 burst: float = 4.0,
+                 min_rate: float = 0.05,
+                 max_rate: float = 20.0,
+                 increase: float = 0.2,
+                 decrease: float = 0.5,
+                 latency_target: float = 3.0,
+                 default_backoff: float = 30.0,
+                 robots_loader: Optional[Callable[[str], Awaitable[Optional[str]]]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.default_rate = default_rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_target = latency_target
+        self.default_backoff = default_backoff
+        self.robots_loader = robots_loader
+        self.clock = clock
+        self._hosts: Dict[str, HostState] = {}
+
+    def _state(self, url: str) -> HostState:
+        host = (urlparse(url).hostname or url).lower()
+        state = self._hosts.get(host)
+        if state is None:
+            state = HostState(rate=self.default_rate, tokens=self.burst, updated=self.clock())
+            self._hosts[host] = state
+        return state
+
+    def reserve(self, url: str) -> float:
+        """Take the host's next slot and return how long to wait for it."""
+        state = self._state(url)
+        now = self.clock()
+        state.tokens = min(self.burst, state.tokens + max(0.0, now - state.updated) * state.rate)
+        state.updated = max(now, state.updated)
+        state.tokens -= 1
+        state.requests += 1
+        # A negative balance is a queue of reservations; each waits its turn,
+        # counted from the end of any throttling block
+        wait = 0.0 if state.tokens >= 0 else -state.tokens / state.rate
+        return state.updated - now + wait
+
+    async def load_robots(self, url: str) -> None:
+        """Load the host's robots.txt once; concurrent callers wait for the same load."""
+        if not self.robots_loader:
+            return
+        state = self._state(url)
+        if state.robots_task is None:
+            state.robots_task = asyncio.ensure_future(self._load_robots(url, state))
+        await asyncio.shield(state.robots_task)
+
+    def can_fetch(self, url: str, user_agent: str = "*") -> bool:
+        """Whether robots.txt allows the URL (allowed if it is unavailable or not loaded)."""
+        state = self._state(url)
+        return state.robots is None or state.robots.can_fetch(user_agent, url)
+
+    async def acquire(self, url: str) -> float:
+        """Wait until the host may be requested again. Returns seconds waited."""
+        await self.load_robots(url)
+
+        wait = self.reserve(url)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    async def _load_robots(self, url: str, state: HostState) -> None:
+        parsed = urlparse(url)
+        robots_url = f"{parsed.scheme}://{parsed.netloc}/robots.txt"
+        try:
+            text = await self.robots_loader(robots_url)
+        except Exception as e:
+            logger.debug(f"robots.txt unavailable for {parsed.netloc}: {e}")
+            return
+        if not text:
+            return
+
+        parser = RobotFileParser(robots_url)
+        parser.parse(text.splitlines())
+        state.robots = parser
+        delay = parser.crawl_delay("*")
+        if delay:
+            state.crawl_delay = float(delay)
+            state.rate = min(state.rate, 1.0 / state.crawl_delay)
+            logger.info(f"{parsed.netloc} crawl-delay {delay}s")
+
+    def record_response(self, url: str,
+                        status: Optional[int],
+                        latency: Optional[float] = None,
+                        retry_after: Optional[str] = None) -> None:
+        """Adapt the host's rate to a response (status None = connection error)."""
+        state = self._state(url)
+        if latency is not None:
+            state.ewma_latency = latency if state.ewma_latency is None \
+                else 0.8 * state.ewma_latency + 0.2 * latency
+
+        if status in THROTTLE_STATUSES:
+            state.throttled += 1
+            now = self.clock()
+            pause = parse_retry_after(retry_after)
+            state.blocked_until = max(state.blocked_until,
+                                      now + (pause if pause is not None else self.default_backoff))
+            # Refill stops until the block ends, so callers queued meanwhile
+            # resume one probe at a time at the new rate instead of as a burst
+            state.tokens = min(1.0, state.tokens + max(0.0, now - state.updated) * state.rate)
+            state.updated = max(state.updated, state.blocked_until)
+            state.rate = max(self.min_rate, state.rate * self.decrease)
+            logger.warning(f"Throttled by {urlparse(url).netloc} ({status}), rate now {state.rate:.2f}/s")
+        elif status is None or status >= 500:
+            state.rate = max(self.min_rate, state.rate * 0.8)
+        elif state.ewma_latency is not None and state.ewma_latency > self.latency_target:
+            state.rate = max(self.min_rate, state.rate * 0.9)
+        else:
+            ceiling = min(self.max_rate, 1.0 / state.crawl_delay) if state.crawl_delay else self.max_rate
+            state.rate = min(ceiling, state.rate + self.increase)
+
+    def stats(self) -> Dict[str, Dict[str, Optional[float]]]:
+        return {
+            host: {
+                "rate": round(state.rate, 3),
+                "ewma_latency": round(state.ewma_latency, 3) if state.ewma_latency is not None else None,
+                "crawl_delay": state.crawl_delay,
+                "requests": state.requests,
+                "throttled": state.throttled
+            }
+            for host, state in self._hosts.items()
+        }
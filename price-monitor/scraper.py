@@ -1,48 +1,152 @@
 import re
+import time
+import asyncio
 import httpx
-from bs4 import BeautifulSoup
-from typing import List, Tuple
-from urllib.parse import urljoin
+from bs4 import BeautifulSoup, SoupStrainer
+from loguru import logger
+from typing import List, Optional, Set, Tuple
+from urllib.parse import urljoin, urlparse
+
+from frontier import Frontier, normalize_url, parse_sitemap, sitemaps_from_robots
+from rate_limiter import HostRateLimiter
 
 PRODUCT_URL_REGEX = re.compile(r"^https://www\.shwapno\.com/product/[^/]+$")
 CATEGORY_URL_REGEX = re.compile(r"^https://www\.shwapno\.com/(?:[a-zA-Z0-9\-]+)$")
 
-async def crawl_for_products(seed_url: str, max_products: int = 20, max_depth: int = 2) -> List[str]:
+async def _fetch_text(client: httpx.AsyncClient, url: str,
+                      rate_limiter: Optional[HostRateLimiter] = None) -> Optional[str]:
+    if rate_limiter:
+        await rate_limiter.acquire(url)
+    start = time.monotonic()
+    status, retry_after = None, None
+    try:
+        response = await client.get(url)
+        status, retry_after = response.status_code, response.headers.get("Retry-After")
+        return response.text if response.status_code == 200 else None
+    except httpx.HTTPError as e:
+        logger.debug(f"Could not fetch {url}: {e}")
+        return None
+    finally:
+        if rate_limiter:
+            rate_limiter.record_response(url, status, time.monotonic() - start, retry_after)
+
+async def _seed_from_sitemaps(client: httpx.AsyncClient, seed_url: str, frontier: Frontier,
+                              product_urls: Set[str], max_products: int, max_sitemaps: int,
+                              rate_limiter: HostRateLimiter) -> None:
+    """Collect product URLs (and queue category pages) from the site's sitemaps."""
+    parsed = urlparse(seed_url)
+    root = f"{parsed.scheme}://{parsed.netloc}"
+
+    robots = await _fetch_text(client, f"{root}/robots.txt", rate_limiter)
+    pending = (sitemaps_from_robots(robots) if robots else []) or [f"{root}/sitemap.xml"]
+    fetched = 0
+
+    while pending and fetched < max_sitemaps and len(product_urls) < max_products:
+        # Sitemap indexes can list hundreds of files; fetch them concurrently in small waves
+        wave, pending = pending[:8], pending[8:]
+        fetched += len(wave)
+        for xml_text in await asyncio.gather(*(_fetch_text(client, url, rate_limiter) for url in wave)):
+            if not xml_text:
+                continue
+            pages, children = parse_sitemap(xml_text)
+            pending.extend(children)
+            for url in pages:
+                url = normalize_url(url)
+                if PRODUCT_URL_REGEX.match(url):
+                    if frontier.mark_seen(url):
+                        product_urls.add(url)
+                elif CATEGORY_URL_REGEX.match(url):
+                    frontier.push(url, depth=1)
+
+    logger.info(f"Sitemaps yielded {len(product_urls)} product URLs from {fetched} files")
+
+async def crawl_for_products(seed_url: str,
+                             max_products: int = 20,
+                             max_depth: int = 2,
+                             concurrency: int = 8,
+                             max_pages: int = 500,
+                             use_sitemaps: bool = True,
+                             max_sitemaps: int = 50,
+                             bloom_capacity: Optional[int] = None,
+                             rate_limiter: Optional[HostRateLimiter] = None,
+                             respect_robots: bool = True) -> List[str]:
     """
     Crawl the given seed URL and return only real Shwapno product URLs.
-    Follows category links up to max_depth.
+
+    Sitemaps (from robots.txt, else /sitemap.xml) are read first; category
+    pages are then crawled breadth-first by `concurrency` workers up to
+    `max_depth`, fetching at most `max_pages` pages. Pass `bloom_capacity`
+    to deduplicate with a Bloom filter on very large crawls.
+
+    Every fetch waits for the host's slot in `rate_limiter` (a fresh one
+    honouring robots.txt crawl-delay by default), and pages robots.txt
+    disallows are skipped unless `respect_robots` is False.
     """
-    product_urls = set()
-    visited = set()
-    queue = [(seed_url, 0)]  # (url, depth)
+    product_urls: Set[str] = set()
+    frontier = Frontier(max_depth=max_depth, max_pages=max_pages, bloom_capacity=bloom_capacity)
+    done = asyncio.Event()
 
-    async with httpx.AsyncClient(timeout=10) as client:
-        while queue and len(product_urls) < max_products:
-            current_url, depth = queue.pop(0)
-            if current_url in visited:
-                continue
-                
-            visited.add(current_url)
-            try:
-                response = await client.get(current_url)
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                for a in soup.find_all("a", href=True):
-                    href = urljoin(current_url, a['href'])
-                    if href not in visited:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(timeout=10, limits=limits, follow_redirects=True) as client:
+        if rate_limiter is None:
+            loader = (lambda robots_url: _fetch_text(client, robots_url)) if respect_robots else None
+            rate_limiter = HostRateLimiter(robots_loader=loader)
+        # Queue the seed first so sitemap categories cannot use up max_pages before it
+        frontier.push(seed_url, depth=0)
+        if use_sitemaps:
+            await _seed_from_sitemaps(client, seed_url, frontier, product_urls, max_products,
+                                      max_sitemaps, rate_limiter)
+
+        async def worker():
+            while True:
+                current_url, depth = await frontier.get()
+                try:
+                    if done.is_set():
+                        continue
+                    if respect_robots:
+                        await rate_limiter.load_robots(current_url)
+                        if not rate_limiter.can_fetch(current_url):
+                            logger.debug(f"robots.txt disallows {current_url}")
+                            continue
+                    html = await _fetch_text(client, current_url, rate_limiter)
+                    if not html:
+                        continue
+                    soup = BeautifulSoup(html, 'lxml', parse_only=SoupStrainer("a", href=True))
+                    for a in soup.find_all("a", href=True):
+                        href = normalize_url(urljoin(current_url, a['href']))
                         if PRODUCT_URL_REGEX.match(href):
-                            product_urls.add(href)
-                            if len(product_urls) >= max_products:
-                                break
-                        elif CATEGORY_URL_REGEX.match(href) and depth < max_depth:
-                            queue.append((href, depth + 1))
-            except Exception as e:
-                logger.error(f"Error crawling {current_url}: {e}")
+                            if frontier.mark_seen(href):
+                                product_urls.add(href)
+                        elif CATEGORY_URL_REGEX.match(href):
+                            frontier.push(href, depth + 1)
+                    if len(product_urls) >= max_products:
+                        done.set()
+                except Exception as e:
+                    logger.error(f"Error crawling {current_url}: {e}")
+                finally:
+                    frontier.task_done()
+
+        if len(product_urls) < max_products:
+            workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+            # Finish when the frontier drains, or stop early once enough products are found
+            waiters = [asyncio.create_task(frontier.join()), asyncio.create_task(done.wait())]
+            await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+            for task in workers + waiters:
+                task.cancel()
+            await asyncio.gather(*workers, *waiters, return_exceptions=True)
 
-    return sorted(product_urls)
+    logger.info(f"Crawl found {len(product_urls)} product URLs after queueing {frontier.queued} pages")
+    return sorted(product_urls)[:max_products]
 
 def extract_price(html: str) -> float:
     soup = BeautifulSoup(html, "html.parser")
+    # Structured price tag first: cheaper and stable across template changes
+    meta = soup.find("meta", {"property": "product:price:amount"})
+    if meta and meta.get("content"):
+        try:
+            return float(meta["content"].replace(",", ""))
+        except ValueError:
+            pass
     price_tag = (
         soup.find("span", class_="product-price")
         or soup.find("div", class_="product-price")
@@ -50,12 +154,6 @@ def extract_price(html: str) -> float:
         or soup.find("div", class_="price")
     )
     if not price_tag:
-        meta = soup.find("meta", {"property": "product:price:amount"})
-        if meta and meta.get("content"):
-            try:
-                return float(meta["content"])
-            except ValueError:
-                return 0.0
         return 0.0
     text = price_tag.get_text(strip=True)
     cleaned = re.sub(r"[^0-9.]", "", text)
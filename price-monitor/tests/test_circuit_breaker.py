@@ -0,0 +1,86 @@
+from circuit_breaker import CircuitBreaker, CircuitBreakerRegistry, CLOSED, HALF_OPEN, OPEN
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_opens_after_threshold():
+    breaker = CircuitBreaker(failure_threshold=3, clock=FakeClock())
+    for _ in range(3):
+        assert breaker.allow()
+        breaker.record_failure()
+
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+def test_half_open_probe_closes_on_success():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=10, clock=clock)
+    breaker.record_failure()
+
+    clock.now = 10
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    # Only one probe at a time
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+
+def test_failed_probe_doubles_recovery_timeout():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=10, max_recovery_timeout=15, clock=clock)
+    breaker.record_failure()
+
+    clock.now = 10
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.retry_after() == 15
+
+    clock.now = 24
+    assert not breaker.allow()
+    clock.now = 25
+    assert breaker.allow()
+
+def test_registry_isolates_hosts_and_methods():
+    changes = []
+    registry = CircuitBreakerRegistry(failure_threshold=1, listener=lambda *change: changes.append(change))
+    registry.get("broken.example.com", "aiohttp").record_failure()
+
+    assert not registry.get("broken.example.com", "aiohttp").allow()
+    assert registry.get("broken.example.com", "playwright").allow()
+    assert registry.get("ok.example.com", "aiohttp").allow()
+    assert changes == [("broken.example.com", "aiohttp", OPEN)]
+    assert registry.open_circuits() == ["broken.example.com/aiohttp"]
+
+def test_registry_reset_single_host():
+    registry = CircuitBreakerRegistry(failure_threshold=1)
+    registry.get("a.example.com", "aiohttp").record_failure()
+    registry.get("b.example.com", "aiohttp").record_failure()
+
+    assert registry.reset("a.example.com") == 1
+    assert registry.open_circuits() == ["b.example.com/aiohttp"]
+    registry.reset()
+    assert registry.open_circuits() == []
+
+def test_cancelled_probe_releases_its_slot():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=10, clock=clock)
+    breaker.record_failure()
+
+    clock.now = 10
+    assert breaker.allow()
+    # The probe was cancelled before it could record an outcome
+    breaker.release()
+
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    breaker.record_success()
+    breaker.release()
+    assert breaker.state == CLOSED
+    assert breaker.probes_in_flight == 0
@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+from frontier import BloomFilter, Frontier, normalize_url, parse_sitemap, sitemaps_from_robots
+
+def test_normalize_url():
+    assert normalize_url("HTTPS://WWW.Shwapno.com:443/product/milk/?utm_source=fb&b=2&a=1#reviews") \
+        == "https://www.shwapno.com/product/milk?a=1&b=2"
+    assert normalize_url("https://www.shwapno.com") == "https://www.shwapno.com/"
+    assert normalize_url("http://localhost:8080//a//b/") == "http://localhost:8080/a/b"
+
+def test_bloom_filter_membership():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    urls = [f"https://www.shwapno.com/product/{i}" for i in range(1000)]
+    for url in urls:
+        bloom.add(url)
+
+    assert all(url in bloom for url in urls)
+    false_positives = sum(f"https://other.com/{i}" in bloom for i in range(1000))
+    assert false_positives < 50
+
+@pytest.mark.asyncio
+async def test_frontier_dedups_and_orders_by_depth():
+    frontier = Frontier(max_depth=2)
+    assert frontier.push("https://www.shwapno.com/rice", depth=2)
+    assert frontier.push("https://www.shwapno.com/", depth=0)
+    assert not frontier.push("https://www.shwapno.com/rice/", depth=1)
+    assert not frontier.push("https://www.shwapno.com/deep", depth=3)
+
+    assert await frontier.get() == ("https://www.shwapno.com/", 0)
+    assert await frontier.get() == ("https://www.shwapno.com/rice", 2)
+    assert len(frontier) == 0
+
+def test_frontier_page_budget():
+    frontier = Frontier(max_pages=2)
+    pushed = [frontier.push(f"https://www.shwapno.com/c{i}", depth=1) for i in range(4)]
+
+    assert pushed == [True, True, False, False]
+
+def test_frontier_with_bloom_filter():
+    frontier = Frontier(bloom_capacity=10_000)
+    assert frontier.push("https://www.shwapno.com/dairy", depth=1)
+    assert not frontier.push("https://www.shwapno.com/dairy?utm_medium=x", depth=1)
+
+def test_parse_sitemap_and_index():
+    urlset = """<?xml version="1.0" encoding="UTF-8"?>
+    <urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+        <url><loc>https://www.shwapno.com/product/milk</loc></url>
+        <url><loc>https://www.shwapno.com/dairy</loc></url>
+    </urlset>"""
+    index = """<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+        <sitemap><loc>https://www.shwapno.com/sitemap-products-1.xml</loc></sitemap>
+    </sitemapindex>"""
+
+    assert parse_sitemap(urlset) == (["https://www.shwapno.com/product/milk", "https://www.shwapno.com/dairy"], [])
+    assert parse_sitemap(index) == ([], ["https://www.shwapno.com/sitemap-products-1.xml"])
+    assert parse_sitemap("<html>not xml") == ([], [])
+
+def test_sitemaps_from_robots():
+    robots = "User-agent: *\nDisallow: /cart\nSitemap: https://www.shwapno.com/sitemap.xml\n"
+    assert sitemaps_from_robots(robots) == ["https://www.shwapno.com/sitemap.xml"]
@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+
+from rate_limiter import HostRateLimiter
+
+ROBOTS = "User-agent: *\nCrawl-delay: 4\nDisallow: /cart\n"
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.mark.asyncio
+async def test_concurrent_first_callers_share_robots_load():
+    loads = []
+
+    async def loader(robots_url):
+        loads.append(robots_url)
+        await asyncio.sleep(0.05)
+        return ROBOTS
+
+    limiter = HostRateLimiter(burst=10.0, robots_loader=loader, clock=FakeClock())
+    await asyncio.gather(*(limiter.acquire("https://www.shwapno.com/rice") for _ in range(5)))
+
+    assert loads == ["https://www.shwapno.com/robots.txt"]
+    assert limiter.stats()["www.shwapno.com"]["crawl_delay"] == 4.0
+    assert limiter.stats()["www.shwapno.com"]["rate"] == 0.25
+
+@pytest.mark.asyncio
+async def test_can_fetch_follows_robots_rules():
+    async def loader(robots_url):
+        return ROBOTS
+
+    limiter = HostRateLimiter(robots_loader=loader, clock=FakeClock())
+    # Unknown until robots.txt is loaded
+    assert limiter.can_fetch("https://www.shwapno.com/cart")
+
+    await limiter.load_robots("https://www.shwapno.com/")
+    assert not limiter.can_fetch("https://www.shwapno.com/cart")
+    assert limiter.can_fetch("https://www.shwapno.com/rice")
+
+def test_reservations_after_retry_after_are_spaced_out():
+    clock = FakeClock()
+    limiter = HostRateLimiter(default_rate=1.0, burst=2.0, clock=clock)
+    limiter.record_response("https://www.shwapno.com/rice", 429, retry_after="30")
+
+    waits = [limiter.reserve("https://www.shwapno.com/rice") for _ in range(5)]
+
+    assert waits == [30.0, 32.0, 34.0, 36.0, 38.0]
@@ -5,14 +5,15 @@ from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
 import aiohttp
 import asyncio
-from bs4 import BeautifulSoup
-import re
+from bs4 import SoupStrainer
 import logging
 from typing import Optional, List, Dict
 import json
 from datetime import datetime
 import concurrent.futures
 from apon_system.agents.ai_price_scraper import fetch_products
+from agents.data_collection.parsing import make_soup
+from agents.data_collection.price_patterns import find_price
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
@@ -35,27 +36,9 @@ templates = Jinja2Templates(directory="templates")
 # Store prices in memory for quick access
 price_cache = {}
 
-# Common price patterns
-PRICE_PATTERNS = [
-    r'৳\s*(\d+\.?\d*)',
-    r'Tk\.?\s*(\d+\.?\d*)',
-    r'"price"\s*:\s*"?([\d.]+)',
-    r'price-amount[^>]*>([\d.]+)',
-    r'product-price[^>]*>([\d.]+)',
-    r'data-price="([\d.]+)"',
-    r'class="price"[^>]*>([\d.]+)'
-]
-
 async def extract_price(html: str) -> Optional[float]:
-    """Quick price extraction using common patterns"""
-    for pattern in PRICE_PATTERNS:
-        match = re.search(pattern, html)
-        if match:
-            try:
-                return float(match.group(1).replace(',', ''))
-            except:
-                continue
-    return None
+    """Quick price extraction using common patterns (single precompiled scan)"""
+    return find_price(html)
 
 async def get_product_price(url: str, session: aiohttp.ClientSession) -> Dict:
     """Get product price with caching and timeout"""
@@ -71,7 +54,9 @@ async def get_product_price(url: str, session: aiohttp.ClientSession) -> Dict:
             
             html = await response.text()
             price = await extract_price(html)
-            soup = BeautifulSoup(html, 'html.parser')
+            # Only the <title> is needed, so skip building the rest of the tree
+            soup = make_soup(html, start_marker='<title', end_marker='</title>',
+                             parse_only=SoupStrainer('title'))
             title = soup.title.string.strip() if soup.title else "Product"
             
             result = {
@@ -70,13 +70,19 @@ class AponAI:
             telegram_bot_token=self.config.notification.telegram_bot_token,
             telegram_chat_id=self.config.notification.telegram_chat_id,
             webhook_enabled=self.config.notification.webhook_enabled,
-            webhook_url=self.config.notification.webhook_url
+            webhook_url=self.config.notification.webhook_url,
+            slack_enabled=self.config.notification.slack_enabled,
+            slack_webhook_url=self.config.notification.slack_webhook_url,
+            digest_window_seconds=self.config.notification.digest_window_seconds,
+            max_digest_items=self.config.notification.max_digest_items,
+            outbox_path=self.config.notification.outbox_path
         )
         self.notification_service = NotificationService(notification_config)
         
         # Initialize monitor agent
         self.monitor_agent = MonitorAgent(
-            data_dir=str(Path(self.config.storage.data_dir) / "monitoring")
+            data_dir=str(Path(self.config.storage.data_dir) / "monitoring"),
+            notifier=self.notification_service
         )
     
     def start_monitoring(self):
@@ -62,6 +62,13 @@ class NotificationConfig:
     
     webhook_enabled: bool = False
     webhook_url: str = ""
+    
+    slack_enabled: bool = False
+    slack_webhook_url: str = ""
+    
+    digest_window_seconds: float = 60.0
+    max_digest_items: int = 50
+    outbox_path: str = "data/notifications/outbox.db"
 
 @dataclass
 class LLMConfig:
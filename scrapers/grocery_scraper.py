@@ -1,24 +1,38 @@
 import requests
-from bs4 import BeautifulSoup
 import re
-import random
 from urllib.parse import urlparse
 from fake_useragent import UserAgent
 from typing import List, Dict, Any, Optional
 import json
-import os
+import time
 from pathlib import Path
 
+# Needs the project root on the import path: run from the root
+# (python -m scrapers.grocery_scraper) or set PYTHONPATH to it
+from agents.data_collection.parsing import make_soup
+from agents.data_collection.price_patterns import PRICE_RE
+from agents.data_collection.proxy_pool import ProxyPool
+from agents.data_collection.rate_limiter import RobotsDisallowed, get_rate_limiter
+
+# Compiled once; every container on every page is checked against these
+GROCERY_KEYWORDS_RE = re.compile(
+    r'\b(?:egg|noodle|rice|flour|pasta|oil|sugar|salt|milk|bread|butter|cheese|yogurt|chicken|beef|fish|vegetable|fruit|apple|banana|orange'
+    r'|potato|tomato|onion|garlic|ginger|chili|meat|juice|water|soda|coffee|tea|biscuit|chocolate|snack|cereal|soup|sauce|spice|herb)\b',
+    re.IGNORECASE
+)
+CONTAINER_CLASS_RE = re.compile(r'(?i)(product|item|card|container)')
+NAME_CLASS_RE = re.compile(r'(?i)(title|name|product)')
+
 class GroceryScraper:
     def __init__(self, use_proxy: bool = True):
         self.ua = UserAgent()
         self.use_proxy = use_proxy
-        self.proxies = self._get_free_proxies()
+        self.proxy_pool = ProxyPool.from_env(default=self._get_free_proxies())
         self.data_dir = Path("data")
         self.data_dir.mkdir(exist_ok=True)
         
     def _get_free_proxies(self) -> list:
-        """Get a list of free proxies"""
+        """Get a list of free proxies (used when PROXY_LIST is not set)"""
         return [
             "http://45.79.189.142:80",
             "http://190.64.18.177:80",
@@ -39,22 +53,51 @@ class GroceryScraper:
     def _make_request(self, url: str, max_retries: int = 3) -> Optional[requests.Response]:
         """Make HTTP request with retries and proxy rotation"""
         headers = self._get_random_headers()
+        limiter = get_rate_limiter()
+        
+        domain = urlparse(url).netloc
         
         for attempt in range(max_retries):
+            proxy_url = self.proxy_pool.acquire(domain) if self.use_proxy else None
+            proxy = {"http": proxy_url, "https": proxy_url} if proxy_url else None
+            
             try:
-                proxy = {"http": random.choice(self.proxies), "https": random.choice(self.proxies)} \
-                    if self.use_proxy else None
+                # Per-host pacing shared with every other fetcher in the process
+                limiter.acquire(url)
+                start = time.monotonic()
+                try:
+                    response = requests.get(
+                        url, 
+                        headers=headers, 
+                        proxies=proxy,
+                        timeout=10
+                    )
+                except (requests.RequestException, ConnectionError) as e:
+                    # A dead proxy says nothing about the site's health
+                    limiter.record_response(url, None, time.monotonic() - start,
+                                            proxy_error=isinstance(e, requests.exceptions.ProxyError))
+                    raise
+                elapsed = time.monotonic() - start
+                limiter.record_response(url, response.status_code, elapsed,
+                                        response.headers.get("Retry-After"))
                 
-                response = requests.get(
-                    url, 
-                    headers=headers, 
-                    proxies=proxy,
-                    timeout=10
-                )
+                if proxy_url:
+                    # Blocks and proxy auth errors are the exit IP's fault, not the site's
+                    if response.status_code in (403, 407, 429):
+                        self.proxy_pool.record_failure(proxy_url, domain)
+                    else:
+                        self.proxy_pool.record_success(proxy_url, elapsed)
                 response.raise_for_status()
                 return response
+
+            except RobotsDisallowed as e:
+                print(f"Skipping {url}: {str(e)}")
+                return None
                 
             except (requests.RequestException, ConnectionError) as e:
+                # Covers proxy, connect-timeout and TLS errors; the retry picks another proxy
+                if proxy_url and isinstance(e, (requests.exceptions.ConnectionError, ConnectionError)):
+                    self.proxy_pool.record_failure(proxy_url, domain)
                 print(f"Attempt {attempt + 1} failed: {str(e)}")
                 if attempt == max_retries - 1:
                     print(f"Failed to fetch {url} after {max_retries} attempts")
@@ -67,30 +110,24 @@ class GroceryScraper:
         if not response:
             return []
         
-        soup = BeautifulSoup(response.text, 'html.parser')
+        soup = make_soup(response.text)
         domain = urlparse(url).netloc
         
-        # Common patterns for grocery items
-        item_patterns = [
-            r'\b(?:egg|noodle|rice|flour|pasta|oil|sugar|salt|milk|bread|butter|cheese|yogurt|chicken|beef|fish|vegetable|fruit|apple|banana|orange)\b',
-            r'\b(?:potato|tomato|onion|garlic|ginger|chili|meat|fish|juice|water|soda|coffee|tea|biscuit|chocolate|snack|cereal|noodle|soup|sauce|spice|herb)\b'
-        ]
-        
         results = []
         seen = set()
         
         # Look for product containers
-        product_containers = soup.find_all(['div', 'li', 'article', 'section'], class_=re.compile(r'(?i)(product|item|card|container)'))
+        product_containers = soup.find_all(['div', 'li', 'article', 'section'], class_=CONTAINER_CLASS_RE)
         
         for container in product_containers:
             text = container.get_text(' ', strip=True)
             
             # Skip if no relevant text
-            if not any(re.search(pattern, text, re.IGNORECASE) for pattern in item_patterns):
+            if not GROCERY_KEYWORDS_RE.search(text):
                 continue
                 
             # Extract product name (simplified)
-            name_elem = container.find(['h1', 'h2', 'h3', 'h4', 'div'], class_=re.compile(r'(?i)(title|name|product)'))
+            name_elem = container.find(['h1', 'h2', 'h3', 'h4', 'div'], class_=NAME_CLASS_RE)
             name = name_elem.get_text(strip=True) if name_elem else 'Unknown Product'
             
             # Skip if we've already seen this product
@@ -100,8 +137,8 @@ class GroceryScraper:
             seen.add(name)
             
             # Extract price
-            price_match = re.search(r'\$\s*\d+(?:\.\d{2})?|\d+(?:\.\d{2})?\s*(?:USD|BDT|\$)', text)
-            price = price_match.group() if price_match else 'Price not found'
+            price_match = PRICE_RE.search(text)
+            price = price_match.group().strip() if price_match else 'Price not found'
             
             # Extract image if available
             img = container.find('img')
@@ -1,6 +1,9 @@
 import time
 import json
 import os
+import random
+import traceback
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
@@ -16,7 +19,8 @@ CONFIG = {
     "price_change_threshold_percent": 5.0,  # Minimum price change to trigger notification
     "data_retention_days": 30,  # How long to keep historical data
     "max_products_per_retailer": 100,  # Maximum number of products to track per retailer
-    "timezone": "Asia/Dhaka"  # Timezone for notifications
+    "timezone": "Asia/Dhaka",  # Timezone for notifications
+    "jitter_seconds": 30  # Random delay before each scheduled check
 }
 
 @dataclass
@@ -41,13 +45,15 @@ class Product:
     highest_price_30d: Optional[float] = None
 
 class MonitorAgent:
-    def __init__(self, data_dir: str = "data/monitoring"):
+    def __init__(self, data_dir: str = "data/monitoring", notifier=None):
         self.data_dir = Path(data_dir)
         self.data_dir.mkdir(parents=True, exist_ok=True)
         self.products_file = self.data_dir / "products.json"
         self.scraper = GroceryScraper(use_proxy=True)
         self.products: Dict[str, Product] = self._load_products()
         self.timezone = pytz.timezone(CONFIG["timezone"])
+        # Optional NotificationService; changes are sent to it as digests
+        self.notifier = notifier
     
     def _load_products(self) -> Dict[str, Product]:
         """Load existing products from disk"""
@@ -293,9 +299,10 @@ class MonitorAgent:
         for url in urls:
             changes = self.check_price_changes(url)
             all_changes.extend(changes)
-            
-            # Add a small delay between requests
-            time.sleep(2)
+            # Hand changes over per URL so alerts do not wait for the whole run
+            if changes and self.notifier:
+                self.notifier.notify_changes(changes)
+            # Pacing between requests is handled per host by the scraper's rate limiter
         
         return all_changes
     
@@ -319,11 +326,36 @@ class MonitorAgent:
             
             print("=" * 50)
         
+        # Checks run on a worker thread so a slow site cannot stall or drift the
+        # schedule loop; a check still running when the next is due is skipped
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="monitor")
+        current: Dict[str, Optional[Future]] = {"run": None}
+        stats = {"runs": 0, "skipped": 0}
+        
+        def report_failure(run: Future):
+            error = run.exception()
+            if error is not None:
+                print(f"Scheduled check failed: {error!r}")
+                traceback.print_exception(type(error), error, error.__traceback__)
+        
+        def submit(jitter: float = 0):
+            # Jitter is waited out here, so it never counts as a running check
+            if jitter:
+                time.sleep(random.uniform(0, jitter))
+            run = current["run"]
+            if run is not None and not run.done():
+                stats["skipped"] += 1
+                print(f"Previous check still running, skipping this run ({stats['skipped']} skipped so far)")
+                return
+            stats["runs"] += 1
+            current["run"] = executor.submit(job)
+            current["run"].add_done_callback(report_failure)
+        
         # Run immediately
-        job()
+        submit()
         
-        # Then schedule periodic checks
-        schedule.every(interval).minutes.do(job)
+        # Then schedule periodic checks, each delayed by a little jitter
+        schedule.every(interval).minutes.do(submit, jitter=CONFIG.get("jitter_seconds", 0))
         
         print(f"Monitoring {len(urls)} URLs every {interval} minutes...")
         print("Press Ctrl+C to stop")
@@ -334,7 +366,10 @@ class MonitorAgent:
                 time.sleep(1)
         except KeyboardInterrupt:
             print("\nStopping monitoring...")
+            executor.shutdown(wait=True)
             self.save_products()
+            if self.notifier:
+                self.notifier.stop()
 
 # Example usage
 if __name__ == "__main__":
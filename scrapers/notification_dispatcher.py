@@ -0,0 +1,463 @@
+"""
+Asynchronous notification dispatch.
+
+Messages are written to a durable SQLite outbox and delivered to all channels
+concurrently over pooled connections. Change events are collected per
+channel and recipient and sent as one digest per window instead of one
+message per change.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import asyncio
+import smtplib
+import logging
+import threading
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class OutboxMessage:
+    """A message waiting in the outbox for delivery to one recipient"""
+    id: int
+    channel: str
+    recipient: str
+    title: str
+    message: str
+    data: Dict[str, Any] = field(default_factory=dict)
+    attempts: int = 0
+    last_error: Optional[str] = None
+
+class Outbox:
+    """SQLite-backed store of undelivered messages with retry scheduling"""
+
+    def __init__(self, path: str = ":memory:", clock: Callable[[], float] = time.time):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                channel TEXT NOT NULL,
+                recipient TEXT NOT NULL,
+                title TEXT NOT NULL,
+                message TEXT NOT NULL,
+                data TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                last_error TEXT,
+                created_at REAL NOT NULL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt_at)")
+        self._db.commit()
+
+    def add(self, channel: str, recipient: str, title: str, message: str, data: Optional[Dict] = None) -> int:
+        now = self.clock()
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO outbox (channel, recipient, title, message, data, next_attempt_at, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (channel, recipient, title, message, json.dumps(data or {}, default=str), now, now)
+            )
+            self._db.commit()
+            return cursor.lastrowid
+
+    def due(self, limit: int = 100) -> List[OutboxMessage]:
+        """Pending messages whose next attempt time has passed"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, channel, recipient, title, message, data, attempts, last_error FROM outbox "
+                "WHERE status = 'pending' AND next_attempt_at <= ? ORDER BY id LIMIT ?",
+                (self.clock(), limit)
+            ).fetchall()
+        return [OutboxMessage(row[0], row[1], row[2], row[3], row[4], json.loads(row[5]), row[6], row[7])
+                for row in rows]
+
+    def mark_sent(self, message_id: int):
+        with self._lock:
+            self._db.execute("UPDATE outbox SET status = 'sent' WHERE id = ?", (message_id,))
+            self._db.commit()
+
+    def mark_failed(self, message: OutboxMessage, error: str, max_attempts: int,
+                    backoff_base: float, backoff_max: float):
+        """Schedule a retry with exponential backoff, or mark the message dead"""
+        attempts = message.attempts + 1
+        status = "dead" if attempts >= max_attempts else "pending"
+        delay = min(backoff_max, backoff_base * (2 ** (attempts - 1)))
+        with self._lock:
+            self._db.execute(
+                "UPDATE outbox SET attempts = ?, status = ?, last_error = ?, next_attempt_at = ? WHERE id = ?",
+                (attempts, status, error, self.clock() + delay, message.id)
+            )
+            self._db.commit()
+
+    def purge_sent(self, older_than_seconds: float = 86400):
+        with self._lock:
+            self._db.execute("DELETE FROM outbox WHERE status = 'sent' AND created_at < ?",
+                             (self.clock() - older_than_seconds,))
+            self._db.commit()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._db.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall()
+        counts = {"pending": 0, "sent": 0, "dead": 0}
+        counts.update(dict(rows))
+        return counts
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+class Channel:
+    """Base class for delivery channels"""
+    name = "channel"
+    max_concurrency = 8
+
+    def recipients(self) -> List[str]:
+        raise NotImplementedError
+
+    async def send(self, recipient: str, title: str, message: str, data: Dict[str, Any]):
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+class HTTPChannel(Channel):
+    """Channel that posts over a shared aiohttp session"""
+
+    def __init__(self, session_factory: Callable[[], aiohttp.ClientSession]):
+        self._session = session_factory
+
+    async def _post(self, url: str, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+        async with self._session().post(url, json=payload, headers=headers) as response:
+            if response.status >= 400:
+                raise RuntimeError(f"HTTP {response.status} from {self.name}")
+
+class TelegramChannel(HTTPChannel):
+    name = "telegram"
+
+    def __init__(self, session_factory, bot_token: str, chat_id: str):
+        super().__init__(session_factory)
+        self.bot_token = bot_token
+        self.chat_id = chat_id
+
+    def recipients(self) -> List[str]:
+        return [self.chat_id]
+
+    async def send(self, recipient, title, message, data):
+        await self._post(f"https://api.telegram.org/bot{self.bot_token}/sendMessage",
+                         {"chat_id": recipient, "text": f"{title}\n\n{message}"})
+
+class WebhookChannel(HTTPChannel):
+    name = "webhook"
+
+    def __init__(self, session_factory, url: str):
+        super().__init__(session_factory)
+        self.url = url
+
+    def recipients(self) -> List[str]:
+        return [self.url]
+
+    async def send(self, recipient, title, message, data):
+        await self._post(recipient, {
+            "title": title,
+            "message": message,
+            "timestamp": datetime.utcnow().isoformat(),
+            "data": data
+        }, headers={"User-Agent": "AponAI-NotificationService/1.0"})
+
+class SlackChannel(HTTPChannel):
+    name = "slack"
+
+    def __init__(self, session_factory, webhook_url: str, channel: str = "#market-alerts"):
+        super().__init__(session_factory)
+        self.webhook_url = webhook_url
+        self.channel = channel
+
+    def recipients(self) -> List[str]:
+        return [self.channel]
+
+    async def send(self, recipient, title, message, data):
+        await self._post(self.webhook_url, {
+            "channel": recipient,
+            "username": "Apon Market Bot",
+            "text": f"*{title}*\n{message}",
+            "icon_emoji": ":chart_with_upwards_trend:"
+        })
+
+class EmailChannel(Channel):
+    """SMTP channel that keeps one logged-in connection open between sends"""
+    name = "email"
+    max_concurrency = 1  # smtplib connections are not safe to share between threads
+
+    def __init__(self, sender: str, password: str, recipient_list: List[str],
+                 smtp_server: str = "smtp.gmail.com", smtp_port: int = 587):
+        self.sender = sender
+        self.password = password
+        self.recipient_list = [r.strip() for r in recipient_list if r.strip()]
+        self.smtp_server = smtp_server
+        self.smtp_port = smtp_port
+        self._smtp: Optional[smtplib.SMTP] = None
+
+    def recipients(self) -> List[str]:
+        return self.recipient_list
+
+    def _connect(self) -> smtplib.SMTP:
+        if not self.sender or not self.password:
+            raise ValueError("Email sender and password must be configured")
+        smtp = smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=30)
+        smtp.starttls()
+        smtp.login(self.sender, self.password)
+        return smtp
+
+    def _send_sync(self, recipient: str, title: str, message: str):
+        msg = MIMEMultipart()
+        msg['From'] = self.sender
+        msg['To'] = recipient
+        msg['Subject'] = f"[Apon AI] {title}"
+        msg.attach(MIMEText(message, 'plain'))
+
+        for attempt in range(2):
+            if self._smtp is None:
+                self._smtp = self._connect()
+            try:
+                self._smtp.send_message(msg)
+                return
+            except smtplib.SMTPServerDisconnected:
+                # The server closed the idle connection; reconnect once
+                self._smtp = None
+                if attempt:
+                    raise
+
+    async def send(self, recipient, title, message, data):
+        await asyncio.to_thread(self._send_sync, recipient, title, message)
+
+    async def close(self):
+        if self._smtp is not None:
+            try:
+                await asyncio.to_thread(self._smtp.quit)
+            except smtplib.SMTPException:
+                pass
+            self._smtp = None
+
+def format_change(change: Dict[str, Any]) -> str:
+    """One-line summary of a change event from MonitorAgent or the change detector"""
+    name = change.get("name") or change.get("product", "Unknown product")
+    retailer = change.get("retailer") or change.get("site", "")
+    where = f" ({retailer})" if retailer else ""
+    change_type = change.get("type") or change.get("change_type")
+
+    if change_type in ("price_change", "price"):
+        old = change.get("old_price", change.get("old_value"))
+        new = change.get("new_price", change.get("new_value"))
+        percent = change.get("change_percent")
+        suffix = f" ({percent:+.1f}%)" if percent is not None else ""
+        return f"{name}{where}: {old} -> {new}{suffix}"
+    if change_type == "new_product":
+        return f"{name}{where}: new at {change.get('price', change.get('new_value'))}"
+    if "old_value" in change or "new_value" in change:
+        return f"{name}{where}: {change_type} {change.get('old_value')} -> {change.get('new_value')}"
+    return f"{name}{where}: {change_type}"
+
+class NotificationDispatcher:
+    """
+    Fans notifications out to every channel concurrently.
+
+    Every outgoing message goes through the outbox first, so failed
+    deliveries are retried with backoff and survive restarts. Change events
+    added with add_changes() are held per (channel, recipient) and turned
+    into a single digest message when the window closes or the digest fills.
+    Sent messages are purged from the outbox once they are older than
+    `sent_retention_seconds`.
+    """
+
+    def __init__(self,
+                 channels: List[Channel],
+                 outbox: Optional[Outbox] = None,
+                 digest_window_seconds: float = 60.0,
+                 max_digest_items: int = 50,
+                 max_attempts: int = 5,
+                 backoff_base: float = 30.0,
+                 backoff_max: float = 3600.0,
+                 sent_retention_seconds: float = 86400.0,
+                 purge_interval: float = 3600.0,
+                 clock: Callable[[], float] = time.time):
+        self.channels = {channel.name: channel for channel in channels}
+        self.clock = clock
+        self.outbox = outbox or Outbox(clock=clock)
+        self.digest_window_seconds = digest_window_seconds
+        self.max_digest_items = max_digest_items
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.sent_retention_seconds = sent_retention_seconds
+        self.purge_interval = purge_interval
+        self._last_purge: Optional[float] = None
+        self._pending: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        self._window_started: Dict[Tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._in_flight = set()
+
+    def notify(self, title: str, message: str, data: Optional[Dict] = None) -> Dict[int, str]:
+        """
+        Queue an immediate message for every recipient on every channel.
+
+        Returns:
+            Mapping of outbox message id to channel name
+        """
+        return {self.outbox.add(name, recipient, title, message, data): name
+                for name, channel in self.channels.items()
+                for recipient in channel.recipients()}
+
+    def add_changes(self, changes: List[Dict[str, Any]]):
+        """Add change events to the open digests, closing any that are full"""
+        if not changes:
+            return
+        now = self.clock()
+        with self._lock:
+            for name, channel in self.channels.items():
+                for recipient in channel.recipients():
+                    key = (name, recipient)
+                    self._window_started.setdefault(key, now)
+                    self._pending.setdefault(key, []).extend(changes)
+                    self._close_digests(key, force=False)
+
+    def _close_digests(self, key: Tuple[str, str], force: bool):
+        pending = self._pending.get(key, [])
+        expired = self.clock() - self._window_started.get(key, self.clock()) >= self.digest_window_seconds
+        # Full digests go out right away; a partial one waits for its window
+        while len(pending) >= self.max_digest_items or (pending and (force or expired)):
+            batch, pending = pending[:self.max_digest_items], pending[self.max_digest_items:]
+            title, message = self._format_digest(batch)
+            self.outbox.add(key[0], key[1], title, message, {"changes": batch})
+        if pending:
+            self._pending[key] = pending
+        else:
+            self._pending.pop(key, None)
+            self._window_started.pop(key, None)
+
+    def flush_digests(self, force: bool = False):
+        """Move digests whose window has closed (or all, if forced) into the outbox"""
+        with self._lock:
+            for key in list(self._pending):
+                self._close_digests(key, force=force)
+
+    def _format_digest(self, changes: List[Dict[str, Any]]) -> Tuple[str, str]:
+        if len(changes) == 1:
+            return "Price Alert", format_change(changes[0])
+        return f"Price Alert: {len(changes)} changes", "\n".join(f"- {format_change(c)}" for c in changes)
+
+    async def _deliver_one(self, message: OutboxMessage) -> Optional[str]:
+        channel = self.channels.get(message.channel)
+        if channel is None:
+            error = f"Unknown channel {message.channel}"
+        else:
+            semaphore = self._semaphores.setdefault(message.channel, asyncio.Semaphore(channel.max_concurrency))
+            async with semaphore:
+                try:
+                    await channel.send(message.recipient, message.title, message.message, message.data)
+                    self.outbox.mark_sent(message.id)
+                    return None
+                except Exception as e:
+                    error = f"{type(e).__name__}: {e}"
+
+        logger.warning(f"Delivery of message {message.id} via {message.channel} failed: {error}")
+        self.outbox.mark_failed(message, error, self.max_attempts, self.backoff_base, self.backoff_max)
+        return error
+
+    async def deliver(self, limit: int = 500) -> Dict[int, Optional[str]]:
+        """
+        Send everything due in the outbox concurrently.
+
+        Returns:
+            Mapping of message id to error (None when delivered)
+        """
+        messages = [m for m in self.outbox.due(limit) if m.id not in self._in_flight]
+        self._in_flight.update(m.id for m in messages)
+        try:
+            results = await asyncio.gather(*(self._deliver_one(m) for m in messages))
+        finally:
+            self._in_flight.difference_update(m.id for m in messages)
+        return {m.id: error for m, error in zip(messages, results)}
+
+    def purge_sent(self):
+        """Drop delivered messages past their retention, at most once per purge_interval"""
+        now = self.clock()
+        if self._last_purge is not None and now - self._last_purge < self.purge_interval:
+            return
+        self.outbox.purge_sent(self.sent_retention_seconds)
+        self._last_purge = now
+
+    async def run(self, stop_event: asyncio.Event, interval: float = 1.0):
+        """Close digests, drain the outbox and purge old sent messages until stopped"""
+        try:
+            while not stop_event.is_set():
+                self.flush_digests()
+                await self.deliver()
+                self.purge_sent()
+                try:
+                    await asyncio.wait_for(stop_event.wait(), timeout=interval)
+                except asyncio.TimeoutError:
+                    pass
+            self.flush_digests(force=True)
+            await self.deliver()
+        finally:
+            await self.close()
+
+    async def close(self):
+        await asyncio.gather(*(channel.close() for channel in self.channels.values()))
+        self._semaphores.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            buffered = sum(len(changes) for changes in self._pending.values())
+        return {"buffered_changes": buffered, "outbox": self.outbox.stats()}
+
+class SharedSession:
+    """Lazily created aiohttp session reused by all HTTP channels"""
+
+    def __init__(self, timeout: float = 10.0, limit: int = 20):
+        self.timeout = timeout
+        self.limit = limit
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def __call__(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                connector=aiohttp.TCPConnector(limit=self.limit)
+            )
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+def build_channels(config, session: SharedSession) -> List[Channel]:
+    """Create channels for the enabled services in a NotificationConfig"""
+    channels: List[Channel] = []
+    if config.email_enabled and config.email_recipients:
+        channels.append(EmailChannel(config.email_sender, config.email_password, config.email_recipients,
+                                     config.smtp_server, config.smtp_port))
+    if config.telegram_enabled and config.telegram_bot_token and config.telegram_chat_id:
+        channels.append(TelegramChannel(session, config.telegram_bot_token, config.telegram_chat_id))
+    if config.webhook_enabled and config.webhook_url:
+        channels.append(WebhookChannel(session, config.webhook_url))
+    if getattr(config, "slack_enabled", False) and getattr(config, "slack_webhook_url", ""):
+        channels.append(SlackChannel(session, config.slack_webhook_url))
+    return channels
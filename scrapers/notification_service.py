@@ -1,13 +1,10 @@
 import os
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-import requests
+import asyncio
 import logging
+import threading
 from typing import List, Dict, Any, Optional
-from dataclasses import dataclass
-from datetime import datetime
-import json
+from dataclasses import dataclass, field
+from notification_dispatcher import NotificationDispatcher, Outbox, SharedSession, build_channels
 
 # Configure logging
 logging.basicConfig(
@@ -37,6 +34,13 @@ class NotificationConfig:
     webhook_enabled: bool = False
     webhook_url: str = ""
     
+    slack_enabled: bool = False
+    slack_webhook_url: str = ""
+    
+    digest_window_seconds: float = 60.0
+    max_digest_items: int = 50
+    outbox_path: str = "data/notifications/outbox.db"
+    
     @classmethod
     def from_env(cls):
         """Load configuration from environment variables"""
@@ -53,7 +57,14 @@ class NotificationConfig:
             telegram_chat_id=os.getenv("TELEGRAM_CHAT_ID", ""),
             
             webhook_enabled=os.getenv("WEBHOOK_ENABLED", "false").lower() == "true",
-            webhook_url=os.getenv("WEBHOOK_URL", "")
+            webhook_url=os.getenv("WEBHOOK_URL", ""),
+            
+            slack_enabled=os.getenv("SLACK_ENABLED", "false").lower() == "true",
+            slack_webhook_url=os.getenv("SLACK_WEBHOOK_URL", ""),
+            
+            digest_window_seconds=float(os.getenv("NOTIFICATION_DIGEST_WINDOW", "60")),
+            max_digest_items=int(os.getenv("NOTIFICATION_DIGEST_MAX_ITEMS", "50")),
+            outbox_path=os.getenv("NOTIFICATION_OUTBOX_PATH", "data/notifications/outbox.db")
         )
 
 class NotificationService:
@@ -61,13 +72,56 @@ class NotificationService:
     
     def __init__(self, config: Optional[NotificationConfig] = None):
         self.config = config or NotificationConfig.from_env()
+        self._session = SharedSession()
+        self.dispatcher = NotificationDispatcher(
+            build_channels(self.config, self._session),
+            outbox=Outbox(self.config.outbox_path),
+            digest_window_seconds=self.config.digest_window_seconds,
+            max_digest_items=self.config.max_digest_items
+        )
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._started = threading.Event()
+    
+    def start(self):
+        """Start the background loop that delivers digests and retries the outbox"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._started.clear()
+        self._thread = threading.Thread(target=self._run_loop, name="notifications", daemon=True)
+        self._thread.start()
+        self._started.wait()
+    
+    def _run_loop(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._stop = asyncio.Event()
+        self._started.set()
+        
+        async def main():
+            try:
+                await self.dispatcher.run(self._stop)
+            finally:
+                await self._session.close()
+        
+        try:
+            self._loop.run_until_complete(main())
+        finally:
+            self._loop.close()
+    
+    def stop(self, timeout: float = 30):
+        """Send anything still buffered, then stop the background loop"""
+        if self._thread and self._thread.is_alive():
+            self._loop.call_soon_threadsafe(self._stop.set)
+            self._thread.join(timeout)
     
     def send_notification(self, title: str, message: str, data: Optional[Dict] = None):
         """Send notification through all enabled channels"""
         data = data or {}
         
         # Prepare the full message
-        full_message = f"{title}\n\n{message}"
+        full_message = message
         if data:
             full_message += "\n\nAdditional Data:\n"
             full_message += "\n".join(f"- {k}: {v}" for k, v in data.items())
@@ -76,110 +130,46 @@ class NotificationService:
             "email_sent": False,
             "telegram_sent": False,
             "webhook_sent": False,
+            "slack_sent": False,
             "errors": []
         }
         
-        # Send email if enabled
-        if self.config.email_enabled and self.config.email_recipients:
-            try:
-                self._send_email(
-                    subject=title,
-                    message=full_message,
-                    recipients=self.config.email_recipients
-                )
-                results["email_sent"] = True
-                logger.info(f"Email notification sent to {len(self.config.email_recipients)} recipients")
-            except Exception as e:
-                error_msg = f"Failed to send email: {str(e)}"
-                results["errors"].append(error_msg)
-                logger.error(error_msg)
+        # Queue one message per recipient, then deliver all channels at once;
+        # anything that fails stays in the outbox and is retried later
+        self.start()
+        message_ids = self.dispatcher.notify(title, full_message, data)
+        outcome = asyncio.run_coroutine_threadsafe(self.dispatcher.deliver(), self._loop).result()
         
-        # Send Telegram message if enabled
-        if self.config.telegram_enabled and self.config.telegram_bot_token and self.config.telegram_chat_id:
-            try:
-                self._send_telegram(
-                    message=full_message,
-                    chat_id=self.config.telegram_chat_id
-                )
-                results["telegram_sent"] = True
-                logger.info("Telegram notification sent")
-            except Exception as e:
-                error_msg = f"Failed to send Telegram message: {str(e)}"
-                results["errors"].append(error_msg)
-                logger.error(error_msg)
+        channel_errors: Dict[str, List[str]] = {}
+        for message_id, channel in message_ids.items():
+            error = outcome.get(message_id)
+            channel_errors.setdefault(channel, [])
+            if error:
+                channel_errors[channel].append(error)
         
-        # Send webhook if enabled
-        if self.config.webhook_enabled and self.config.webhook_url:
-            try:
-                self._send_webhook(
-                    payload={
-                        "title": title,
-                        "message": message,
-                        "timestamp": datetime.utcnow().isoformat(),
-                        "data": data
-                    },
-                    url=self.config.webhook_url
-                )
-                results["webhook_sent"] = True
-                logger.info("Webhook notification sent")
-            except Exception as e:
-                error_msg = f"Failed to send webhook: {str(e)}"
+        for channel, errors in channel_errors.items():
+            results[f"{channel}_sent"] = not errors
+            if errors:
+                error_msg = f"Failed to send {channel} notification: {errors[0]}"
                 results["errors"].append(error_msg)
                 logger.error(error_msg)
+            else:
+                logger.info(f"{channel.capitalize()} notification sent")
         
         return results
     
-    def _send_email(self, subject: str, message: str, recipients: List[str]):
-        """Send an email notification"""
-        if not self.config.email_sender or not self.config.email_password:
-            raise ValueError("Email sender and password must be configured")
-        
-        msg = MIMEMultipart()
-        msg['From'] = self.config.email_sender
-        msg['To'] = ", ".join(recipients)
-        msg['Subject'] = f"[Apon AI] {subject}"
-        
-        msg.attach(MIMEText(message, 'plain'))
-        
-        with smtplib.SMTP(self.config.smtp_server, self.config.smtp_port) as server:
-            server.starttls()
-            server.login(self.config.email_sender, self.config.email_password)
-            server.send_message(msg)
-    
-    def _send_telegram(self, message: str, chat_id: Optional[str] = None):
-        """Send a message via Telegram bot"""
-        chat_id = chat_id or self.config.telegram_chat_id
-        if not self.config.telegram_bot_token or not chat_id:
-            raise ValueError("Telegram bot token and chat ID must be configured")
+    def notify_changes(self, changes: List[Dict[str, Any]]):
+        """
+        Queue change events for digest delivery.
         
-        url = f"https://api.telegram.org/bot{self.config.telegram_bot_token}/sendMessage"
-        payload = {
-            "chat_id": chat_id,
-            "text": message,
-            "parse_mode": "HTML"
-        }
-        
-        response = requests.post(url, json=payload, timeout=10)
-        response.raise_for_status()
-    
-    def _send_webhook(self, payload: Dict, url: Optional[str] = None):
-        """Send data to a webhook URL"""
-        url = url or self.config.webhook_url
-        if not url:
-            raise ValueError("Webhook URL must be configured")
-        
-        headers = {
-            "Content-Type": "application/json",
-            "User-Agent": "AponAI-NotificationService/1.0"
-        }
-        
-        response = requests.post(
-            url,
-            json=payload,
-            headers=headers,
-            timeout=10
-        )
-        response.raise_for_status()
+        Changes are grouped per channel and recipient, so a large batch of
+        price moves results in a few digest messages rather than one
+        message per change and channel.
+        """
+        if not changes:
+            return
+        self.start()
+        self.dispatcher.add_changes(changes)
 
 # Example usage
 if __name__ == "__main__":
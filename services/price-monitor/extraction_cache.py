@@ -0,0 +1,124 @@
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+WHITESPACE_RE = re.compile(r'\s+')
+
+class ExtractionCache:
+    """
+    Content-addressed on-disk cache of LLM extraction results.
+
+    Entries are keyed by a hash of the normalized page text, the model name
+    and the prompt version, so re-scrapes that return identical text skip
+    the LLM entirely while any prompt or model change misses naturally.
+    Total size is bounded; the least recently used entries are evicted first.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 100 * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._total_bytes = sum(f.stat().st_size for f in self.cache_dir.glob('*.json'))
+
+    @staticmethod
+    def make_key(text: str, model: str, prompt_version: str) -> str:
+        """Build the cache key for a piece of page text."""
+        normalized = WHITESPACE_RE.sub(' ', text).strip()
+        digest = hashlib.sha256()
+        for part in (prompt_version, model or '', normalized):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """Return cached items for a key, or None on a miss."""
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                items = json.load(f)['items']
+            # Refresh mtime so eviction treats this entry as recently used
+            os.utime(path)
+        except (OSError, ValueError, KeyError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return items
+
+    def set(self, key: str, items: List[Dict[str, Any]]) -> None:
+        """Store extraction results for a key; failures are logged, never raised."""
+        path = self._path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+
+        with self._lock:
+            try:
+                payload = json.dumps({'items': items, 'created_at': time.time()}, ensure_ascii=False)
+                old_size = path.stat().st_size if path.exists() else 0
+                tmp_path.write_text(payload, encoding='utf-8')
+                # Atomic replace so concurrent readers never see partial files
+                os.replace(tmp_path, path)
+                self._total_bytes += path.stat().st_size - old_size
+            except (OSError, TypeError, ValueError) as e:
+                # An unserializable result only costs the cache entry, not the extraction
+                logger.warning(f"Could not write extraction cache entry: {e}")
+                return
+
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        """Delete least recently used entries until under 90% of the size bound."""
+        entries = []
+        for f in self.cache_dir.glob('*.json'):
+            try:
+                stat = f.stat()
+                entries.append((stat.st_mtime, stat.st_size, f))
+            except OSError:
+                continue
+
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        removed = 0
+
+        for _, size, f in entries:
+            if total <= target:
+                break
+            try:
+                f.unlink()
+                total -= size
+                removed += 1
+            except OSError:
+                continue
+
+        self._total_bytes = total
+        logger.info(f"Evicted {removed} extraction cache entries")
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache hit/miss counters and size."""
+        with self._lock:
+            hits, misses, size = self.hits, self.misses, self._total_bytes
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "size_bytes": size,
+            "max_bytes": self.max_bytes
+        }
@@ -0,0 +1,266 @@
+import re
+import json
+import time
+import inspect
+import logging
+import importlib.util
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+from urllib.parse import urlparse
+
+from bs4 import BeautifulSoup
+
+logger = logging.getLogger(__name__)
+
+# C-backed lxml when installed, the pure-Python parser otherwise
+PARSER_BACKEND = "lxml" if importlib.util.find_spec("lxml") else "html.parser"
+
+def make_soup(html: str) -> BeautifulSoup:
+    return BeautifulSoup(html, PARSER_BACKEND)
+
+@dataclass
+class PageContent:
+    url: str
+    html: str
+    soup: BeautifulSoup
+    model_name: Optional[str] = None
+
+    @property
+    def domain(self) -> str:
+        return urlparse(self.url).netloc.lower()
+
+Items = List[Dict[str, Any]]
+Extractor = Callable[[PageContent], Union[Items, Awaitable[Items]]]
+
+@dataclass
+class Tier:
+    """
+    One extraction strategy in the cascade.
+
+    `weight` caps the confidence a tier can reach: heuristics such as regex
+    can produce plausible-looking junk, so their scores are discounted.
+    """
+    name: str
+    extract: Extractor
+    weight: float = 1.0
+
+@dataclass
+class TierResult:
+    tier: str
+    items: Items
+    confidence: float
+    elapsed: float
+    error: Optional[str] = None
+
+@dataclass
+class PipelineResult:
+    tier: str
+    items: Items
+    confidence: float
+    attempts: List[TierResult] = field(default_factory=list)
+
+SCORED_FIELDS = ("name", "price", "currency", "unit", "in_stock")
+
+def score_items(items: Items) -> float:
+    """
+    Confidence (0-1) that a list of extracted items is a real product listing.
+
+    Price/name plausibility carries most of the weight, then item count
+    (saturating at 3), schema completeness and name uniqueness. A single
+    plausible name and price, as on a product detail page, scores about
+    0.78 and clears the default threshold; the same item from a discounted
+    heuristic tier (weight 0.75) does not.
+    """
+    if not items:
+        return 0.0
+
+    plausible = 0
+    completeness = 0.0
+    names = set()
+    for item in items:
+        name = str(item.get("name") or "").strip()
+        price = item.get("price")
+        if (isinstance(price, (int, float)) and 0 < price < 1_000_000
+                and 3 <= len(name) <= 200 and re.search(r"[^\W\d_]{2}", name)):
+            plausible += 1
+        completeness += sum(1 for f in SCORED_FIELDS if item.get(f) not in (None, "")) / len(SCORED_FIELDS)
+        names.add(name.lower())
+
+    count_score = min(len(items) / 3, 1.0)
+    return round(
+        0.2 * count_score
+        + 0.55 * plausible / len(items)
+        + 0.15 * completeness / len(items)
+        + 0.1 * len(names) / len(items),
+        3
+    )
+
+class ExtractionPipeline:
+    """
+    Runs extraction tiers cheapest-first and stops at the first confident result.
+
+    Each tier's result is scored; if it reaches `threshold` the remaining
+    (more expensive) tiers are skipped. Otherwise the best result seen is
+    returned. Per-domain win counts show which tier usually settles a site.
+    """
+
+    def __init__(self, tiers: List[Tier], threshold: float = 0.65):
+        self.tiers = tiers
+        self.threshold = threshold
+        self.domain_wins: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.tier_runs: Dict[str, int] = defaultdict(int)
+        self.tier_wins: Dict[str, int] = defaultdict(int)
+
+    async def run(self, page: PageContent, skip: tuple = ()) -> PipelineResult:
+        """
+        Extract items from a page.
+
+        Args:
+            page: Fetched page
+            skip: Tier names to leave out (e.g., 'llm' when no model is ready)
+        """
+        attempts: List[TierResult] = []
+        best: Optional[TierResult] = None
+
+        for tier in self.tiers:
+            if tier.name in skip:
+                continue
+
+            start = time.perf_counter()
+            error = None
+            try:
+                items = tier.extract(page)
+                if inspect.isawaitable(items):
+                    items = await items
+                items = items or []
+            except Exception as e:
+                logger.warning(f"Extraction tier {tier.name} failed: {e}")
+                items, error = [], str(e)
+
+            result = TierResult(
+                tier=tier.name,
+                items=items,
+                confidence=round(tier.weight * score_items(items), 3),
+                elapsed=round(time.perf_counter() - start, 4),
+                error=error
+            )
+            attempts.append(result)
+            self.tier_runs[tier.name] += 1
+            logger.info(f"Tier {tier.name}: {len(items)} items, confidence {result.confidence}")
+
+            if best is None or result.confidence > best.confidence:
+                best = result
+            if result.confidence >= self.threshold:
+                break
+
+        if best is None or not best.items:
+            return PipelineResult(tier="none", items=[], confidence=0.0, attempts=attempts)
+
+        self.tier_wins[best.tier] += 1
+        self.domain_wins[page.domain][best.tier] += 1
+        return PipelineResult(tier=best.tier, items=best.items,
+                              confidence=best.confidence, attempts=attempts)
+
+    def stats(self) -> Dict[str, Any]:
+        """Tier run/win counts overall and the usual winning tier per domain."""
+        return {
+            "threshold": self.threshold,
+            "tiers": {
+                tier.name: {"runs": self.tier_runs[tier.name], "wins": self.tier_wins[tier.name]}
+                for tier in self.tiers
+            },
+            "domains": {
+                domain: {"usual_tier": max(wins, key=wins.get), "wins": dict(wins)}
+                for domain, wins in self.domain_wins.items()
+            }
+        }
+
+# Generic card selectors; site-specific ones can be prepended
+DEFAULT_SELECTOR_SETS = [
+    {"card": '[itemtype*="schema.org/Product"]', "name": '[itemprop="name"]', "price": '[itemprop="price"]'},
+    {"card": ".product-item, .product-card, .product", "name": ".product-name, .product-title, h2, h3",
+     "price": ".price, .product-price"},
+]
+
+PRICE_NUMBER_RE = re.compile(r"\d[\d,]*(?:\.\d+)?")
+JSON_LD_RE = re.compile(
+    r'<script[^>]+type=["\']application/ld\+json["\'][^>]*>(.*?)</script>',
+    re.IGNORECASE | re.DOTALL
+)
+
+def _parse_price(value: Any) -> Optional[float]:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    match = PRICE_NUMBER_RE.search(str(value or ""))
+    if not match:
+        return None
+    try:
+        return float(match.group(0).replace(",", ""))
+    except ValueError:
+        return None
+
+def extract_with_selectors(soup: BeautifulSoup, selector_sets: List[Dict[str, str]]) -> Items:
+    """Extract items using the first card/name/price selector set that matches."""
+    for selectors in selector_sets:
+        items = []
+        for card in soup.select(selectors["card"]):
+            name_el = card.select_one(selectors["name"])
+            price_el = card.select_one(selectors["price"])
+            if not name_el or not price_el:
+                continue
+            price = _parse_price(price_el.get("content") or price_el.get_text(" ", strip=True))
+            if price:
+                items.append({"name": name_el.get_text(" ", strip=True), "price": price})
+        if items:
+            return items
+    return []
+
+def extract_structured(html: str) -> Items:
+    """Extract Product items from JSON-LD blocks, falling back to OpenGraph price tags."""
+    items = []
+
+    def walk(node):
+        if isinstance(node, list):
+            for child in node:
+                walk(child)
+        elif isinstance(node, dict):
+            types = node.get("@type")
+            types = types if isinstance(types, list) else [types]
+            if "Product" in types:
+                offers = node.get("offers") or {}
+                offers = offers[0] if isinstance(offers, list) and offers else offers
+                price = _parse_price(offers.get("price", offers.get("lowPrice"))) if isinstance(offers, dict) else None
+                if node.get("name") and price:
+                    availability = str(offers.get("availability", ""))
+                    items.append({
+                        "name": node["name"],
+                        "price": price,
+                        "currency": offers.get("priceCurrency") or "BDT",
+                        "in_stock": "OutOfStock" not in availability
+                    })
+                return
+            walk(node.get("@graph", []))
+            for element in node.get("itemListElement", []):
+                walk(element.get("item", element) if isinstance(element, dict) else element)
+
+    for block in JSON_LD_RE.findall(html):
+        try:
+            walk(json.loads(block.strip()))
+        except json.JSONDecodeError:
+            continue
+
+    if not items:
+        soup = make_soup(html[:20000])  # meta tags live in <head>
+        price_tag = soup.find("meta", {"property": "product:price:amount"})
+        title_tag = soup.find("meta", {"property": "og:title"})
+        price = _parse_price(price_tag.get("content")) if price_tag else None
+        if price and title_tag and title_tag.get("content"):
+            currency_tag = soup.find("meta", {"property": "product:price:currency"})
+            items.append({
+                "name": title_tag["content"],
+                "price": price,
+                "currency": currency_tag.get("content") if currency_tag else "BDT"
+            })
+
+    return items
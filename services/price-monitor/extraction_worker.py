@@ -0,0 +1,274 @@
+import time
+import asyncio
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from extraction_cache import ExtractionCache
+
+logger = logging.getLogger(__name__)
+
+PAGE_MARKER = "=== PAGE {page_id} ==="
+# Marker line plus blank-line separator per packed page
+PAGE_OVERHEAD = len(PAGE_MARKER) + 4
+
+class ExtractionQueueFull(Exception):
+    """Raised when the extraction queue cannot accept more work."""
+
+@dataclass
+class ExtractionJob:
+    text: str
+    model: str
+    cache_key: Optional[str]
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+class ExtractionWorker:
+    """
+    Queue in front of the local model server.
+
+    Jobs are queued and drained by a single dispatcher that holds at most
+    `max_concurrency` model calls in flight, so concurrent scrapes queue up
+    instead of thrashing Ollama. Small pages for the same model are packed
+    into one prompt (each under a page marker) up to `max_batch_chars`, and
+    chains are built once per model and reused.
+    """
+
+    def __init__(self,
+                 chain_factory: Callable[[Optional[str], bool], Any],
+                 cache: Optional[ExtractionCache] = None,
+                 prompt_version: str = "1",
+                 max_concurrency: int = 1,
+                 max_batch_chars: int = 8000,
+                 max_queue_size: int = 100,
+                 batch_window: float = 0.05):
+        self.chain_factory = chain_factory
+        self.cache = cache
+        self.prompt_version = prompt_version
+        self.max_concurrency = max_concurrency
+        self.max_batch_chars = max_batch_chars
+        self.max_queue_size = max_queue_size
+        self.batch_window = batch_window
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._held: Deque[ExtractionJob] = deque()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        # Running batches, referenced so they are not garbage-collected and can be stopped
+        self._batch_tasks: Set[asyncio.Task] = set()
+        self._chains: Dict[Tuple[Optional[str], bool], Any] = {}
+
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.batches = 0
+        self.cache_hits = 0
+        self._batched_pages = 0
+        self._total_wait = 0.0
+
+    def start(self) -> None:
+        """Start the dispatcher on the running event loop."""
+        if self._dispatcher:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self._dispatcher = asyncio.create_task(self._dispatch())
+        logger.info(f"Extraction worker started (concurrency={self.max_concurrency})")
+
+    async def stop(self) -> None:
+        """Stop dispatching; queued jobs and running batches are cancelled."""
+        if self._dispatcher:
+            self._dispatcher.cancel()
+            try:
+                await self._dispatcher
+            except asyncio.CancelledError:
+                pass
+            self._dispatcher = None
+
+        tasks = list(self._batch_tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        while self._held:
+            self._held.popleft().future.cancel()
+        while self._queue and not self._queue.empty():
+            self._queue.get_nowait().future.cancel()
+
+    def get_chain(self, model: Optional[str], batched: bool = False) -> Any:
+        """Get a cached extraction chain for a model, building it on first use."""
+        key = (model, batched)
+        if key not in self._chains:
+            chain = self.chain_factory(model, batched)
+            if chain is None:
+                return None
+            self._chains[key] = chain
+        return self._chains[key]
+
+    async def extract(self, text: str, model: str) -> List[Dict[str, Any]]:
+        """
+        Extract products from page text, queueing behind other requests.
+
+        Raises:
+            ExtractionQueueFull: If the queue is at capacity
+        """
+        cache_key = None
+        if self.cache:
+            cache_key = self.cache.make_key(text, model, self.prompt_version)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                self.cache_hits += 1
+                return cached
+
+        if not self._dispatcher:
+            self.start()
+
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait(ExtractionJob(text=text, model=model,
+                                                 cache_key=cache_key, future=future))
+        except asyncio.QueueFull:
+            raise ExtractionQueueFull(f"Extraction queue full ({self.max_queue_size} jobs)")
+
+        return await future
+
+    def _next_job(self) -> Optional[ExtractionJob]:
+        if self._held:
+            return self._held.popleft()
+        try:
+            return self._queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return None
+
+    def _fill_batch(self, batch: List[ExtractionJob]) -> None:
+        """Add already-queued jobs for the same model while they fit the context."""
+        size = sum(len(job.text) + PAGE_OVERHEAD for job in batch)
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            if job.future.cancelled():
+                continue
+            if job.model != batch[0].model or size + len(job.text) + PAGE_OVERHEAD > self.max_batch_chars:
+                self._held.appendleft(job)
+                return
+            batch.append(job)
+            size += len(job.text) + PAGE_OVERHEAD
+
+    async def _dispatch(self) -> None:
+        while True:
+            # Take a model slot first so jobs pile up (and batch) while the model is busy
+            await self._slots.acquire()
+
+            job = self._next_job() or await self._queue.get()
+            if job.future.cancelled():
+                self._slots.release()
+                continue
+
+            batch = [job]
+            self._fill_batch(batch)
+            if len(batch) == 1 and self.batch_window > 0:
+                try:
+                    await asyncio.sleep(self.batch_window)
+                except asyncio.CancelledError:
+                    job.future.cancel()
+                    raise
+                self._fill_batch(batch)
+
+            task = asyncio.create_task(self._run_batch(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    async def _invoke(self, model: str, text: str, batched: bool) -> List[Dict[str, Any]]:
+        chain = self.get_chain(model, batched)
+        if chain is None:
+            raise RuntimeError(f"No LLM chain available for model {model}")
+        result = await chain.ainvoke({"text": text})
+        return result.get("text", []) if isinstance(result, dict) else result
+
+    async def _run_batch(self, batch: List[ExtractionJob]) -> None:
+        model = batch[0].model
+        now = time.monotonic()
+        self.in_flight += len(batch)
+        self.batches += 1
+        self._batched_pages += len(batch)
+        self._total_wait += sum(now - job.enqueued_at for job in batch)
+
+        try:
+            if len(batch) == 1:
+                results = [await self._invoke(model, batch[0].text, batched=False)]
+            else:
+                results = await self._run_packed(model, batch)
+
+            for job, items in zip(batch, results):
+                if self.cache and job.cache_key:
+                    self.cache.set(job.cache_key, items)
+                if not job.future.done():
+                    job.future.set_result(items)
+            self.completed += len(batch)
+
+        except Exception as e:
+            logger.error(f"Extraction batch of {len(batch)} pages failed: {e}")
+            self.failed += len(batch)
+            for job in batch:
+                if not job.future.done():
+                    job.future.set_exception(e)
+
+        except asyncio.CancelledError:
+            for job in batch:
+                job.future.cancel()
+            raise
+
+        finally:
+            self.in_flight -= len(batch)
+            self._slots.release()
+
+    async def _run_packed(self, model: str, batch: List[ExtractionJob]) -> List[List[Dict[str, Any]]]:
+        """Run several pages in one prompt and split the items back by page id."""
+        page_ids = [f"p{i + 1}" for i in range(len(batch))]
+        packed = "\n\n".join(
+            f"{PAGE_MARKER.format(page_id=page_id)}\n{job.text}"
+            for page_id, job in zip(page_ids, batch)
+        )
+
+        items = await self._invoke(model, packed, batched=True)
+
+        by_page: Dict[str, List[Dict[str, Any]]] = {page_id: [] for page_id in page_ids}
+        unknown = 0
+        for item in items:
+            page_id = str(item.pop("page", "")).strip() if isinstance(item, dict) else ""
+            if page_id in by_page:
+                by_page[page_id].append(item)
+            else:
+                unknown += 1
+
+        # A page without items may simply have been skipped by the model (an
+        # empty reply, or items under missing or made-up page ids), so only
+        # pages that got items count as answered; the rest are run on their own
+        unanswered = [i for i, page_id in enumerate(page_ids) if not by_page[page_id]]
+        if unknown:
+            logger.warning(f"Packed extraction returned {unknown} items without a valid page id"
+                           f" ({len(unanswered)} of {len(batch)} pages unanswered)")
+        if unanswered:
+            logger.info(f"Retrying {len(unanswered)} unanswered pages individually")
+
+        results = [by_page[page_id] for page_id in page_ids]
+        for i in unanswered:
+            results[i] = await self._invoke(model, batch[i].text, batched=False)
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and throughput counters."""
+        return {
+            "queue_depth": (self._queue.qsize() if self._queue else 0) + len(self._held),
+            "max_queue_size": self.max_queue_size,
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "completed": self.completed,
+            "failed": self.failed,
+            "cache_hits": self.cache_hits,
+            "batches": self.batches,
+            "avg_pages_per_batch": round(self._batched_pages / self.batches, 2) if self.batches else 0.0,
+            "avg_queue_wait_seconds": round(self._total_wait / self._batched_pages, 3) if self._batched_pages else 0.0
+        }
@@ -1,19 +1,34 @@
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel, HttpUrl, Field
-import requests
 from bs4 import BeautifulSoup
 from langchain_community.llms import Ollama
 from langchain_core.prompts import ChatPromptTemplate
 from langchain.chains import create_extraction_chain
 import re
-import json
 import time
 import logging
 import httpx
 from typing import List, Dict, Any, Optional, Literal
 from enum import Enum
 import asyncio
+import os
+
+from extraction_cache import ExtractionCache
+from extraction_worker import ExtractionWorker, ExtractionQueueFull
+from text_reducer import reduce_page
+from extraction_pipeline import (
+    DEFAULT_SELECTOR_SETS,
+    ExtractionPipeline,
+    PageContent,
+    Tier,
+    extract_structured,
+    extract_with_selectors,
+    make_soup,
+    score_items
+)
+from selector_learning import SelectorStore, learn_selectors
 
 # Configure logging
 logging.basicConfig(
@@ -58,56 +73,113 @@ PRODUCT_SCHEMA = {
 }
 
 class OllamaClient:
-    def __init__(self):
-        self.base_url = "http://localhost:11434"
-        self.available_models = []
-        self._check_connection()
+    """
+    Lazily discovered Ollama models.
+
+    The model list is fetched asynchronously after startup and refreshed
+    periodically, so importing or starting the service never waits on the
+    model server. Model objects are created on first use and reused.
+    """
+
+    def __init__(self,
+                 base_url: Optional[str] = None,
+                 refresh_interval: float = 60.0,
+                 timeout: float = 5.0):
+        self.base_url = base_url or os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+        self.refresh_interval = refresh_interval
+        self.timeout = timeout
+        self.available_models: List[str] = []
+        self.last_refresh: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._models: Dict[str, Ollama] = {}
+        self._refresh_task: Optional[asyncio.Task] = None
     
-    def _check_connection(self):
-        """Check Ollama connection and get available models"""
+    @property
+    def is_ready(self) -> bool:
+        """Whether at least one model has been discovered"""
+        return bool(self.available_models)
+    
+    @property
+    def default_model(self) -> Optional[str]:
+        """Preferred model if installed, otherwise the first available one"""
+        if ModelName.DEEPSEEK_R1.value in self.available_models:
+            return ModelName.DEEPSEEK_R1.value
+        return self.available_models[0] if self.available_models else None
+    
+    async def refresh_models(self) -> List[str]:
+        """Fetch the model list from Ollama, keeping the last good list on failure"""
         try:
-            response = requests.get(f"{self.base_url}/api/tags")
-            if response.status_code == 200:
-                models_data = response.json()
-                self.available_models = [model['name'] for model in models_data.get('models', [])]
-                logger.info(f"Connected to Ollama. Available models: {self.available_models}")
-            else:
-                logger.warning("Ollama is running but couldn't fetch models")
+            async with httpx.AsyncClient(timeout=self.timeout) as client:
+                response = await client.get(f"{self.base_url}/api/tags")
+                response.raise_for_status()
+            models = [model['name'] for model in response.json().get('models', [])]
+            if models != self.available_models:
+                logger.info(f"Connected to Ollama. Available models: {models}")
+            self.available_models = models
+            self.last_refresh = time.time()
+            self.last_error = None
         except Exception as e:
-            logger.warning(f"Could not connect to Ollama: {e}")
+            self.last_error = str(e)
+            logger.warning(f"Could not refresh Ollama models: {e}")
+        return self.available_models
+    
+    async def _refresh_loop(self):
+        while True:
+            await self.refresh_models()
+            # Retry sooner while the model server is unreachable
+            await asyncio.sleep(self.refresh_interval if self.is_ready else min(self.refresh_interval, 5.0))
+    
+    def start(self):
+        """Start background model discovery on the running event loop"""
+        if not self._refresh_task:
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+    
+    async def stop(self):
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
     
     def get_model(self, model_name: str = None):
         """Get an instance of the specified model"""
-        if not model_name and self.available_models:
-            model_name = self.available_models[0]
-        
-        try:
-            return Ollama(model=model_name, temperature=0.2, timeout=60)
-        except Exception as e:
-            logger.error(f"Failed to initialize model {model_name}: {e}")
-            if self.available_models and model_name != self.available_models[0]:
-                return self.get_model(self.available_models[0])  # Fallback to first available model
+        model_name = model_name or self.default_model
+        if not model_name:
             return None
+        
+        if model_name not in self._models:
+            try:
+                self._models[model_name] = Ollama(base_url=self.base_url, model=model_name,
+                                                  temperature=0.2, timeout=60)
+            except Exception as e:
+                logger.error(f"Failed to initialize model {model_name}: {e}")
+                if self.default_model and model_name != self.default_model:
+                    return self.get_model(self.default_model)  # Fallback to default model
+                return None
+        return self._models[model_name]
 
-# Initialize Ollama client
-ollama_client = OllamaClient()
+# Model discovery starts with the app; nothing here touches the network
+ollama_client = OllamaClient(
+    refresh_interval=float(os.getenv("OLLAMA_REFRESH_SECONDS", "60")),
+    timeout=float(os.getenv("OLLAMA_TIMEOUT_SECONDS", "5"))
+)
 
-# Get the default model
-default_model = ModelName.DEEPSEEK_R1 if ollama_client.available_models else None
-llm = ollama_client.get_model(ModelName.DEEPSEEK_R1) if default_model else None
+# Bump whenever the extraction prompt or schema changes so cached results miss
+PROMPT_VERSION = "2"
 
-# Create extraction chain
-def create_extraction_chain(model_name: str = None):
-    model = ollama_client.get_model(model_name) if model_name else llm
-    if not model:
-        return None
-    
-    prompt = ChatPromptTemplate.from_template("""
+extraction_cache = ExtractionCache(
+    os.getenv("EXTRACTION_CACHE_DIR", ".cache/extractions"),
+    max_bytes=int(os.getenv("EXTRACTION_CACHE_MAX_MB", "100")) * 1024 * 1024
+)
+
+EXTRACTION_PROMPT = """
     Extract product information from the following website content.
     Focus on grocery items, especially eggs and noodles.
-    
+    {batch_instructions}
     Website content:
-    {text}
+    {{text}}
     
     Extract the following information for each product:
     - name: Product name
@@ -115,15 +187,117 @@ def create_extraction_chain(model_name: str = None):
     - currency: Currency code (BDT, USD, etc.)
     - category: Product category (egg, noodle, grocery, other)
     - unit: Unit of measurement (piece, kg, g, L, etc.)
-    - in_stock: Whether the product is in stock (true/false)
+    - in_stock: Whether the product is in stock (true/false){batch_fields}
     
     Return only a valid JSON array of product objects.
     If no products found, return an empty array [].
-    """)
+    """
+
+BATCH_INSTRUCTIONS = """
+    The content contains several pages. Each page starts with a line
+    "=== PAGE <id> ===" and ends where the next page marker begins.
+    """
+
+# Packed prompts tag every product with the page it came from
+BATCH_PRODUCT_SCHEMA = {
+    "properties": {**PRODUCT_SCHEMA["properties"], "page": {"type": "string"}},
+    "required": PRODUCT_SCHEMA["required"] + ["page"]
+}
+
+# Create extraction chain
+def build_extraction_chain(model_name: str = None, batched: bool = False):
+    model = ollama_client.get_model(model_name)
+    if not model:
+        return None
+    
+    prompt = ChatPromptTemplate.from_template(EXTRACTION_PROMPT.format(
+        batch_instructions=BATCH_INSTRUCTIONS if batched else "",
+        batch_fields="\n    - page: Id of the page the product was found on" if batched else ""
+    ))
+    schema = BATCH_PRODUCT_SCHEMA if batched else PRODUCT_SCHEMA
     
-    return create_extraction_chain(PRODUCT_SCHEMA, model, prompt=prompt)
+    return create_extraction_chain(schema, model, prompt=prompt)
+
+# Single queue in front of Ollama: reuses chains, packs small pages, bounds concurrency
+extraction_worker = ExtractionWorker(
+    build_extraction_chain,
+    cache=extraction_cache,
+    prompt_version=PROMPT_VERSION,
+    max_concurrency=int(os.getenv("OLLAMA_MAX_CONCURRENCY", "1")),
+    max_batch_chars=int(os.getenv("EXTRACTION_MAX_BATCH_CHARS", "8000")),
+    max_queue_size=int(os.getenv("EXTRACTION_QUEUE_SIZE", "100"))
+)
+
+# Per-domain selectors learned from successful LLM extractions
+selector_store = SelectorStore(os.getenv("SELECTOR_STORE_PATH", ".cache/selectors.json"))
+# Domains with selector learning running, and the tasks doing it
+_learning_domains: set = set()
+_learning_tasks: set = set()
+
+async def _learn_selectors(domain: str, soup, items: List[Dict[str, Any]]) -> None:
+    try:
+        # Locating every item in the DOM is CPU-bound; keep it off the event loop
+        learned = await asyncio.to_thread(learn_selectors, soup, items)
+        if learned:
+            selector_store.save(domain, learned)
+    except Exception as e:
+        logger.warning(f"Selector learning for {domain} failed: {e}")
+    finally:
+        _learning_domains.discard(domain)
+
+def schedule_selector_learning(page: PageContent, items: List[Dict[str, Any]]) -> None:
+    """Learn selectors for a page's domain in the background, once at a time per domain"""
+    if page.domain in _learning_domains or selector_store.get(page.domain):
+        return
+    _learning_domains.add(page.domain)
+    task = asyncio.create_task(_learn_selectors(page.domain, page.soup, items))
+    _learning_tasks.add(task)
+    task.add_done_callback(_learning_tasks.discard)
+
+def selectors_tier(page: PageContent) -> List[Dict[str, Any]]:
+    learned = selector_store.get(page.domain)
+    if learned:
+        items = extract_with_selectors(page.soup, [learned])
+        ok = score_items(items) >= extraction_pipeline.threshold
+        selector_store.record_result(page.domain, ok)
+        if ok:
+            return items
+    return extract_with_selectors(page.soup, DEFAULT_SELECTOR_SETS)
+
+def regex_tier(page: PageContent) -> List[Dict[str, Any]]:
+    text = page.soup.get_text('\n', strip=True)
+    # Without a currency a "name + number" is as likely a year or a phone
+    # number as a price, so only currency-marked matches count as products
+    return [{'name': item['item'], 'price': item['price']}
+            for item in extract_items_with_regex(text) if item.get('currency')]
+
+async def llm_tier(page: PageContent) -> List[Dict[str, Any]]:
+    # Keep only deduplicated, product-bearing chunks of the page text
+    chunks = reduce_page(
+        page.soup,
+        max_chunk_chars=int(os.getenv("LLM_CHUNK_CHARS", "4000")),
+        max_chunks=int(os.getenv("LLM_MAX_CHUNKS", "4"))
+    )
+    model_key = page.model_name or ollama_client.default_model
+    try:
+        # Large pages are split into several calls; the worker packs small ones together
+        chunk_items = await asyncio.gather(*[
+            extraction_worker.extract(chunk, model_key) for chunk in chunks
+        ])
+    except ExtractionQueueFull as e:
+        logger.warning(f"{e}, skipping LLM extraction")
+        return []
+    return [item for batch in chunk_items for item in batch]
 
-app = FastAPI()
+extraction_pipeline = ExtractionPipeline(
+    tiers=[
+        Tier("selectors", selectors_tier),
+        Tier("structured", lambda page: extract_structured(page.html)),
+        Tier("regex", regex_tier, weight=0.75),
+        Tier("llm", llm_tier, weight=0.9),
+    ],
+    threshold=float(os.getenv("EXTRACTION_CONFIDENCE_THRESHOLD", "0.65"))
+)
 
 class ScrapeRequest(BaseModel):
     url: HttpUrl
@@ -153,149 +327,41 @@ class ScrapeResponse(BaseModel):
     url: str
     status: Literal["success", "partial", "error"]
     items: List[ProductItem]
-    extraction_method: Literal["llm", "regex", "hybrid"]
+    extraction_method: Literal["selectors", "structured", "regex", "llm", "hybrid", "none"]
+    confidence: Optional[float] = None
     processing_time: float
     model_used: Optional[str] = None
     error: Optional[str] = None
 
-def extract_items_with_llm(text_content: str, max_retries: int = 2) -> List[Dict[str, Any]]:
-    """Extract items and prices using the LLM."""
-    if not chain:
-        logger.warning("LLM chain not available, falling back to regex")
-        return extract_items_with_regex(text_content)
-    
-    for attempt in range(max_retries + 1):
-        try:
-            # Truncate text to avoid context window issues
-            truncated_text = text_content[:6000]  # Conservative limit
-            
-            # Get LLM response
-            llm_response = chain.run(text_content=truncated_text)
-            
-            # Clean up the response
-            llm_response = llm_response.strip()
-            
-            # Try to extract JSON from markdown code blocks if present
-            if '```json' in llm_response:
-                llm_response = llm_response.split('```json')[1].split('```')[0].strip()
-            elif '```' in llm_response:
-                llm_response = llm_response.split('```')[1].split('```')[0].strip()
-            
-            # Parse the JSON response
-            try:
-                items = json.loads(llm_response)
-                if not isinstance(items, list):
-                    raise ValueError("Expected a list of items")
-                
-                # Validate and clean the items
-                valid_items = []
-                for item in items:
-                    if not isinstance(item, dict):
-                        continue
-                    
-                    item_name = item.get('item', '')
-                    price = item.get('price', 0)
-                    
-                    # Skip invalid items
-                    if not item_name or not price:
-                        continue
-                    
-                    # Clean price if it's a string
-                    if isinstance(price, str):
-                        price = clean_price(price)
-                    
-                    # Skip if price is still invalid
-                    if not isinstance(price, (int, float)) or price <= 0:
-                        continue
-                    
-                    valid_items.append({
-                        'item': str(item_name)[:200],  # Limit length
-                        'price': round(float(price), 2)
-                    })
-                
-                logger.info(f"Extracted {len(valid_items)} items using LLM")
-                return valid_items
-                
-            except (json.JSONDecodeError, ValueError) as e:
-                logger.warning(f"Failed to parse LLM response (attempt {attempt + 1}): {e}")
-                if attempt == max_retries:
-                    logger.warning(f"LLM response was: {llm_response[:500]}...")
-                
-        except Exception as e:
-            logger.error(f"Error in LLM extraction (attempt {attempt + 1}): {str(e)}")
-            if attempt == max_retries:
-                logger.exception("Max retries reached with LLM extraction")
-            
-            # Exponential backoff before retry
-            if attempt < max_retries:
-                wait_time = (2 ** attempt) * 0.5  # 0.5s, 1s, 2s, etc.
-                time.sleep(wait_time)
-    
-    # Fall back to regex if LLM fails
-    logger.info("Falling back to regex extraction after LLM failure")
-    return extract_items_with_regex(text_content)
+# Compiled once at import; item-then-price and price-then-item share one scan
+CURRENCY = r'(?:\$|৳|Tk\.?|BDT|USD)'
+ITEM_PRICE_RE = re.compile(
+    r'(?P<name>[A-Z][^\n$৳]{5,30}?)[ \t]*(?P<currency>' + CURRENCY + r')?[ \t]*(?<![\d,.])(?P<price>\d[\d,]*\.?\d{0,2})(?!\w)'
+    r'|(?P<currency_first>' + CURRENCY + r')?[ \t]*(?P<price_first>\d[\d,]*\.?\d{0,2})(?!\w)[ \t]*(?P<name_after>[A-Z][^\n$৳]{5,30})',
+    re.IGNORECASE | re.MULTILINE
+)
+ITEM_NAME_JUNK_RE = re.compile(r'[^\w\s\-()]')
+PRICE_JUNK_RE = re.compile(r'[^\d.,]')
+BANGLA_DIGITS = str.maketrans('০১২৩৪৫৬৭৮৯', '0123456789')
 
 def extract_items_with_regex(text: str) -> List[Dict[str, Any]]:
     """Fallback method to extract items using regex patterns."""
     items = []
     
-    # Common price patterns (supports $4.99, 4.99$, USD 4.99, etc.)
-    price_patterns = [
-        r'\$\s*(\d+\.?\d{0,2})',  # $4.99
-        r'(\d+\.?\d{0,2})\s*\$',  # 4.99$
-        r'(?i)usd\s*(\d+\.?\d{0,2})',  # USD 4.99
-        r'(?i)price\s*:\s*\$?(\d+\.?\d{0,2})',  # Price: $4.99
-    ]
-    
-    # Common item patterns (look for text around prices)
-    item_patterns = [
-        r'([A-Z][^\n$]{5,30}?)\s*\$?(\d+\.?\d{0,2})',  # Item name then price
-        r'\$?(\d+\.?\d{0,2})\s*([A-Z][^\n$]{5,30})',  # Price then item name
-    ]
-    
-    # First try to find item-price pairs
-    for pattern in item_patterns:
-        matches = re.finditer(pattern, text, re.IGNORECASE | re.MULTILINE)
-        for match in matches:
-            try:
-                if len(match.groups()) >= 2:
-                    item = match.group(1).strip()
-                    price = match.group(2).strip()
-                    
-                    # Clean up the item name
-                    item = re.sub(r'[^\w\s\-()]', ' ', item).strip()
-                    item = ' '.join(item.split())  # Remove extra spaces
-                    
-                    # Clean and convert price
-                    price = clean_price(price)
-                    
-                    if item and price > 0:
-                        items.append({
-                            'item': item[:100],  # Limit item length
-                            'price': price
-                        })
-            except Exception as e:
-                logger.warning(f"Error processing match: {e}")
-                continue
-    
-    # If no items found with patterns, try to find any prices with surrounding text
-    if not items:
-        price_matches = re.finditer(r'([A-Z][^\n$]{5,30}?)\s*\$?(\d+\.?\d{0,2})', 
-                                 text, re.IGNORECASE | re.MULTILINE)
-        for match in price_matches:
-            try:
-                item = match.group(1).strip()
-                price = match.group(2).strip()
-                price = clean_price(price)
-                
-                if price > 0:
-                    items.append({
-                        'item': item[:100],
-                        'price': price
-                    })
-            except Exception as e:
-                logger.warning(f"Error in fallback extraction: {e}")
-                continue
+    for match in ITEM_PRICE_RE.finditer(text):
+        item = match.group('name') or match.group('name_after')
+        price = clean_price(match.group('price') or match.group('price_first'))
+        currency = match.group('currency') or match.group('currency_first')
+        
+        # Clean up the item name
+        item = ' '.join(ITEM_NAME_JUNK_RE.sub(' ', item).split())
+        
+        if item and price > 0:
+            items.append({
+                'item': item[:100],  # Limit item length
+                'price': price,
+                'currency': currency
+            })
     
     logger.info(f"Extracted {len(items)} items using regex")
     return items
@@ -306,20 +372,20 @@ def clean_price(price_str: str) -> float:
         return 0.0
         
     # Remove all non-numeric characters except decimal point and comma
-    price_str = re.sub(r'[^\d.,]', '', str(price_str))
+    price_str = PRICE_JUNK_RE.sub('', str(price_str).translate(BANGLA_DIGITS)).strip('.,')
     
     # Handle cases with both comma and period
     if ',' in price_str and '.' in price_str:
         # If comma is before period, it's a thousand separator
-        if price_str.find(',') < price_str.find('.'):
+        if price_str.rfind(',') < price_str.rfind('.'):
             price_str = price_str.replace(',', '')
         else:
             # Comma is decimal separator
             price_str = price_str.replace('.', '').replace(',', '.')
     # Handle comma as decimal separator (e.g., 4,99)
-    elif ',' in price_str and (len(price_str.split(',')[-1]) == 2 or price_str.count(',') == 1):
+    elif ',' in price_str and price_str.count(',') == 1 and len(price_str.split(',')[-1]) in (1, 2):
         price_str = price_str.replace(',', '.')
-    # Handle comma as thousand separator (e.g., 1,000)
+    # Handle comma as thousand separator (e.g., 1,000 or 1,00,000)
     elif ',' in price_str:
         price_str = price_str.replace(',', '')
     
@@ -382,49 +448,24 @@ async def scrape_website(request: ScrapeRequest) -> ScrapeResponse:
         if not response:
             raise HTTPException(status_code=500, detail="Failed to fetch URL")
         
-        # Parse HTML and extract text
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Clean up the HTML
-        for element in soup(["script", "style", "nav", "footer", "header", "iframe"]):
-            element.decompose()
-        
-        # Extract text content with context
-        text_content = "\n".join(
-            element.get_text(strip=True)
-            for element in soup.find_all(['p', 'div', 'span', 'h1', 'h2', 'h3', 'li', 'a'])
-            if element.get_text(strip=True)
+        # Cheapest extractor first; the LLM only runs if earlier tiers are not confident
+        page = PageContent(
+            url=str(response.url),
+            html=response.text,
+            soup=make_soup(response.text),
+            model_name=request.model_name
         )
+        skip = () if request.use_llm and ollama_client.is_ready else ("llm",)
+        result = await extraction_pipeline.run(page, skip=skip)
         
-        if not text_content.strip():
-            text_content = soup.get_text('\n', strip=True)
+        items = result.items
+        extraction_method = result.tier
         
-        logger.info(f"Extracted {len(text_content)} characters of text content")
-        
-        # Initialize response variables
-        items = []
-        extraction_method = "none"
-        model_used = None
-        
-        # Try LLM extraction if enabled and models are available
-        if request.use_llm and llm:
-            try:
-                extraction_chain = create_extraction_chain(request.model_name)
-                if extraction_chain:
-                    logger.info("Using LLM for extraction")
-                    result = await extraction_chain.ainvoke({"text": text_content[:8000]})  # Limit input size
-                    items = result.get("text", [])
-                    extraction_method = "llm"
-                    model_used = request.model_name or default_model
-                    logger.info(f"LLM extracted {len(items)} items")
-            except Exception as e:
-                logger.error(f"LLM extraction failed: {e}")
-        
-        # Fall back to regex if LLM extraction failed or wasn't used
-        if not items:
-            logger.info("Falling back to regex extraction")
-            items = extract_items_with_regex(response.text)
-            extraction_method = "regex"
+        # Turn a slow LLM extraction into selectors so the next page from this site is instant
+        if result.tier == "llm":
+            schedule_selector_learning(page, items)
+        model_used = (request.model_name or ollama_client.default_model) if result.tier == "llm" else None
+        logger.info(f"Extraction settled by {result.tier} tier (confidence {result.confidence})")
         
         # Process and validate items
         processed_items = []
@@ -472,6 +513,7 @@ async def scrape_website(request: ScrapeRequest) -> ScrapeResponse:
             status=status,
             items=processed_items,
             extraction_method=extraction_method,
+            confidence=result.confidence,
             processing_time=processing_time,
             model_used=model_used,
             error=None if processed_items else "No valid products found"
@@ -488,27 +530,69 @@ async def scrape_website(request: ScrapeRequest) -> ScrapeResponse:
             error=f"An unexpected error occurred: {str(e)}"
         )
 
+@app.on_event("startup")
+async def start_background_tasks():
+    ollama_client.start()
+    extraction_worker.start()
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    await extraction_worker.stop()
+    await ollama_client.stop()
+    await asyncio.gather(*_learning_tasks, return_exceptions=True)
+    selector_store.flush()
+
 @app.get("/health", response_model=dict)
 async def health_check():
-    """Health check endpoint"""
-    ollama_status = "connected" if ollama_client.available_models else "disconnected"
+    """Liveness: the process is up; never waits on Ollama"""
     return {
         "status": "healthy",
         "timestamp": time.time(),
-        "ollama_status": ollama_status,
+        "ollama_status": "connected" if ollama_client.is_ready else "disconnected",
+        "default_model": ollama_client.default_model,
+        "extraction_cache": extraction_cache.stats()
+    }
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness: at least one model has been discovered"""
+    body = {
+        "ready": ollama_client.is_ready,
         "available_models": ollama_client.available_models,
-        "default_model": default_model
+        "last_refresh": ollama_client.last_refresh,
+        "last_error": ollama_client.last_error
     }
+    return JSONResponse(body, status_code=200 if ollama_client.is_ready else 503)
 
 @app.get("/models", response_model=dict)
-async def get_models():
-    """Get available Ollama models"""
+async def get_models(refresh: bool = False):
+    """Get available Ollama models (cached; pass refresh=true to re-query)"""
+    if refresh:
+        await ollama_client.refresh_models()
     return {
         "available_models": ollama_client.available_models,
-        "default_model": default_model,
-        "status": "connected" if ollama_client.available_models else "disconnected"
+        "default_model": ollama_client.default_model,
+        "status": "connected" if ollama_client.is_ready else "disconnected"
     }
 
+@app.get("/extraction/stats", response_model=dict)
+async def get_extraction_stats():
+    """Get extraction queue depth, throughput and cache counters"""
+    return {
+        "worker": extraction_worker.stats(),
+        "cache": extraction_cache.stats()
+    }
+
+@app.get("/extraction/tiers", response_model=dict)
+async def get_tier_stats():
+    """Get which extraction tier settles pages, overall and per domain"""
+    return extraction_pipeline.stats()
+
+@app.get("/extraction/selectors", response_model=dict)
+async def get_learned_selectors():
+    """Get selectors learned per domain with their hit and failure counts"""
+    return selector_store.stats()
+
 @app.post("/price-monitor/scrape", response_model=ScrapeResponse)
 async def scrape_endpoint(request: ScrapeRequest):
     """
@@ -0,0 +1,233 @@
+import os
+import re
+import json
+import time
+import logging
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup, Tag
+
+from extraction_pipeline import extract_with_selectors
+
+logger = logging.getLogger(__name__)
+
+WHITESPACE_RE = re.compile(r'\s+')
+NUMBER_RE = re.compile(r'\d[\d,]*(?:\.\d+)?')
+# Classes that describe state rather than template structure
+VOLATILE_CLASS_RE = re.compile(r'\d|^(?:active|selected|hover|focus|first|last|odd|even|show|hidden)$', re.IGNORECASE)
+
+MIN_MATCHED_ITEMS = 2
+MIN_RECALL = 0.6
+# A text node longer than the name may still hold it ("Milk 1L - 10% off"),
+# but the name has to make up most of the node
+MIN_PARTIAL_SHARE = 0.6
+
+def _normalize(text: str) -> str:
+    return WHITESPACE_RE.sub(' ', text).strip().lower()
+
+def _stable_classes(element: Tag) -> List[str]:
+    return [c for c in element.get('class', []) if not VOLATILE_CLASS_RE.search(c)]
+
+class _PageIndex:
+    """
+    Text nodes of a page indexed once by normalized text and by the numbers
+    they contain, so locating many items costs one pass over the page
+    instead of one full-tree search per item and ancestor.
+    """
+
+    def __init__(self, soup: BeautifulSoup):
+        self.by_text: Dict[str, Tag] = {}
+        self.texts: List[Tuple[str, Tag]] = []
+        self.by_number: Dict[float, List[Tag]] = {}
+        for string in soup.find_all(string=True):
+            text = _normalize(string)
+            if not text:
+                continue
+            self.by_text.setdefault(text, string.parent)
+            self.texts.append((text, string.parent))
+            for number in NUMBER_RE.findall(string):
+                try:
+                    value = round(float(number.replace(',', '')), 2)
+                except ValueError:
+                    continue
+                self.by_number.setdefault(value, []).append(string.parent)
+
+    def find_name(self, name: str) -> Optional[Tag]:
+        """Element whose text is the product name, or mostly consists of it."""
+        target = _normalize(name)
+        if len(target) < 3:
+            return None
+        if target in self.by_text:
+            return self.by_text[target]
+        for text, parent in self.texts:
+            if target in text and len(target) >= MIN_PARTIAL_SHARE * len(text):
+                return parent
+        return None
+
+    def locate(self, item: Dict[str, Any]) -> Optional[Tuple[Tag, Tag, Tag]]:
+        """Locate (card, name element, price element) for one extracted item."""
+        try:
+            price = round(float(item.get('price')), 2)
+        except (TypeError, ValueError):
+            return None
+
+        name_el = self.find_name(str(item.get('name') or ''))
+        price_els = self.by_number.get(price)
+        if name_el is None or not price_els:
+            return None
+
+        # Ancestors of the price elements, each mapped to its first price element
+        holders: Dict[int, Tag] = {}
+        for price_el in price_els:
+            for element in [price_el, *price_el.parents]:
+                holders.setdefault(id(element), price_el)
+
+        # Climb from the name until the ancestor also holds the price: that is the card
+        card = name_el
+        while card is not None and card.name not in ('body', 'html', '[document]'):
+            if id(card) in holders:
+                return card, name_el, holders[id(card)]
+            card = card.parent
+        return None
+
+def _common_selector(elements: List[Tag], require_class: bool) -> Optional[str]:
+    """Selector shared by most elements: tag plus the classes they all carry."""
+    tag, count = Counter(el.name for el in elements).most_common(1)[0]
+    if count < len(elements) * MIN_RECALL:
+        return None
+
+    same_tag = [el for el in elements if el.name == tag]
+    common = set(_stable_classes(same_tag[0]))
+    for el in same_tag[1:]:
+        common &= set(_stable_classes(el))
+
+    if not common:
+        return None if require_class else tag
+    return tag + ''.join(f'.{c}' for c in sorted(common))
+
+def learn_selectors(soup: BeautifulSoup, items: List[Dict[str, Any]]) -> Optional[Dict[str, str]]:
+    """
+    Infer card/name/price selectors from items the LLM found on a page.
+
+    Each item's name and price are located in the DOM; their smallest
+    common ancestor is the product card. Selectors shared by the located
+    cards, names and prices are kept only if they re-extract most of the
+    LLM's items from the same page.
+
+    Args:
+        soup: Parsed page the items were extracted from
+        items: LLM items with 'name' and 'price'
+
+    Returns:
+        Selector set with 'card', 'name' and 'price' keys, or None
+    """
+    index = _PageIndex(soup)
+    located = [triple for triple in (index.locate(item) for item in items) if triple]
+    if len(located) < MIN_MATCHED_ITEMS:
+        return None
+
+    cards, names, prices = zip(*located)
+    selectors = {
+        'card': _common_selector(list(cards), require_class=True),
+        'name': _common_selector(list(names), require_class=False),
+        'price': _common_selector(list(prices), require_class=False)
+    }
+    if not all(selectors.values()):
+        return None
+
+    # Validate against the page the selectors came from
+    expected = {_normalize(str(item.get('name') or '')) for item in items}
+    found = {_normalize(item['name']) for item in extract_with_selectors(soup, [selectors])}
+    recall = len(expected & found) / len(expected) if expected else 0.0
+    if recall < MIN_RECALL:
+        logger.info(f"Rejected learned selectors {selectors} (recall {recall:.2f})")
+        return None
+
+    return selectors
+
+class SelectorStore:
+    """
+    Learned selectors per domain, persisted as JSON.
+
+    Selectors that fail validation `max_failures` times in a row (the site
+    template changed) are dropped so the domain can be re-learned. Newly
+    learned or dropped selectors are written at once; hit and failure
+    counters, which change on every request, are written at most every
+    `save_interval` seconds and on flush().
+    """
+
+    def __init__(self, path: str, max_failures: int = 3, save_interval: float = 30.0,
+                 clock=time.monotonic):
+        self.path = Path(path)
+        self.max_failures = max_failures
+        self.save_interval = save_interval
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+        self._last_save = clock()
+        if self.path.exists():
+            try:
+                self._entries = json.loads(self.path.read_text(encoding='utf-8'))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not load selector store: {e}")
+
+    def _save(self) -> None:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix('.tmp')
+            tmp_path.write_text(json.dumps(self._entries, indent=2), encoding='utf-8')
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not save selector store: {e}")
+            return
+        self._dirty = False
+        self._last_save = self.clock()
+
+    def flush(self) -> None:
+        """Write pending counter updates."""
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+    def get(self, domain: str) -> Optional[Dict[str, str]]:
+        entry = self._entries.get(domain)
+        return entry['selectors'] if entry else None
+
+    def save(self, domain: str, selectors: Dict[str, str]) -> None:
+        with self._lock:
+            self._entries[domain] = {
+                'selectors': selectors,
+                'learned_at': time.time(),
+                'hits': 0,
+                'failures': 0
+            }
+            self._save()
+        logger.info(f"Learned selectors for {domain}: {selectors}")
+
+    def record_result(self, domain: str, ok: bool) -> None:
+        """Record whether a domain's selectors still extracted products."""
+        with self._lock:
+            entry = self._entries.get(domain)
+            if not entry:
+                return
+            if ok:
+                entry['hits'] += 1
+                entry['failures'] = 0
+            else:
+                entry['failures'] += 1
+                if entry['failures'] >= self.max_failures:
+                    logger.info(f"Dropping stale selectors for {domain}")
+                    del self._entries[domain]
+                    self._save()
+                    return
+            self._dirty = True
+            if self.clock() - self._last_save >= self.save_interval:
+                self._save()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {domain: dict(entry) for domain, entry in self._entries.items()}
@@ -0,0 +1,59 @@
+import threading
+
+from extraction_cache import ExtractionCache
+
+ITEMS = [{"name": "Milk 1L", "price": 90.0, "currency": "BDT"}]
+
+def test_key_ignores_whitespace_and_tracks_model_and_prompt():
+    key = ExtractionCache.make_key("Milk  1L\n৳ 90", "llama3", "v1")
+
+    assert key == ExtractionCache.make_key(" Milk 1L ৳ 90 ", "llama3", "v1")
+    assert key != ExtractionCache.make_key("Milk 1L ৳ 90", "mistral", "v1")
+    assert key != ExtractionCache.make_key("Milk 1L ৳ 90", "llama3", "v2")
+
+def test_set_get_roundtrip_and_stats(tmp_path):
+    cache = ExtractionCache(str(tmp_path))
+    key = ExtractionCache.make_key("page", "llama3", "v1")
+
+    assert cache.get(key) is None
+    cache.set(key, ITEMS)
+
+    assert cache.get(key) == ITEMS
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
+    assert stats["size_bytes"] > 0
+
+def test_unserializable_result_is_not_raised(tmp_path):
+    cache = ExtractionCache(str(tmp_path))
+
+    cache.set("key", [{"name": "Milk", "price": object()}])
+
+    assert cache.get("key") is None
+    assert cache.stats()["size_bytes"] == 0
+    assert list(tmp_path.iterdir()) == []
+
+def test_evicts_least_recently_used_over_bound(tmp_path):
+    cache = ExtractionCache(str(tmp_path), max_bytes=400)
+    for i in range(10):
+        cache.set(f"key{i}", [{"name": f"Product {i}", "price": float(i)}])
+
+    assert cache.stats()["size_bytes"] <= 400
+    assert cache.get("key9") is not None
+    assert cache.get("key0") is None
+
+def test_counters_are_thread_safe(tmp_path):
+    cache = ExtractionCache(str(tmp_path))
+    cache.set("hit", ITEMS)
+
+    def lookups():
+        for _ in range(500):
+            cache.get("hit")
+            cache.get("miss")
+
+    threads = [threading.Thread(target=lookups) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert (cache.hits, cache.misses) == (2000, 2000)
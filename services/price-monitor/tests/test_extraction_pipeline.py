@@ -0,0 +1,92 @@
+import pytest
+
+from extraction_pipeline import (
+    ExtractionPipeline,
+    PageContent,
+    Tier,
+    extract_structured,
+    extract_with_selectors,
+    make_soup,
+    score_items
+)
+
+THRESHOLD = 0.65
+
+def page(html="<html></html>", url="https://shop.example.com.bd/p/1"):
+    return PageContent(url=url, html=html, soup=make_soup(html))
+
+def test_single_product_with_name_and_price_is_confident():
+    items = [{"name": "Fresh Milk 1L", "price": 90.0}]
+
+    assert score_items(items) >= THRESHOLD
+    # The same lone item from the discounted regex tier still escalates
+    assert 0.75 * score_items(items) < THRESHOLD
+
+def test_listing_scores_above_single_item_and_junk_scores_low():
+    listing = [{"name": f"Product {c}", "price": 10.0 + i} for i, c in enumerate("abcde")]
+    junk = [{"name": "12", "price": 0}, {"name": "", "price": "৳"}]
+
+    assert score_items(listing) > score_items(listing[:1])
+    assert 0.75 * score_items(listing) >= THRESHOLD
+    assert score_items(junk) < 0.3
+    assert score_items([]) == 0.0
+
+def test_half_plausible_listing_escalates():
+    items = [{"name": f"Product {c}", "price": 10.0} for c in "abc"] + [{"name": "x", "price": 0}] * 3
+
+    assert score_items(items) < THRESHOLD
+
+@pytest.mark.asyncio
+async def test_pipeline_stops_at_first_confident_tier():
+    calls = []
+
+    def tier(name, items, weight=1.0):
+        def extract(page):
+            calls.append(name)
+            return items
+        return Tier(name, extract, weight)
+
+    async def llm(page):
+        calls.append("llm")
+        return []
+
+    pipeline = ExtractionPipeline([
+        tier("selectors", []),
+        tier("structured", [{"name": "Fresh Milk 1L", "price": 90.0}]),
+        Tier("llm", llm),
+    ], threshold=THRESHOLD)
+
+    result = await pipeline.run(page())
+
+    assert result.tier == "structured"
+    assert calls == ["selectors", "structured"]
+    assert pipeline.stats()["domains"]["shop.example.com.bd"]["usual_tier"] == "structured"
+
+@pytest.mark.asyncio
+async def test_pipeline_survives_failing_tier_and_honours_skip():
+    def broken(page):
+        raise ValueError("bad markup")
+
+    pipeline = ExtractionPipeline([
+        Tier("selectors", broken),
+        Tier("regex", lambda page: [{"name": "Rice 5kg", "price": 450.0}], weight=0.75),
+        Tier("llm", lambda page: [{"name": "never", "price": 1.0}]),
+    ], threshold=THRESHOLD)
+
+    result = await pipeline.run(page(), skip=("llm",))
+
+    assert result.tier == "regex"
+    assert result.attempts[0].error == "bad markup"
+    assert [a.tier for a in result.attempts] == ["selectors", "regex"]
+
+def test_structured_and_selector_extractors():
+    html = """
+    <html><head><meta property="og:title" content="Fresh Milk 1L">
+    <meta property="product:price:amount" content="90"></head>
+    <body><div class="product-card"><h3>Rice 5kg</h3><span class="price">৳ 1,450</span></div></body></html>
+    """
+
+    assert extract_structured(html) == [{"name": "Fresh Milk 1L", "price": 90.0, "currency": "BDT"}]
+    assert extract_with_selectors(make_soup(html), [
+        {"card": ".product-card", "name": "h3", "price": ".price"}
+    ]) == [{"name": "Rice 5kg", "price": 1450.0}]
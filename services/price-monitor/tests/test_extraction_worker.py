@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from extraction_cache import ExtractionCache
+from extraction_worker import PAGE_MARKER, ExtractionWorker
+
+class FakeChain:
+    """Stand-in for an LLM chain: replies come from a function of the prompt text."""
+
+    def __init__(self, reply, delay: float = 0.0):
+        self.reply = reply
+        self.delay = delay
+        self.calls = []
+
+    async def ainvoke(self, inputs):
+        self.calls.append(inputs["text"])
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return {"text": self.reply(inputs["text"])}
+
+def single_page_reply(text):
+    return [{"name": text.strip(), "price": 10.0}]
+
+def make_worker(packed_reply, tmp_path=None, **kwargs):
+    chains = {False: FakeChain(single_page_reply), True: FakeChain(packed_reply)}
+    cache = ExtractionCache(str(tmp_path)) if tmp_path else None
+    worker = ExtractionWorker(lambda model, batched: chains[batched], cache=cache, **kwargs)
+    return worker, chains
+
+async def extract_together(worker, texts):
+    # Hold the only slot so the pages queue up and are packed into one prompt
+    worker.start()
+    await worker._slots.acquire()
+    tasks = [asyncio.create_task(worker.extract(text, "llama3")) for text in texts]
+    await asyncio.sleep(0)
+    worker._slots.release()
+    try:
+        return await asyncio.gather(*tasks)
+    finally:
+        await worker.stop()
+
+@pytest.mark.asyncio
+async def test_packed_pages_are_split_by_page_id(tmp_path):
+    def reply(text):
+        return [{"name": "Milk", "price": 90.0, "page": "p1"}, {"name": "Rice", "price": 65.0, "page": "p2"}]
+
+    worker, chains = make_worker(reply, tmp_path)
+
+    results = await extract_together(worker, ["milk page", "rice page"])
+
+    assert results == [[{"name": "Milk", "price": 90.0}], [{"name": "Rice", "price": 65.0}]]
+    assert len(chains[True].calls) == 1 and chains[False].calls == []
+    assert PAGE_MARKER.format(page_id="p2") in chains[True].calls[0]
+
+@pytest.mark.asyncio
+async def test_empty_packed_reply_is_not_cached_for_every_page(tmp_path):
+    worker, chains = make_worker(lambda text: [], tmp_path)
+
+    results = await extract_together(worker, ["milk page", "rice page"])
+
+    # Unanswered pages are extracted on their own instead of being cached as empty
+    assert results == [[{"name": "milk page", "price": 10.0}], [{"name": "rice page", "price": 10.0}]]
+    assert sorted(chains[False].calls) == ["milk page", "rice page"]
+    key = worker.cache.make_key("milk page", "llama3", worker.prompt_version)
+    assert worker.cache.get(key) == [{"name": "milk page", "price": 10.0}]
+
+@pytest.mark.asyncio
+async def test_pages_missing_from_reply_are_retried_alone(tmp_path, caplog):
+    def reply(text):
+        return [{"name": "Milk", "price": 90.0, "page": "p1"}, {"name": "Stray", "price": 1.0, "page": "p9"}]
+
+    worker, chains = make_worker(reply, tmp_path)
+
+    results = await extract_together(worker, ["milk page", "rice page"])
+
+    assert results[0] == [{"name": "Milk", "price": 90.0}]
+    assert results[1] == [{"name": "rice page", "price": 10.0}]
+    assert chains[False].calls == ["rice page"]
+    assert "1 items without a valid page id" in caplog.text
+
+@pytest.mark.asyncio
+async def test_stop_cancels_running_batches():
+    worker = ExtractionWorker(lambda model, batched: FakeChain(single_page_reply, delay=10), batch_window=0)
+    worker.start()
+    task = asyncio.create_task(worker.extract("milk page", "llama3"))
+    await asyncio.sleep(0.01)
+    assert worker.in_flight == 1 and len(worker._batch_tasks) == 1
+
+    await worker.stop()
+
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert worker.in_flight == 0
+    assert not worker._batch_tasks
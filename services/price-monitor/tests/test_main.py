@@ -0,0 +1,107 @@
+import json
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+from fastapi.testclient import TestClient
+
+from extraction_pipeline import PageContent, make_soup
+from main import OllamaClient, app, ollama_client, regex_tier
+
+class TagsHandler(BaseHTTPRequestHandler):
+    """Stand-in Ollama server answering /api/tags with the configured models."""
+    models = []
+    requests = 0
+
+    def do_GET(self):
+        type(self).requests += 1
+        body = json.dumps({"models": [{"name": name} for name in self.models]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def ollama_server():
+    TagsHandler.models = ["qwen2.5-coder:1.5b", "deepseek-r1:latest"]
+    TagsHandler.requests = 0
+    server = HTTPServer(("127.0.0.1", 0), TagsHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+def test_client_does_not_contact_ollama_until_refreshed(ollama_server):
+    client = OllamaClient(base_url=ollama_server)
+
+    assert not client.is_ready
+    assert client.default_model is None
+    assert client.get_model() is None
+    assert TagsHandler.requests == 0
+
+@pytest.mark.asyncio
+async def test_refresh_discovers_models_and_prefers_default(ollama_server):
+    client = OllamaClient(base_url=ollama_server)
+
+    assert await client.refresh_models() == ["qwen2.5-coder:1.5b", "deepseek-r1:latest"]
+    assert client.is_ready
+    assert client.default_model == "deepseek-r1:latest"
+    assert client.last_refresh is not None and client.last_error is None
+
+@pytest.mark.asyncio
+async def test_failed_refresh_keeps_last_good_models(ollama_server):
+    client = OllamaClient(base_url=ollama_server)
+    await client.refresh_models()
+
+    client.base_url = "http://127.0.0.1:1"
+    models = await client.refresh_models()
+
+    assert models == ["qwen2.5-coder:1.5b", "deepseek-r1:latest"]
+    assert client.is_ready
+    assert client.last_error
+
+@pytest.mark.asyncio
+async def test_background_discovery_starts_and_stops(ollama_server):
+    client = OllamaClient(base_url=ollama_server, refresh_interval=60)
+    client.start()
+    for _ in range(50):
+        if client.is_ready:
+            break
+        await asyncio.sleep(0.02)
+
+    assert client.is_ready
+    await client.stop()
+    assert client._refresh_task is None
+
+def test_health_is_live_while_ready_waits_for_models(monkeypatch):
+    client = TestClient(app)
+    monkeypatch.setattr(ollama_client, "available_models", [])
+
+    health = client.get("/health")
+    ready = client.get("/ready")
+
+    assert health.status_code == 200
+    assert health.json()["ollama_status"] == "disconnected"
+    assert ready.status_code == 503
+    assert ready.json()["ready"] is False
+
+    monkeypatch.setattr(ollama_client, "available_models", ["deepseek-r1:latest"])
+    ready = client.get("/ready")
+
+    assert ready.status_code == 200
+    assert ready.json()["available_models"] == ["deepseek-r1:latest"]
+
+def test_regex_tier_ignores_numbers_without_currency():
+    html = ("<p>Welcome to our store since 1998</p><p>Copyright 2024</p><p>Call Hotline 16469</p>")
+    page = PageContent(url="https://shop.example", html=html, soup=make_soup(html))
+
+    assert regex_tier(page) == []
+
+    html += "<p>Milk 1L ৳ 95</p><p>Basmati Rice 5kg Tk 450</p>"
+    page = PageContent(url="https://shop.example", html=html, soup=make_soup(html))
+
+    assert regex_tier(page) == [{"name": "Milk 1L", "price": 95.0}, {"name": "Basmati Rice 5kg", "price": 450.0}]
@@ -0,0 +1,85 @@
+import json
+
+from bs4 import BeautifulSoup
+
+from selector_learning import SelectorStore, learn_selectors
+
+LISTING = """
+<html><body>
+<nav><a>Fresh deals</a></nav>
+<div class="grid">
+  <div class="card item-1"><h3 class="title">Fresh Milk 1L</h3><span class="price">৳ 90</span></div>
+  <div class="card item-2"><h3 class="title">Miniket Rice 5kg</h3><span class="price">৳ 450</span></div>
+  <div class="card item-3"><h3 class="title">Soybean Oil 1L</h3><span class="price">৳ 1,650</span></div>
+</div>
+</body></html>
+"""
+
+ITEMS = [
+    {"name": "Fresh Milk 1L", "price": 90},
+    {"name": "Miniket Rice 5kg", "price": 450},
+    {"name": "Soybean Oil 1L", "price": 1650},
+]
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_learns_card_name_and_price_selectors():
+    selectors = learn_selectors(BeautifulSoup(LISTING, "html.parser"), ITEMS)
+
+    assert selectors == {"card": "div.card", "name": "h3.title", "price": "span.price"}
+
+def test_short_fragments_do_not_count_as_name_matches():
+    # "Fresh deals" in the nav and "Milk" alone must not be taken for "Fresh Milk 1L"
+    html = """
+    <div class="card"><span class="tag">Milk</span><span class="price">৳ 90</span></div>
+    <div class="card"><span class="tag">Rice</span><span class="price">৳ 450</span></div>
+    """
+
+    assert learn_selectors(BeautifulSoup(html, "html.parser"), ITEMS) is None
+
+def test_name_inside_longer_text_is_still_found():
+    html = LISTING.replace("Fresh Milk 1L<", "Fresh Milk 1L (New)<")
+
+    assert learn_selectors(BeautifulSoup(html, "html.parser"), ITEMS)["card"] == "div.card"
+
+def test_learning_does_not_modify_soup():
+    soup = BeautifulSoup(LISTING, "html.parser")
+    before = str(soup)
+
+    learn_selectors(soup, ITEMS)
+
+    assert str(soup) == before
+
+def test_counter_updates_are_debounced(tmp_path):
+    clock = FakeClock()
+    path = tmp_path / "selectors.json"
+    store = SelectorStore(str(path), save_interval=30, clock=clock)
+    store.save("shop.example.com", {"card": "div.card", "name": "h3", "price": ".price"})
+
+    for _ in range(5):
+        store.record_result("shop.example.com", True)
+    assert json.loads(path.read_text())["shop.example.com"]["hits"] == 0
+
+    clock.now = 31
+    store.record_result("shop.example.com", True)
+    assert json.loads(path.read_text())["shop.example.com"]["hits"] == 6
+
+    store.record_result("shop.example.com", True)
+    store.flush()
+    assert json.loads(path.read_text())["shop.example.com"]["hits"] == 7
+
+def test_stale_selectors_are_dropped_and_saved_at_once(tmp_path):
+    path = tmp_path / "selectors.json"
+    store = SelectorStore(str(path), max_failures=2, clock=FakeClock())
+    store.save("shop.example.com", {"card": "div.card", "name": "h3", "price": ".price"})
+
+    store.record_result("shop.example.com", False)
+    store.record_result("shop.example.com", False)
+
+    assert store.get("shop.example.com") is None
+    assert json.loads(path.read_text()) == {}
@@ -0,0 +1,49 @@
+from bs4 import BeautifulSoup
+
+from text_reducer import page_blocks, reduce_page, score_block
+
+PAGE = """
+<html><head><script>var tracking = "৳ 1";</script><style>.price { color: red }</style></head>
+<body>
+<header><nav><a href="/">Home</a> <a href="/deals">Deals ৳ 99</a></nav></header>
+<div class="grid">
+  <div class="card"><div><span class="name">Milk 1L</span></div><span class="price">৳ 90</span></div>
+  <div class="card"><div><span class="name">Rice 5kg</span></div><span class="price">৳ 450</span></div>
+</div>
+<p>About us</p>
+<footer>Contact ৳ 0</footer>
+</body></html>
+"""
+
+def test_page_blocks_skip_boilerplate_without_mutating_soup():
+    soup = BeautifulSoup(PAGE, "html.parser")
+
+    blocks = page_blocks(soup)
+
+    assert "Milk 1L" in blocks and "৳ 90" in blocks
+    assert not any("Deals" in block or "Contact" in block or "tracking" in block for block in blocks)
+    # The tree is left intact for selector learning and other extractors
+    assert soup.find("nav") is not None and soup.find("script") is not None
+
+def test_reduce_page_keeps_price_regions():
+    chunks = reduce_page(BeautifulSoup(PAGE, "html.parser"), context=1)
+
+    assert len(chunks) == 1
+    assert "Milk 1L" in chunks[0] and "৳ 450" in chunks[0]
+    assert "Home" not in chunks[0]
+
+def test_reduce_page_splits_long_blocks_instead_of_truncating():
+    products = " ".join(f"Product{i} ৳ {100 + i}" for i in range(100))
+    soup = BeautifulSoup(f"<div>{products}</div>", "html.parser")
+
+    chunks = reduce_page(soup, max_chunk_chars=300, max_chunks=100)
+
+    assert all(len(chunk) <= 300 for chunk in chunks)
+    text = " ".join(chunks)
+    assert "Product0 ৳ 100" in text and "Product99 ৳ 199" in text
+    assert sum(score_block(chunk) for chunk in chunks) == 100
+
+def test_reduce_page_without_prices_falls_back_to_leading_text():
+    soup = BeautifulSoup("<div>Welcome</div><p>No prices here</p>", "html.parser")
+
+    assert reduce_page(soup) == ["Welcome\nNo prices here"]
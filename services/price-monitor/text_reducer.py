@@ -0,0 +1,146 @@
+import re
+import logging
+from typing import List, Tuple
+
+from bs4 import BeautifulSoup
+
+logger = logging.getLogger(__name__)
+
+# Elements whose text forms its own block; inline tags merge into the nearest one
+BLOCK_TAGS = {
+    'address', 'article', 'aside', 'blockquote', 'body', 'dd', 'div', 'dl', 'dt',
+    'fieldset', 'figcaption', 'figure', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'li', 'main', 'ol', 'p', 'section', 'table', 'td', 'th', 'tr', 'ul'
+}
+BOILERPLATE_TAGS = {"script", "style", "noscript", "nav", "footer", "header", "iframe", "svg"}
+
+PRICE_HINT_RE = re.compile(
+    r'(?:৳|\bTk\.?|\bBDT|\$|\bUSD)\s*\d'
+    r'|\d[\d,]*(?:\.\d+)?\s*(?:৳|টাকা|\bTk\b|\bBDT\b|\$)',
+    re.IGNORECASE
+)
+UNIT_HINT_RE = re.compile(r'\d\s*(?:kg|gm?|ml|ltr|l|pcs|pc|dozen|pack)\b', re.IGNORECASE)
+
+def page_blocks(soup: BeautifulSoup) -> List[str]:
+    """
+    Split a page into text blocks without nested duplication.
+
+    Every text node is assigned to its nearest block-level ancestor, so the
+    text of a product card appears once instead of once per wrapping div.
+    Consecutive identical blocks (duplicated mobile/desktop markup) collapse.
+    Text inside boilerplate elements is skipped; the soup is not modified,
+    so other extractors can still use the full tree.
+    """
+    groups = {}
+    for string in soup.find_all(string=True):
+        text = string.strip()
+        if not text:
+            continue
+        block = None
+        for parent in string.parents:
+            if parent.name in BOILERPLATE_TAGS:
+                break
+            if block is None and parent.name in BLOCK_TAGS:
+                block = parent
+        else:
+            groups.setdefault(id(block), []).append(text)
+
+    blocks = []
+    for parts in groups.values():
+        text = ' '.join(parts)
+        if not blocks or blocks[-1] != text:
+            blocks.append(text)
+    return blocks
+
+def score_block(text: str) -> float:
+    """Relevance of a block: price mentions count most, quantities a little."""
+    return len(PRICE_HINT_RE.findall(text)) + 0.25 * len(UNIT_HINT_RE.findall(text))
+
+def _split_block(text: str, limit: int) -> List[str]:
+    """Split an over-long block into pieces of at most `limit` chars, at whitespace when possible."""
+    pieces = []
+    while len(text) > limit:
+        cut = text.rfind(' ', 0, limit + 1)
+        if cut <= 0:
+            cut = limit
+        pieces.append(text[:cut].strip())
+        text = text[cut:].strip()
+    if text:
+        pieces.append(text)
+    return pieces
+
+def _segments(blocks: List[str], scores: List[float], context: int) -> List[Tuple[int, int]]:
+    """Merge price-bearing blocks and their neighbours into contiguous ranges."""
+    ranges = []
+    for i, score in enumerate(scores):
+        if score <= 0:
+            continue
+        start, end = max(0, i - context), min(len(blocks), i + context + 1)
+        if ranges and start <= ranges[-1][1]:
+            ranges[-1] = (ranges[-1][0], max(ranges[-1][1], end))
+        else:
+            ranges.append((start, end))
+    return ranges
+
+def reduce_page(soup: BeautifulSoup,
+                max_chunk_chars: int = 4000,
+                max_chunks: int = 4,
+                context: int = 2) -> List[str]:
+    """
+    Reduce a page to the chunks most likely to contain products.
+
+    Blocks with price mentions are kept together with `context` neighbouring
+    blocks (names and units usually sit next to the price), packed into
+    chunks of at most `max_chunk_chars`, and the `max_chunks` chunks with the
+    most price mentions are returned in document order. Blocks longer than a
+    chunk are split rather than truncated. Pages without any price mention
+    fall back to their leading text.
+
+    Args:
+        soup: Parsed page; it is read, not modified
+        max_chunk_chars: Size bound for a single LLM call
+        max_chunks: Maximum number of chunks (LLM calls) per page
+        context: Neighbouring blocks kept around each price-bearing block
+
+    Returns:
+        Text chunks to send to the model
+    """
+    blocks = page_blocks(soup)
+    scores = [score_block(block) for block in blocks]
+
+    if not any(scores):
+        return ['\n'.join(blocks)[:max_chunk_chars]] if blocks else []
+
+    chunks: List[Tuple[int, float, str]] = []
+    current: List[str] = []
+    current_len = 0
+    current_score = 0.0
+
+    def flush():
+        nonlocal current, current_len, current_score
+        if current:
+            chunks.append((len(chunks), current_score, '\n'.join(current)))
+        current, current_len, current_score = [], 0, 0.0
+
+    for start, end in _segments(blocks, scores, context):
+        for i in range(start, end):
+            pieces = _split_block(blocks[i], max_chunk_chars)
+            for block in pieces:
+                if current_len + len(block) + 1 > max_chunk_chars:
+                    flush()
+                current.append(block)
+                current_len += len(block) + 1
+                current_score += scores[i] if len(pieces) == 1 else score_block(block)
+        # Separate unrelated regions so the model does not merge their products
+        current.append('')
+        current_len += 1
+    flush()
+
+    # Most product-bearing chunks first, then restore document order
+    ranked = sorted(chunks, key=lambda c: c[1], reverse=True)[:max_chunks]
+    selected = [text.strip() for _, _, text in sorted(ranked)]
+
+    total = sum(len(block) for block in blocks)
+    kept = sum(len(text) for text in selected)
+    logger.info(f"Reduced {total} chars in {len(blocks)} blocks to {kept} chars in {len(selected)} chunks")
+    return selected
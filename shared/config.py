@@ -750,6 +750,14 @@ class Settings(BaseSettings):
     PRICE_CHANGE_THRESHOLD: float = 5.0  # 5% change
     STOCK_THRESHOLD: int = 10
     
+    # Alert Engine
+    ALERT_HYSTERESIS_PERCENT: float = 2.0  # extra move needed to alert a reversal
+    ALERT_DEDUP_WINDOW: int = 21600  # 6 hours
+    ALERT_RATE_LIMIT: int = 10  # immediate alerts per channel...
+    ALERT_RATE_PERIOD: int = 60  # ...per this many seconds
+    ALERT_DIGEST_WINDOW: int = 300  # 5 minutes
+    ALERT_STATE_PATH: Optional[str] = None
+    
     # Twilio Configuration
     TWILIO_ACCOUNT_SID: str = os.getenv("TWILIO_ACCOUNT_SID")
     TWILIO_AUTH_TOKEN: str = os.getenv("TWILIO_AUTH_TOKEN")
@@ -0,0 +1,120 @@
+"""
+Tests for alert deduplication, hysteresis, rate limiting and digests.
+"""
+
+import threading
+
+import pytest
+
+from agents.price_monitor.alert_engine import AlertEngine
+from agents.price_monitor.change_detector import ChangeDetector
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+@pytest.fixture
+def sent():
+    return []
+
+def make_engine(sent, clock, **kwargs):
+    kwargs.setdefault("checkpoint_interval", 0)
+    return AlertEngine(lambda alert, channel: sent.append((channel, alert)), clock=clock, **kwargs)
+
+def price(product, old, new, site="shop"):
+    return {"product": product, "site": site, "change_type": "price", "old_value": old, "new_value": new}
+
+def test_oscillating_price_alerts_once_per_level(sent, clock):
+    engine = make_engine(sent, clock, threshold_percent=5, dedup_window=3600)
+    outcomes = [engine.submit(price("Egg", a, b)) for a, b in [(100, 90), (90, 100), (100, 90), (90, 100)]]
+    assert outcomes == ["sent", "sent", "duplicate", "duplicate"]
+
+    clock.now += 3601
+    assert engine.submit(price("Egg", 100, 90)) == "sent"
+
+def test_small_moves_accumulate_and_reversals_need_the_band(sent, clock):
+    engine = make_engine(sent, clock, threshold_percent=5, hysteresis_percent=3)
+    assert engine.submit(price("Rice", 100, 103)) == "below_threshold"
+    assert engine.submit(price("Rice", 103, 106)) == "sent"
+    assert sent[-1][1]["old_value"] == 100 and sent[-1][1]["change_percent"] == 6.0
+    # A 6.6% drop would pass the plain threshold but not threshold + band
+    assert engine.submit(price("Rice", 106, 99)) == "below_threshold"
+    assert engine.submit(price("Rice", 99, 97)) == "sent"
+
+def test_rate_limit_overflow_goes_to_digest(sent, clock):
+    engine = make_engine(sent, clock, channels=["console", "slack"],
+                         rate_limits={"console": (5, 60), "slack": (1, 60)}, digest_window=300)
+    for i in range(20):
+        engine.submit(price(f"Item {i}", 100, 80))
+
+    assert sum(1 for channel, _ in sent if channel == "console") == 5
+    assert sum(1 for channel, _ in sent if channel == "slack") == 1
+
+    clock.now += 301
+    assert engine.flush() == 2
+    digests = {channel: alert for channel, alert in sent if alert["change_type"] == "digest"}
+    assert len(digests["console"]["changes"]) == 15
+    assert len(digests["slack"]["changes"]) == 19
+    assert digests["slack"]["new_value"].splitlines()[0] == "Item 1 (shop): price 100.0 -> 80"
+
+def test_low_priority_changes_are_only_digested(sent, clock):
+    engine = make_engine(sent, clock, digest_window=60)
+    assert engine.submit({"product": "Tea", "site": "shop", "change_type": "new_product", "new_value": 50}) == "digested"
+    assert sent == []
+    engine.flush(force=True)
+    assert sent[0][1]["change_type"] == "digest"
+
+def test_state_survives_restart(tmp_path, sent, clock):
+    path = str(tmp_path / "alerts.json")
+    engine = make_engine(sent, clock, state_path=path, digest_window=60)
+    stock = {"product": "Egg", "site": "shop", "change_type": "stock", "old_value": "in", "new_value": "out"}
+    engine.submit(price("Egg", 100, 90))
+    engine.submit(stock)
+    engine.submit({"product": "Tea", "site": "shop", "change_type": "delisted", "old_value": 50})
+
+    restored = make_engine(sent, clock, state_path=path, digest_window=60)
+    assert restored.references["shop|Egg"] == [90.0, -1.0]
+    assert restored.submit(stock) == "duplicate"
+    assert len(restored.digests["console"].changes) == 1
+
+def test_detector_events_feed_engine(sent, clock):
+    detector = ChangeDetector()
+    engine = make_engine(sent, clock, threshold_percent=5)
+    detector.subscribe(engine.submit)
+    detector.prime("shop", [{"product_name": "Egg", "price": 100}])
+
+    for p in (101, 102, 103, 104, 106):
+        detector.process("shop", [{"product_name": "Egg", "price": p}])
+    assert [(a["old_value"], a["new_value"]) for _, a in sent] == [(100.0, 106.0)]
+    assert engine.stats.below_threshold == 4
+
+def test_slow_delivery_does_not_block_other_submitters(clock):
+    """Alerts are delivered outside the engine lock."""
+    entered, release = threading.Event(), threading.Event()
+
+    def slow_sender(alert, channel):
+        entered.set()
+        release.wait(5)
+
+    engine = AlertEngine(slow_sender, clock=clock, checkpoint_interval=0)
+    sender = threading.Thread(target=engine.submit, args=(price("Milk", 100, 120),))
+    sender.start()
+    try:
+        assert entered.wait(5)
+        # Would wait on the lock while the first alert is being sent if delivery held it
+        result = []
+        other = threading.Thread(target=lambda: result.append(engine.submit(
+            {"product": "Tea", "site": "shop", "change_type": "new_product", "new_value": 50})))
+        other.start()
+        other.join(timeout=2)
+        assert result == ["digested"]
+    finally:
+        release.set()
+        sender.join()
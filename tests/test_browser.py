@@ -0,0 +1,129 @@
+"""
+Tests for shared browser helpers.
+"""
+
+import os
+import sys
+import subprocess
+from unittest.mock import Mock
+
+from agents.data_collection.browser import (
+    SiteProfile,
+    get_site_profile,
+    load_until_stable,
+    new_light_context,
+    wait_for_products
+)
+
+class FakeClock:
+    """Deterministic clock advanced by the injected sleep function."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+def test_load_until_stable_stops_when_count_stops_growing():
+    """Scrolling stops after the first scroll that loads nothing new."""
+    batches = iter([10, 20, 30, 30])
+    loaded = {"count": 0}
+    scroll = Mock(side_effect=lambda: loaded.update(count=next(batches)))
+    clock = FakeClock()
+
+    count = load_until_stable(lambda: loaded["count"], scroll,
+                              settle_time=1.0, sleep=clock.sleep, clock=clock)
+
+    assert count == 30
+    assert scroll.call_count == 4
+
+def test_load_until_stable_ready_page_costs_one_settle_window():
+    """A fully loaded page waits one settle window, not a fixed sleep per scroll."""
+    scroll = Mock()
+    clock = FakeClock()
+
+    count = load_until_stable(lambda: 24, scroll, settle_time=1.0,
+                              poll_interval=0.25, sleep=clock.sleep, clock=clock)
+
+    assert count == 24
+    assert scroll.call_count == 1
+    assert clock.now <= 1.0
+
+def test_load_until_stable_respects_max_scrolls():
+    """Endless feeds are bounded by max_scrolls."""
+    loaded = {"count": 0}
+    scroll = Mock(side_effect=lambda: loaded.update(count=loaded["count"] + 10))
+    clock = FakeClock()
+
+    count = load_until_stable(lambda: loaded["count"], scroll, max_scrolls=5,
+                              sleep=clock.sleep, clock=clock)
+
+    assert scroll.call_count == 5
+    assert count == 50
+
+def test_load_until_stable_respects_timeout():
+    """The overall timeout bounds slow-loading pages."""
+    loaded = {"count": 0}
+    clock = FakeClock()
+
+    def slow_scroll():
+        clock.sleep(4.0)
+        loaded["count"] += 10
+
+    count = load_until_stable(lambda: loaded["count"], slow_scroll, timeout=10.0,
+                              max_scrolls=100, sleep=clock.sleep, clock=clock)
+
+    assert count == 30
+
+def test_wait_for_products_waits_on_selector_then_network():
+    """The Playwright adapter waits for the grid before checking network idle."""
+    page = Mock()
+    page.locator.return_value.count.return_value = 12
+
+    count = wait_for_products(page, ".product-item", settle_time=0)
+
+    assert count == 12
+    page.wait_for_selector.assert_called_once_with(".product-item", state="attached", timeout=15000)
+    page.wait_for_load_state.assert_called_once_with("networkidle", timeout=5000)
+
+def test_site_profile_blocks_heavy_resources_and_trackers():
+    """Images and analytics hosts are blocked, documents and XHR are not."""
+    profile = get_site_profile("shwapno")
+
+    assert profile.should_block("image", "https://www.shwapno.com/img/milk.jpg")
+    assert profile.should_block("script", "https://www.googletagmanager.com/gtm.js")
+    assert profile.should_block("xhr", "https://region1.google-analytics.com/g/collect")
+    assert not profile.should_block("document", "https://www.shwapno.com/category/dairy")
+    assert not profile.should_block("xhr", "https://www.shwapno.com/api/products")
+
+def test_site_profile_per_site_domains():
+    """Site profiles extend the default block list."""
+    assert get_site_profile("daraz").should_block("script", "https://gm.mmstat.com/track")
+    assert not get_site_profile("agora").should_block("script", "https://gm.mmstat.com/track")
+    assert get_site_profile("unknown-site").name == "default"
+
+def test_new_light_context_applies_profile():
+    """Contexts get the profile's JavaScript setting and a catch-all route."""
+    browser = Mock()
+    profile = SiteProfile(name="static", javascript_enabled=False)
+
+    context = new_light_context(browser, profile, viewport={"width": 1280, "height": 1024})
+
+    browser.new_context.assert_called_once_with(java_script_enabled=False,
+                                                viewport={"width": 1280, "height": 1024})
+    context.route.assert_called_once()
+    assert context.route.call_args[0][0] == "**/*"
+
+def test_importing_browser_has_no_side_effects(tmp_path, project_root):
+    """Importing the helpers creates no files, adds no log handlers and does not load Playwright."""
+    code = ("import logging, sys\n"
+            "import agents.data_collection.browser\n"
+            "assert not logging.getLogger().handlers\n"
+            "assert 'playwright' not in sys.modules\n")
+    env = {**os.environ, "PYTHONPATH": str(project_root)}
+    subprocess.run([sys.executable, "-c", code], cwd=tmp_path, env=env, check=True)
+
+    assert list(tmp_path.iterdir()) == []
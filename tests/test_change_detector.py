@@ -0,0 +1,84 @@
+"""
+Tests for the streaming change detector and its tracker integration.
+"""
+
+from unittest.mock import MagicMock, patch
+
+from agents.price_monitor.change_detector import ChangeDetector
+from agents.price_monitor.tracker import PriceChangeTracker
+
+def item(name, price, stock="in_stock", delivery="1 day"):
+    return {"product_name": name, "price": price, "stock_status": stock,
+            "delivery_time": delivery, "scraped_url": f"https://shop.test/{name}"}
+
+def test_typed_events_and_subscriber_filtering():
+    detector = ChangeDetector(price_threshold_percent=5)
+    prices = []
+    detector.subscribe(prices.append, change_types=["price"])
+
+    first = detector.process("shop", [item("Egg", 150), item("Milk", 90)])
+    assert {e.change_type for e in first} == {"new_product"}
+
+    events = detector.process("shop", [item("Egg", 160, stock="out_of_stock"), item("Milk", 91, delivery="2 days")])
+    assert sorted(e.change_type for e in events) == ["delivery_time", "price", "stock"]
+    # Milk moved ~1%, under the threshold
+    assert [(e.product, e.old_value, e.new_value) for e in prices] == [("Egg", 150.0, 160.0)]
+    assert prices[0].to_alert()["change_percent"] == 6.67
+
+def test_small_moves_accumulate_against_last_reported_price():
+    detector = ChangeDetector(price_threshold_percent=5)
+    detector.prime("shop", [item("Egg", 100)])
+    assert detector.process("shop", [item("Egg", 103)]) == []
+    events = detector.process("shop", [item("Egg", 106)])
+    assert [(e.old_value, e.new_value) for e in events] == [(100.0, 106.0)]
+
+def test_delisting_after_missed_listings():
+    detector = ChangeDetector(delist_after=2)
+    detector.prime("shop", [item("Egg", 150), item("Milk", 90)])
+
+    assert detector.process("shop", [item("Egg", 150)]) == []
+    events = detector.process("shop", [item("Egg", 150)])
+    assert [(e.change_type, e.product) for e in events] == [("delisted", "Milk")]
+    # Partial batches never count towards delisting
+    assert detector.process("other", [item("Tea", 10)], complete=False)[0].change_type == "new_product"
+
+    relisted = detector.process("shop", [item("Egg", 150), item("Milk", 95)])
+    assert [(e.change_type, e.product) for e in relisted] == [("new_product", "Milk")]
+
+def test_streaming_submit_and_failing_subscriber():
+    detector = ChangeDetector()
+    received = []
+    detector.subscribe(lambda event: 1 / 0)
+    detector.subscribe(received.append)
+
+    detector.submit("shop", [item("Egg", 150)])
+    detector.submit("shop", [item("Egg", 140)])
+    detector.flush()
+    detector.stop()
+
+    assert [e.change_type for e in received] == ["new_product", "price"]
+    assert detector.stats()["batches"] == 2
+
+def test_state_checkpoint_round_trip(tmp_path):
+    path = str(tmp_path / "state.json")
+    ChangeDetector(state_path=path).process("shop", [item("Egg", 150)])
+
+    restored = ChangeDetector(state_path=path)
+    assert restored.knows("shop", "Egg")
+    events = restored.process("shop", [item("Egg", 155)])
+    assert [(e.change_type, e.old_value) for e in events] == [("price", 150.0)]
+
+def test_tracker_fetches_each_product_once():
+    response = MagicMock()
+    response.json.return_value = {"price": 150.0, "stock_status": "in_stock", "delivery_time": "1 day"}
+    tracker = PriceChangeTracker("http://backend.test")
+
+    with patch("agents.price_monitor.tracker.requests.get", return_value=response) as get:
+        assert tracker.detect_and_store_changes("shop", [item("Egg", 150)]) == []
+        changes = tracker.detect_and_store_changes("shop", [item("Egg", 165, stock="out_of_stock")])
+
+    assert get.call_count == 1
+    assert changes[0]["product"] == "Egg"
+    assert changes[0]["change_description"] == (
+        "Price changed from ৳150.00 to ৳165.00 (10.00%), Stock status changed from 'in_stock' to 'out_of_stock'")
+    assert changes[0]["link"] == "https://shop.test/Egg"
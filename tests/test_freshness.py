@@ -0,0 +1,95 @@
+"""
+Tests for change-rate learning and adaptive scheduling.
+"""
+
+from unittest.mock import patch
+
+from agents.data_collection.freshness import (
+    FreshnessTracker, allocate_poll_rates, expected_freshness, price_signature
+)
+from agents.data_collection.scheduler import SmartScheduler
+
+DAY = 86400
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+def test_price_signature_ignores_order():
+    a = [{"name": "Egg 12pcs", "price": 150}, {"name": "Milk 1L", "price": 90}]
+    assert price_signature(a) == price_signature(list(reversed(a)))
+    assert price_signature(a) != price_signature([{"name": "Egg 12pcs", "price": 155}, a[1]])
+
+def test_tracker_learns_change_rates(tmp_path):
+    clock = FakeClock()
+    state_path = str(tmp_path / "freshness.json")
+    tracker = FreshnessTracker(state_path, clock=clock)
+    tracker.register("eggs", initial_interval=3600)
+    tracker.register("salt", initial_interval=3600)
+
+    for hour in range(48):
+        clock.now += 3600
+        assert tracker.observe("eggs", [{"name": "Egg", "price": 150 + hour}]) == (hour > 0)
+        tracker.observe("salt", [{"name": "Salt", "price": 40}])
+
+    assert tracker.change_rate("eggs") > 2 * tracker.change_rate("salt")
+
+    # History survives a restart
+    reloaded = FreshnessTracker(state_path, clock=clock)
+    assert reloaded.change_rate("eggs") == tracker.change_rate("eggs")
+
+def test_allocation_respects_budget_and_favours_volatile_jobs():
+    rates = {"eggs": 6 / DAY, "meat": 3 / DAY, "rice": 0.2 / DAY, "salt": 0.05 / DAY}
+    budget = 10 / 3600
+
+    # Uncapped, so every job could use the whole budget and it binds
+    poll = allocate_poll_rates(rates, budget, min_rate=1 / DAY, max_rate=1 / 900,
+                               polls_per_change=float("inf"))
+
+    assert abs(sum(poll.values()) - budget) < 1e-6
+    assert poll["eggs"] >= poll["meat"] > poll["rice"] > poll["salt"]
+
+    uniform = sum(expected_freshness(r, budget / len(rates)) for r in rates.values())
+    adaptive = sum(expected_freshness(rates[job], poll[job]) for job in rates)
+    assert adaptive > uniform
+
+def test_spare_budget_is_left_unspent():
+    """Without a binding budget each job is polled in proportion to its change rate, not at max_rate."""
+    rates = {"eggs": 24 / DAY, "meat": 6 / DAY, "rice": 0.2 / DAY}
+
+    poll = allocate_poll_rates(rates, 20 / 3600, min_rate=1 / DAY, max_rate=1 / 900)
+
+    assert poll["eggs"] == 1 / 900
+    assert poll["meat"] == 4 * rates["meat"]
+    # Rice changes less than once a day, so it stays at the floor
+    assert poll["rice"] == 1 / DAY
+    assert sum(poll.values()) * 3600 < 6
+
+def test_allocation_below_minimum_budget():
+    poll = allocate_poll_rates({"a": 1 / DAY, "b": 2 / DAY}, budget=0.0, min_rate=1 / DAY, max_rate=1)
+    assert poll == {"a": 1 / DAY, "b": 1 / DAY}
+
+def test_scheduler_adaptive_jobs():
+    """Adaptive jobs get budgeted intervals and a rebalance job."""
+    config = {
+        "jobs": [],
+        "retry_limit": 3,
+        "backoff_base": 5,
+        "adaptive": {"state_path": None, "fetches_per_hour": 4, "min_interval_minutes": 15}
+    }
+
+    with patch("agents.data_collection.scheduler.SmartScheduler._load_config", return_value=config):
+        scheduler = SmartScheduler("dummy_path")
+
+        scheduler.add_collection_job("shwapno", "eggs", {"type": "adaptive", "params": {"initial_minutes": 30}})
+        scheduler.add_collection_job("shwapno", "salt", {"type": "adaptive", "params": {"initial_minutes": 1440}})
+
+        intervals = scheduler.adaptive_intervals
+        assert intervals["shwapno_eggs"] < intervals["shwapno_salt"]
+        assert sum(3600 / i for i in intervals.values()) <= 4 + 1e-6
+        assert {job.id for job in scheduler.scheduler.get_jobs()} == {
+            "shwapno_eggs", "shwapno_salt", "_freshness_rebalance"
+        }
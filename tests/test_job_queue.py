@@ -0,0 +1,184 @@
+"""
+Tests for the leased job queue and scheduler producer mode.
+"""
+
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from agents.data_collection.job_queue import JobQueue, MemoryBackend, Worker
+from agents.data_collection.scheduler import SmartScheduler
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+@pytest.fixture
+def queue(clock):
+    return JobQueue(MemoryBackend(), visibility_timeout=60, max_attempts=3, backoff_base=10, clock=clock)
+
+def test_idempotent_keys(queue):
+    """A key cannot be queued again until its job finishes."""
+    assert queue.submit({"category": "eggs"}, key="shwapno_eggs")
+    assert queue.submit({"category": "eggs"}, key="shwapno_eggs") is None
+
+    job = queue.claim()
+    assert queue.submit({"category": "eggs"}, key="shwapno_eggs") is None
+    assert queue.complete(job)
+    assert queue.submit({"category": "eggs"}, key="shwapno_eggs")
+
+def test_claimed_job_is_invisible_until_lease_expires(queue, clock):
+    queue.submit({"n": 1}, key="a")
+    job = queue.claim()
+    assert queue.claim() is None
+
+    clock.now += 61
+    redelivered = queue.claim()
+    assert redelivered.id == job.id
+    assert redelivered.attempts == 2
+    # The first worker's lease is gone, so it can no longer ack
+    assert not queue.complete(job)
+    assert queue.complete(redelivered)
+
+def test_extend_keeps_lease(queue, clock):
+    queue.submit({"n": 1}, key="a")
+    job = queue.claim()
+    clock.now += 50
+    assert queue.extend(job)
+    clock.now += 50
+    assert queue.claim() is None
+
+def test_failures_back_off_then_dead_letter(queue, clock):
+    queue.submit({"n": 1}, key="a")
+
+    job = queue.claim()
+    queue.fail(job, "timeout")
+    assert queue.claim() is None
+    clock.now += 13  # first retry after ~10s (with jitter)
+    job = queue.claim()
+    assert job.attempts == 2 and job.last_error == "timeout"
+
+    queue.fail(job, "timeout")
+    clock.now += 25
+    job = queue.claim()
+    queue.fail(job, "still failing")
+
+    assert queue.stats() == {"queued": 0, "leased": 0, "dead": 1}
+    assert queue.backend.dead_letters()[0].last_error == "still failing"
+
+def test_abandoned_jobs_are_dead_lettered(queue, clock):
+    queue.submit({"n": 1}, key="a")
+    for _ in range(3):
+        assert queue.claim()
+        clock.now += 61
+
+    assert queue.claim() is None
+    assert queue.stats()["dead"] == 1
+
+def test_worker_runs_handler_and_retries_failures(queue, clock):
+    seen = []
+
+    def handler(payload):
+        seen.append(payload["n"])
+        if payload["n"] == 2:
+            raise RuntimeError("boom")
+
+    queue.submit({"n": 1}, key="one")
+    queue.submit({"n": 2}, key="two")
+    worker = Worker(queue, handler, worker_id="test")
+
+    assert worker.run_once() and worker.run_once()
+    assert not worker.run_once()
+    assert seen == [1, 2]
+    assert (worker.processed, worker.failed) == (1, 1)
+    assert queue.stats()["queued"] == 1
+
+def test_scheduler_producer_and_worker():
+    """In queue mode scheduled runs are queued and collected by workers."""
+    config = {"jobs": [], "retry_limit": 3, "backoff_base": 5, "queue": {"enabled": True}}
+    products = [{"name": "Egg", "price": 150}]
+
+    with patch("agents.data_collection.scheduler.SmartScheduler._load_config", return_value=config), \
+         patch("agents.data_collection.scheduler.collect_data", return_value=products) as collect, \
+         patch("agents.data_collection.scheduler.save_data") as save:
+        scheduler = SmartScheduler("dummy_path")
+        scheduler._run_collection("shwapno", "eggs")
+        scheduler._run_collection("shwapno", "eggs")
+
+        collect.assert_not_called()
+        assert scheduler.job_queue.stats()["queued"] == 1
+
+        stop = threading.Event()
+        threads = scheduler.run_workers(count=2, stop_event=stop)
+        for _ in range(100):
+            if scheduler.job_queue.stats() == {"queued": 0, "leased": 0, "dead": 0}:
+                break
+            stop.wait(0.02)
+        stop.set()
+        for thread in threads:
+            thread.join(timeout=2)
+
+        collect.assert_called_once_with("shwapno", "eggs", raise_errors=True)
+        save.assert_called_once()
+
+def test_queue_workers_feed_adaptive_scheduling(tmp_path):
+    """Observations made by worker nodes reach the producer's freshness model."""
+    state_path = str(tmp_path / "freshness.json")
+    config = {"jobs": [], "retry_limit": 3, "backoff_base": 5, "queue": {"enabled": True},
+              "adaptive": {"state_path": state_path}}
+    products = [{"name": "Egg", "price": 150}]
+
+    with patch("agents.data_collection.scheduler.SmartScheduler._load_config", return_value=config), \
+         patch("agents.data_collection.scheduler.collect_data", return_value=products), \
+         patch("agents.data_collection.scheduler.save_data"):
+        producer = SmartScheduler("dummy_path")
+        producer.add_collection_job("shwapno", "eggs", {"type": "adaptive", "params": {"initial_minutes": 30}})
+        producer._run_collection("shwapno", "eggs")
+
+        # A worker node has its own scheduler that never registered the adaptive job
+        worker_node = SmartScheduler("dummy_path")
+        worker_node.job_queue = producer.job_queue
+        assert Worker(producer.job_queue, worker_node.process_job).run_once()
+
+        producer.rebalance()
+
+    assert producer.freshness.history["shwapno_eggs"].checks == 1
+
+def test_empty_collection_completes_job():
+    """A scrape that finds nothing is a result, not a failure to retry."""
+    config = {"jobs": [], "retry_limit": 3, "backoff_base": 5, "queue": {"enabled": True}}
+
+    with patch("agents.data_collection.scheduler.SmartScheduler._load_config", return_value=config), \
+         patch("agents.data_collection.scheduler.collect_data", return_value=[]):
+        scheduler = SmartScheduler("dummy_path")
+        scheduler._run_collection("shwapno", "eggs")
+        worker = Worker(scheduler.job_queue, scheduler.process_job)
+
+        assert worker.run_once()
+
+    assert (worker.processed, worker.failed) == (1, 0)
+    assert scheduler.job_queue.stats() == {"queued": 0, "leased": 0, "dead": 0}
+
+def test_failed_collection_fails_the_lease():
+    """A scrape error is retried by the queue instead of being acked as an empty result."""
+    config = {"jobs": [], "retry_limit": 3, "backoff_base": 5, "queue": {"enabled": True}}
+
+    with patch("agents.data_collection.scheduler.SmartScheduler._load_config", return_value=config), \
+         patch("agents.data_collection.collector.COMPETITOR_MAP") as competitors:
+        competitors.get.return_value.scrape_category.side_effect = TimeoutError("page timed out")
+        scheduler = SmartScheduler("dummy_path")
+        scheduler._run_collection("shwapno", "eggs")
+        worker = Worker(scheduler.job_queue, scheduler.process_job)
+
+        assert worker.run_once()
+
+    assert (worker.processed, worker.failed) == (0, 1)
+    assert scheduler.job_queue.stats() == {"queued": 1, "leased": 0, "dead": 0}
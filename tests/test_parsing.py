@@ -0,0 +1,92 @@
+"""
+Tests for HTML parsing helpers.
+"""
+
+from bs4 import SoupStrainer
+
+from agents.data_collection.parsing import (
+    class_marker, count_markers, make_soup, select_text, slice_region, tag_marker
+)
+
+PAGE = """
+<html>
+<head><title>Dairy | Shop</title><script>var heavy = "x";</script></head>
+<body>
+    <nav><div class="product-item">Nav promo</div></nav>
+    <div class="grid">
+        <div class="col product-item"><span class="product-name">Milk 1L</span></div>
+        <div class="col product-item"><span class="product-name">Butter 200g</span></div>
+    </div>
+    <footer><div class="product-item">Recently viewed</div></footer>
+</body>
+</html>
+"""
+
+def test_slice_region_starts_at_enclosing_tag_and_stops_at_end_marker():
+    """The slice begins at the tag holding the marker and excludes the footer."""
+    region = slice_region(PAGE, 'class="col product-item', "<footer")
+
+    assert region.startswith('<div class="col product-item">')
+    assert "Recently viewed" not in region
+    assert "Nav promo" not in region
+
+def test_slice_region_missing_marker_returns_document():
+    """Pages without the marker are parsed in full."""
+    assert slice_region(PAGE, "no-such-class") == PAGE
+    assert slice_region(PAGE, "product-name", "no-such-end").endswith("</html>\n")
+
+def test_make_soup_region_parses_only_grid():
+    """Only products between the markers end up in the tree."""
+    soup = make_soup(PAGE, start_marker='class="col product-item', end_marker="<footer")
+
+    names = [el.get_text(strip=True) for el in soup.select(".product-item .product-name")]
+    assert names == ["Milk 1L", "Butter 200g"]
+
+def test_make_soup_title_only():
+    """A strained title-only parse still exposes soup.title."""
+    soup = make_soup(PAGE, start_marker="<title", end_marker="</title>",
+                     parse_only=SoupStrainer("title"))
+
+    assert soup.title.string.strip() == "Dairy | Shop"
+
+def test_make_soup_explicit_backend():
+    """The backend can be forced to the pure-Python parser."""
+    soup = make_soup("<p>Tk 50</p>", backend="html.parser")
+
+    assert soup.p.get_text() == "Tk 50"
+
+def test_select_text_first_matching_selector():
+    """Selectors are tried in order until one matches."""
+    assert select_text(PAGE, [".missing", ".product-name"]) == "Milk 1L"
+    assert select_text(PAGE, [".missing"]) is None
+
+def test_class_marker_skips_css_scripts_and_longer_class_names():
+    """Anchored markers only match a real class attribute holding the whole class."""
+    page = """
+    <html><head><style>.product-item { color: red }</style>
+    <script>var tpl = "<footer class=\\"product-item\\"></footer>";</script></head>
+    <body><span class="product-item-count">2 items</span>
+    <div class="grid"><div class="col product-item"><span class="product-name">Milk 1L</span></div>
+    <div class='product-item'><span class="product-name">Butter 200g</span></div></div>
+    <footer><div class="product-item">Recently viewed</div></footer></body></html>
+    """
+
+    region = slice_region(page, class_marker("product-item"), tag_marker("footer"))
+
+    assert region.startswith('<div class="col product-item">')
+    assert "Butter 200g" in region
+    assert "Recently viewed" not in region
+
+def test_tag_marker_needs_a_tag_boundary():
+    """<footer-menu> is not mistaken for the page footer."""
+    html = '<div class="product-item">A</div><footer-menu>x</footer-menu><div class="product-item">B</div><footer>'
+
+    region = slice_region(html, class_marker("product-item"), tag_marker("footer"))
+
+    assert region.endswith('<div class="product-item">B</div>')
+
+def test_count_markers_stops_at_end_marker():
+    """Cards are counted without parsing; those after the end marker are not."""
+    assert count_markers(PAGE, class_marker("product-item"), tag_marker("footer")) == 3
+    assert count_markers(PAGE, 'class="col product-item', tag_marker("footer")) == 2
+    assert count_markers(PAGE, class_marker("missing")) == 0
@@ -0,0 +1,61 @@
+"""
+Tests for precompiled price matching.
+"""
+
+import pytest
+
+from agents.data_collection.price_patterns import clean_price, find_price, find_prices
+
+@pytest.mark.parametrize("raw, expected", [
+    ("৳ 1,250", 1250.0),
+    ("Tk. 95.50", 95.5),
+    ("৳ ১,২৫০", 1250.0),
+    ("4,99", 4.99),
+    ("1,000", 1000.0),
+    ("1,00,000", 100000.0),
+    ("1.234,56", 1234.56),
+    ("1,234.56", 1234.56),
+    ("", 0.0),
+    ("N/A", 0.0),
+])
+def test_clean_price(raw, expected):
+    """Separators, Bangla digits and junk are handled."""
+    assert clean_price(raw) == expected
+
+def test_find_prices_single_scan_all_formats():
+    """Every supported format is found in document order."""
+    text = 'Milk ৳ 95 | Butter Tk 250 | Ghee BDT 1,200 | Tea $4.99 | Rice ৬৫০ টাকা'
+
+    prices = find_prices(text)
+
+    assert [p.value for p in prices] == [95.0, 250.0, 1200.0, 4.99, 650.0]
+    assert [p.currency for p in prices] == ["BDT", "BDT", "BDT", "USD", "BDT"]
+
+def test_find_price_prefers_taka_symbol_over_markup():
+    """Explicit ৳ prices beat JSON and markup hints regardless of position."""
+    html = '<script>{"price": "80"}</script><div class="price">75</div><span>৳ 90</span>'
+
+    assert find_price(html) == 90.0
+
+def test_find_price_markup_hints():
+    """Markup hints are used when no currency symbol is present."""
+    assert find_price('<span data-price="120.00"></span>') == 120.0
+    assert find_price('<div class="product-price">45</div>') == 45.0
+    assert find_price('{"sku": 1, "price": 300}') == 300.0
+
+def test_find_price_none():
+    """Pages without prices return None; zero prices are ignored."""
+    assert find_price("<p>Out of stock</p>") is None
+    assert find_price("৳ 0") is None
+
+def test_find_price_markup_hints_beat_new_formats():
+    """JSON and markup hints keep priority over BDT, $ and trailing-currency prices."""
+    assert find_price('<span>BDT 500</span><div data-price="450"></div>') == 450.0
+    assert find_price('Was 600 টাকা {"price": "550"}') == 550.0
+
+def test_suffix_match_leaves_following_taka_sign():
+    """A trailing-currency match does not swallow the ৳ of the next price."""
+    prices = find_prices("Save 50 ৳ 120")
+
+    assert [(p.kind, p.value) for p in prices] == [("suffix", 50.0), ("taka", 120.0)]
+    assert find_price("Save 50 ৳ 120") == 120.0
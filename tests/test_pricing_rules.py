@@ -0,0 +1,130 @@
+"""
+Tests for the compiled pricing rule set.
+"""
+
+import time
+
+import numpy as np
+import pytest
+
+from agents.price_monitor.pricing_rules import PriceFrame, RuleSet
+from agents.price_monitor.repricer import RepricingEngine, run_repricer
+
+RULES = [
+    {"name": "eggs match", "match": {"category": "eggs"}, "strategy": "match"},
+    {"name": "fresh brand", "match": {"category": "dairy", "brand": ["Fresh", "Aarong"]},
+     "beat_by_amount": 2, "ending": 9},
+    {"name": "dairy", "match": {"category": "dairy"}, "beat_by_percent": 3, "min_margin_pct": 5},
+    {"name": "rice capped", "match": {"category": "rice"}, "beat_by_percent": 1, "ceiling": 80, "floor": 60},
+]
+
+def frame(*rows):
+    return PriceFrame.from_records([
+        {"product": p, "competitor_price": c, "cost": cost, "category": cat, "brand": brand}
+        for p, c, cost, cat, brand in rows
+    ])
+
+def test_first_matching_rule_prices_each_product():
+    rules = RuleSet.from_dicts(RULES)
+    result = rules.evaluate(frame(
+        ("Egg 12pc", 150, None, "Eggs", ""),
+        ("Fresh Milk", 100, 80, "dairy", "fresh"),
+        ("Milk Vita", 100, 96, "dairy", "milk vita"),
+        ("Miniket", 100, 70, "rice", ""),
+        ("Tea", 50, None, "beverages", ""),
+    ))
+
+    assert result.prices[:4].tolist() == [150.0, 89.0, 100.8, 80.0]
+    assert np.isnan(result.prices[4])
+    assert [rules.rules[i].name for i in result.rule_index[:4]] == [
+        "eggs match", "fresh brand", "dairy", "rice capped"]
+
+def test_explanation_trail():
+    rules = RuleSet.from_dicts(RULES)
+    result = rules.evaluate(frame(
+        ("Fresh Milk", 100, 80, "dairy", "fresh"),
+        ("Milk Vita", 100, 96, "dairy", ""),
+        ("Tea", 50, None, "beverages", ""),
+    ))
+    assert result.explain(0) == ["rule 'fresh brand': beat competitor ৳100.00 by ৳2 -> ৳98.00",
+                                 "rounded to ৳89.00 (ending 9)"]
+    assert result.explain(1)[1] == "raised to minimum ৳100.80 (cost margin / floor)"
+    assert result.explain(2) == ["no rule matched; price left unchanged"]
+
+def test_rounding_never_goes_below_cost():
+    rules = RuleSet.from_dicts([{"name": "endings", "beat_by_percent": 5, "min_margin_pct": 0, "ending": 9}])
+    result = rules.evaluate(frame(("A", 210, None, "", ""), ("B", 210, 199.2, "", "")))
+    # 199.5 rounds down to 199 unless cost forbids it, then up to 209
+    assert result.prices.tolist() == [199.0, 209.0]
+
+def test_rounding_up_never_breaks_the_ceiling():
+    rules = RuleSet.from_dicts([{"name": "endings", "beat_by_percent": 5, "min_margin_pct": 0,
+                                 "ceiling": 205, "ending": 9}])
+    result = rules.evaluate(frame(("B", 210, 199.2, "", "")))
+    # 199 is under cost and 209 over the ceiling, so the unrounded price stays
+    assert result.prices.tolist() == [199.5]
+    assert not result.rounded[0]
+
+def test_sub_step_prices_are_not_rounded_up():
+    rules = RuleSet.from_dicts([{"name": "endings", "beat_by_amount": 0.5, "min_margin_pct": 0,
+                                 "ending": 9, "step": 10}])
+    result = rules.evaluate(frame(("B", 5, 1, "", "")))
+    # There is no ending below ৳4.50, and ৳9 would be far above the competitor
+    assert result.prices.tolist() == [4.5]
+    assert not result.rounded[0]
+
+def test_invalid_rules_are_rejected():
+    with pytest.raises(ValueError):
+        RuleSet.from_dicts([{"name": "x", "match": {"colour": "red"}}])
+    with pytest.raises(ValueError):
+        RuleSet.from_dicts([{"name": "x", "strategy": "undercut"}])
+    with pytest.raises(ValueError):
+        RuleSet.from_dicts([{"name": "x", "beat_by": 2}])
+
+def test_evaluates_large_catalog_quickly():
+    n = 50_000
+    rng = np.random.default_rng(0)
+    categories = np.array(["eggs", "dairy", "rice", "oil", "snacks"], dtype=object)
+    big = PriceFrame(
+        product=np.array([f"SKU{i}" for i in range(n)], dtype=object),
+        competitor_price=rng.uniform(20, 2000, n),
+        cost=rng.uniform(10, 1500, n),
+        category=categories[rng.integers(0, 5, n)],
+        brand=np.array(["fresh", "other"], dtype=object)[rng.integers(0, 2, n)],
+        floor=np.full(n, np.nan),
+        ceiling=np.full(n, np.nan),
+    )
+    rules = RuleSet.from_dicts(RULES + [{"name": "default", "beat_by_percent": 2, "ending": 5}])
+    rules.evaluate(big)
+
+    started = time.perf_counter()
+    result = rules.evaluate(big)
+    elapsed = time.perf_counter() - started
+
+    assert not np.isnan(result.prices).any()
+    assert elapsed < 0.5
+
+def test_repricer_plan_uses_rules():
+    engine = RepricingEngine("http://store.invalid/price", "key")
+    rules = RuleSet.from_dicts(RULES)
+    changes = [{"product": "Fresh Milk", "change_type": "price", "new_value": 100},
+               {"product": "Tea", "change_type": "price", "new_value": 50}]
+    catalog = {"Fresh Milk": {"price": 95.0, "category": "dairy", "brand": "Fresh", "cost": 80},
+               "Tea": {"price": 45.0}}
+
+    report = engine.plan(changes, margin_pct=5, catalog=catalog, rules=rules).report()
+
+    assert report["to_update"] == 1 and report["unchanged"] == 1
+    row = report["changes"][0]
+    assert (row["product"], row["new_price"]) == ("Fresh Milk", 89.0)
+    assert row["explanation"][0].startswith("rule 'fresh brand'")
+
+def test_empty_rules_input_uses_the_flat_margin():
+    """Workflows pass an unset repricing_rules input as an empty string."""
+    engine = RepricingEngine("http://store.invalid/price", "key")
+    changes = [{"product": "Egg", "change_type": "price", "new_value": 100}]
+
+    results = run_repricer(changes, 5, "http://store.invalid/price", "key", dry_run=True,
+                           engine=engine, rules="")
+
+    assert results[0]["report"]["changes"][0]["new_price"] == 95.0
@@ -0,0 +1,126 @@
+"""
+Tests for the health-scored proxy pool.
+"""
+
+import random
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from agents.data_collection.proxy_pool import ProxyPool
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class StandInProxyHandler(BaseHTTPRequestHandler):
+    """Answers every proxied GET itself instead of forwarding it."""
+
+    def do_GET(self):
+        self.send_response(200)
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def stand_in_proxy():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInProxyHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+@pytest.fixture
+def dead_proxy():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}"
+
+def make_pool(proxies, **kwargs):
+    kwargs.setdefault("clock", FakeClock())
+    return ProxyPool(proxies, rng=random.Random(7), **kwargs)
+
+def test_sticky_per_domain():
+    """A domain keeps its proxy; the assignment expires after sticky_ttl."""
+    clock = FakeClock()
+    pool = make_pool([f"http://proxy{i}:8080" for i in range(5)], sticky_ttl=60, clock=clock)
+
+    first = pool.acquire("shwapno.com")
+    assert all(pool.acquire("shwapno.com") == first for _ in range(10))
+
+    clock.now = 61
+    pool.acquire("shwapno.com")
+    assert pool._sticky["shwapno.com"][1] == 121
+
+def test_failure_drops_sticky_and_evicts():
+    clock = FakeClock()
+    pool = make_pool(["http://a:1", "http://b:1"], max_failures=2, cooldown=100, clock=clock)
+    proxy = pool.acquire("site")
+
+    pool.record_failure(proxy, "site")
+    assert "site" not in pool._sticky
+
+    pool.record_failure(proxy)
+    assert proxy not in pool.healthy()
+    assert all(pool.acquire() != proxy for _ in range(10))
+
+    clock.now = 100
+    assert proxy in pool.healthy()
+
+def test_repeat_eviction_doubles_cooldown():
+    clock = FakeClock()
+    pool = make_pool(["http://a:1"], max_failures=2, cooldown=100, clock=clock)
+    pool.record_failure("http://a:1")
+    pool.record_failure("http://a:1")
+
+    clock.now = 100
+    # Back from cooldown, a single failure evicts again for twice as long
+    pool.record_failure("http://a:1")
+    assert pool.acquire() is None
+    clock.now = 299
+    assert pool.acquire() is None
+    clock.now = 300
+    assert pool.acquire() == "http://a:1"
+
+def test_weighted_selection_prefers_fast_reliable_proxies():
+    pool = make_pool(["http://fast:1", "http://slow:1"])
+    for _ in range(5):
+        pool.record_success("http://fast:1", latency=0.2)
+        pool.record_success("http://slow:1", latency=4.0)
+
+    picks = [pool.acquire() for _ in range(200)]
+    assert picks.count("http://fast:1") > 150
+
+def test_from_env_ignores_blank_entries(monkeypatch):
+    monkeypatch.setenv("PROXY_LIST", "http://a:1, ,http://b:2,")
+    assert sorted(ProxyPool.from_env().healthy()) == ["http://a:1", "http://b:2"]
+
+    monkeypatch.delenv("PROXY_LIST")
+    assert ProxyPool.from_env(default=["http://c:3"]).healthy() == ["http://c:3"]
+
+def test_check_all_with_local_stand_in_proxies(stand_in_proxy, dead_proxy):
+    """Active health checks through a live and a dead local proxy."""
+    pool = make_pool([stand_in_proxy, dead_proxy], max_failures=1)
+
+    def probe(proxy):
+        start = time.monotonic()
+        response = requests.get("http://prices.invalid/health",
+                                proxies={"http": proxy}, timeout=2)
+        response.raise_for_status()
+        return time.monotonic() - start
+
+    results = pool.check_all(probe)
+
+    assert results == {stand_in_proxy: True, dead_proxy: False}
+    assert pool.healthy() == [stand_in_proxy]
+    assert pool.stats()[stand_in_proxy]["successes"] == 1
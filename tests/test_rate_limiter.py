@@ -0,0 +1,158 @@
+"""
+Tests for the per-host adaptive rate limiter.
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from agents.data_collection.rate_limiter import RateLimiter, RobotsDisallowed, _parse_retry_after
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class SlowRobotsHandler(BaseHTTPRequestHandler):
+    """Serves a robots.txt with a crawl-delay, slowly enough for callers to overlap."""
+
+    def do_GET(self):
+        time.sleep(0.3)
+        body = b"User-agent: *\nCrawl-delay: 4\nDisallow: /private\n"
+        self.send_response(200 if self.path == "/robots.txt" else 404)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def robots_site():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SlowRobotsHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+@pytest.fixture
+def limiter(clock):
+    return RateLimiter(default_rate=1.0, burst=2.0, respect_robots=False, clock=clock)
+
+def test_burst_then_paced(limiter):
+    """A new host gets `burst` immediate requests, then one per 1/rate seconds."""
+    waits = [limiter.reserve("https://shop.example.com/a") for _ in range(4)]
+
+    assert waits == [0.0, 0.0, 1.0, 2.0]
+
+def test_hosts_are_independent(limiter):
+    """Exhausting one host's bucket does not delay another host."""
+    for _ in range(3):
+        limiter.reserve("https://a.example.com/")
+
+    assert limiter.reserve("https://b.example.com/") == 0.0
+
+def test_tokens_refill_over_time(limiter, clock):
+    """Elapsed time refills the bucket up to its capacity."""
+    limiter.reserve("https://a.example.com/")
+    limiter.reserve("https://a.example.com/")
+    clock.now += 1.0
+
+    assert limiter.reserve("https://a.example.com/") == 0.0
+
+def test_throttle_halves_rate_and_honours_retry_after(limiter):
+    """A 429 halves the rate and blocks the host for Retry-After seconds."""
+    url = "https://a.example.com/p"
+    limiter.record_response(url, 429, latency=0.2, retry_after="12")
+
+    stats = limiter.stats()["a.example.com"]
+    assert stats["rate"] == 0.5
+    assert stats["throttled"] == 1
+    assert limiter.reserve(url) == 12.0
+
+def test_callers_queued_during_a_block_resume_spaced_out(limiter):
+    """Reservations made during Retry-After are paced from the end of the block, not released together."""
+    url = "https://a.example.com/p"
+    limiter.record_response(url, 429, retry_after="30")
+
+    waits = [limiter.reserve(url) for _ in range(5)]
+
+    assert waits == [30.0, 32.0, 34.0, 36.0, 38.0]
+
+def test_throttle_without_retry_after_uses_default_backoff(limiter):
+    limiter.record_response("https://a.example.com/", 503)
+
+    assert limiter.reserve("https://a.example.com/") == limiter.default_backoff
+
+def test_success_increases_rate_additively(limiter):
+    for _ in range(5):
+        limiter.record_response("https://a.example.com/", 200, latency=0.3)
+
+    assert limiter.stats()["a.example.com"]["rate"] == 1.5
+
+def test_slow_responses_reduce_rate(limiter):
+    """Smoothed latency above the target backs the host off before it refuses."""
+    limiter.record_response("https://a.example.com/", 200, latency=5.0)
+
+    assert limiter.stats()["a.example.com"]["rate"] < 1.0
+
+def test_crawl_delay_caps_rate(limiter):
+    url = "https://a.example.com/"
+    limiter.set_crawl_delay(url, 4)
+    for _ in range(10):
+        limiter.record_response(url, 200, latency=0.1)
+
+    assert limiter.stats()["a.example.com"]["rate"] == 0.25
+
+def test_host_key_normalization():
+    assert RateLimiter.host_of("https://WWW.Shwapno.com/category/dairy") == "www.shwapno.com"
+    assert RateLimiter.host_of("www.shwapno.com") == "www.shwapno.com"
+
+def test_parse_retry_after():
+    assert _parse_retry_after("7") == 7.0
+    assert _parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert _parse_retry_after("soon") is None
+    assert _parse_retry_after(None) is None
+
+def test_robots_disallowed_url_is_refused(robots_site, clock):
+    """Disallowed paths raise instead of being fetched; allowed ones pass."""
+    limiter = RateLimiter(burst=10.0, clock=clock)
+
+    assert limiter.acquire(f"{robots_site}/products") == 0.0
+    with pytest.raises(RobotsDisallowed):
+        limiter.acquire(f"{robots_site}/private/cart")
+
+def test_concurrent_first_callers_wait_for_crawl_delay(robots_site, clock):
+    """Callers racing the robots.txt fetch only proceed once its crawl-delay applies."""
+    limiter = RateLimiter(burst=10.0, clock=clock)
+    seen = []
+
+    def fetch():
+        limiter.acquire(f"{robots_site}/products")
+        seen.append(limiter.stats()["127.0.0.1"]["crawl_delay"])
+
+    threads = [threading.Thread(target=fetch) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert seen == [4.0] * 4
+
+def test_proxy_errors_leave_host_rate_alone(limiter):
+    """A failure at the proxy does not cut the target host's rate."""
+    url = "https://a.example.com/"
+    limiter.record_response(url, None, latency=10.0, proxy_error=True)
+
+    assert "a.example.com" not in limiter.stats()
+
+    limiter.record_response(url, None, latency=1.0)
+    assert limiter.stats()["a.example.com"]["rate"] == 0.8
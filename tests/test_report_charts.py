@@ -0,0 +1,54 @@
+"""
+Tests for the cached, pooled chart renderer used by reporting.
+"""
+
+import os
+
+from agents.reporting.charts import ChartRenderer, ChartSpec
+
+def fake_render(spec, path):
+    """Stands in for matplotlib: writes the spec title and the worker pid."""
+    with open(path, "w") as f:
+        f.write(f"{spec.title}:{os.getpid()}")
+    return path
+
+def spec(title="Prices", values=(1, 2, 3)):
+    return ChartSpec(kind="bar", title=title, labels=["a", "b", "c"], series={"shop": list(values)})
+
+def test_key_depends_on_content_only():
+    assert spec().key() == spec().key()
+    assert spec().key() != spec(values=(1, 2, 4)).key()
+    assert ChartSpec.from_dict(spec().to_dict()).key() == spec().key()
+
+def test_unchanged_charts_come_from_cache(tmp_path):
+    renderer = ChartRenderer(cache_dir=str(tmp_path), use_processes=False, render_fn=fake_render)
+
+    first = renderer.render_all({"north/prices": spec(), "south/prices": spec(), "east/prices": spec("East")})
+    # Identical charts for two regions are drawn once
+    assert first["north/prices"] == first["south/prices"]
+    assert (renderer.misses, renderer.hits) == (2, 1)
+
+    again = renderer.render_all({"north/prices": spec(), "east/prices": spec("East", (5, 6, 7))})
+    assert again["north/prices"] == first["north/prices"]
+    assert (renderer.misses, renderer.hits) == (3, 2)
+
+    renderer.prune(list(again.values()))
+    assert sorted(os.listdir(tmp_path)) == sorted(os.path.basename(p) for p in again.values())
+
+def test_charts_render_in_worker_processes(tmp_path):
+    renderer = ChartRenderer(cache_dir=str(tmp_path), max_workers=2, render_fn=fake_render)
+    paths = renderer.render_all({f"region{i}": spec(f"Region {i}") for i in range(4)})
+
+    contents = [open(p).read() for p in paths.values()]
+    assert sorted(c.split(":")[0] for c in contents) == [f"Region {i}" for i in range(4)]
+    assert all(int(c.split(":")[1]) != os.getpid() for c in contents)
+
+def test_publish_copies_charts_to_fixed_names(tmp_path):
+    """Readers such as the dashboard find the latest charts under stable names."""
+    renderer = ChartRenderer(cache_dir=str(tmp_path / "cache"), use_processes=False, render_fn=fake_render)
+    paths = renderer.render_all({"price_comparison": spec("Comparison"), "price_distribution": spec("Spread")})
+
+    published = renderer.publish(paths, str(tmp_path / "analysis"))
+
+    assert published == {name: str(tmp_path / "analysis" / f"{name}.png") for name in paths}
+    assert open(published["price_comparison"]).read().startswith("Comparison:")
@@ -0,0 +1,105 @@
+"""
+Tests for the streaming report writer and its section cache.
+"""
+
+import json
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+# apon_system has its own top-level `agents` package, so load the module by path
+_spec = importlib.util.spec_from_file_location(
+    "apon_report_generator",
+    Path(__file__).parent.parent / "apon_system" / "agents" / "report_generator.py")
+report_generator = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(report_generator)
+
+StreamingReportWriter = report_generator.StreamingReportWriter
+
+def make_analysis(name, avg=100.0, timestamp="2026-01-01T00:00:00"):
+    return {
+        "product_name": name,
+        "price_statistics": {"min_price": avg - 10, "max_price": avg + 10, "avg_price": avg},
+        "competitor_analysis": {"Chaldal": {"avg_price": avg, "availability_rate": 100.0}},
+        "insights": [f"{name} is stable"],
+        "analysis_timestamp": timestamp,
+    }
+
+def test_writer_streams_sections_and_counts_only_added_analyses(tmp_path):
+    """Falsy analyses are skipped and the header counts only written sections."""
+    base = tmp_path / "report"
+
+    with StreamingReportWriter(str(base), formats=("md", "json")) as report:
+        report.add(make_analysis("Milk"))
+        report.add({})
+        report.add(None)
+        report.add(make_analysis("Rice"))
+        assert "Milk" in (tmp_path / "report.md.part").read_text(encoding="utf-8")
+
+    assert report.count == 2
+    markdown = (tmp_path / "report.md").read_text(encoding="utf-8")
+    assert "**Products Analyzed**: 2" in markdown
+    assert markdown.index("Milk") < markdown.index("Rice") < markdown.index("Recommendations")
+    data = json.loads((tmp_path / "report.json").read_text(encoding="utf-8"))
+    assert data["products_analyzed"] == 2
+    assert [p["product_name"] for p in data["products"]] == ["Milk", "Rice"]
+    assert not list(tmp_path.glob("*.part"))
+
+def test_unchanged_sections_are_reused_and_stale_ones_pruned(tmp_path):
+    """A rerun reuses sections whose inputs did not change and drops the rest."""
+    base, cache = tmp_path / "report", tmp_path / "sections"
+
+    with StreamingReportWriter(str(base), cache_dir=str(cache)) as first:
+        first.add(make_analysis("Milk"))
+        first.add(make_analysis("Rice"))
+    assert first.reused == 0
+    assert len(list(cache.iterdir())) == 2
+
+    with StreamingReportWriter(str(base), cache_dir=str(cache)) as second:
+        second.add(make_analysis("Milk", timestamp="2026-01-02T00:00:00"))
+        second.add(make_analysis("Rice", avg=120.0))
+
+    assert second.reused == 1
+    cached = sorted(p.name for p in cache.iterdir())
+    assert cached == sorted([f"{report_generator.section_hash(make_analysis('Milk'))}.md",
+                             f"{report_generator.section_hash(make_analysis('Rice', avg=120.0))}.md"])
+    assert "120.00 BDT" in (tmp_path / "report.md").read_text(encoding="utf-8")
+
+def test_failed_run_removes_partial_files_and_keeps_last_report(tmp_path):
+    """An exception mid-run leaves no .part files and the previous report intact."""
+    base = tmp_path / "report"
+    with StreamingReportWriter(str(base)) as report:
+        report.add(make_analysis("Milk"))
+    previous = (tmp_path / "report.md").read_text(encoding="utf-8")
+
+    with pytest.raises(RuntimeError):
+        with StreamingReportWriter(str(base)) as report:
+            report.add(make_analysis("Rice"))
+            raise RuntimeError("scraper crashed")
+
+    assert not list(tmp_path.glob("*.part"))
+    assert (tmp_path / "report.md").read_text(encoding="utf-8") == previous
+
+def test_json_report_is_strict_and_cached_sections_carry_no_timestamp(tmp_path):
+    """NaN statistics become null and reused JSON sections hold no stale timestamps."""
+    base = tmp_path / "report"
+    single = make_analysis("Milk")
+    single["price_statistics"]["std_deviation"] = float("nan")
+
+    for timestamp in ("2026-01-01T00:00:00", "2026-01-02T00:00:00"):
+        with StreamingReportWriter(str(base), formats=("json",)) as report:
+            report.add({**single, "analysis_timestamp": timestamp})
+
+    assert report.reused == 1
+    text = (tmp_path / "report.json").read_text(encoding="utf-8")
+    data = json.loads(text, parse_constant=lambda name: pytest.fail(f"non-standard JSON constant {name}"))
+    assert data["products"][0]["price_statistics"]["std_deviation"] is None
+    assert "analysis_timestamp" not in data["products"][0]
+
+def test_unknown_format_is_rejected(tmp_path):
+    """Unsupported formats fail before any file is opened."""
+    with pytest.raises(ValueError):
+        StreamingReportWriter(str(tmp_path / "report"), formats=("pdf",))
+
+    assert not list(tmp_path.glob("*.part"))
@@ -0,0 +1,113 @@
+"""
+Tests for bulk repricing: vectorized price rules, store diff, batching and dry runs.
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pytest
+
+from agents.price_monitor.repricer import RepricingEngine, compute_prices, run_repricer
+
+class StoreHandler(BaseHTTPRequestHandler):
+    requests_seen = []
+    fail_next = 0
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        cls = type(self)
+        if cls.fail_next:
+            cls.fail_next -= 1
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        cls.requests_seen.append((self.path, self.headers["Idempotency-Key"], body))
+        payload = json.dumps({"ok": True}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def store():
+    StoreHandler.requests_seen = []
+    StoreHandler.fail_next = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StoreHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+def price_change(product, new_value):
+    return {"product": product, "change_type": "price", "old_value": None, "new_value": new_value}
+
+def test_compute_prices_applies_guard_rails():
+    competitor = np.array([100.0, 100.0, 100.0, 100.0])
+    costs = np.array([np.nan, 98.0, np.nan, np.nan])
+    floors = np.array([np.nan, np.nan, 97.0, np.nan])
+    ceilings = np.array([np.nan, np.nan, np.nan, 90.0])
+    prices = compute_prices(competitor, 5, costs, min_margin_pct=2, floors=floors, ceilings=ceilings)
+    assert prices.tolist() == [95.0, 99.96, 97.0, 90.0]
+
+def test_only_real_changes_are_pushed_in_batches(store):
+    engine = RepricingEngine(f"{store}/price", "key", batch_endpoint=f"{store}/prices/batch", batch_size=2)
+    changes = [price_change(f"SKU{i}", 100 + i) for i in range(5)] + [{"product": "Tea", "change_type": "stock"}]
+    # SKU0 already sells at the computed price
+    catalog = {"SKU0": {"price": 95.0}}
+
+    results = engine.push(engine.plan(changes, margin_pct=5, catalog=catalog))
+
+    statuses = {r["product"]: r["status"] for r in results}
+    assert statuses == {"SKU0": "unchanged", "SKU1": "success", "SKU2": "success",
+                        "SKU3": "success", "SKU4": "success"}
+    assert sorted(len(body["updates"]) for _, _, body in StoreHandler.requests_seen) == [2, 2]
+    assert all(path == "/prices/batch" for path, _, _ in StoreHandler.requests_seen)
+    assert all(key == body["idempotency_key"] for _, key, body in StoreHandler.requests_seen)
+
+    # Pushed prices are remembered, so the same changes are a no-op next time
+    StoreHandler.requests_seen = []
+    again = engine.push(engine.plan(changes, margin_pct=5, catalog=catalog))
+    assert {r["status"] for r in again} == {"unchanged"}
+    assert StoreHandler.requests_seen == []
+
+def test_retry_reuses_idempotency_key(store):
+    StoreHandler.fail_next = 1
+    engine = RepricingEngine(f"{store}/price", "key")
+    plan = engine.plan([price_change("Egg", 150)], margin_pct=0)
+    results = engine.push(plan)
+
+    assert results[0]["status"] == "success"
+    assert len(StoreHandler.requests_seen) == 1
+    assert StoreHandler.requests_seen[0][1] == RepricingEngine.idempotency_key(
+        [{"product_name": "Egg", "new_price": 150.0}], plan.nonce)
+
+def test_returning_to_an_earlier_price_gets_a_new_key(store):
+    """A -> B -> A is three updates, not a replay of the first."""
+    engine = RepricingEngine(f"{store}/price", "key")
+    for competitor_price in (150, 160, 150):
+        engine.push(engine.plan([price_change("Egg", competitor_price)], margin_pct=0))
+
+    keys = [key for _, key, _ in StoreHandler.requests_seen]
+    assert len(keys) == 3
+    assert len(set(keys)) == 3
+
+def test_dry_run_reports_without_pushing(store):
+    engine = RepricingEngine(f"{store}/price", "key")
+    changes = [price_change("Egg", 150), price_change("Milk", "n/a"), price_change("Rice", 80)]
+    results = run_repricer(changes, 10, f"{store}/price", "key", dry_run=True,
+                           catalog={"Rice": {"price": 72.0}, "Egg": {"price": 140.0}}, engine=engine)
+
+    report = results[0]["report"]
+    assert results[0]["status"] == "dry_run"
+    assert report["to_update"] == 1 and report["unchanged"] == 1
+    assert report["changes"] == [{"product": "Egg", "competitor_price": 150.0, "current_price": 140.0,
+                                  "new_price": 135.0, "delta": -5.0}]
+    assert list(report["invalid"]) == ["Milk"]
+    assert StoreHandler.requests_seen == []
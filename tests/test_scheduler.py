@@ -0,0 +1,73 @@
+"""
+Tests for SmartScheduler execution policy and run metrics.
+"""
+
+import threading
+from unittest.mock import patch
+
+from apscheduler.events import EVENT_JOB_MAX_INSTANCES
+
+from agents.data_collection.scheduler import SmartScheduler
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+CONFIG = {
+    "jobs": [],
+    "retry_limit": 3,
+    "backoff_base": 5,
+    "execution": {"max_workers": 2, "jitter_seconds": 0}
+}
+
+def test_execution_defaults_applied():
+    with patch("agents.data_collection.scheduler.SmartScheduler._load_config", return_value=CONFIG):
+        scheduler = SmartScheduler("dummy_path")
+        scheduler.add_collection_job("daraz", "dairy", {"type": "interval", "params": {"minutes": 5}})
+        scheduler.start()
+        try:
+            job = scheduler.scheduler.get_job("daraz_dairy")
+            assert job.max_instances == 1
+            assert job.coalesce is True
+            assert job.misfire_grace_time == 300
+        finally:
+            scheduler.stop()
+
+def test_slow_job_is_skipped_not_overlapped():
+    """A run that is still going when the next one is due causes a skip."""
+    clock = FakeClock()
+    started, release, skipped = threading.Event(), threading.Event(), threading.Event()
+    running = []
+    overlaps = []
+
+    def slow_collect(competitor, category):
+        if running:
+            overlaps.append(category)
+        running.append(category)
+        started.set()
+        # Held until the scheduler has skipped a due run; the fake clock gives the duration
+        release.wait(5)
+        clock.now += 90
+        running.pop()
+
+    with patch("agents.data_collection.scheduler.SmartScheduler._load_config", return_value=CONFIG), \
+         patch.object(SmartScheduler, "_collect", side_effect=slow_collect):
+        scheduler = SmartScheduler("dummy_path", clock=clock)
+        scheduler.scheduler.add_listener(lambda event: skipped.set(), EVENT_JOB_MAX_INSTANCES)
+        scheduler.add_collection_job("daraz", "dairy", {"type": "interval", "params": {"seconds": 0.05}})
+        scheduler.start()
+        try:
+            assert started.wait(5)
+            assert skipped.wait(5)
+        finally:
+            release.set()
+            scheduler.stop()
+
+    metrics = scheduler.get_metrics()["daraz_dairy"]
+    assert overlaps == []
+    assert metrics["skipped_overlap"] >= 1
+    assert metrics["runs"] >= 1
+    assert metrics["max_duration_seconds"] == 90
@@ -0,0 +1,195 @@
+"""
+Tests for structured-data product extraction.
+"""
+
+import json
+
+from agents.data_collection.browser import SiteProfile
+from agents.data_collection.structured_data import (
+    extract_embedded_state,
+    extract_json_ld,
+    extract_listing_products,
+    extract_opengraph,
+    extract_structured_products
+)
+from agents.data_collection.competitors import daraz
+
+BASE_URL = "https://www.example.com.bd"
+
+def json_ld_page(data) -> str:
+    """Wrap a JSON-LD payload in a minimal HTML page."""
+    return f'<html><head><script type="application/ld+json">{json.dumps(data)}</script></head></html>'
+
+def test_extract_json_ld_item_list():
+    """ItemList and @graph wrappers are unpacked to Product nodes."""
+    html = json_ld_page({
+        "@context": "https://schema.org",
+        "@graph": [{
+            "@type": "ItemList",
+            "itemListElement": [
+                {"@type": "ListItem", "item": {
+                    "@type": "Product", "name": "Pran Milk 1L", "url": "/p/1",
+                    "offers": {"@type": "Offer", "price": "95.00", "priceCurrency": "BDT",
+                               "availability": "https://schema.org/InStock"}
+                }},
+                {"@type": "ListItem", "item": {
+                    "@type": "Product", "name": "Danish Butter 200g",
+                    "brand": {"@type": "Brand", "name": "Danish"},
+                    "offers": [{"@type": "Offer", "price": 1250,
+                                "availability": "https://schema.org/OutOfStock"}]
+                }}
+            ]
+        }]
+    })
+
+    items = extract_json_ld(html)
+
+    assert [item["name"] for item in items] == ["Pran Milk 1L", "Danish Butter 200g"]
+    assert items[1]["brand"] == "Danish"
+
+def test_extract_opengraph_product_meta():
+    """OpenGraph product:price tags yield a single product."""
+    html = (
+        '<meta property="og:title" content="Fresh Sugar 1kg">'
+        '<meta content="120" property="product:price:amount">'
+        '<meta property="product:price:currency" content="BDT">'
+    )
+
+    items = extract_opengraph(html)
+
+    assert items == [{"name": "Fresh Sugar 1kg", "price": "120", "currency": "BDT",
+                      "availability": None, "url": None, "brand": None}]
+    assert extract_opengraph('<meta property="og:title" content="No price">') == []
+
+def test_extract_embedded_state_page_data():
+    """Product-like objects are found inside window.pageData assignments."""
+    state = {"mods": {"listItems": [
+        {"name": "Igloo Ice Cream 1L", "price": "350.00", "productUrl": "//www.daraz.com.bd/p/9",
+         "inStock": False},
+        {"name": "Pran Juice 250ml", "price": "30", "productUrl": "/p/10"}
+    ]}}
+    html = f"<script>window.pageData = {json.dumps(state)};</script>"
+
+    items = extract_embedded_state(html)
+
+    assert {item["name"] for item in items} == {"Igloo Ice Cream 1L", "Pran Juice 250ml"}
+
+def test_extract_structured_products_normalizes_fields():
+    """Prices are parsed, URLs resolved and availability mapped to in_stock."""
+    html = json_ld_page({"@type": "Product", "name": "Milk Vita 500ml", "url": "/p/7",
+                         "offers": {"price": "1,050.50",
+                                    "availability": "https://schema.org/OutOfStock"}})
+
+    items = extract_structured_products(html, BASE_URL)
+
+    assert items == [{
+        "name": "Milk Vita 500ml",
+        "price": 1050.5,
+        "currency": "BDT",
+        "in_stock": False,
+        "url": "https://www.example.com.bd/p/7",
+        "promotion": None,
+        "brand": None
+    }]
+
+def test_extract_structured_products_prefers_past_strategy():
+    """The strategy that worked last time is tried first and recorded."""
+    profile = SiteProfile(name="test")
+    html = (
+        '<meta property="og:title" content="From OpenGraph">'
+        '<meta property="product:price:amount" content="10">'
+        '<script>window.__INITIAL_STATE__ = {"product": {"name": "From state", "price": 20}};</script>'
+    )
+
+    assert extract_structured_products(html, BASE_URL, profile)[0]["name"] == "From OpenGraph"
+    assert profile.strategy_hits == {"opengraph": 1}
+
+    profile.strategy_hits["embedded_state"] = 5
+    assert extract_structured_products(html, BASE_URL, profile)[0]["name"] == "From state"
+    assert profile.strategy_hits["embedded_state"] == 6
+
+def test_extract_structured_products_skips_invalid():
+    """Malformed JSON and items without a usable price are ignored."""
+    html = (
+        '<script type="application/ld+json">{not json</script>'
+        + json_ld_page({"@type": "Product", "name": "Free sample", "offers": {"price": "0"}})
+    )
+
+    assert extract_structured_products(html, BASE_URL) == []
+
+def test_competitor_extract_products_falls_back_to_dom():
+    """Pages without structured data are parsed from the product grid."""
+    html = """
+    <div class="product-card">
+        <a class="product-link" href="/p/5"><span class="product-title">Pran Chanachur 150g</span></a>
+        <span class="product-price">৳ 45</span>
+    </div>
+    """
+
+    products = daraz.extract_products(html, "snacks")
+
+    assert len(products) == 1
+    assert products[0]["price"] == 45.0
+    assert products[0]["brand"] == "Pran"
+    assert daraz.get_site_profile("daraz").strategy_hits.get("dom", 0) >= 1
+
+def test_competitor_extract_products_uses_structured_data():
+    """Structured items get the competitor's category, unit and brand fields."""
+    html = json_ld_page({"@type": "Product", "name": "Fresh Milk 1L", "url": "/p/1",
+                         "offers": {"price": "90"}})
+
+    products = daraz.extract_products(html, "dairy")
+
+    assert products[0]["competitor"] == "daraz"
+    assert products[0]["category"] == "dairy"
+    assert products[0]["unit"] == "1L"
+    assert products[0]["brand"] == "Fresh"
+    assert products[0]["url"] == "https://www.daraz.com.bd/p/1"
+
+def test_competitor_extract_products_keeps_grid_over_lone_structured_item():
+    """A single OpenGraph product on a listing page does not replace the product grid."""
+    cards = "".join(f"""
+    <div class="product-card">
+        <a class="product-link" href="/p/{i}"><span class="product-title">Pran Chanachur {i}</span></a>
+        <span class="product-price">৳ {40 + i}</span>
+    </div>""" for i in range(5))
+    html = ('<meta property="og:title" content="Snacks category">'
+            '<meta property="product:price:amount" content="10">' + cards)
+    profile = daraz.get_site_profile("daraz")
+    before = profile.strategy_hits.get("opengraph", 0)
+
+    products = daraz.extract_products(html, "snacks")
+
+    assert [p["name"] for p in products] == [f"Pran Chanachur {i}" for i in range(5)]
+    assert profile.strategy_hits.get("opengraph", 0) == before
+
+def test_listing_covered_by_structured_data_skips_grid_parse():
+    """When JSON-LD covers the counted cards the DOM parser is never run."""
+    cards = "".join(f'<div class="product-card">Item {i}</div>' for i in range(3))
+    html = json_ld_page({"@type": "ItemList", "itemListElement": [
+        {"@type": "ListItem", "item": {"@type": "Product", "name": f"Item {i}", "offers": {"price": 10 + i}}}
+        for i in range(3)
+    ]}).replace("</html>", cards + "<footer></footer></html>")
+
+    def parse_dom(html, category):
+        raise AssertionError("grid should not be parsed")
+
+    products = extract_listing_products(html, "snacks", "daraz", BASE_URL, parse_dom,
+                                        lambda name: None, lambda name: None,
+                                        card_marker=daraz.GRID_START, grid_end=daraz.GRID_END)
+
+    assert [p["name"] for p in products] == ["Item 0", "Item 1", "Item 2"]
+
+def test_extract_structured_products_min_items():
+    """Strategies yielding fewer products than required are skipped."""
+    html = json_ld_page({"@type": "Product", "name": "Lone item", "offers": {"price": "10"}})
+
+    assert extract_structured_products(html, BASE_URL, min_items=2) == []
+    assert len(extract_structured_products(html, BASE_URL, min_items=1)) == 1
+
+def test_extract_embedded_state_walks_breadth_first():
+    """Shallow product objects are found before deeply nested ones."""
+    html = ('<script>window.__INITIAL_STATE__ = {"deep": {"a": {"b": {"name": "Deep", "price": 1}}}, '
+            '"items": [{"name": "Shallow", "price": 2}]};</script>')
+
+    assert [item["name"] for item in extract_embedded_state(html)] == ["Shallow", "Deep"]